@@ -1,7 +1,7 @@
 from django import forms
 from .models import EmpresaRegistrada
+from django.contrib.auth.hashers import make_password
 from django.core.exceptions import ValidationError
-import hashlib
 
 class EmpresaRegistroSimpleForm(forms.ModelForm):
     """Formulario simplificado para registro de empresas"""
@@ -65,7 +65,7 @@ class EmpresaRegistroSimpleForm(forms.ModelForm):
         # Generar username automáticamente a partir del NIT
         empresa.username = f"empresa_{self.cleaned_data['nit']}"
         # Hash de la contraseña
-        empresa.password = hashlib.sha256(self.cleaned_data['password'].encode()).hexdigest()
+        empresa.password = make_password(self.cleaned_data['password'])
         
         if commit:
             empresa.save()
@@ -147,7 +147,7 @@ class EmpresaRegistroForm(forms.ModelForm):
     def save(self, commit=True):
         empresa = super().save(commit=False)
         # Hash de la contraseña
-        empresa.password = hashlib.sha256(self.cleaned_data['password'].encode()).hexdigest()
+        empresa.password = make_password(self.cleaned_data['password'])
         
         if commit:
             empresa.save()
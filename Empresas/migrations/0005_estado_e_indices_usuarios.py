@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Empresas', '0004_empresaregistrada_two_factor_secret'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='empresaregistrada',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Último cambio de estado'),
+        ),
+        migrations.AddIndex(
+            model_name='empresaregistrada',
+            index=models.Index(fields=['is_active', 'fecha_registro'], name='empresa_estado_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='empresaregistrada',
+            index=models.Index(fields=['fecha_registro'], name='empresa_registro_idx'),
+        ),
+    ]
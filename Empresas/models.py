@@ -42,6 +42,7 @@ class EmpresaRegistrada(models.Model):
     # Control y estado
     fecha_registro = models.DateTimeField(default=timezone.now, verbose_name="Fecha de Registro")
     is_active = models.BooleanField(default=True, verbose_name="Activo")
+    status_changed_at = models.DateTimeField(blank=True, null=True, verbose_name="Último cambio de estado")
     is_verified = models.BooleanField(default=False, verbose_name="Verificado")
     last_login = models.DateTimeField(blank=True, null=True, verbose_name="Último Acceso")
     
@@ -57,6 +58,11 @@ class EmpresaRegistrada(models.Model):
         verbose_name = "Empresa Registrada"
         verbose_name_plural = "Empresas Registradas"
         ordering = ['-fecha_registro']
+        indexes = [
+            # Listado paginado de gestión de usuarios (views_usuarios.py): filtro por estado y orden
+            models.Index(fields=['is_active', 'fecha_registro'], name='empresa_estado_registro_idx'),
+            models.Index(fields=['fecha_registro'], name='empresa_registro_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre_empresa} - {self.nit}"
@@ -0,0 +1,445 @@
+let ideaIdParaRechazar = null;
+let usuarioIdActual = null;
+let telefonoUsuarioActual = null;
+
+// Ver ideas de un usuario
+function verIdeasUsuario(usuarioId, nombreUsuario) {
+    usuarioIdActual = usuarioId;
+    document.getElementById('nombreUsuario').textContent = nombreUsuario;
+    
+    fetch(`/obtener-ideas-usuario/${usuarioId}/`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Guardar el teléfono del usuario
+                telefonoUsuarioActual = data.usuario.telefono;
+                mostrarIdeas(data.ideas);
+                document.getElementById('modalIdeasUsuario').style.display = 'block';
+            } else {
+                alert('Error: ' + data.error);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al cargar las ideas');
+        });
+}
+
+// Mostrar ideas en el modal
+function mostrarIdeas(ideas) {
+    const lista = document.getElementById('listaIdeas');
+    
+    if (ideas.length === 0) {
+        lista.innerHTML = '<div class="no-datos">Este usuario no tiene ideas registradas.</div>';
+        return;
+    }
+    
+    lista.innerHTML = ideas.map(idea => {
+        let botones = '';
+        
+        // Botones según el estado
+        if (idea.estado === 'pendiente') {
+            botones = `
+                <button class="btn-small btn-aceptar" onclick="aceptarIdea(${idea.id})">
+                    Aceptar
+                </button>
+                <button class="btn-small btn-rechazar" onclick="abrirModalRechazo(${idea.id})">
+                    Rechazar
+                </button>
+                <button class="btn-small btn-info" onclick='verDetallesIdea(${idea.id}, "${idea.titulo.replace(/"/g, '&quot;')}", "${(idea.descripcion || "Sin descripción").replace(/"/g, "&quot;")}", ${idea.tiene_imagen}, ${idea.tiene_modelo_3d})'>
+                    Ver Detalles
+                </button>
+            `;
+        } else if (idea.estado === 'en_proceso') {
+            botones = `
+                <button class="btn-small btn-completar" onclick="completarIdea(${idea.id})">
+                    Completar
+                </button>
+                <button class="btn-small btn-contactar" onclick="contactarUsuario(${idea.id})">
+                    Contactar Usuario
+                </button>
+                <button class="btn-small btn-info" onclick="verDetallesIdea(${idea.id}, '${idea.titulo}', '${(idea.descripcion || 'Sin descripción').replace(/'/g, "\\'")}')">
+                    Ver Detalles
+                </button>
+            `;
+        } else if (idea.estado === 'completada') {
+            botones = `
+                <button class="btn-small btn-finalizar" onclick="finalizarIdea(${idea.id})">
+                    Finalizar
+                </button>
+                <button class="btn-small btn-contactar" onclick="contactarUsuario(${idea.id})">
+                    Contactar Usuario
+                </button>
+                <button class="btn-small btn-info" onclick="verDetallesIdea(${idea.id}, '${idea.titulo}', '${(idea.descripcion || 'Sin descripción').replace(/'/g, "\\'")}')">
+                    Ver Detalles
+                </button>
+            `;
+        } else if (idea.estado === 'finalizada') {
+            if (!idea.permiso_publicacion) {
+                botones = `
+                    <button class="btn-small btn-solicitar-permiso" onclick="solicitarPermiso(${idea.id})">
+                        Solicitar Permiso
+                    </button>
+                `;
+            } else if (!idea.publicada_como_producto) {
+                botones = `
+                    <button class="btn-small btn-publicar" onclick="publicarComoProducto(${idea.id})">
+                        Publicar como Producto
+                    </button>
+                `;
+            } else {
+                botones = '<p style="color: #10b981; font-weight: 600;">✓ Ya publicada como producto</p>';
+            }
+            botones += `
+                <button class="btn-small btn-contactar" onclick="contactarUsuario(${idea.id})">
+                    Contactar Usuario
+                </button>
+                <button class="btn-small btn-info" onclick="verDetallesIdea(${idea.id}, '${idea.titulo}', '${(idea.descripcion || 'Sin descripción').replace(/'/g, "\\'")}')">
+                    Ver Detalles
+                </button>
+            `;
+        } else if (idea.estado === 'rechazada') {
+            botones = `
+                <button class="btn-small btn-contactar" onclick="contactarUsuario(${idea.id})">
+                    Contactar Usuario
+                </button>
+                <button class="btn-small btn-info" onclick="verDetallesIdea(${idea.id}, '${idea.titulo}', '${(idea.descripcion || 'Sin descripción').replace(/'/g, "\\'")}')">
+                    Ver Detalles
+                </button>
+                <p style="color: #ef4444; font-weight: 600; margin-top: 10px;">✗ Idea rechazada</p>
+            `;
+        }
+        
+        const estadoClass = 'badge-' + idea.estado;
+        const estadoTexto = idea.estado.replace('_', ' ').replace(/\b\w/g, l => l.toUpperCase());
+        
+        return `
+            <div class="idea-card">
+                <div class="idea-header">
+                    <h3>${idea.titulo}</h3>
+                    <span class="badge-estado ${estadoClass}">${estadoTexto}</span>
+                </div>
+                <div class="idea-info">
+                    ${idea.miniatura_modelo_3d ? `<img class="idea-miniatura-3d" src="${idea.miniatura_modelo_3d}" loading="lazy" alt="Vista previa del modelo 3D">` : ''}
+                    <p><strong>Fecha:</strong> ${idea.fecha_creacion}</p>
+                    ${idea.empresa_asignada ? `<p><strong>Empresa asignada:</strong> ${idea.empresa_asignada}</p>` : ''}
+                    ${idea.permiso_publicacion ? '<p style="color: #10b981;">✓ Permiso de publicación otorgado</p>' : ''}
+                </div>
+                <div class="idea-actions">
+                    ${botones}
+                </div>
+            </div>
+        `;
+    }).join('');
+}
+
+// Abrir modal de rechazo
+function abrirModalRechazo(ideaId) {
+    ideaIdParaRechazar = ideaId;
+    document.getElementById('motivoRechazo').value = '';
+    document.getElementById('modalRechazoIdea').style.display = 'block';
+}
+
+// Cerrar modal de rechazo
+function cerrarModalRechazo() {
+    ideaIdParaRechazar = null;
+    document.getElementById('modalRechazoIdea').style.display = 'none';
+}
+
+// Enviar rechazo
+document.getElementById('formRechazoIdea').addEventListener('submit', function(e) {
+    e.preventDefault();
+    
+    if (!ideaIdParaRechazar) return;
+    
+    const motivo = document.getElementById('motivoRechazo').value.trim();
+    
+    if (!motivo) {
+        alert('Debes escribir un motivo de rechazo');
+        return;
+    }
+    
+    const formData = new FormData();
+    formData.append('motivo', motivo);
+    formData.append('csrfmiddlewaretoken', document.querySelector('[name=csrfmiddlewaretoken]').value);
+    
+    fetch(`/rechazar-idea/${ideaIdParaRechazar}/`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Idea rechazada y notificación enviada al usuario');
+            cerrarModalRechazo();
+            // Recargar las ideas del usuario actual
+            if (usuarioIdActual) {
+                const nombreUsuario = document.getElementById('nombreUsuario').textContent;
+                verIdeasUsuario(usuarioIdActual, nombreUsuario);
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al rechazar la idea');
+    });
+});
+
+// Aceptar idea
+function aceptarIdea(ideaId) {
+    if (!confirm('¿Estás seguro de aceptar esta idea?')) return;
+    
+    const formData = new FormData();
+    formData.append('csrfmiddlewaretoken', document.querySelector('[name=csrfmiddlewaretoken]').value);
+    
+    fetch(`/aceptar-idea/${ideaId}/`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Idea aceptada exitosamente');
+            // Recargar las ideas del usuario actual
+            if (usuarioIdActual) {
+                const nombreUsuario = document.getElementById('nombreUsuario').textContent;
+                verIdeasUsuario(usuarioIdActual, nombreUsuario);
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al aceptar la idea');
+    });
+}
+
+// Completar idea
+function completarIdea(ideaId) {
+    if (!confirm('¿Marcar esta idea como completada?')) return;
+    
+    const formData = new FormData();
+    formData.append('csrfmiddlewaretoken', document.querySelector('[name=csrfmiddlewaretoken]').value);
+    
+    fetch(`/completar-idea/${ideaId}/`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Idea completada exitosamente');
+            // Recargar las ideas del usuario actual
+            if (usuarioIdActual) {
+                const nombreUsuario = document.getElementById('nombreUsuario').textContent;
+                verIdeasUsuario(usuarioIdActual, nombreUsuario);
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al completar la idea');
+    });
+}
+
+// Finalizar idea
+function finalizarIdea(ideaId) {
+    if (!confirm('¿Finalizar esta idea?')) return;
+    
+    const formData = new FormData();
+    formData.append('csrfmiddlewaretoken', document.querySelector('[name=csrfmiddlewaretoken]').value);
+    
+    fetch(`/finalizar-idea/${ideaId}/`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Idea finalizada exitosamente');
+            // Recargar las ideas del usuario actual
+            if (usuarioIdActual) {
+                const nombreUsuario = document.getElementById('nombreUsuario').textContent;
+                verIdeasUsuario(usuarioIdActual, nombreUsuario);
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al finalizar la idea');
+    });
+}
+
+// Ver detalles de la idea
+function verDetallesIdea(ideaId, titulo, descripcion, tieneImagen, tieneModelo3D) {
+    // Contenedores de media
+    const mediaContainer = document.getElementById('detallesMediaContainer');
+    const imagenContainer = document.getElementById('detallesImagenContainer');
+    const modelo3DContainer = document.getElementById('detallesModelo3DContainer');
+    const medidasContainer = document.getElementById('detallesMedidasContainer');
+    
+    // Resetear displays
+    mediaContainer.style.display = 'none';
+    imagenContainer.style.display = 'none';
+    modelo3DContainer.style.display = 'none';
+    medidasContainer.style.display = 'none';
+    
+    // Cargar datos completos de la idea
+    fetch(`/obtener-detalle-idea/${ideaId}/`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                // Mostrar datos básicos
+                document.getElementById('detallesTitulo').textContent = data.titulo;
+                document.getElementById('detallesDescripcion').textContent = data.descripcion;
+                document.getElementById('detallesCategoria').textContent = data.categoria;
+                document.getElementById('detallesEstado').textContent = data.estado;
+                document.getElementById('detallesAutor').textContent = data.autor;
+                document.getElementById('detallesFecha').textContent = data.fecha_creacion;
+                document.getElementById('detallesEmpresa').textContent = data.empresa_asignada;
+                
+                // Mostrar medidas personalizadas si existen
+                if (data.medidas && Object.keys(data.medidas).length > 0) {
+                    const medidasDiv = document.getElementById('detallesMedidas');
+                    let medidasHTML = '<ul style="margin: 0; padding-left: 20px;">';
+                    for (const [key, value] of Object.entries(data.medidas)) {
+                        medidasHTML += `<li><strong>${key}:</strong> ${value}</li>`;
+                    }
+                    medidasHTML += '</ul>';
+                    medidasDiv.innerHTML = medidasHTML;
+                    medidasContainer.style.display = 'block';
+                }
+                
+                // Mostrar imagen si existe
+                if (tieneImagen && data.imagen_url) {
+                    const imgElement = document.getElementById('detallesImagen');
+                    imgElement.src = data.imagen_url;
+                    imagenContainer.style.display = 'block';
+                    mediaContainer.style.display = 'block';
+                }
+                
+                // Mostrar modelo 3D si existe: primero la miniatura; la malla se descarga al pedirla
+                if (tieneModelo3D && data.modelo_3d_url) {
+                    const modelViewer = document.getElementById('detallesModelo3D');
+                    const botonCargar = document.getElementById('detallesCargarModelo3D');
+                    modelViewer.poster = data.modelo_3d_miniatura_url || '';
+                    botonCargar.style.display = 'inline-block';
+                    botonCargar.onclick = function() {
+                        // La vista previa (pocos polígonos) si ya está lista; si no, el modelo original
+                        modelViewer.src = data.modelo_3d_preview_url || data.modelo_3d_url;
+                        botonCargar.style.display = 'none';
+                    };
+                    document.getElementById('detallesModeloCompleto').href = `/idea/modelo3d/${ideaId}/`;
+                    document.getElementById('detallesModelo3DInfo').innerHTML = infoModelo3D(data.modelo_3d_estado, data.modelo_3d_info);
+                    modelo3DContainer.style.display = 'block';
+                    mediaContainer.style.display = 'block';
+                }
+            }
+        })
+        .catch(error => console.error('Error al cargar detalles:', error));
+    
+    document.getElementById('modalDetallesIdea').style.display = 'block';
+}
+
+// Dimensiones y avisos del modelo 3D procesado
+function infoModelo3D(estado, info) {
+    if (estado === 'pendiente' || estado === 'procesando') {
+        return '<p>Procesando el modelo 3D...</p>';
+    }
+    if (estado === 'error') {
+        return `<p style="color: #ef4444;">No se pudo procesar el modelo: ${info ? info.error : ''}</p>`;
+    }
+    if (!info || estado !== 'listo') {
+        return '';
+    }
+    let html = `<p><strong>Dimensiones:</strong> ${info.ancho_cm} x ${info.alto_cm} x ${info.profundidad_cm} cm (ancho x alto x profundidad)</p>`;
+    if (info.avisos_medidas && info.avisos_medidas.length > 0) {
+        html += '<ul style="color: #d97706; text-align: left;">' + info.avisos_medidas.map(aviso => `<li>${aviso}</li>`).join('') + '</ul>';
+    }
+    return html;
+}
+
+// Cerrar modal de detalles
+function cerrarModalDetalles() {
+    document.getElementById('modalDetallesIdea').style.display = 'none';
+    // Limpiar el src del modelo 3D para detener la carga
+    const modelViewer = document.getElementById('detallesModelo3D');
+    if (modelViewer) {
+        modelViewer.removeAttribute('src');
+        modelViewer.poster = '';
+    }
+}
+
+// Contactar usuario (abre WhatsApp con el número del usuario)
+function contactarUsuario(ideaId) {
+    if (telefonoUsuarioActual) {
+        // Limpiar el número de teléfono (remover espacios, guiones, etc.)
+        const numeroLimpio = telefonoUsuarioActual.replace(/[^0-9]/g, '');
+        // Abrir WhatsApp Web en una nueva pestaña
+        window.open(`https://wa.me/+57${numeroLimpio}`, '_blank');
+    } else {
+        alert('El usuario no tiene un número de teléfono registrado');
+    }
+}
+
+// Solicitar permiso de publicación
+function solicitarPermiso(ideaId) {
+    const mensaje = prompt('Escribe tu solicitud de permiso al usuario:');
+    if (!mensaje) return;
+    
+    const formData = new FormData();
+    formData.append('mensaje', mensaje);
+    formData.append('csrfmiddlewaretoken', document.querySelector('[name=csrfmiddlewaretoken]').value);
+    
+    fetch(`/solicitar-permiso-publicacion/${ideaId}/`, {
+        method: 'POST',
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            alert('Solicitud enviada al usuario');
+            // Recargar las ideas del usuario actual
+            if (usuarioIdActual) {
+                const nombreUsuario = document.getElementById('nombreUsuario').textContent;
+                verIdeasUsuario(usuarioIdActual, nombreUsuario);
+            }
+        } else {
+            alert('Error: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Error al enviar solicitud');
+    });
+}
+
+// Publicar como producto
+function publicarComoProducto(ideaId) {
+    window.location.href = `/publicar-idea-producto/${ideaId}/`;
+}
+
+// Cerrar modal de ideas
+function cerrarModalIdeas() {
+    document.getElementById('modalIdeasUsuario').style.display = 'none';
+}
+
+// Cerrar modales al hacer clic fuera
+window.onclick = function(event) {
+    const modalIdeas = document.getElementById('modalIdeasUsuario');
+    const modalRechazo = document.getElementById('modalRechazoIdea');
+    
+    if (event.target === modalIdeas) {
+        cerrarModalIdeas();
+    }
+    if (event.target === modalRechazo) {
+        cerrarModalRechazo();
+    }
+}
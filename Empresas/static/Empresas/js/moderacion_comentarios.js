@@ -0,0 +1,116 @@
+// Cola de moderación de comentarios: los pendientes se cargan por páginas desde
+// /api/comentarios/moderacion/ (en orden de id) y se aprueban o rechazan en lote.
+document.addEventListener('DOMContentLoaded', function() {
+    const contenedor = document.getElementById('colaModeracion');
+    const lista = document.getElementById('listaPendientes');
+    const cargarMas = document.getElementById('cargarMasPendientes');
+    const seleccionarTodos = document.getElementById('seleccionarPendientes');
+    const POR_PAGINA = 50;
+    // id del último comentario recibido: la página siguiente empieza después de él
+    let siguiente = 0;
+
+    function csrfToken() {
+        return contenedor.querySelector('[name=csrfmiddlewaretoken]').value;
+    }
+
+    function escaparHtml(texto) {
+        const reemplazos = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+        return (texto == null ? '' : String(texto)).replace(/[&<>"']/g, caracter => reemplazos[caracter]);
+    }
+
+    function tarjetaComentario(comentario) {
+        const tarjeta = document.createElement('div');
+        tarjeta.className = 'pedido-card';
+        tarjeta.dataset.id = comentario.id;
+        const fecha = new Date(comentario.fecha_creacion).toLocaleDateString('es-CO');
+        tarjeta.innerHTML = `
+            <div class="pedido-header">
+                <label><input type="checkbox" class="seleccion-comentario" value="${comentario.id}"> Comentario #${comentario.id}</label>
+                <span class="badge-estado badge-pendiente">Spam: ${comentario.puntuacion_spam}/100</span>
+            </div>
+            <div class="pedido-info">
+                <div class="info-item">
+                    <span class="info-label">Cliente</span>
+                    <span class="info-value">${escaparHtml(comentario.usuario)}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">Fecha</span>
+                    <span class="info-value">${fecha}</span>
+                </div>
+            </div>
+            <p style="margin: 10px 0 0 0;">${escaparHtml(comentario.contenido)}</p>`;
+        return tarjeta;
+    }
+
+    function cargarPendientes(desdeInicio) {
+        if (desdeInicio) {
+            siguiente = 0;
+        }
+        const parametros = new URLSearchParams({despues: siguiente, limite: POR_PAGINA});
+        fetch(`${contenedor.dataset.api}?${parametros}`)
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    alert(data.error || 'Error al cargar la cola de moderación');
+                    return;
+                }
+                const tarjetas = data.comentarios.map(tarjetaComentario);
+                if (desdeInicio) {
+                    lista.replaceChildren(...tarjetas);
+                    seleccionarTodos.checked = false;
+                } else {
+                    lista.append(...tarjetas);
+                }
+                if (!lista.children.length) {
+                    lista.innerHTML = '<div class="no-datos">No hay comentarios pendientes.</div>';
+                }
+                document.getElementById('totalPendientes').textContent = data.pendientes;
+                siguiente = data.siguiente;
+                cargarMas.style.display = data.siguiente ? 'inline-block' : 'none';
+            })
+            .catch(error => {
+                console.error('Error:', error);
+            });
+    }
+
+    function moderarSeleccionados(accion) {
+        const ids = Array.from(lista.querySelectorAll('.seleccion-comentario:checked')).map(caja => parseInt(caja.value, 10));
+        if (!ids.length) {
+            alert('Selecciona al menos un comentario');
+            return;
+        }
+        if (!confirm(`¿Seguro que quieres ${accion} ${ids.length} comentario(s)?`)) {
+            return;
+        }
+        fetch(contenedor.dataset.apiAcciones, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken(),
+                'X-Requested-With': 'XMLHttpRequest',
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({ids: ids, accion: accion}),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                cargarPendientes(true);
+            } else {
+                alert(data.error || 'Error al moderar los comentarios');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al procesar la solicitud');
+        });
+    }
+
+    seleccionarTodos.addEventListener('change', function() {
+        lista.querySelectorAll('.seleccion-comentario').forEach(caja => { caja.checked = this.checked; });
+    });
+    document.getElementById('aprobarSeleccionados').addEventListener('click', () => moderarSeleccionados('aprobar'));
+    document.getElementById('rechazarSeleccionados').addEventListener('click', () => moderarSeleccionados('rechazar'));
+    cargarMas.addEventListener('click', () => cargarPendientes(false));
+
+    cargarPendientes(true);
+});
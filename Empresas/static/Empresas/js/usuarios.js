@@ -0,0 +1,264 @@
+// Gestión de usuarios: la tabla se carga por páginas desde /api/usuarios/
+// (búsqueda, filtro de estado y orden en el servidor).
+document.addEventListener('DOMContentLoaded', function() {
+    const contenedor = document.getElementById('tablaUsuarios');
+    const cuerpo = document.getElementById('cuerpoUsuarios');
+    const modal = document.getElementById('editModal');
+    const closeBtn = document.getElementsByClassName('close')[0];
+    const editUserForm = document.getElementById('editUserForm');
+    const seleccionarTodos = document.getElementById('seleccionarTodos');
+
+    const estado = {
+        tipo: 'cliente',
+        q: '',
+        estado: '',
+        orden: '-fecha_registro',
+        pagina: 1,
+        paginas: 0,
+        porPagina: contenedor.dataset.porPagina || '50',
+    };
+    let peticionActual = null;
+    let esperaBusqueda = null;
+
+    function csrfToken() {
+        return document.querySelector('[name=csrfmiddlewaretoken]').value;
+    }
+
+    // También escapa comillas: el texto se usa dentro de atributos data-*
+    function escaparHtml(texto) {
+        const reemplazos = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'};
+        return (texto == null ? '' : String(texto)).replace(/[&<>"']/g, caracter => reemplazos[caracter]);
+    }
+
+    function filaUsuario(usuario) {
+        const tr = document.createElement('tr');
+        if (!usuario.is_active) {
+            tr.className = 'usuario-inactivo';
+        }
+        const registro = usuario.fecha_registro ? new Date(usuario.fecha_registro).toLocaleDateString('es-CO') : '';
+        const accion = usuario.is_active
+            ? `<a href="#" class="button disable-user" data-id="${usuario.id}" data-type="${usuario.tipo}">Desactivar</a>`
+            : `<a href="#" class="button enable-user" data-id="${usuario.id}" data-type="${usuario.tipo}">Activar</a>`;
+        tr.innerHTML = `
+            <td><input type="checkbox" class="seleccion-usuario" value="${usuario.id}" aria-label="Seleccionar ${escaparHtml(usuario.username)}"></td>
+            <td>${usuario.tipo === 'cliente' ? 'Cliente' : 'Empresa'}</td>
+            <td>${escaparHtml(usuario.username)}</td>
+            <td>${escaparHtml(usuario.email)}</td>
+            <td>${usuario.is_active ? 'Activo' : 'Inactivo'}</td>
+            <td>${registro}</td>
+            <td class="action-links">
+                <a href="#" class="button edit-user" data-id="${usuario.id}" data-type="${usuario.tipo}"
+                   data-username="${escaparHtml(usuario.username)}" data-email="${escaparHtml(usuario.email)}">Editar</a>
+                ${accion}
+            </td>`;
+        return tr;
+    }
+
+    function actualizarEncabezados() {
+        document.querySelectorAll('th.ordenable').forEach(th => {
+            const campo = th.dataset.orden;
+            th.classList.toggle('orden-asc', estado.orden === campo);
+            th.classList.toggle('orden-desc', estado.orden === '-' + campo);
+        });
+    }
+
+    function cargarUsuarios() {
+        if (peticionActual) {
+            peticionActual.abort();
+        }
+        peticionActual = new AbortController();
+        const parametros = new URLSearchParams({
+            tipo: estado.tipo,
+            q: estado.q,
+            estado: estado.estado,
+            orden: estado.orden,
+            pagina: estado.pagina,
+            por_pagina: estado.porPagina,
+        });
+        fetch(`${contenedor.dataset.api}?${parametros}`, {signal: peticionActual.signal})
+            .then(response => response.json())
+            .then(data => {
+                if (!data.success) {
+                    alert(data.error || 'Error al cargar los usuarios');
+                    return;
+                }
+                estado.paginas = data.paginas;
+                cuerpo.replaceChildren(...data.usuarios.map(filaUsuario));
+                seleccionarTodos.checked = false;
+                document.getElementById('infoPagina').textContent =
+                    data.total ? `Página ${data.pagina} de ${data.paginas} (${data.total} usuarios)` : 'Sin resultados';
+                document.getElementById('paginaAnterior').classList.toggle('deshabilitado', data.pagina <= 1);
+                document.getElementById('paginaSiguiente').classList.toggle('deshabilitado', data.pagina >= data.paginas);
+                actualizarEncabezados();
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error:', error);
+                }
+            });
+    }
+
+    function recargarDesdeInicio() {
+        estado.pagina = 1;
+        cargarUsuarios();
+    }
+
+    function cambiarEstado(ids, tipo, action) {
+        return fetch(contenedor.dataset.apiEstado, {
+            method: 'POST',
+            headers: {
+                'X-CSRFToken': csrfToken(),
+                'X-Requested-With': 'XMLHttpRequest',
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({tipo: tipo, ids: ids, accion: action}),
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                cargarUsuarios();
+            } else {
+                alert(data.error || 'Error al cambiar el estado del usuario');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al procesar la solicitud');
+        });
+    }
+
+    function cambiarSeleccionados(action) {
+        const ids = Array.from(document.querySelectorAll('.seleccion-usuario:checked')).map(caja => parseInt(caja.value, 10));
+        if (!ids.length) {
+            alert('Selecciona al menos un usuario');
+            return;
+        }
+        const verbo = action === 'enable' ? 'activar' : 'desactivar';
+        if (confirm(`¿Estás seguro de que quieres ${verbo} ${ids.length} usuario(s)?`)) {
+            cambiarEstado(ids, estado.tipo, action);
+        }
+    }
+
+    // Filtros, búsqueda y orden
+    document.getElementById('filtroTipo').addEventListener('change', function() {
+        estado.tipo = this.value;
+        recargarDesdeInicio();
+    });
+    document.getElementById('filtroEstado').addEventListener('change', function() {
+        estado.estado = this.value;
+        recargarDesdeInicio();
+    });
+    document.getElementById('filtroBusqueda').addEventListener('input', function() {
+        clearTimeout(esperaBusqueda);
+        // Una sola petición cuando se deja de escribir
+        esperaBusqueda = setTimeout(() => {
+            estado.q = this.value.trim();
+            recargarDesdeInicio();
+        }, 300);
+    });
+    document.querySelectorAll('th.ordenable').forEach(th => {
+        th.addEventListener('click', function() {
+            const campo = this.dataset.orden;
+            estado.orden = estado.orden === campo ? '-' + campo : campo;
+            recargarDesdeInicio();
+        });
+    });
+
+    // Paginación
+    document.getElementById('paginaAnterior').addEventListener('click', function(e) {
+        e.preventDefault();
+        if (estado.pagina > 1) {
+            estado.pagina -= 1;
+            cargarUsuarios();
+        }
+    });
+    document.getElementById('paginaSiguiente').addEventListener('click', function(e) {
+        e.preventDefault();
+        if (estado.pagina < estado.paginas) {
+            estado.pagina += 1;
+            cargarUsuarios();
+        }
+    });
+
+    // Selección y cambios de estado en lote
+    seleccionarTodos.addEventListener('change', function() {
+        document.querySelectorAll('.seleccion-usuario').forEach(caja => { caja.checked = this.checked; });
+    });
+    document.getElementById('activarSeleccionados').addEventListener('click', function(e) {
+        e.preventDefault();
+        cambiarSeleccionados('enable');
+    });
+    document.getElementById('desactivarSeleccionados').addEventListener('click', function(e) {
+        e.preventDefault();
+        cambiarSeleccionados('disable');
+    });
+
+    // Botones de cada fila (las filas se crean dinámicamente)
+    cuerpo.addEventListener('click', function(e) {
+        const boton = e.target.closest('a.button');
+        if (!boton) {
+            return;
+        }
+        e.preventDefault();
+        const userId = parseInt(boton.dataset.id, 10);
+        const userType = boton.dataset.type;
+
+        if (boton.classList.contains('edit-user')) {
+            document.getElementById('userId').value = userId;
+            document.getElementById('userType').value = userType;
+            document.getElementById('username').value = boton.dataset.username;
+            document.getElementById('emailGroup').style.display = 'block';
+            document.getElementById('email').value = boton.dataset.email;
+            // Hacer el email obligatorio solo para clientes
+            document.getElementById('email').required = userType === 'cliente';
+            modal.style.display = 'block';
+            return;
+        }
+
+        if (confirm('¿Estás seguro de que quieres cambiar el estado de este usuario?')) {
+            const action = boton.classList.contains('disable-user') ? 'disable' : 'enable';
+            cambiarEstado([userId], userType, action);
+        }
+    });
+
+    // Cerrar modal
+    closeBtn.onclick = function() {
+        modal.style.display = 'none';
+    };
+
+    window.onclick = function(event) {
+        if (event.target == modal) {
+            modal.style.display = 'none';
+        }
+    };
+
+    // Manejar envío del formulario de edición
+    editUserForm.onsubmit = function(e) {
+        e.preventDefault();
+        const formData = new FormData(this);
+
+        fetch('/update-user/', {
+            method: 'POST',
+            body: formData,
+            headers: {
+                'X-CSRFToken': csrfToken(),
+                'X-Requested-With': 'XMLHttpRequest'
+            },
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.success) {
+                modal.style.display = 'none';
+                cargarUsuarios();
+            } else {
+                alert(data.error || 'Error al actualizar el usuario');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al procesar la solicitud');
+        });
+    };
+
+    cargarUsuarios();
+});
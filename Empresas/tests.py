@@ -1,3 +1,354 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.inventario import evaluar_inventario
+from core.models import (
+    UserClientes, Pago, Factura, Mesas, Sillas, VentaProducto, VentaProductoDiaria, AlertaInventario,
+)
+from core.ventas import mas_vendidos, analisis_inventario, recalcular_ventas
+
+
+class ExportacionContableTests(TestCase):
+    """Pruebas de la exportación en streaming de pagos/pedidos/facturas"""
+
+    def setUp(self):
+        self.cliente = UserClientes.objects.create(usernameCliente='cliente_export', passwordCliente='x')
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+
+    def _crear_pagos(self, cantidad, inicio=0):
+        productos = json.dumps([
+            {'id': 1, 'tipo': 'mesa', 'nombre': 'Mesa Roble', 'precio': '150000', 'cantidad': 2},
+            {'id': 4, 'tipo': 'silla', 'nombre': 'Silla, "clásica"', 'precio': '50000', 'cantidad': 1},
+        ])
+        Pago.objects.bulk_create([
+            Pago(
+                cliente=self.cliente,
+                nombre_completo=f'Cliente {inicio + i}',
+                metodo_pago='nequi',
+                monto_total=Decimal('350000'),
+                comprobante='uploads/comprobantes/prueba.png',
+                productos=productos,
+                estado='confirmado' if i % 2 == 0 else 'pendiente',
+            )
+            for i in range(cantidad)
+        ])
+
+    def _pico_memoria_exportacion(self):
+        response = self.client.get(reverse('exportar_pagos'))
+        self.assertEqual(response.status_code, 200)
+        tracemalloc.start()
+        try:
+            total = sum(len(fragmento) for fragmento in response.streaming_content)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return pico, total
+
+    def test_csv_aplana_productos_y_filtra_por_estado(self):
+        self._crear_pagos(3)
+        response = self.client.get(reverse('exportar_pagos'), {'estado': 'confirmado'})
+        self.assertEqual(response.status_code, 200)
+        contenido = b''.join(response.streaming_content).decode('utf-8-sig')
+        lineas = contenido.strip().splitlines()
+        # 2 pagos confirmados x 2 productos + encabezado
+        self.assertEqual(len(lineas), 5)
+        self.assertIn('"Silla, ""clásica"""', contenido)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(reverse('exportar_pagos'), {'desde': 'ayer'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('exportar_pedidos'), {'estado': 'perdido'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('exportar_facturas'), {'formato': 'pdf'}).status_code, 400)
+
+    def test_xlsx_es_un_libro_valido(self):
+        self._crear_pagos(2)
+        response = self.client.get(reverse('exportar_pagos'), {'formato': 'xlsx'})
+        libro = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(libro.testzip())
+        hoja = libro.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(hoja.count('<row>'), 5)
+
+    @override_settings(EXPORTACION_TAMANO_LOTE=100)
+    def test_memoria_constante_al_crecer_las_filas(self):
+        self._crear_pagos(500)
+        pico_pequeno, bytes_pequeno = self._pico_memoria_exportacion()
+
+        self._crear_pagos(4500, inicio=500)
+        pico_grande, bytes_grande = self._pico_memoria_exportacion()
+
+        # 10 veces más datos exportados...
+        self.assertGreater(bytes_grande, bytes_pequeno * 8)
+        # ...pero el pico de memoria apenas cambia (no crece con las filas)
+        self.assertLess(pico_grande, pico_pequeno * 2)
+
+
+class ExportacionFacturasPdfTests(TestCase):
+    """Pruebas del ZIP de facturas en PDF con caché"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        cliente = UserClientes.objects.create(usernameCliente='cliente_pdf', passwordCliente='x')
+        productos = json.dumps([{'id': 1, 'tipo': 'mesa', 'nombre': 'Mesa Roble', 'precio': '150000', 'cantidad': 1}])
+        for i in range(2):
+            pago = Pago.objects.create(
+                cliente=cliente, metodo_pago='nequi', monto_total=Decimal('150000'),
+                comprobante='uploads/comprobantes/prueba.png', productos=productos, estado='confirmado',
+            )
+            Factura.objects.create(
+                pago=pago, numero_factura=f'FACT-PRUEBA-{i}', cliente=cliente, nombre_cliente='Cliente',
+                productos=productos, subtotal=Decimal('150000'), total=Decimal('150000'),
+            )
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+
+    def test_zip_reutiliza_pdfs_en_cache_y_reporta_progreso(self):
+        # La vista nunca crea procesos, aunque el comando tenga varios workers configurados
+        with self.settings(FACTURAS_PDF_DIR=self.directorio.name, FACTURAS_PDF_WORKERS=4), \
+                patch('core.facturas.ProcessPoolExecutor', side_effect=AssertionError('pool en la petición')):
+            response = self.client.get(reverse('exportar_facturas_pdf'), {'token': 'abc'})
+            archivo = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+            self.assertEqual(sorted(archivo.namelist()), ['Factura_FACT-PRUEBA-0.pdf', 'Factura_FACT-PRUEBA-1.pdf'])
+            self.assertTrue(archivo.read('Factura_FACT-PRUEBA-0.pdf').startswith(b'%PDF'))
+
+            progreso = self.client.get(reverse('exportar_facturas_pdf_progreso', args=['abc'])).json()
+            self.assertEqual((progreso['procesadas'], progreso['total'], progreso['terminado']), (2, 2, True))
+
+            # La segunda exportación no vuelve a renderizar: sirve los PDFs en caché
+            with patch('core.facturas.renderizar_pdf_factura') as renderizar:
+                response = self.client.get(reverse('exportar_facturas_pdf'))
+                self.assertEqual(len(zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))).namelist()), 2)
+            renderizar.assert_not_called()
+
+
+class EstadisticasSeriesTests(TestCase):
+    """Pruebas de la serie temporal de ingresos/pedidos del panel de estadísticas"""
+
+    def setUp(self):
+        cache.clear()
+        cliente = UserClientes.objects.create(usernameCliente='cliente_series', passwordCliente='x')
+        fechas = [
+            (datetime(2025, 1, 10, 12, tzinfo=dt_timezone.utc), 'confirmado', '100000'),
+            (datetime(2025, 1, 20, 12, tzinfo=dt_timezone.utc), 'confirmado', '50000'),
+            (datetime(2025, 1, 21, 12, tzinfo=dt_timezone.utc), 'rechazado', '70000'),
+            (datetime(2025, 3, 5, 12, tzinfo=dt_timezone.utc), 'pendiente', '30000'),
+        ]
+        for fecha, estado, monto in fechas:
+            pago = Pago.objects.create(
+                cliente=cliente, metodo_pago='nequi', monto_total=Decimal(monto),
+                comprobante='uploads/comprobantes/prueba.png', productos='[]', estado=estado,
+            )
+            Pago.objects.filter(id=pago.id).update(fecha_creacion=fecha)
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+
+    def test_agrupa_por_mes_y_rellena_huecos(self):
+        parametros = {'bucket': 'mes', 'desde': '2025-01-01', 'hasta': '2025-03-31'}
+        data = self.client.get(reverse('estadisticas_series'), parametros).json()
+        self.assertEqual([p['periodo'] for p in data['series']], ['2025-01-01', '2025-02-01', '2025-03-01'])
+        enero, febrero, marzo = data['series']
+        self.assertEqual((enero['ingresos'], enero['pagos_confirmados'], enero['pagos_rechazados']), (150000.0, 2, 1))
+        self.assertEqual(febrero['ingresos'], 0.0)
+        self.assertEqual(marzo['pagos_pendientes'], 1)
+
+        # La segunda consulta con el mismo rango sale de la caché
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('estadisticas_series'), parametros)
+        self.assertFalse([q for q in consultas.captured_queries if 'core_pago' in q['sql']])
+
+    def test_agrupa_por_semana_desde_el_lunes(self):
+        data = self.client.get(reverse('estadisticas_series'), {'bucket': 'semana', 'desde': '2025-01-15', 'hasta': '2025-01-26'}).json()
+        self.assertEqual([p['periodo'] for p in data['series']], ['2025-01-13', '2025-01-20'])
+        self.assertEqual(data['series'][1]['pagos_confirmados'] + data['series'][1]['pagos_rechazados'], 2)
+
+    def test_parametros_invalidos(self):
+        url = reverse('estadisticas_series')
+        self.assertEqual(self.client.get(url, {'bucket': 'hora'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'desde': '2025-02-01', 'hasta': '2025-01-01'}).status_code, 400)
+
+
+class VentasProductoTests(TestCase):
+    """Pruebas de la analítica de ventas por producto"""
+
+    def setUp(self):
+        self.mesa = Mesas.objects.create(nombre1='Mesa Roble', precio1=Decimal('150000'), imagen1='m.png', cantidad_disponible=10)
+        self.silla = Sillas.objects.create(nombre2='Silla Pino', precio2=Decimal('50000'), imagen2='s.png', cantidad_disponible=5)
+        cliente = UserClientes.objects.create(usernameCliente='cliente_ventas', passwordCliente='x')
+        self.pago = Pago.objects.create(
+            cliente=cliente, metodo_pago='nequi', monto_total=Decimal('300000'),
+            comprobante='uploads/comprobantes/prueba.png', estado='pendiente',
+            productos=json.dumps([{'id': self.mesa.id, 'tipo': 'mesa', 'nombre': 'Mesa Roble', 'precio': '150000', 'cantidad': 2}]),
+        )
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+
+    def test_confirmar_pago_acumula_ventas_y_estima_agotamiento(self):
+        response = self.client.post(reverse('confirmar_pago', args=[self.pago.id]))
+        self.assertTrue(response.json()['success'])
+
+        venta = VentaProducto.objects.get(categoria='mesas', producto_id=self.mesa.id)
+        self.assertEqual((venta.unidades_vendidas, venta.ingresos), (2, Decimal('300000')))
+        self.assertEqual([v.producto_id for v in mas_vendidos()], [self.mesa.id])
+
+        analisis = analisis_inventario(dias=30)
+        # 8 en stock a 2 unidades/30 días -> 120 días
+        self.assertEqual(analisis['riesgo_agotamiento'][0]['dias_restantes'], 120.0)
+        self.assertEqual(analisis['menos_vendidos'][0]['producto_id'], self.silla.id)
+
+    def test_confirmar_pago_emite_factura_con_numero_consecutivo(self):
+        self.client.post(reverse('confirmar_pago', args=[self.pago.id]))
+        anio = timezone.localdate().year
+        self.assertEqual(Factura.objects.get(pago=self.pago).numero_factura, f'FACT-{anio}-000001')
+
+    def test_si_falla_el_registro_de_ventas_el_pago_no_queda_confirmado(self):
+        with patch('Empresas.views.registrar_venta', side_effect=RuntimeError('tabla de ventas bloqueada')):
+            response = self.client.post(reverse('confirmar_pago', args=[self.pago.id]))
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(Pago.objects.get(id=self.pago.id).estado, 'pendiente')
+        self.assertFalse(VentaProducto.objects.exists())
+        # El descuento de inventario se deshace con el resto
+        self.mesa.refresh_from_db()
+        self.assertEqual(self.mesa.cantidad_disponible, 10)
+        self.assertTrue(self.mesa.is_active)
+
+    def test_reintentar_tras_un_fallo_descuenta_el_stock_una_sola_vez(self):
+        with patch('Empresas.views.registrar_venta', side_effect=RuntimeError('tabla de ventas bloqueada')):
+            self.client.post(reverse('confirmar_pago', args=[self.pago.id]))
+        self.assertTrue(self.client.post(reverse('confirmar_pago', args=[self.pago.id])).json()['success'])
+        self.assertEqual(self.client.post(reverse('confirmar_pago', args=[self.pago.id])).status_code, 400)
+
+        self.mesa.refresh_from_db()
+        self.assertEqual(self.mesa.cantidad_disponible, 8)
+        self.assertEqual(VentaProducto.objects.get().unidades_vendidas, 2)
+
+    def test_recalcular_reconstruye_desde_pagos_confirmados(self):
+        Pago.objects.filter(id=self.pago.id).update(estado='confirmado')
+        self.assertEqual(recalcular_ventas(), (1, 1))
+        # Recalcular de nuevo no duplica
+        recalcular_ventas()
+        self.assertEqual(VentaProducto.objects.get().unidades_vendidas, 2)
+        self.assertEqual(VentaProductoDiaria.objects.get().unidades, 2)
+
+
+class InventarioUmbralesTests(TestCase):
+    """Pruebas de reactivación automática y alertas de stock bajo"""
+
+    def setUp(self):
+        self.mesa = Mesas.objects.create(nombre1='Mesa Roble', precio1=Decimal('150000'), imagen1='m.png', cantidad_disponible=2, stock_minimo=1)
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+
+    def test_producto_agotado_se_reactiva_al_reponer(self):
+        cliente = UserClientes.objects.create(usernameCliente='cliente_stock', passwordCliente='x')
+        pago = Pago.objects.create(
+            cliente=cliente, metodo_pago='nequi', monto_total=Decimal('300000'),
+            comprobante='uploads/comprobantes/prueba.png', estado='pendiente',
+            productos=json.dumps([{'id': self.mesa.id, 'tipo': 'mesa', 'nombre': 'Mesa Roble', 'precio': '150000', 'cantidad': 2}]),
+        )
+        self.client.post(reverse('confirmar_pago', args=[pago.id]))
+        self.mesa.refresh_from_db()
+        self.assertEqual((self.mesa.is_active, self.mesa.inactivo_por_stock), (False, True))
+
+        response = self.client.post(reverse('actualizar_inventario'), {'tipo': 'mesa', 'id': self.mesa.id, 'cantidad': 5, 'stock_minimo': 3})
+        self.assertTrue(response.json()['reactivado'])
+        self.mesa.refresh_from_db()
+        self.assertEqual((self.mesa.is_active, self.mesa.inactivo_por_stock, self.mesa.stock_minimo), (True, False, 3))
+
+    def test_job_genera_actualiza_y_resuelve_alertas(self):
+        Mesas.objects.create(nombre1='Inhabilitada', precio1=Decimal('1'), imagen1='m.png', cantidad_disponible=0, is_active=False)
+        Mesas.objects.filter(id=self.mesa.id).update(cantidad_disponible=1)
+
+        self.assertEqual(evaluar_inventario()['alertas_nuevas'], 1)
+        alerta = AlertaInventario.objects.get()
+        self.assertEqual((alerta.producto_id, alerta.tipo), (self.mesa.id, 'stock_bajo'))
+        self.assertEqual(self.client.get(reverse('api_alertas_inventario')).json()['no_leidas'], 1)
+        self.client.post(reverse('marcar_alertas_inventario_leidas'))
+
+        # Se agota (y queda deshabilitado por stock): la misma alerta pasa a "agotado" y vuelve a no leída
+        Mesas.objects.filter(id=self.mesa.id).update(cantidad_disponible=0, is_active=False, inactivo_por_stock=True)
+        self.assertEqual(evaluar_inventario()['alertas_actualizadas'], 1)
+        alerta.refresh_from_db()
+        self.assertEqual((alerta.tipo, alerta.leida), ('agotado', False))
+
+        # Reposición directa en la base de datos: el job reactiva y resuelve en bloque
+        Mesas.objects.filter(id=self.mesa.id).update(cantidad_disponible=10)
+        resumen = evaluar_inventario()
+        self.assertEqual((resumen['reactivados'], resumen['alertas_resueltas']), (1, 1))
+        self.assertTrue(Mesas.objects.get(id=self.mesa.id).is_active)
+        self.assertFalse(AlertaInventario.objects.filter(resuelta=False).exists())
+
+
+class UsuariosApiTests(TestCase):
+    """Pruebas del listado paginado de usuarios y de los cambios de estado en lote"""
+
+    def setUp(self):
+        UserClientes.objects.bulk_create([
+            UserClientes(usernameCliente=f'cliente{i:02d}', passwordCliente='x', email=f'c{i:02d}@ejemplo.com', is_active=i % 3 != 0)
+            for i in range(25)
+        ])
+        session = self.client.session
+        session['empresa_id'] = 1
+        session.save()
+        self.url = reverse('api_usuarios')
+
+    def test_pagina_busca_filtra_y_ordena_en_el_servidor(self):
+        datos = self.client.get(self.url, {'orden': 'username', 'por_pagina': 10, 'pagina': 2}).json()
+        self.assertEqual((datos['total'], datos['paginas']), (25, 3))
+        self.assertEqual([u['username'] for u in datos['usuarios']], [f'cliente{i:02d}' for i in range(10, 20)])
+
+        datos = self.client.get(self.url, {'estado': 'inactivo', 'orden': '-email'}).json()
+        self.assertEqual(datos['total'], 9)
+        self.assertEqual(datos['usuarios'][0]['email'], 'c24@ejemplo.com')
+        self.assertFalse(any(u['is_active'] for u in datos['usuarios']))
+
+        self.assertEqual(self.client.get(self.url, {'q': 'CLIENTE1'}).json()['total'], 10)
+
+        # Un COUNT y una página, sin importar cuántos usuarios haya (la sesión aparte)
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(self.url, {'por_pagina': 200})
+        self.assertEqual(sum(1 for q in consultas.captured_queries if 'core_userclientes' in q['sql']), 2)
+
+        for parametros in ({'tipo': 'admin'}, {'orden': 'password'}, {'pagina': 'x'}, {'estado': 'borrado'}):
+            self.assertEqual(self.client.get(self.url, parametros).status_code, 400)
+
+    def test_cambio_de_estado_en_lote_es_un_solo_update(self):
+        ids = list(UserClientes.objects.order_by('id').values_list('id', flat=True)[:6])
+        url = reverse('api_cambiar_estado_usuarios')
+        cuerpo = json.dumps({'tipo': 'cliente', 'ids': ids, 'accion': 'disable'})
+        with CaptureQueriesContext(connection) as consultas:
+            datos = self.client.post(url, cuerpo, content_type='application/json').json()
+        # cliente00 y cliente03 ya estaban inactivos
+        self.assertEqual(datos['actualizados'], 4)
+        self.assertEqual([q['sql'].split()[0] for q in consultas.captured_queries if 'core_userclientes' in q['sql']], ['UPDATE'])
+        cambiados = UserClientes.objects.filter(id__in=ids, status_changed_at__isnull=False)
+        self.assertEqual(sorted(cambiados.values_list('usernameCliente', flat=True)), ['cliente01', 'cliente02', 'cliente04', 'cliente05'])
+        self.assertFalse(UserClientes.objects.filter(id__in=ids, is_active=True).exists())
+
+        # El cambio individual usa el mismo UPDATE
+        toggle = reverse('toggle_user_status', args=[ids[0], 'cliente', 'enable'])
+        self.assertTrue(self.client.post(toggle, HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()['success'])
+        self.assertEqual(self.client.post(toggle, HTTP_X_REQUESTED_WITH='XMLHttpRequest').status_code, 400)
+        ausente = reverse('toggle_user_status', args=[10**6, 'cliente', 'enable'])
+        self.assertEqual(self.client.post(ausente, HTTP_X_REQUESTED_WITH='XMLHttpRequest').status_code, 404)
+
+        self.client.session.flush()
+        self.client.cookies.clear()
+        self.assertEqual(self.client.post(url, cuerpo, content_type='application/json').status_code, 401)
@@ -1,6 +1,8 @@
 from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
 from . import views
+from . import views_exportacion
+from . import views_usuarios
 
 urlpatterns = [
     # Registro y autenticación de empresas (registro como página principal)
@@ -21,6 +23,8 @@ urlpatterns = [
     path('usuarios/', views.usuarios_view, name='usuarios'),
     path('toggle-user-status/<int:user_id>/<str:user_type>/<str:action>/', csrf_exempt(views.toggle_user_status), name='toggle_user_status'),
     path('update-user/', csrf_exempt(views.update_user), name='update_user'),
+    path('api/usuarios/', views_usuarios.api_usuarios, name='api_usuarios'),
+    path('api/usuarios/estado/', views_usuarios.api_cambiar_estado_usuarios, name='api_cambiar_estado_usuarios'),
     path('csrf_token/', views.get_csrf_token, name='get_csrf_token'),
     path('gestion-pagos/', views.gestion_pagos_view, name='gestion_pagos'),
     path('obtener-pagos-cliente/<int:cliente_id>/', views.obtener_pagos_cliente_view, name='obtener_pagos_cliente'),
@@ -30,9 +34,12 @@ urlpatterns = [
     path('obtener-pedidos-cliente/<int:cliente_id>/', views.obtener_pedidos_cliente_view, name='obtener_pedidos_cliente'),
     path('actualizar-estado-pedido/<int:pedido_id>/', csrf_exempt(views.actualizar_estado_pedido_view), name='actualizar_estado_pedido'),
     path('estadisticas/', views.estadisticas_view, name='estadisticas'),
+    path('estadisticas/series/', views.estadisticas_series_view, name='estadisticas_series'),
     path('estadisticas/pdf/', views.descargar_estadisticas_pdf, name='descargar_estadisticas_pdf'),
     path('inventario/', views.inventario_view, name='inventario'),
     path('actualizar-inventario/', csrf_exempt(views.actualizar_inventario_view), name='actualizar_inventario'),
+    path('api/alertas-inventario/', views.api_alertas_inventario, name='api_alertas_inventario'),
+    path('api/alertas-inventario/leidas/', views.marcar_alertas_inventario_leidas, name='marcar_alertas_inventario_leidas'),
     path('contactar-usuario-idea/<int:idea_id>/', csrf_exempt(views.contactar_usuario_idea), name='contactar_usuario_idea'),
     path('solicitar-permiso-publicacion/<int:idea_id>/', csrf_exempt(views.solicitar_permiso_publicacion), name='solicitar_permiso_publicacion'),
     path('publicar-idea-producto/<int:idea_id>/', views.publicar_idea_como_producto, name='publicar_idea_producto'),
@@ -45,4 +52,10 @@ urlpatterns = [
     path('completar-idea/<int:idea_id>/', csrf_exempt(views.completar_idea_view), name='completar_idea'),
     path('finalizar-idea/<int:idea_id>/', csrf_exempt(views.finalizar_idea_view), name='finalizar_idea'),
     path('factura/<int:pago_id>/', views.ver_factura_view, name='ver_factura'),
+    # Exportación contable en streaming (CSV/XLSX)
+    path('exportar/pagos/', views_exportacion.exportar_pagos_view, name='exportar_pagos'),
+    path('exportar/pedidos/', views_exportacion.exportar_pedidos_view, name='exportar_pedidos'),
+    path('exportar/facturas/', views_exportacion.exportar_facturas_view, name='exportar_facturas'),
+    path('exportar/facturas-pdf/', views_exportacion.exportar_facturas_pdf_view, name='exportar_facturas_pdf'),
+    path('exportar/facturas-pdf/progreso/<str:token>/', views_exportacion.progreso_exportacion_facturas_view, name='exportar_facturas_pdf_progreso'),
 ]
\ No newline at end of file
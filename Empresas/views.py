@@ -5,15 +5,22 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.middleware.csrf import get_token
+from django.db import transaction
 from django.utils import timezone
 from datetime import timedelta
 from functools import wraps
 from core.models import Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios, Idea, UserClientes, Pago, Pedido, Factura
 from core.forms import IdeaForm
+from core.ventas import registrar_venta
+from core.inventario import marcar_agotado
+from core.contrasenas import comprobar_contrasena
+from core.limites import campo_post, clave_sesion, limitar
+from core.numeracion import siguiente_numero_factura
+from core.replicas import lectura_en_replica
 from .models import EmpresaRegistrada
 from .forms import EmpresaRegistroForm, EmpresaRegistroSimpleForm
+from .views_usuarios import POR_PAGINA, TIPOS_USUARIO, cambiar_estado_usuarios
 import json
-import hashlib
 import pyotp
 import qrcode
 import io
@@ -30,7 +37,7 @@ def empresa_login_required(view_func):
     return wrapper
 
 # Importar vistas adicionales
-from .views_estadisticas import estadisticas_view, inventario_view, actualizar_inventario_view, descargar_estadisticas_pdf
+from .views_estadisticas import estadisticas_view, estadisticas_series_view, inventario_view, actualizar_inventario_view, api_alertas_inventario, marcar_alertas_inventario_leidas, descargar_estadisticas_pdf
 
 # Vista para registro de empresas simplificado
 def registro_empresa_view(request):
@@ -56,6 +63,7 @@ def registro_empresa_view(request):
     return render(request, 'Empresas/registro_empresa_simple.html', {'form': form})
 
 # Vista para login de empresas
+@limitar('login_empresa', cuenta=campo_post('username'))
 def login_empresa_view(request):
     """Vista para el login de empresas registradas"""
     if request.method == 'POST':
@@ -74,10 +82,8 @@ def login_empresa_view(request):
                 messages.error(request, 'No existe una empresa con ese nombre.')
                 return render(request, 'Empresas/login_empresa.html')
             
-            # Verificar la contraseña
-            password_hash = hashlib.sha256(password.encode()).hexdigest()
-            
-            if empresa.password != password_hash:
+            # Verificar la contraseña (rehace el hash si está en un formato antiguo)
+            if not comprobar_contrasena(empresa, password):
                 messages.error(request, 'Contraseña incorrecta.')
                 return render(request, 'Empresas/login_empresa.html')
             
@@ -102,6 +108,7 @@ def login_empresa_view(request):
     return render(request, 'Empresas/login_empresa.html')
 
 # Vista para verificar código 2FA en login
+@limitar('verificar_2fa', cuenta=clave_sesion('empresa_login_temp'))
 def verificar_2fa_empresa_login(request):
     """Vista para verificar el código TOTP durante el login"""
     empresa_id = request.session.get('empresa_login_temp')
@@ -422,6 +429,8 @@ def eliminar_producto_view2(request, categoria, producto_id):
         
         # Cambiar el estado en lugar de eliminar
         producto.is_active = not producto.is_active
+        # Una decisión manual reemplaza la reactivación automática por stock
+        producto.inactivo_por_stock = False
         producto.save()
         
         if producto.is_active:
@@ -507,16 +516,15 @@ def ver_modelo_3d_idea(request, idea_id):
 
 @ensure_csrf_cookie
 @empresa_login_required
+@lectura_en_replica
 def usuarios_view(request):
     """
-    Vista para gestión de usuarios (clientes y empresas)
+    Vista para gestión de usuarios (clientes y empresas).
+    La tabla se carga por páginas desde api_usuarios (views_usuarios.py).
     """
-    users = UserClientes.objects.all()
-    empresas = EmpresaRegistrada.objects.all()
     context = {
-        'users': users,
-        'empresas': empresas,
-        'csrf_token': get_token(request)
+        'csrf_token': get_token(request),
+        'por_pagina': POR_PAGINA,
     }
     return render(request,'Empresas/usuarios2.html', context)
 
@@ -527,38 +535,32 @@ def get_csrf_token(request):
 def toggle_user_status(request, user_id, user_type, action):
     if not request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
     
     if action not in ['enable', 'disable']:
         return JsonResponse({'success': False, 'error': 'Acción inválida'}, status=400)
+    if user_type not in TIPOS_USUARIO:
+        return JsonResponse({'success': False, 'error': 'Tipo de usuario inválido'}, status=400)
         
     try:
-        if user_type == 'cliente':
-            user = UserClientes.objects.get(id=user_id)
-        elif user_type == 'empresa':
-            user = EmpresaRegistrada.objects.get(id=user_id)
-        else:
-            return JsonResponse({'success': False, 'error': 'Tipo de usuario inválido'}, status=400)
-            
-        # Actualizar el estado
+        # Un solo UPDATE (registra status_changed_at) en lugar de leer y guardar el usuario completo
         new_status = action == 'enable'
-        if user.is_active == new_status:
+        if not cambiar_estado_usuarios(user_type, [user_id], new_status):
+            if not TIPOS_USUARIO[user_type][0].objects.filter(id=user_id).exists():
+                return JsonResponse({'success': False, 'error': 'Usuario no encontrado'}, status=404)
             return JsonResponse({'success': False, 'error': 'El usuario ya está en ese estado'}, status=400)
-            
-        user.is_active = new_status
-        user.status_changed_at = timezone.now()
-        user.save()
         
         return JsonResponse({
             'success': True,
-            'status': 'Activo' if user.is_active else 'Inactivo',
-            'action': 'disable' if user.is_active else 'enable'
+            'status': 'Activo' if new_status else 'Inactivo',
+            'action': 'disable' if new_status else 'enable'
         })
-    except (UserClientes.DoesNotExist, EmpresaRegistrada.DoesNotExist):
-        return JsonResponse({'success': False, 'error': 'Usuario no encontrado'}, status=404)
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 @empresa_login_required
+@lectura_en_replica
 def gestion_pedidos_view(request):
     """Vista para gestión de pedidos por parte de la empresa"""
     
@@ -664,6 +666,7 @@ def actualizar_estado_pedido_view(request, pedido_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 @empresa_login_required
+@lectura_en_replica
 def gestion_pagos_view(request):
     """Vista para gestión de pagos por parte de la empresa"""
     
@@ -721,114 +724,122 @@ def obtener_pagos_cliente_view(request, cliente_id):
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
 
+def _descontar_inventario(pago):
+    """Descuenta del inventario los productos del pago (dentro de la transacción que lo confirma).
+
+    Devuelve una JsonResponse de error si falta stock o un producto, antes de
+    escribir nada; None si descontó todo. Los productos se leen con
+    select_for_update: dos confirmaciones a la vez no descuentan del mismo stock.
+    """
+    from core.models import Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios
+
+    try:
+        productos = json.loads(pago.productos)
+    except json.JSONDecodeError as e:
+        print(f"ERROR al parsear productos JSON: {e}")
+        return JsonResponse({'success': False, 'error': 'Error al procesar productos'}, status=500)
+    print(f"=== INICIANDO DEDUCCIÓN DE INVENTARIO ===")
+    print(f"Pago ID: {pago.id}")
+    print(f"Productos a descontar: {productos}")
+
+    # Mapeo de categorías a modelos (soportar múltiples formatos)
+    modelos_map = {
+        'mesas': Mesas,
+        'mesa': Mesas,
+        'sillas': Sillas,
+        'silla': Sillas,
+        'armarios': Armarios,
+        'armario': Armarios,
+        'cajoneras': Cajoneras,
+        'cajonera': Cajoneras,
+        'escritorios': Escritorios,
+        'escritorio': Escritorios,
+        'utensilios': Utensilios,
+        'utensilio': Utensilios,
+    }
+
+    # Primero verificar que hay suficiente stock de todos los productos
+    items_a_descontar = []
+    for producto in productos:
+        categoria = producto.get('categoria', producto.get('tipo', '')).lower()
+        producto_id = producto.get('id')
+        cantidad = int(producto.get('cantidad', 0))
+
+        modelo = modelos_map.get(categoria)
+
+        if modelo and producto_id and cantidad > 0:
+            try:
+                item = modelo.objects.select_for_update().get(id=producto_id)
+                print(f"Verificando: {categoria} ID={producto_id}, Stock={item.cantidad_disponible}, Solicitado={cantidad}")
+
+                if item.cantidad_disponible < cantidad:
+                    print(f"⚠ Stock insuficiente para {categoria} ID {producto_id}")
+                    return JsonResponse({
+                        'success': False,
+                        'error': f'Stock insuficiente para {categoria}. Disponible: {item.cantidad_disponible}, Solicitado: {cantidad}'
+                    }, status=400)
+
+                items_a_descontar.append({'item': item, 'cantidad': cantidad, 'categoria': categoria})
+            except modelo.DoesNotExist:
+                print(f"✗ Producto {categoria} ID {producto_id} no encontrado")
+                return JsonResponse({
+                    'success': False,
+                    'error': f'Producto {categoria} no encontrado en el inventario'
+                }, status=404)
+
+    # Si llegamos aquí, hay suficiente stock. Proceder a descontar
+    for data in items_a_descontar:
+        item = data['item']
+        cantidad = data['cantidad']
+        categoria = data['categoria']
+
+        stock_anterior = item.cantidad_disponible
+        item.cantidad_disponible -= cantidad
+
+        # Deshabilitar automáticamente si el stock llega a 0 (se reactiva al reponer)
+        if marcar_agotado(item):
+            print(f"⚠ {categoria} ID={item.id} deshabilitado automáticamente (stock agotado)")
+
+        item.save()
+        print(f"✓ {categoria} actualizado: {stock_anterior} -> {item.cantidad_disponible}")
+
+    print(f"=== FIN DEDUCCIÓN DE INVENTARIO ===")
+    return None
+
+
 @empresa_login_required
 @require_POST
 def confirmar_pago_view(request, pago_id):
     """Vista para confirmar un pago y crear pedido automáticamente"""
     try:
-        pago = Pago.objects.get(id=pago_id)
-        
-        # Verificar que el pago no haya sido confirmado anteriormente
-        if pago.estado == 'confirmado':
-            return JsonResponse({'success': False, 'error': 'Este pago ya fue confirmado anteriormente'}, status=400)
-        
-        # Descontar productos del inventario ANTES de confirmar
-        try:
-            import json
-            from core.models import Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios
-            
-            productos = json.loads(pago.productos)
-            print(f"=== INICIANDO DEDUCCIÓN DE INVENTARIO ===")
-            print(f"Pago ID: {pago.id}")
-            print(f"Productos a descontar: {productos}")
-            
-            # Mapeo de categorías a modelos (soportar múltiples formatos)
-            modelos_map = {
-                'mesas': Mesas,
-                'mesa': Mesas,
-                'sillas': Sillas,
-                'silla': Sillas,
-                'armarios': Armarios,
-                'armario': Armarios,
-                'cajoneras': Cajoneras,
-                'cajonera': Cajoneras,
-                'escritorios': Escritorios,
-                'escritorio': Escritorios,
-                'utensilios': Utensilios,
-                'utensilio': Utensilios,
-            }
-            
-            # Primero verificar que hay suficiente stock de todos los productos
-            items_a_descontar = []
-            for producto in productos:
-                categoria = producto.get('categoria', producto.get('tipo', '')).lower()
-                producto_id = producto.get('id')
-                cantidad = int(producto.get('cantidad', 0))
-                
-                print(f"\n>>> Producto: {producto}")
-                print(f">>> Categoría extraída: '{categoria}'")
-                print(f">>> ID: {producto_id}, Cantidad: {cantidad}")
-                
-                modelo = modelos_map.get(categoria)
-                
-                if modelo and producto_id and cantidad > 0:
-                    try:
-                        item = modelo.objects.get(id=producto_id)
-                        print(f"Verificando: {categoria} ID={producto_id}, Stock={item.cantidad_disponible}, Solicitado={cantidad}")
-                        
-                        if item.cantidad_disponible < cantidad:
-                            print(f"⚠ Stock insuficiente para {categoria} ID {producto_id}")
-                            return JsonResponse({
-                                'success': False, 
-                                'error': f'Stock insuficiente para {categoria}. Disponible: {item.cantidad_disponible}, Solicitado: {cantidad}'
-                            }, status=400)
-                        
-                        items_a_descontar.append({'item': item, 'cantidad': cantidad, 'categoria': categoria})
-                    except modelo.DoesNotExist:
-                        print(f"✗ Producto {categoria} ID {producto_id} no encontrado")
-                        return JsonResponse({
-                            'success': False, 
-                            'error': f'Producto {categoria} no encontrado en el inventario'
-                        }, status=404)
-            
-            # Si llegamos aquí, hay suficiente stock. Proceder a descontar
-            for data in items_a_descontar:
-                item = data['item']
-                cantidad = data['cantidad']
-                categoria = data['categoria']
-                
-                stock_anterior = item.cantidad_disponible
-                item.cantidad_disponible -= cantidad
-                
-                # Deshabilitar automáticamente si el stock llega a 0
-                if item.cantidad_disponible <= 0:
-                    item.is_active = False
-                    print(f"⚠ {categoria} ID={item.id} deshabilitado automáticamente (stock agotado)")
-                
-                item.save()
-                print(f"✓ {categoria} actualizado: {stock_anterior} -> {item.cantidad_disponible}")
-            
-            print(f"=== FIN DEDUCCIÓN DE INVENTARIO ===")
-        except json.JSONDecodeError as e:
-            print(f"ERROR al parsear productos JSON: {e}")
-            return JsonResponse({'success': False, 'error': 'Error al procesar productos'}, status=500)
-        except Exception as e:
-            print(f"ERROR CRÍTICO al descontar inventario: {e}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'success': False, 'error': f'Error al descontar inventario: {str(e)}'}, status=500)
-        
-        # Ahora sí confirmar el pago
-        pago.estado = 'confirmado'
-        pago.fecha_confirmacion = timezone.now()
-        
-        # Obtener notas opcionales
-        notas = request.POST.get('notas', '')
-        if notas:
-            pago.notas_empresa = notas
-        
-        pago.save()
-        
+        # El descuento de inventario, el pago confirmado y sus unidades en las tablas de
+        # analítica se guardan juntos: si algo falla, el error llega al except general
+        # sin haber descontado nada y el pago sigue pendiente
+        with transaction.atomic():
+            # Bloquear el pago: una segunda confirmación simultánea espera y ve 'confirmado'
+            pago = Pago.objects.select_for_update().get(id=pago_id)
+
+            # Verificar que el pago no haya sido confirmado anteriormente
+            if pago.estado == 'confirmado':
+                return JsonResponse({'success': False, 'error': 'Este pago ya fue confirmado anteriormente'}, status=400)
+
+            # Descontar productos del inventario ANTES de confirmar
+            error = _descontar_inventario(pago)
+            if error is not None:
+                return error
+
+            # Ahora sí confirmar el pago
+            pago.estado = 'confirmado'
+            pago.fecha_confirmacion = timezone.now()
+
+            # Obtener notas opcionales
+            notas = request.POST.get('notas', '')
+            if notas:
+                pago.notas_empresa = notas
+
+            pago.save()
+            registrar_venta(pago)
+
         # Verificar si ya existe un pedido para este pago
         if not hasattr(pago, 'pedido'):
             # Obtener datos guardados del cliente si existen
@@ -858,25 +869,25 @@ def confirmar_pago_view(request, pago_id):
             if hasattr(pago, 'factura'):
                 print(f"Factura ya existe para el pago #{pago.id}: {pago.factura.numero_factura}")
             else:
-                # Generar número de factura único
-                numero_factura = f"FACT-{pago.id}-{timezone.now().strftime('%Y%m%d%H%M%S')}"
-                
-                # Crear la factura usando los datos del pago (que el cliente ingresó en el formulario)
-                factura = Factura.objects.create(
-                    pago=pago,
-                    numero_factura=numero_factura,
-                    cliente=cliente,
-                    nombre_cliente=pago.nombre_completo if pago.nombre_completo else cliente.usernameCliente,
-                    email_cliente=pago.email if pago.email else cliente.email,
-                    telefono_cliente=pago.telefono if pago.telefono else '',
-                    direccion_cliente=pago.direccion if pago.direccion else '',
-                    ciudad_cliente=cliente.ciudad if cliente.ciudad else '',
-                    departamento_cliente=cliente.departamento if cliente.departamento else '',
-                    productos=pago.productos,  # Mismo JSON de productos
-                    subtotal=pago.monto_total,
-                    impuestos=0,  # Por ahora sin impuestos
-                    total=pago.monto_total
-                )
+                # El número se reserva en la misma transacción que crea la factura: si falla
+                # la creación, el número vuelve a quedar libre (numeración sin huecos)
+                with transaction.atomic():
+                    # Crear la factura usando los datos del pago (que el cliente ingresó en el formulario)
+                    factura = Factura.objects.create(
+                        pago=pago,
+                        numero_factura=siguiente_numero_factura(),
+                        cliente=cliente,
+                        nombre_cliente=pago.nombre_completo if pago.nombre_completo else cliente.usernameCliente,
+                        email_cliente=pago.email if pago.email else cliente.email,
+                        telefono_cliente=pago.telefono if pago.telefono else '',
+                        direccion_cliente=pago.direccion if pago.direccion else '',
+                        ciudad_cliente=cliente.ciudad if cliente.ciudad else '',
+                        departamento_cliente=cliente.departamento if cliente.departamento else '',
+                        productos=pago.productos,  # Mismo JSON de productos
+                        subtotal=pago.monto_total,
+                        impuestos=0,  # Por ahora sin impuestos
+                        total=pago.monto_total
+                    )
                 print(f"✅ Factura {factura.numero_factura} generada exitosamente automáticamente")
         except Exception as e:
             print(f"ERROR al generar factura: {e}")
@@ -1321,6 +1332,7 @@ def obtener_ideas_usuario_view(request, usuario_id):
                 'fecha_creacion': idea.fecha_creacion.strftime('%d/%m/%Y'),
                 'tiene_imagen': bool(idea.imagen),
                 'tiene_modelo_3d': bool(idea.modelo_3d),
+                'miniatura_modelo_3d': idea.modelo_3d_miniatura.url if idea.modelo_3d_miniatura else None,
                 'empresa_asignada': idea.empresa_asignada.usernameEmpresa if idea.empresa_asignada else None,
                 'permiso_publicacion': idea.permiso_publicacion,
                 'publicada_como_producto': idea.publicada_como_producto,
@@ -1377,7 +1389,12 @@ def obtener_detalle_idea_view(request, idea_id):
             'empresa_asignada': idea.empresa_asignada.usernameEmpresa if idea.empresa_asignada else 'No asignada',
             'medidas': medidas_formateadas,
             'imagen_url': idea.imagen.url if idea.imagen else None,
-            'modelo_3d_url': idea.modelo_3d.url if idea.modelo_3d else None,
+            'modelo_3d_url': idea.url_modelo_3d_completo,
+            # Las listas y el visor cargan primero la miniatura y la vista previa; la malla completa, bajo demanda
+            'modelo_3d_estado': idea.modelo_3d_estado,
+            'modelo_3d_miniatura_url': idea.modelo_3d_miniatura.url if idea.modelo_3d_miniatura else None,
+            'modelo_3d_preview_url': idea.modelo_3d_preview.url if idea.modelo_3d_preview else None,
+            'modelo_3d_info': idea.modelo_3d_info,
         })
         
     except Idea.DoesNotExist:
@@ -1,13 +1,34 @@
 from django.shortcuts import render, redirect
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_POST
-from core.models import UserClientes, Pedido, Pago, Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios
-from django.db.models import Sum, Count, Q
-from datetime import datetime, timedelta
+from core.models import UserClientes, Pedido, Pago, AlertaInventario, Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Count, Q, DateField
+from django.db.models.functions import TruncDate, TruncWeek, TruncMonth
+from django.utils.dateparse import parse_date
+from datetime import datetime, date, time, timedelta
 from django.utils import timezone
+from core.ventas import mas_vendidos, analisis_inventario
+from core.inventario import reactivar_si_hay_stock
+from core.replicas import lectura_en_replica
 import io
 import base64
 
+def _pedidos_archivados(desde=None):
+    """{estado: cantidad} de los pedidos que la retención pasó a RegistroArchivado (core/retencion.py).
+
+    Su pago se conserva marcado con el estado que tenía el pedido. El pedido se
+    crea al confirmar el pago, así que el período se filtra por fecha_confirmacion.
+    """
+    # > '' en lugar de exclude(=''): así SQLite recorre solo el tramo del índice pago_archivado_fecha_idx
+    pagos = Pago.objects.filter(estado_pedido_archivado__gt='')
+    if desde:
+        pagos = pagos.filter(fecha_confirmacion__gte=desde)
+    return dict(pagos.values_list('estado_pedido_archivado').annotate(total=Count('id')).order_by())
+
+
+@lectura_en_replica
 def estadisticas_view(request):
     """Vista para mostrar estadísticas de la empresa"""
     if 'empresa_id' not in request.session:
@@ -68,11 +89,13 @@ def estadisticas_view(request):
     if fecha_inicio:
         pedidos_query = pedidos_query.filter(fecha_creacion__gte=fecha_inicio)
     
-    total_pedidos = pedidos_query.count()
-    pedidos_procesando = pedidos_query.filter(estado='procesando').count()
-    pedidos_enviado = pedidos_query.filter(estado='enviado').count()
-    pedidos_en_transito = pedidos_query.filter(estado='en_transito').count()
-    pedidos_entregado = pedidos_query.filter(estado='entregado').count()
+    # Los pedidos archivados por la retención también cuentan
+    archivados = _pedidos_archivados(fecha_inicio)
+    total_pedidos = pedidos_query.count() + sum(archivados.values())
+    pedidos_procesando = pedidos_query.filter(estado='procesando').count() + archivados.get('procesando', 0)
+    pedidos_enviado = pedidos_query.filter(estado='enviado').count() + archivados.get('enviado', 0)
+    pedidos_en_transito = pedidos_query.filter(estado='en_transito').count() + archivados.get('en_transito', 0)
+    pedidos_entregado = pedidos_query.filter(estado='entregado').count() + archivados.get('entregado', 0)
     
     # Estadísticas de pagos (filtradas por período)
     pagos_query = Pago.objects.all()
@@ -116,10 +139,150 @@ def estadisticas_view(request):
         'pagos_confirmados': pagos_confirmados,
         'pagos_rechazados': pagos_rechazados,
         'ingresos_totales': ingresos_totales,
+        # Analítica de ventas por producto (tablas precalculadas)
+        'mas_vendidos': mas_vendidos(10),
+        'riesgo_agotamiento': analisis_inventario()['riesgo_agotamiento'],
     }
     
     return render(request, 'Empresas/estadisticas.html', context)
 
+# Agrupaciones disponibles para la serie temporal: bucket -> (función de truncado, días por defecto)
+BUCKETS_SERIE = {
+    'dia': (lambda campo: TruncDate(campo), 30),
+    'semana': (lambda campo: TruncWeek(campo, output_field=DateField()), 7 * 12),
+    'mes': (lambda campo: TruncMonth(campo, output_field=DateField()), 365),
+}
+
+# Límite de puntos por respuesta (p. ej. 3 años por día)
+MAX_PUNTOS_SERIE = 1100
+
+
+def _inicio_bucket(fecha, bucket):
+    if bucket == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if bucket == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def _siguiente_bucket(fecha, bucket):
+    if bucket == 'semana':
+        return fecha + timedelta(days=7)
+    if bucket == 'mes':
+        return date(fecha.year + fecha.month // 12, fecha.month % 12 + 1, 1)
+    return fecha + timedelta(days=1)
+
+
+def _calcular_series(bucket, desde, hasta):
+    """Serie de ingresos, pedidos y estados de pago entre desde y hasta (inclusive).
+
+    Hace una sola consulta agrupada por tabla (Pago y Pedido) y rellena con
+    ceros los períodos sin movimiento para que el gráfico no tenga huecos.
+    Los pedidos archivados por la retención no aparecen en la serie (son más
+    antiguos que RETENCION_PEDIDOS_ENTREGADOS_MESES); los totales sí los cuentan.
+    """
+    truncar, _ = BUCKETS_SERIE[bucket]
+    inicio = timezone.make_aware(datetime.combine(desde, time.min))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+
+    # order_by('periodo') reemplaza el ordering del Meta, que si no entraría en el GROUP BY
+    pagos = (
+        Pago.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+        .annotate(periodo=truncar('fecha_creacion'))
+        .values('periodo')
+        .annotate(
+            ingresos=Sum('monto_total', filter=Q(estado='confirmado')),
+            pagos_pendientes=Count('id', filter=Q(estado='pendiente')),
+            pagos_confirmados=Count('id', filter=Q(estado='confirmado')),
+            pagos_rechazados=Count('id', filter=Q(estado='rechazado')),
+        )
+        .order_by('periodo')
+    )
+    pedidos = (
+        Pedido.objects.filter(fecha_creacion__gte=inicio, fecha_creacion__lt=fin)
+        .annotate(periodo=truncar('fecha_creacion'))
+        .values('periodo')
+        .annotate(pedidos=Count('id'), pedidos_cancelados=Count('id', filter=Q(estado='cancelado')))
+        .order_by('periodo')
+    )
+
+    puntos = {}
+    actual = _inicio_bucket(desde, bucket)
+    while actual <= hasta:
+        puntos[actual] = {
+            'periodo': actual.isoformat(),
+            'ingresos': 0.0,
+            'pedidos': 0,
+            'pedidos_cancelados': 0,
+            'pagos_pendientes': 0,
+            'pagos_confirmados': 0,
+            'pagos_rechazados': 0,
+        }
+        actual = _siguiente_bucket(actual, bucket)
+
+    for fila in pagos:
+        punto = puntos.get(fila['periodo'])
+        if punto is None:
+            continue
+        punto['ingresos'] = float(fila['ingresos'] or 0)
+        punto['pagos_pendientes'] = fila['pagos_pendientes']
+        punto['pagos_confirmados'] = fila['pagos_confirmados']
+        punto['pagos_rechazados'] = fila['pagos_rechazados']
+
+    for fila in pedidos:
+        punto = puntos.get(fila['periodo'])
+        if punto is None:
+            continue
+        punto['pedidos'] = fila['pedidos']
+        punto['pedidos_cancelados'] = fila['pedidos_cancelados']
+
+    return list(puntos.values())
+
+
+@lectura_en_replica
+def estadisticas_series_view(request):
+    """API con la evolución de ingresos, pedidos y pagos agrupados por día, semana o mes.
+
+    Parámetros: ?bucket=dia|semana|mes&desde=AAAA-MM-DD&hasta=AAAA-MM-DD
+    """
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+
+    bucket = request.GET.get('bucket', 'dia')
+    if bucket not in BUCKETS_SERIE:
+        return JsonResponse({'success': False, 'error': 'Bucket no válido (use dia, semana o mes)'}, status=400)
+
+    hoy = timezone.localdate()
+    hasta = parse_date(request.GET.get('hasta', '')) if request.GET.get('hasta') else hoy
+    if not hasta:
+        return JsonResponse({'success': False, 'error': 'Fecha "hasta" inválida (use AAAA-MM-DD)'}, status=400)
+    if request.GET.get('desde'):
+        desde = parse_date(request.GET['desde'])
+        if not desde:
+            return JsonResponse({'success': False, 'error': 'Fecha "desde" inválida (use AAAA-MM-DD)'}, status=400)
+    else:
+        desde = hasta - timedelta(days=BUCKETS_SERIE[bucket][1] - 1)
+
+    if desde > hasta:
+        return JsonResponse({'success': False, 'error': '"desde" no puede ser posterior a "hasta"'}, status=400)
+    if bucket == 'dia' and (hasta - desde).days + 1 > MAX_PUNTOS_SERIE:
+        return JsonResponse({'success': False, 'error': 'Rango demasiado amplio para agrupar por día'}, status=400)
+
+    clave = f'estadisticas_series:{bucket}:{desde.isoformat()}:{hasta.isoformat()}'
+    series = cache.get(clave)
+    if series is None:
+        series = _calcular_series(bucket, desde, hasta)
+        cache.set(clave, series, getattr(settings, 'ESTADISTICAS_SERIES_CACHE_SEGUNDOS', 300))
+
+    return JsonResponse({
+        'success': True,
+        'bucket': bucket,
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'series': series,
+    })
+
+@lectura_en_replica
 def inventario_view(request):
     """Vista para gestionar el inventario de productos"""
     if 'empresa_id' not in request.session:
@@ -142,6 +305,9 @@ def inventario_view(request):
         'utensilios': utensilios,
     }
     
+    # Productos de venta lenta y con riesgo de agotarse según el ritmo de venta reciente
+    context.update(analisis_inventario())
+    
     return render(request, 'Empresas/inventario.html', context)
 
 @require_POST
@@ -171,16 +337,68 @@ def actualizar_inventario_view(request):
         
         producto = modelo.objects.get(id=producto_id)
         producto.cantidad_disponible = nueva_cantidad
+        
+        # Nivel de reorden opcional para las alertas de stock bajo
+        stock_minimo = request.POST.get('stock_minimo')
+        if stock_minimo not in (None, ''):
+            stock_minimo = int(stock_minimo)
+            if stock_minimo < 0:
+                return JsonResponse({'success': False, 'error': 'El stock mínimo no puede ser negativo'}, status=400)
+            producto.stock_minimo = stock_minimo
+        
+        reactivado = reactivar_si_hay_stock(producto)
         producto.save()
         
+        mensaje = f'Inventario actualizado: {nueva_cantidad} unidades disponibles'
+        if reactivado:
+            mensaje += '. El producto se habilitó de nuevo'
+        
         return JsonResponse({
             'success': True,
-            'mensaje': f'Inventario actualizado: {nueva_cantidad} unidades disponibles'
+            'mensaje': mensaje,
+            'reactivado': reactivado
         })
         
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
 
+def api_alertas_inventario(request):
+    """API con las alertas de inventario abiertas (generadas por el job evaluar_inventario)"""
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=401)
+    
+    alertas = AlertaInventario.objects.filter(resuelta=False)[:100]
+    return JsonResponse({
+        'success': True,
+        'no_leidas': AlertaInventario.objects.filter(resuelta=False, leida=False).count(),
+        'alertas': [{
+            'id': alerta.id,
+            'categoria': alerta.categoria,
+            'producto_id': alerta.producto_id,
+            'nombre': alerta.nombre,
+            'tipo': alerta.tipo,
+            'tipo_display': alerta.get_tipo_display(),
+            'cantidad_disponible': alerta.cantidad_disponible,
+            'stock_minimo': alerta.stock_minimo,
+            'leida': alerta.leida,
+            'fecha': timezone.localtime(alerta.fecha_creacion).strftime('%d/%m/%Y %H:%M'),
+        } for alerta in alertas]
+    })
+
+@require_POST
+def marcar_alertas_inventario_leidas(request):
+    """Marca como leídas las alertas de inventario (todas o las indicadas en 'ids')"""
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=401)
+    
+    alertas = AlertaInventario.objects.filter(resuelta=False, leida=False)
+    ids = request.POST.getlist('ids')
+    if ids:
+        alertas = alertas.filter(id__in=[int(i) for i in ids if i.isdigit()])
+    
+    return JsonResponse({'success': True, 'marcadas': alertas.update(leida=True)})
+
+@lectura_en_replica
 def descargar_estadisticas_pdf(request):
     """Genera y descarga un PDF con las estadísticas de ventas y gráficas"""
     if 'empresa_id' not in request.session:
@@ -215,10 +433,11 @@ def descargar_estadisticas_pdf(request):
         total_inventario = inventario_mesas + inventario_sillas + inventario_armarios + inventario_cajoneras + inventario_escritorios + inventario_utensilios
         
         # Estadísticas de pedidos
-        total_pedidos = Pedido.objects.count()
-        pedidos_procesando = Pedido.objects.filter(estado='procesando').count()
-        pedidos_enviado = Pedido.objects.filter(estado='enviado').count()
-        pedidos_entregado = Pedido.objects.filter(estado='entregado').count()
+        archivados = _pedidos_archivados()
+        total_pedidos = Pedido.objects.count() + sum(archivados.values())
+        pedidos_procesando = Pedido.objects.filter(estado='procesando').count() + archivados.get('procesando', 0)
+        pedidos_enviado = Pedido.objects.filter(estado='enviado').count() + archivados.get('enviado', 0)
+        pedidos_entregado = Pedido.objects.filter(estado='entregado').count() + archivados.get('entregado', 0)
         
         # Estadísticas de pagos
         pagos_pendientes = Pago.objects.filter(estado='pendiente').count()
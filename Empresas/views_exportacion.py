@@ -0,0 +1,261 @@
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from core.models import Pago, Pedido, Factura
+from core.exportacion import productos_de_json, iterar_csv, iterar_xlsx, iterar_zip
+from core.facturas import iterar_pdfs_facturas, leer_en_fragmentos
+from .views import empresa_login_required
+
+# Tamaño de lote por defecto para .iterator(); se puede ajustar con EXPORTACION_TAMANO_LOTE
+TAMANO_LOTE_EXPORTACION = 2000
+
+COLUMNAS_ITEM = ['producto_id', 'categoria', 'producto', 'cantidad', 'precio_unitario', 'subtotal_item']
+
+# Estado del pedido de una factura: el del pedido, o el que tenía si la retención lo archivó
+CAMPOS_ESTADO_FACTURA = ('pago__pedido__estado', 'pago__estado_pedido_archivado')
+
+
+def _tamano_lote():
+    return getattr(settings, 'EXPORTACION_TAMANO_LOTE', TAMANO_LOTE_EXPORTACION)
+
+
+def _inicio_del_dia(fecha):
+    return timezone.make_aware(datetime.combine(fecha, time.min))
+
+
+def _filtrar_exportacion(request, queryset, campo_fecha, campo_estado, estados_validos):
+    """Aplica los filtros ?desde=AAAA-MM-DD&hasta=AAAA-MM-DD&estado=... al queryset.
+
+    Devuelve (queryset, error) donde error es un JsonResponse si algún parámetro es inválido.
+    """
+    desde = request.GET.get('desde')
+    hasta = request.GET.get('hasta')
+    estado = request.GET.get('estado')
+
+    if desde:
+        fecha = parse_date(desde)
+        if not fecha:
+            return None, JsonResponse({'success': False, 'error': 'Fecha "desde" inválida (use AAAA-MM-DD)'}, status=400)
+        queryset = queryset.filter(**{f'{campo_fecha}__gte': _inicio_del_dia(fecha)})
+
+    if hasta:
+        fecha = parse_date(hasta)
+        if not fecha:
+            return None, JsonResponse({'success': False, 'error': 'Fecha "hasta" inválida (use AAAA-MM-DD)'}, status=400)
+        # "hasta" es inclusivo: se filtra por menor que el inicio del día siguiente
+        queryset = queryset.filter(**{f'{campo_fecha}__lt': _inicio_del_dia(fecha + timedelta(days=1))})
+
+    if estado:
+        if estado not in estados_validos:
+            return None, JsonResponse({'success': False, 'error': 'Estado no válido'}, status=400)
+        # campo_estado puede ser varios campos: basta con que coincida uno
+        filtro = Q()
+        for campo in (campo_estado,) if isinstance(campo_estado, str) else campo_estado:
+            filtro |= Q(**{campo: estado})
+        queryset = queryset.filter(filtro)
+
+    return queryset.order_by(campo_fecha, 'id'), None
+
+
+def _filas_con_items(registros, columnas_base):
+    """Aplana los productos JSON: una fila por item (o una sola fila si no tiene items)."""
+    for registro in registros:
+        base = columnas_base(registro)
+        items = productos_de_json(registro.productos)
+        if not items:
+            yield base + [''] * len(COLUMNAS_ITEM)
+            continue
+        for item in items:
+            yield base + [
+                item['id'],
+                item['categoria'],
+                item['nombre'],
+                item['cantidad'],
+                item['precio_unitario'],
+                item['subtotal'],
+            ]
+
+
+def _fecha_texto(valor):
+    if not valor:
+        return ''
+    return timezone.localtime(valor).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _respuesta_exportacion(request, nombre_base, encabezados, filas):
+    formato = request.GET.get('formato', 'csv').lower()
+    marca = timezone.now().strftime('%Y%m%d_%H%M%S')
+
+    if formato == 'xlsx':
+        response = StreamingHttpResponse(
+            iterar_xlsx(encabezados, filas, hoja=nombre_base.capitalize()),
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{nombre_base}_{marca}.xlsx"'
+        return response
+
+    if formato != 'csv':
+        return JsonResponse({'success': False, 'error': 'Formato no válido (use csv o xlsx)'}, status=400)
+
+    response = StreamingHttpResponse(iterar_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre_base}_{marca}.csv"'
+    return response
+
+
+@empresa_login_required
+def exportar_pagos_view(request):
+    """Exporta los pagos (una fila por producto) en CSV o XLSX sin cargarlos en memoria"""
+    estados = [estado for estado, _ in Pago.ESTADO_CHOICES]
+    pagos, error = _filtrar_exportacion(request, Pago.objects.select_related('cliente'), 'fecha_creacion', 'estado', estados)
+    if error:
+        return error
+
+    encabezados = [
+        'pago_id', 'fecha_creacion', 'fecha_confirmacion', 'estado', 'cliente', 'nombre_completo',
+        'cedula', 'email', 'telefono', 'metodo_pago', 'monto_total',
+    ] + COLUMNAS_ITEM
+
+    def columnas_pago(pago):
+        return [
+            pago.id,
+            _fecha_texto(pago.fecha_creacion),
+            _fecha_texto(pago.fecha_confirmacion),
+            pago.estado,
+            pago.cliente.usernameCliente,
+            pago.nombre_completo,
+            pago.cedula,
+            pago.email,
+            pago.telefono,
+            pago.metodo_pago,
+            pago.monto_total,
+        ]
+
+    filas = _filas_con_items(pagos.iterator(chunk_size=_tamano_lote()), columnas_pago)
+    return _respuesta_exportacion(request, 'pagos', encabezados, filas)
+
+
+@empresa_login_required
+def exportar_pedidos_view(request):
+    """Exporta los pedidos (una fila por producto) en CSV o XLSX sin cargarlos en memoria"""
+    estados = [estado for estado, _ in Pedido.ESTADO_PEDIDO_CHOICES]
+    pedidos, error = _filtrar_exportacion(request, Pedido.objects.select_related('cliente'), 'fecha_creacion', 'estado', estados)
+    if error:
+        return error
+
+    encabezados = [
+        'pedido_id', 'pago_id', 'fecha_creacion', 'estado', 'cliente', 'nombre_completo', 'telefono',
+        'direccion', 'ciudad', 'departamento', 'empresa_envio', 'numero_seguimiento',
+        'fecha_entrega_real', 'monto_total',
+    ] + COLUMNAS_ITEM
+
+    def columnas_pedido(pedido):
+        return [
+            pedido.id,
+            pedido.pago_id,
+            _fecha_texto(pedido.fecha_creacion),
+            pedido.estado,
+            pedido.cliente.usernameCliente,
+            pedido.nombre_completo or '',
+            pedido.telefono or '',
+            pedido.direccion or '',
+            pedido.ciudad or '',
+            pedido.departamento or '',
+            pedido.empresa_envio or '',
+            pedido.numero_seguimiento or '',
+            _fecha_texto(pedido.fecha_entrega_real),
+            pedido.monto_total,
+        ]
+
+    filas = _filas_con_items(pedidos.iterator(chunk_size=_tamano_lote()), columnas_pedido)
+    return _respuesta_exportacion(request, 'pedidos', encabezados, filas)
+
+
+@empresa_login_required
+def exportar_facturas_view(request):
+    """Exporta las facturas (una fila por producto) en CSV o XLSX sin cargarlas en memoria.
+
+    El filtro ?estado= aplica al estado del pedido asociado (p. ej. entregado o cancelado).
+    """
+    estados = [estado for estado, _ in Pedido.ESTADO_PEDIDO_CHOICES]
+    facturas, error = _filtrar_exportacion(request, Factura.objects.all(), 'fecha_emision', CAMPOS_ESTADO_FACTURA, estados)
+    if error:
+        return error
+
+    encabezados = [
+        'numero_factura', 'pago_id', 'fecha_emision', 'nombre_cliente', 'email_cliente',
+        'telefono_cliente', 'direccion_cliente', 'ciudad_cliente', 'departamento_cliente',
+        'subtotal', 'impuestos', 'total',
+    ] + COLUMNAS_ITEM
+
+    def columnas_factura(factura):
+        return [
+            factura.numero_factura,
+            factura.pago_id,
+            _fecha_texto(factura.fecha_emision),
+            factura.nombre_cliente,
+            factura.email_cliente,
+            factura.telefono_cliente,
+            factura.direccion_cliente,
+            factura.ciudad_cliente,
+            factura.departamento_cliente,
+            factura.subtotal,
+            factura.impuestos,
+            factura.total,
+        ]
+
+    filas = _filas_con_items(facturas.iterator(chunk_size=_tamano_lote()), columnas_factura)
+    return _respuesta_exportacion(request, 'facturas', encabezados, filas)
+
+
+def _clave_progreso(request, token):
+    return f"exportacion_facturas_pdf:{request.session.get('empresa_id')}:{token}"
+
+
+@empresa_login_required
+def exportar_facturas_pdf_view(request):
+    """Descarga un ZIP con los PDFs de las facturas del período (mismos filtros que exportar_facturas).
+
+    Los PDFs en caché se envían primero y los que faltan se renderizan uno tras
+    otro en esta misma petición: el pool de procesos solo lo usa el comando
+    exportar_facturas_pdf (crear procesos desde un worker web con hilos no es
+    seguro y cada descarga simultánea multiplicaría los procesos). El ZIP se
+    envía en streaming. Si se pasa ?token=..., el avance se puede consultar en
+    exportar_facturas_pdf_progreso.
+    """
+    estados = [estado for estado, _ in Pedido.ESTADO_PEDIDO_CHOICES]
+    facturas, error = _filtrar_exportacion(request, Factura.objects.select_related('pago'), 'fecha_emision', CAMPOS_ESTADO_FACTURA, estados)
+    if error:
+        return error
+
+    token = request.GET.get('token')
+    clave = _clave_progreso(request, token) if token else None
+
+    def progreso(procesadas, total, nombre):
+        if clave:
+            cache.set(clave, {'procesadas': procesadas, 'total': total, 'ultima': nombre}, 3600)
+
+    def entradas():
+        for nombre, ruta in iterar_pdfs_facturas(facturas.iterator(chunk_size=_tamano_lote()), workers=1, progreso=progreso):
+            yield nombre, leer_en_fragmentos(ruta)
+        if clave:
+            progreso_final = cache.get(clave) or {'procesadas': 0, 'total': 0, 'ultima': None}
+            progreso_final['terminado'] = True
+            cache.set(clave, progreso_final, 3600)
+
+    marca = timezone.now().strftime('%Y%m%d_%H%M%S')
+    response = StreamingHttpResponse(iterar_zip(entradas()), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="facturas_pdf_{marca}.zip"'
+    return response
+
+
+@empresa_login_required
+def progreso_exportacion_facturas_view(request, token):
+    """Avance de una exportación de facturas en PDF iniciada con ?token=..."""
+    estado = cache.get(_clave_progreso(request, token))
+    if estado is None:
+        return JsonResponse({'success': False, 'error': 'Exportación no encontrada'}, status=404)
+    return JsonResponse({'success': True, 'terminado': estado.get('terminado', False), **estado})
@@ -0,0 +1,131 @@
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
+from core.lotes import MAX_POR_PAGINA, POR_PAGINA, leer_lote, parametro_entero
+from core.models import UserClientes
+from core.replicas import lectura_en_replica
+from .models import EmpresaRegistrada
+
+# Usuarios que se pueden activar/desactivar en una sola petición
+MAX_USUARIOS_POR_LOTE = 1000
+
+# tipo: (modelo, campos por los que se puede ordenar, campos de búsqueda)
+TIPOS_USUARIO = {
+    'cliente': (
+        UserClientes,
+        {'username': 'usernameCliente', 'email': 'email', 'estado': 'is_active', 'fecha_registro': 'fecha_registro'},
+        ('usernameCliente', 'email'),
+    ),
+    'empresa': (
+        EmpresaRegistrada,
+        {'username': 'username', 'email': 'email', 'estado': 'is_active', 'fecha_registro': 'fecha_registro'},
+        ('username', 'email', 'nombre_empresa'),
+    ),
+}
+
+
+def _fila(tipo, usuario):
+    fila = {
+        'id': usuario['id'],
+        'tipo': tipo,
+        'username': usuario['usernameCliente'] if tipo == 'cliente' else usuario['username'],
+        'email': usuario['email'],
+        'is_active': usuario['is_active'],
+        'fecha_registro': usuario['fecha_registro'].isoformat() if usuario['fecha_registro'] else None,
+        'status_changed_at': usuario['status_changed_at'].isoformat() if usuario['status_changed_at'] else None,
+    }
+    if tipo == 'empresa':
+        fila['nombre_empresa'] = usuario['nombre_empresa']
+    return fila
+
+
+@require_GET
+@lectura_en_replica
+def api_usuarios(request):
+    """API del listado de gestión de usuarios, paginado en el servidor.
+
+    Parámetros: ?tipo=cliente|empresa&q=<texto>&estado=activo|inactivo
+    &orden=[-]username|email|estado|fecha_registro&pagina=N&por_pagina=N
+    """
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+
+    tipo = request.GET.get('tipo', 'cliente')
+    if tipo not in TIPOS_USUARIO:
+        return JsonResponse({'success': False, 'error': 'Tipo de usuario inválido (use cliente o empresa)'}, status=400)
+    modelo, campos_orden, campos_busqueda = TIPOS_USUARIO[tipo]
+
+    orden = request.GET.get('orden', '-fecha_registro')
+    campo_orden = campos_orden.get(orden.lstrip('-'))
+    if campo_orden is None:
+        return JsonResponse({'success': False, 'error': 'Orden no válido'}, status=400)
+    descendente = orden.startswith('-')
+
+    pagina = parametro_entero(request.GET.get('pagina'), 1, 1, 10**6)
+    por_pagina = parametro_entero(request.GET.get('por_pagina'), POR_PAGINA, 1, MAX_POR_PAGINA)
+    if pagina is None or por_pagina is None:
+        return JsonResponse({'success': False, 'error': 'Página inválida'}, status=400)
+
+    usuarios = modelo.objects.all()
+    estado = request.GET.get('estado', '')
+    if estado:
+        if estado not in ('activo', 'inactivo'):
+            return JsonResponse({'success': False, 'error': 'Estado no válido (use activo o inactivo)'}, status=400)
+        usuarios = usuarios.filter(is_active=estado == 'activo')
+    busqueda = request.GET.get('q', '').strip()
+    if busqueda:
+        filtro = Q()
+        for campo in campos_busqueda:
+            filtro |= Q(**{f'{campo}__icontains': busqueda})
+        usuarios = usuarios.filter(filtro)
+
+    total = usuarios.count()
+    # El id desempata: con valores repetidos (estado, fecha) las páginas no se solapan
+    usuarios = usuarios.order_by(f"{'-' if descendente else ''}{campo_orden}", f"{'-' if descendente else ''}id")
+    columnas = ['id', 'email', 'is_active', 'fecha_registro', 'status_changed_at']
+    columnas += ['usernameCliente'] if tipo == 'cliente' else ['username', 'nombre_empresa']
+    inicio = (pagina - 1) * por_pagina
+    filas = usuarios.values(*columnas)[inicio:inicio + por_pagina]
+
+    return JsonResponse({
+        'success': True,
+        'tipo': tipo,
+        'pagina': pagina,
+        'por_pagina': por_pagina,
+        'total': total,
+        'paginas': (total + por_pagina - 1) // por_pagina,
+        'usuarios': [_fila(tipo, usuario) for usuario in filas],
+    })
+
+
+def cambiar_estado_usuarios(tipo, ids, activo):
+    """Activa o desactiva los usuarios `ids` con un solo UPDATE; devuelve cuántos cambiaron."""
+    modelo = TIPOS_USUARIO[tipo][0]
+    ahora = timezone.now()
+    cambios = {'is_active': activo, 'status_changed_at': ahora}
+    if tipo == 'cliente':
+        # update() no aplica auto_now
+        cambios['last_modified'] = ahora
+    # Los que ya están en ese estado no se tocan (conservan su status_changed_at)
+    return modelo.objects.filter(pk__in=ids).exclude(is_active=activo).update(**cambios)
+
+
+@require_POST
+def api_cambiar_estado_usuarios(request):
+    """Activa o desactiva varios usuarios. JSON: {"tipo": "cliente", "ids": [1, 2], "accion": "enable"|"disable"}"""
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+    datos, error = leer_lote(request, MAX_USUARIOS_POR_LOTE, 'usuarios')
+    if error:
+        return error
+
+    tipo = datos.get('tipo')
+    accion = datos.get('accion')
+    if tipo not in TIPOS_USUARIO:
+        return JsonResponse({'success': False, 'error': 'Tipo de usuario inválido'}, status=400)
+    if accion not in ('enable', 'disable'):
+        return JsonResponse({'success': False, 'error': 'Acción inválida'}, status=400)
+
+    actualizados = cambiar_estado_usuarios(tipo, datos['ids'], accion == 'enable')
+    return JsonResponse({'success': True, 'actualizados': actualizados})
@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Servidor: uvicorn (en requirements.txt). Ejemplo con 4 procesos:
+
+    uvicorn Gangazos1.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+La espera larga del chat (core/chat_espera.py) solo se activa en el
+navegador con CHAT_ESPERA_LARGA=true: ponerla cuando el sitio ya corra con
+uvicorn; con un servidor WSGI cada espera ocuparía un worker.
 """
 
 import os
@@ -14,3 +22,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Gangazos1.settings')
 
 application = get_asgi_application()
+
+# Los servidores no ejecutan `manage.py check`: los avisos de producción van al log al arrancar
+from core.checks import avisar_al_arrancar  # noqa: E402
+
+avisar_al_arrancar()
@@ -24,13 +24,19 @@ load_dotenv(BASE_DIR / '.env')
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
+# Perfil de configuración: 'desarrollo' (predeterminado) o 'produccion'.
+# En producción: DEBUG apagado, conexiones persistentes, plantillas en caché,
+# GZip, caché compartida y sesiones cached_db (ver más abajo).
+GANGAZOS_ENTORNO = os.environ.get('GANGAZOS_ENTORNO', 'desarrollo').lower()
+PRODUCCION = GANGAZOS_ENTORNO == 'produccion'
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-ia@m&&2#vn8nsacptaiu%o=*yl0q0wot^(q#&-_lhgbpi)d=vj'
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-ia@m&&2#vn8nsacptaiu%o=*yl0q0wot^(q#&-_lhgbpi)d=vj')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'false' if PRODUCCION else 'true').lower() == 'true'
 
-ALLOWED_HOSTS = ['*']
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '*').split(',') if host.strip()]
 
 
 # Application definition
@@ -48,23 +54,40 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero: mide la petición completa, incluidas sesión y mensajes
+    'core.middleware.InstrumentacionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    # Tras escribir, lee del primario aunque la vista use la réplica
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Perfilado bajo demanda (?perfilar=1 para staff); necesita request.user
+    'core.middleware.PerfiladorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Último: mide solo la vista
+    'core.middleware.TiempoVistaMiddleware',
 ]
 
+if PRODUCCION:
+    # Comprime las respuestas HTML y JSON grandes (antes de cualquier middleware que lea el contenido)
+    MIDDLEWARE.insert(MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1, 'django.middleware.gzip.GZipMiddleware')
+
 # Configuración de sesiones - Cada usuario tiene su propia sesión
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Sesiones en base de datos
 SESSION_COOKIE_NAME = 'sessionid'
 SESSION_COOKIE_AGE = 86400  # 24 horas
 SESSION_SAVE_EVERY_REQUEST = True  # Actualizar sesión en cada request
 SESSION_COOKIE_HTTPONLY = True  # Seguridad: no accesible desde JavaScript
-SESSION_COOKIE_SECURE = False  # Cambiar a True en producción con HTTPS
+SESSION_COOKIE_SECURE = PRODUCCION  # Solo por HTTPS en producción
 SESSION_COOKIE_SAMESITE = 'Lax'  # Protección CSRF
+CSRF_COOKIE_SECURE = PRODUCCION
+
+if PRODUCCION:
+    # Lecturas de sesión desde la caché; la base de datos solo se usa al escribir
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 ROOT_URLCONF = 'Gangazos1.urls'
 
@@ -85,12 +108,37 @@ TEMPLATES = [
     },
 ]
 
+if PRODUCCION:
+    # Cargador de plantillas en caché explícito: cada plantilla se compila una sola vez por proceso
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'Gangazos1.wsgi.application'
+# Servidor ASGI (uvicorn, ver Gangazos1/asgi.py): necesario para la espera larga del chat
+ASGI_APPLICATION = 'Gangazos1.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Opciones de SQLite para varios procesos/hilos escribiendo a la vez (se aplican en cada conexión nueva)
+SQLITE_OPCIONES_ALTA_CONCURRENCIA = {
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'      # seguro con WAL: solo se sincroniza en los checkpoints
+        'PRAGMA mmap_size=268435456;'     # 256 MB de E/S mapeada en memoria
+        'PRAGMA cache_size=-65536;'       # 64 MB de caché de páginas por conexión
+        'PRAGMA temp_store=MEMORY;'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': 20,  # busy_timeout en segundos
+}
+
 # Por defecto usa SQLite (por problemas de DNS con Supabase en tu red)
 # Para usar PostgreSQL de Supabase, configura: USE_SUPABASE=true en .env
 USE_SUPABASE = os.environ.get('USE_SUPABASE', 'false').lower() == 'true'
@@ -109,8 +157,20 @@ if USE_SUPABASE:
                 'sslmode': 'require',
                 'connect_timeout': 10,
             },
+            # Conexiones persistentes: evita abrir una conexión SSL nueva en cada petición.
+            # CONN_HEALTH_CHECKS descarta la conexión si el servidor la cerró mientras esperaba.
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600 if PRODUCCION else 0)),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    # Pool de conexiones de psycopg 3 (requiere psycopg[pool]); reemplaza a CONN_MAX_AGE
+    if os.environ.get('DB_POOL', 'false').lower() == 'true':
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+            'timeout': 10,
+        }
 else:
     # SQLite para desarrollo local (predeterminado)
     DATABASES = {
@@ -119,6 +179,54 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    # Modo de alta concurrencia: WAL deja leer mientras alguien escribe y
+    # BEGIN IMMEDIATE evita el "database is locked" al pasar de lectura a escritura.
+    if os.environ.get('SQLITE_ALTA_CONCURRENCIA', 'true' if PRODUCCION else 'false').lower() == 'true':
+        DATABASES['default']['OPTIONS'] = dict(SQLITE_OPCIONES_ALTA_CONCURRENCIA)
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+# Réplica de solo lectura para reportes y listados (ver core/replicas.py).
+# Supabase: SUPABASE_REPLICA_HOST (réplica de lectura del proyecto).
+# SQLite: SQLITE_REPLICA con la ruta de una copia (se refresca con `manage.py copiar_replica_sqlite`).
+if USE_SUPABASE and os.environ.get('SUPABASE_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['SUPABASE_REPLICA_HOST'],
+        'PORT': os.environ.get('SUPABASE_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+    }
+elif not USE_SUPABASE and os.environ.get('SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['SQLITE_REPLICA'],
+        'OPTIONS': {**DATABASES['default'].get('OPTIONS', {}), 'transaction_mode': None},
+    }
+if 'replica' in DATABASES:
+    # En los tests la réplica apunta a la misma base de datos que default
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DB_ALIAS = 'replica'
+else:
+    REPLICA_DB_ALIAS = None
+DATABASE_ROUTERS = ['core.replicas.ReplicaLecturaRouter']
+# Segundos que un usuario lee del primario después de escribir (retraso de replicación)
+REPLICA_PEGADO_SEGUNDOS = int(os.environ.get('REPLICA_PEGADO_SEGUNDOS', 10))
+
+# Caché: Redis si se configura REDIS_URL (compartida entre procesos), si no memoria local
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': 'gangazos',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'gangazos',
+        }
+    }
 
 
 
@@ -140,6 +248,20 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashers de contraseñas (clientes, empresas y usuarios de Django); ver core/contrasenas.py.
+# El primero es el que se usa al guardar; los demás solo para comprobar y rehacer al iniciar sesión
+PASSWORD_HASHERS = [
+    'core.contrasenas.PBKDF2IteracionesPasswordHasher',
+    'core.contrasenas.PBKDF2WrappedSHA256PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+# Iteraciones de PBKDF2: elegir con `manage.py medir_hash_contrasenas` (p99 de login en hora punta)
+CONTRASENAS_ITERACIONES = int(os.environ.get('CONTRASENAS_ITERACIONES', 1_000_000))
+# Procesos usados por `manage.py migrar_contrasenas`
+CONTRASENAS_WORKERS = int(os.environ.get('CONTRASENAS_WORKERS', os.cpu_count() or 1))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -161,10 +283,125 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# Destino de collectstatic
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+if PRODUCCION:
+    # Minifica CSS/JS, añade el hash del contenido al nombre y precomprime (.gz/.br) al hacer collectstatic
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'core.estaticos.ManifestMinificadoStorage'},
+    }
+# Django sirve STATIC_ROOT con caché de un año (desactívalo si nginx u otro servidor ya lo hace)
+SERVIR_ESTATICOS = os.environ.get('SERVIR_ESTATICOS', 'true' if PRODUCCION else 'false').lower() == 'true'
 
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'uploads'
+# Django sirve MEDIA_URL con Range, ETag y permisos de los archivos privados (comprobantes)
+SERVIR_MEDIA = os.environ.get('SERVIR_MEDIA', 'true').lower() == 'true'
+# Con un proxy delante: 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache/lighttpd). Django solo comprueba permisos
+MEDIA_ENVIO = os.environ.get('MEDIA_ENVIO', '').lower()
+# Location `internal` de nginx que apunta a MEDIA_ROOT (solo modo x-accel-redirect)
+MEDIA_PREFIJO_INTERNO = os.environ.get('MEDIA_PREFIJO_INTERNO', '/media-interno/')
+
+# Modelos 3D de las ideas (core/modelos3d.py)
+# 'hilo': se procesan en segundo plano en el proceso web; 'comando': los recoge `manage.py procesar_modelos_3d`
+MODELOS_3D_PROCESAMIENTO = os.environ.get('MODELOS_3D_PROCESAMIENTO', 'hilo')
+MODELOS_3D_TAMANO_MAXIMO_MB = int(os.environ.get('MODELOS_3D_TAMANO_MAXIMO_MB', 50))
+MODELOS_3D_TRIANGULOS_MAXIMOS = int(os.environ.get('MODELOS_3D_TRIANGULOS_MAXIMOS', 3_000_000))
+# Triángulos de la vista previa que cargan las listas y el visor antes de la malla completa
+MODELOS_3D_TRIANGULOS_PREVIEW = int(os.environ.get('MODELOS_3D_TRIANGULOS_PREVIEW', 5000))
+
+# PDFs de facturas generados (caché privada, fuera de MEDIA_ROOT)
+FACTURAS_PDF_DIR = BASE_DIR / 'facturas_pdf'
+# Procesos usados por `manage.py exportar_facturas_pdf` para renderizar facturas en lote
+# (la descarga desde el panel las renderiza una a una en la petición)
+FACTURAS_PDF_WORKERS = int(os.environ.get('FACTURAS_PDF_WORKERS', os.cpu_count() or 1))
+# Numeración de facturas (core/numeracion.py): PREFIJO-AÑO-000001, consecutiva por prefijo y año
+FACTURAS_PREFIJO = os.environ.get('FACTURAS_PREFIJO', 'FACT')
+
+# Instrumentación por petición (cabecera Server-Timing y log de peticiones lentas)
+INSTRUMENTACION_ACTIVA = os.environ.get('INSTRUMENTACION_ACTIVA', 'true').lower() == 'true'
+# Peticiones que tarden más que esto (ms) se registran en el logger 'gangazos.rendimiento'
+INSTRUMENTACION_UMBRAL_LENTO_MS = float(os.environ.get('INSTRUMENTACION_UMBRAL_LENTO_MS', 500))
+# Consultas SQL que tarden más que esto (ms) se registran con la pila desde donde se hicieron
+INSTRUMENTACION_UMBRAL_SQL_LENTO_MS = float(os.environ.get('INSTRUMENTACION_UMBRAL_SQL_LENTO_MS', 50))
+# Peticiones recientes por ruta usadas para los percentiles
+INSTRUMENTACION_MUESTRAS_POR_RUTA = int(os.environ.get('INSTRUMENTACION_MUESTRAS_POR_RUTA', 500))
+
+# Perfiles de peticiones (?perfilar=1 o cabecera X-Perfilar para usuarios staff)
+PERFILES_DIR = Path(os.environ.get('PERFILES_DIR', BASE_DIR / 'perfiles'))
+# Fracción de todas las peticiones que se perfila por muestreo (0 = desactivado)
+PERFILADOR_FRACCION_MUESTREO = float(os.environ.get('PERFILADOR_FRACCION_MUESTREO', 0))
+# Segundos entre muestras de pila
+PERFILADOR_INTERVALO_MUESTREO = float(os.environ.get('PERFILADOR_INTERVALO_MUESTREO', 0.005))
+# Perfiles que se conservan antes de borrar los más antiguos
+PERFILADOR_MAX_PERFILES = int(os.environ.get('PERFILADOR_MAX_PERFILES', 200))
+
+# Envíos de pago idempotentes (core/idempotencia.py)
+# Horas durante las que se repite la respuesta de una Idempotency-Key ya usada
+PAGOS_IDEMPOTENCIA_HORAS = int(os.environ.get('PAGOS_IDEMPOTENCIA_HORAS', 24))
+# Minutos durante los que el mismo comprobante del mismo cliente se trata como el mismo pago
+PAGOS_VENTANA_DUPLICADOS_MINUTOS = int(os.environ.get('PAGOS_VENTANA_DUPLICADOS_MINUTOS', 30))
+# Segundos tras los que un envío reclamado que no guardó respuesta se da por abandonado
+# (bastante más que el timeout de petición del servidor: el primer envío ya no puede seguir vivo)
+PAGOS_PROCESAMIENTO_MAX_SEGUNDOS = int(os.environ.get('PAGOS_PROCESAMIENTO_MAX_SEGUNDOS', 120))
+
+# Límites de intentos (core/limites.py): regla -> {'ip' | 'cuenta': (intentos, segundos)}
+# Con memoria local cada proceso cuenta por separado; con REDIS_URL el límite es global
+LIMITES_ACTIVOS = os.environ.get('LIMITES_ACTIVOS', 'true').lower() == 'true'
+LIMITES_PETICIONES = {
+    'login': {'ip': (20, 60), 'cuenta': (10, 300)},
+    'login_empresa': {'ip': (20, 60), 'cuenta': (10, 300)},
+    # Códigos de 6 dígitos (TOTP) y de 4 dígitos (registro): pocos intentos por cuenta
+    'verificar_2fa': {'ip': (20, 60), 'cuenta': (5, 300)},
+    'verificar_codigo': {'ip': (20, 60), 'cuenta': (5, 600)},
+    'enviar_mensaje': {'ip': (60, 60), 'cuenta': (30, 60)},
+}
+# Proxies delante de Django que añaden X-Forwarded-For (0: se usa REMOTE_ADDR)
+LIMITES_PROXIES_CONFIABLES = int(os.environ.get('LIMITES_PROXIES_CONFIABLES', 0))
+
+# Chat: espera larga de mensajes nuevos (core/chat_espera.py)
+# El navegador solo la usa con true; activarla únicamente si el sitio se sirve con ASGI
+# (uvicorn): con WSGI cada espera ocupa un worker durante CHAT_ESPERA_TIMEOUT
+CHAT_ESPERA_LARGA = os.environ.get('CHAT_ESPERA_LARGA', 'false').lower() == 'true'
+# Segundos que una petición de espera queda abierta antes de responder sin novedades
+CHAT_ESPERA_TIMEOUT = float(os.environ.get('CHAT_ESPERA_TIMEOUT', 25))
+# Segundos entre revisiones de la base de datos (una consulta por tipo de chat para todas las esperas)
+CHAT_ESPERA_INTERVALO = float(os.environ.get('CHAT_ESPERA_INTERVALO', 1))
+
+# Retención de datos (core/retencion.py, `manage.py aplicar_retencion`); 0 desactiva la política
+# Pedidos entregados que pasan a RegistroArchivado después de estos meses (los totales de
+# estadísticas los siguen contando por su pago; la serie temporal solo muestra Pedido)
+RETENCION_PEDIDOS_ENTREGADOS_MESES = int(os.environ.get('RETENCION_PEDIDOS_ENTREGADOS_MESES', 24))
+# Reservas de carrito sin tocar durante estas horas (carritos abandonados) que se borran
+RETENCION_CARRITOS_HORAS = int(os.environ.get('RETENCION_CARRITOS_HORAS', 72))
+# Filas borradas o archivadas por transacción
+RETENCION_LOTE = int(os.environ.get('RETENCION_LOTE', 500))
+# Archivos de MEDIA_ROOT más nuevos que esto nunca se consideran huérfanos (subidas en curso)
+MEDIOS_GC_GRACIA_HORAS = int(os.environ.get('MEDIOS_GC_GRACIA_HORAS', 24))
+
+# Moderación de comentarios (core/moderacion.py)
+# Puntuación de spam (0-100) desde la que un comentario nuevo se rechaza sin pasar por la cola
+COMENTARIOS_UMBRAL_SPAM = int(os.environ.get('COMENTARIOS_UMBRAL_SPAM', 60))
+# Palabras bloqueadas adicionales, separadas por comas
+COMENTARIOS_PALABRAS_BLOQUEADAS = [
+    palabra.strip() for palabra in os.environ.get('COMENTARIOS_PALABRAS_BLOQUEADAS', '').split(',') if palabra.strip()
+]
+# Segundos que los testimonios de la página de inicio quedan en la caché (se invalidan al moderar)
+TESTIMONIOS_CACHE_SEGUNDOS = int(os.environ.get('TESTIMONIOS_CACHE_SEGUNDOS', 600))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'consola': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'gangazos.rendimiento': {'handlers': ['consola'], 'level': 'WARNING', 'propagate': False},
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
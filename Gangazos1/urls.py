@@ -17,8 +17,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include,re_path
 from django.conf import settings
-from django.conf.urls.static import static
 from core import views
+from core.views_estaticos import servir_estatico, servir_media
 from Empresas import views as empresas_views
 
 urlpatterns = [
@@ -71,6 +71,7 @@ urlpatterns = [
     path('factura-cliente/<int:pago_id>/', views.ver_factura_cliente_view, name='ver_factura_cliente'),
     # API para obtener cantidad disponible de productos
     path('api/producto/cantidad-disponible/', views.get_cantidad_disponible_view, name='api_cantidad_disponible'),
+    path('api/productos/disponibilidad/', views.disponibilidad_productos_view, name='api_disponibilidad_productos'),
     # API para sincronizar carrito
     path('api/carrito/sincronizar/', views.sincronizar_carrito_view, name='sincronizar_carrito'),
     path('api/carrito/limpiar/', views.limpiar_carrito_view, name='limpiar_carrito'),
@@ -81,6 +82,10 @@ urlpatterns = [
     path('admin/', admin.site.urls),
 ]
 
-# Servir archivos media en desarrollo
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Archivos subidos: rangos de bytes, caché con validadores y permisos de los privados
+if settings.SERVIR_MEDIA:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), servir_media, name='servir_media')]
+
+# Estáticos de collectstatic (con hash y precomprimidos) cuando no hay un servidor delante que los sirva
+if settings.SERVIR_ESTATICOS:
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % settings.STATIC_URL.lstrip('/'), servir_estatico, name='servir_estatico')]
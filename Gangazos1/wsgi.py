@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Gangazos1.settings')
 
 application = get_wsgi_application()
+
+# Los servidores no ejecutan `manage.py check`: los avisos de producción van al log al arrancar
+from core.checks import avisar_al_arrancar  # noqa: E402
+
+avisar_al_arrancar()
@@ -0,0 +1,33 @@
+"""
+Base de datos desechable para los comandos que crean datos de prueba
+(reporte_consultas, explicar_consultas, reporte_html).
+
+Esos comandos crean clientes, pagos, pedidos... para medir las vistas. Antes
+lo hacían en la base de datos real dentro de una transacción que se deshacía
+al final, pero en SQLite esa transacción retiene el bloqueo de escritura
+durante toda la medición y frena las escrituras del sitio. base_de_prueba()
+crea las bases de datos de prueba igual que `manage.py test` (con las
+migraciones) y las destruye al salir; la real no se toca. Como en TestCase,
+el bloque corre dentro de una transacción: así las vistas que usan
+transaction.atomic() hacen las mismas consultas que en las pruebas.
+"""
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+
+@contextmanager
+def base_de_prueba(verbosity=0):
+    """Ejecuta el bloque con todas las conexiones apuntando a bases de datos de prueba nuevas."""
+    # Entorno de pruebas: el cliente HTTP usa el host 'testserver'
+    setup_test_environment()
+    try:
+        antiguas = setup_databases(verbosity=verbosity, interactive=False, serialized_aliases=set())
+        try:
+            with transaction.atomic():
+                yield
+        finally:
+            teardown_databases(antiguas, verbosity=verbosity)
+    finally:
+        teardown_test_environment()
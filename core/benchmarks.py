@@ -0,0 +1,399 @@
+"""
+Benchmarks de los endpoints más usados con el cliente de pruebas de Django.
+
+Cada escenario prepara su sesión (cliente, empresa del panel o empresa del
+chat), hace unas peticiones de calentamiento y luego mide latencia y número
+de consultas en cada repetición. El resultado se guarda o se compara contra
+una línea base JSON: una regresión es un p95 por encima de la tolerancia o
+cualquier consulta de más.
+
+benchmark_concurrencia_sqlite() lanza varios procesos que sincronizan el
+carrito y registran pagos a la vez, sobre una copia temporal de la base de
+datos, para comparar el modo por defecto de SQLite (rollback journal) con el
+modo de alta concurrencia (WAL).
+
+benchmark_numeracion_facturas() mide cuántos números de factura por segundo
+se reservan con varios hilos a la vez en la base de datos configurada
+(SQLite o PostgreSQL) y comprueba que la numeración queda sin huecos.
+"""
+import json
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.signals import got_request_exception
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Empresas.models import EmpresaRegistrada
+
+from .instrumentacion import percentil
+from .models import ContadorFactura, Mesas, Pedido, UserClientes, UserEmpresa
+from .numeracion import reservar_numeros
+
+
+def _cliente_con_mas_pedidos():
+    fila = Pedido.objects.values('cliente__usernameCliente').annotate(total=Count('id')).order_by('-total').first()
+    return fila['cliente__usernameCliente'] if fila else None
+
+
+def _empresa_chat_con_mas_ideas():
+    empresa = UserEmpresa.objects.annotate(total=Count('idea')).order_by('-total').first()
+    return empresa.usernameEmpresa if empresa else None
+
+
+def _sesion_cliente():
+    username = _cliente_con_mas_pedidos()
+    return {'usernameCliente': username} if username else None
+
+
+def _sesion_empresa_chat():
+    username = _empresa_chat_con_mas_ideas()
+    return {'usernameEmpresa': username} if username else None
+
+
+def _sesion_panel_empresa():
+    empresa = EmpresaRegistrada.objects.order_by('id').first()
+    if empresa is None:
+        return None
+    return {'empresa_id': empresa.id, 'empresa_username': empresa.username, 'empresa_nombre': empresa.nombre_empresa}
+
+
+# nombre: (nombre de URL, parámetros GET, función que da la sesión o None si no aplica)
+ESCENARIOS = {
+    'productos': ('productos', {}, lambda: {}),
+    'mis_pedidos': ('mis_pedidos', {}, _sesion_cliente),
+    'api_conversaciones': ('api_conversaciones', {}, _sesion_empresa_chat),
+    'estadisticas': ('estadisticas', {}, _sesion_panel_empresa),
+    'estadisticas_series': ('estadisticas_series', {'bucket': 'mes'}, _sesion_panel_empresa),
+}
+
+
+def _medir_escenario(nombre, repeticiones, calentamiento):
+    nombre_url, parametros, sesion = ESCENARIOS[nombre]
+    datos_sesion = sesion()
+    if datos_sesion is None:
+        return None
+
+    cliente = Client()
+    if datos_sesion:
+        session = cliente.session
+        session.update(datos_sesion)
+        session.save()
+    url = reverse(nombre_url)
+
+    for _ in range(calentamiento):
+        cliente.get(url, parametros)
+
+    tiempos = []
+    consultas = []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            response = cliente.get(url, parametros)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'{nombre}: {url} respondió {response.status_code}')
+        consultas.append(len(capturadas.captured_queries))
+
+    tiempos.sort()
+    return {
+        'url': url,
+        'repeticiones': repeticiones,
+        'p50_ms': round(percentil(tiempos, 50), 2),
+        'p95_ms': round(percentil(tiempos, 95), 2),
+        'p99_ms': round(percentil(tiempos, 99), 2),
+        'max_ms': round(tiempos[-1], 2),
+        'consultas': max(consultas),
+    }
+
+
+def ejecutar_benchmarks(escenarios=None, repeticiones=20, calentamiento=2):
+    """Mide los escenarios pedidos (todos por defecto); los que no tienen datos se omiten."""
+    resultados = {}
+    for nombre in escenarios or ESCENARIOS:
+        resultado = _medir_escenario(nombre, repeticiones, calentamiento)
+        if resultado is not None:
+            resultados[nombre] = resultado
+    return {
+        'fecha': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'base_de_datos': connection.vendor,
+        'escenarios': resultados,
+    }
+
+
+def comparar_con_baseline(actual, baseline, tolerancia=0.25, margen_ms=2.0):
+    """Lista de regresiones (textos) de `actual` frente a `baseline`.
+
+    El p95 puede crecer hasta `tolerancia` (fracción) más `margen_ms` absolutos
+    para no fallar por ruido en endpoints de pocos milisegundos; el número de
+    consultas no puede crecer nada.
+    """
+    regresiones = []
+    for nombre, base in baseline.get('escenarios', {}).items():
+        medido = actual['escenarios'].get(nombre)
+        if medido is None:
+            continue
+        limite = base['p95_ms'] * (1 + tolerancia) + margen_ms
+        if medido['p95_ms'] > limite:
+            regresiones.append(f"{nombre}: p95 {medido['p95_ms']} ms > {limite:.2f} ms (base {base['p95_ms']} ms)")
+        if medido['consultas'] > base['consultas']:
+            regresiones.append(f"{nombre}: {medido['consultas']} consultas > {base['consultas']} (base)")
+    return regresiones
+
+
+def guardar_resultados(resultados, ruta):
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+
+
+def cargar_resultados(ruta):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+# Concurrencia en SQLite
+
+PREFIJO_CONCURRENCIA = 'concurrencia_'
+
+# modo: opciones de conexión (las del modo 'journal' son las de Django por defecto)
+MODOS_SQLITE = {
+    'journal': lambda: {},
+    'wal': lambda: dict(settings.SQLITE_OPCIONES_ALTA_CONCURRENCIA),
+}
+
+
+def _es_bloqueo(texto):
+    return 'database is locked' in texto or 'database table is locked' in texto
+
+
+def _copiar_base_de_datos(ruta, opciones):
+    """Copia la base de datos configurada en `ruta` con el journal_mode de `opciones`."""
+    connection.ensure_connection()
+    destino = sqlite3.connect(ruta)
+    try:
+        # API de copia de SQLite: la copia es coherente aunque el sitio esté escribiendo
+        connection.connection.backup(destino)
+        modo = 'WAL' if 'journal_mode=WAL' in opciones.get('init_command', '') else 'DELETE'
+        destino.execute(f'PRAGMA journal_mode={modo}')
+    finally:
+        destino.close()
+
+
+_cerrojo_procesos = None
+_barrera_procesos = None
+
+
+def _inicializar_proceso(ruta, opciones, cerrojo, barrera):
+    """Cada proceso hijo usa la copia `ruta` con las opciones del modo medido."""
+    global _cerrojo_procesos, _barrera_procesos
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    _cerrojo_procesos = cerrojo
+    _barrera_procesos = barrera
+    ajustes = connections.settings[DEFAULT_DB_ALIAS]
+    ajustes['NAME'] = ruta
+    ajustes['OPTIONS'] = opciones
+    # Conexión nueva: la heredada del proceso principal apunta a la base de datos real
+    connections[DEFAULT_DB_ALIAS] = connections.create_connection(DEFAULT_DB_ALIAS)
+
+
+def _trabajador(iteraciones):
+    """Alterna sincronizar_carrito y procesar_pago; devuelve (inicio, fin, resultados)."""
+    # Cada proceso con su cliente, su producto y su sesión en la copia, de uno en
+    # uno: la preparación no debe contar como contención
+    try:
+        with _cerrojo_procesos:
+            username = f'{PREFIJO_CONCURRENCIA}{os.getpid()}'
+            UserClientes.objects.create(usernameCliente=username, passwordCliente='x')
+            producto = Mesas.objects.create(
+                nombre1=f'{PREFIJO_CONCURRENCIA}mesa', precio1=1000, imagen1='x.png', cantidad_disponible=10**6,
+            )
+            http = Client(raise_request_exception=False)
+            session = http.session
+            session['usernameCliente'] = username
+            session.save()
+    except Exception:
+        # Los demás procesos no deben quedarse esperando en la barrera
+        _barrera_procesos.abort()
+        raise
+
+    errores = []
+
+    def registrar_error(sender, **kwargs):
+        errores.append(str(sys.exc_info()[1]))
+
+    got_request_exception.connect(registrar_error, weak=False, dispatch_uid='benchmark_concurrencia_sqlite')
+    url_carrito = reverse('sincronizar_carrito')
+    url_pago = reverse('procesar_pago')
+    carrito = json.dumps([{'tipo': 'mesa', 'id': producto.id, 'cantidad': 1}])
+
+    def sincronizar():
+        return http.post(url_carrito, carrito, content_type='application/json')
+
+    def pagar():
+        return http.post(url_pago, {
+            'nombre_completo': 'Cliente Concurrente', 'cedula': '123456', 'email': 'concurrente@ejemplo.com',
+            'telefono': '3001234567', 'direccion': 'Calle 1 # 2-3 Bogotá', 'metodo_pago': 'nequi',
+            'monto_total': '1000', 'productos': carrito,
+            # Cada pago con su propio comprobante: el mismo archivo se trataría como un pago repetido
+            'comprobante': SimpleUploadedFile('comprobante.png', b'\x89PNG' + os.urandom(16), content_type='image/png'),
+        })
+
+    resultados = []
+    _barrera_procesos.wait(timeout=60)
+    # Reloj de pared: los tiempos de inicio y fin se comparan entre procesos
+    inicio = time.time()
+    try:
+        for _ in range(iteraciones):
+            for operacion, peticion in (('sincronizar_carrito', sincronizar), ('procesar_pago', pagar)):
+                errores.clear()
+                antes = time.perf_counter()
+                response = peticion()
+                duracion = (time.perf_counter() - antes) * 1000
+                texto = response.content.decode('utf-8', errors='ignore') + ''.join(errores)
+                if response.status_code < 400:
+                    resultado = 'ok'
+                elif _es_bloqueo(texto):
+                    resultado = 'bloqueos'
+                else:
+                    resultado = 'otros_errores'
+                resultados.append((operacion, resultado, duracion))
+    finally:
+        got_request_exception.disconnect(dispatch_uid='benchmark_concurrencia_sqlite')
+        connections.close_all()
+    return inicio, time.time(), resultados
+
+
+def benchmark_concurrencia_sqlite(procesos=8, iteraciones=20, modos=('journal', 'wal'), timeout=None):
+    """Compara los modos de SQLite con escrituras concurrentes; devuelve un dict por modo.
+
+    Cada modo se mide en su propia copia temporal de la base de datos con
+    `procesos` procesos escribiendo a la vez, como varios workers de
+    gunicorn: los bloqueos de SQLite son por proceso, así que hilos de un
+    mismo proceso no los reproducen. `timeout` (segundos) fija el mismo
+    busy timeout en todos los modos; con uno corto se ve en pocas peticiones
+    cuántos "database is locked" evita cada modo.
+    """
+    if connection.vendor != 'sqlite':
+        raise RuntimeError('El benchmark de concurrencia solo aplica a SQLite')
+
+    resumen = {}
+    with tempfile.TemporaryDirectory() as directorio, override_settings(MEDIA_ROOT=os.path.join(directorio, 'media')):
+        for modo in modos:
+            opciones = MODOS_SQLITE[modo]()
+            if timeout is not None:
+                opciones['timeout'] = timeout
+            ruta = os.path.join(directorio, f'{modo}.sqlite3')
+            _copiar_base_de_datos(ruta, opciones)
+
+            # Los procesos hijos no deben heredar conexiones abiertas a la base de datos
+            connections.close_all()
+            cerrojo = multiprocessing.Lock()
+            barrera = multiprocessing.Barrier(procesos)
+            with ProcessPoolExecutor(
+                max_workers=procesos, initializer=_inicializar_proceso, initargs=(ruta, opciones, cerrojo, barrera),
+            ) as executor:
+                futuros = [executor.submit(_trabajador, iteraciones) for _ in range(procesos)]
+                medidas = [futuro.result() for futuro in futuros]
+
+            inicio = min(medida[0] for medida in medidas)
+            fin = max(medida[1] for medida in medidas)
+            resumen[modo] = _resumir([resultado for medida in medidas for resultado in medida[2]], fin - inicio)
+    return resumen
+
+
+def _resumir(resultados, duracion):
+    por_operacion = {}
+    for operacion, resultado, ms in resultados:
+        datos = por_operacion.setdefault(operacion, {'ok': 0, 'bloqueos': 0, 'otros_errores': 0, 'tiempos': []})
+        datos[resultado] += 1
+        datos['tiempos'].append(ms)
+    for datos in por_operacion.values():
+        tiempos = sorted(datos.pop('tiempos'))
+        datos['p50_ms'] = round(percentil(tiempos, 50), 1)
+        datos['p95_ms'] = round(percentil(tiempos, 95), 1)
+    return {
+        'peticiones': len(resultados),
+        'peticiones_por_segundo': round(len(resultados) / duracion, 1) if duracion else None,
+        'bloqueos': sum(datos['bloqueos'] for datos in por_operacion.values()),
+        'operaciones': por_operacion,
+    }
+
+
+# Numeración de facturas
+
+PREFIJO_NUMERACION = 'BENCH'
+
+
+def _reservador(prefijo, transacciones, bloque, barrera, resultados):
+    barrera.wait()
+    try:
+        for _ in range(transacciones):
+            inicio = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    numeros = reservar_numeros(bloque, prefijo)
+            except Exception as e:
+                resultados.append(('bloqueos' if _es_bloqueo(str(e)) else 'otros_errores', [], 0))
+                continue
+            resultados.append(('ok', numeros, (time.perf_counter() - inicio) * 1000))
+    finally:
+        connections.close_all()
+
+
+def benchmark_numeracion_facturas(hilos=8, transacciones=50, bloques=(1, 10)):
+    """Números reservados por segundo con `hilos` a la vez; un resultado por tamaño de bloque.
+
+    Con bloque 1 cada transacción reserva un número (una confirmación de
+    pago); con bloques mayores, los de una emisión de facturas en lote.
+    """
+    resumen = {}
+    for bloque in bloques:
+        prefijo = f'{PREFIJO_NUMERACION}{bloque}'
+        ContadorFactura.objects.filter(prefijo=prefijo).delete()
+        resultados = []
+        barrera = threading.Barrier(hilos + 1)
+        reservadores = [
+            threading.Thread(target=_reservador, args=(prefijo, transacciones, bloque, barrera, resultados))
+            for _ in range(hilos)
+        ]
+        for reservador in reservadores:
+            reservador.start()
+        barrera.wait()
+        inicio = time.perf_counter()
+        for reservador in reservadores:
+            reservador.join()
+        duracion = time.perf_counter() - inicio
+        ContadorFactura.objects.filter(prefijo=prefijo).delete()
+
+        numeros = sorted(int(numero.rsplit('-', 1)[1]) for resultado, reservados, _ in resultados for numero in reservados)
+        tiempos = sorted(ms for resultado, _, ms in resultados if resultado == 'ok')
+        resumen[bloque] = {
+            'transacciones': len(tiempos),
+            'numeros': len(numeros),
+            'numeros_por_segundo': round(len(numeros) / duracion, 1) if duracion else None,
+            'p50_ms': round(percentil(tiempos, 50), 2) if tiempos else None,
+            'p95_ms': round(percentil(tiempos, 95), 2) if tiempos else None,
+            'bloqueos': sum(1 for resultado, _, _ in resultados if resultado == 'bloqueos'),
+            'otros_errores': sum(1 for resultado, _, _ in resultados if resultado == 'otros_errores'),
+            # Las transacciones que fallaron no consumen números: los reservados deben ser 1..N
+            'sin_huecos': numeros == list(range(1, len(numeros) + 1)),
+        }
+    connections.close_all()
+    return resumen
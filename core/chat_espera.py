@@ -0,0 +1,163 @@
+"""
+Espera larga (long-polling) de mensajes nuevos en los chats de ideas y pagos.
+
+El navegador pide /api/mensajes-idea/<id>/esperar/?despues=<último id> y la
+petición queda abierta hasta que llega un mensaje más nuevo o pasa
+CHAT_ESPERA_TIMEOUT. Con ASGI cada espera es una corrutina: no ocupa un hilo
+ni hace consultas propias mientras espera. Antes de esperar se cierran la
+conexión a la base de datos y el hilo que Django reserva a cada petición
+para su código síncrono (liberar_hilo_peticion); los middlewares del
+proyecto no instalan nada en ese hilo para estas rutas.
+
+Solo tiene sentido servida por ASGI (uvicorn, ver Gangazos1/asgi.py): con
+WSGI cada espera bloquea un worker. Por eso el navegador solo la usa con
+CHAT_ESPERA_LARGA=true.
+
+Un VigilanteMensajes por tipo de chat (y por event loop) revisa cada
+CHAT_ESPERA_INTERVALO segundos, con UNA consulta para todas las esperas
+abiertas del proceso, qué conversaciones tienen mensajes nuevos y despierta
+solo a las que les corresponde. Sin esperas abiertas no consulta nada.
+"""
+import asyncio
+import contextvars
+import weakref
+
+from asgiref.sync import SyncToAsync, sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connections
+from django.db.models import Max
+from django.urls import Resolver404, resolve
+
+from .models import MensajeIdea, MensajePago
+
+
+def espera_larga(vista):
+    """Marca una vista de espera larga (la instrumentación no la registra como petición lenta)."""
+    vista.espera_larga = True
+    return vista
+
+
+def es_espera_larga(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    return bool(coincidencia and getattr(coincidencia.func, 'espera_larga', False))
+
+
+def es_ruta_espera_larga(ruta):
+    """Como es_espera_larga, para los middlewares que se ejecutan antes de resolver la URL."""
+    if not ruta.endswith('/esperar/'):
+        return False
+    try:
+        return getattr(resolve(ruta).func, 'espera_larga', False)
+    except Resolver404:
+        return False
+
+
+async def liberar_hilo_peticion():
+    """Cierra las conexiones y el hilo síncrono de la petición actual antes de una espera larga.
+
+    ASGIHandler ejecuta las señales, los middlewares síncronos, la sesión y el
+    ORM de cada petición en un hilo propio que vive hasta que la petición
+    termina. Se cierra aquí, como al terminar la petición; si después hace
+    falta (guardar la sesión, request_finished) asgiref crea otro.
+    """
+    # En el hilo de la petición: las conexiones son por hilo
+    await sync_to_async(connections.close_all)()
+    contexto = SyncToAsync.thread_sensitive_context.get(None)
+    executor = SyncToAsync.context_to_thread_executor.pop(contexto, None) if contexto else None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+class VigilanteMensajes:
+    """Esperas abiertas de un tipo de chat y la tarea que las despierta."""
+
+    def __init__(self, modelo, campo):
+        self.modelo = modelo
+        self.campo = campo
+        # conversacion_id -> [(último id que ya tiene el cliente, futuro)]
+        self.esperas = {}
+        self.tarea = None
+        self.consultas = 0
+
+    async def esperar(self, conversacion_id, despues, timeout):
+        """Id del último mensaje si llega uno con id > despues antes de `timeout` segundos; si no, None."""
+        loop = asyncio.get_running_loop()
+        entrada = (despues, loop.create_future())
+        self.esperas.setdefault(conversacion_id, []).append(entrada)
+        if self.tarea is None or self.tarea.done():
+            # Contexto vacío: la tarea sobrevive a la petición que la crea y no debe usar
+            # su hilo de base de datos (se cierra al terminar esa petición)
+            self.tarea = loop.create_task(self._bucle(), context=contextvars.Context())
+        try:
+            return await asyncio.wait_for(entrada[1], timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            abiertas = self.esperas.get(conversacion_id)
+            if abiertas and entrada in abiertas:
+                abiertas.remove(entrada)
+                if not abiertas:
+                    del self.esperas[conversacion_id]
+
+    def _ultimos_ids(self, conversaciones, despues):
+        """{conversacion_id: id del último mensaje} de las conversaciones con mensajes > despues."""
+        close_old_connections()
+        self.consultas += 1
+        filas = (
+            self.modelo.objects
+            .filter(**{f'{self.campo}__in': conversaciones, 'id__gt': despues})
+            .order_by()
+            .values_list(self.campo)
+            .annotate(ultimo=Max('id'))
+        )
+        return dict(filas)
+
+    async def _bucle(self):
+        while self.esperas:
+            await asyncio.sleep(settings.CHAT_ESPERA_INTERVALO)
+            if not self.esperas:
+                break
+            despues = min(despues for abiertas in self.esperas.values() for despues, _ in abiertas)
+            try:
+                ultimos = await sync_to_async(self._ultimos_ids)(list(self.esperas), despues)
+            except Exception as e:
+                # Las esperas siguen abiertas: acaban por su timeout si el error persiste
+                print(f"Error revisando mensajes nuevos ({self.modelo.__name__}): {str(e)}")
+                continue
+            for conversacion_id, ultimo in ultimos.items():
+                for despues, futuro in self.esperas.get(conversacion_id, ()):
+                    if ultimo > despues and not futuro.done():
+                        futuro.set_result(ultimo)
+
+
+# event loop -> {'idea': VigilanteMensajes, 'pago': VigilanteMensajes}
+_vigilantes = weakref.WeakKeyDictionary()
+
+
+def vigilante(tipo):
+    """Vigilante del chat `tipo` ('idea' o 'pago') en el event loop actual."""
+    loop = asyncio.get_running_loop()
+    if loop not in _vigilantes:
+        _vigilantes[loop] = {
+            'idea': VigilanteMensajes(MensajeIdea, 'idea'),
+            'pago': VigilanteMensajes(MensajePago, 'pago'),
+        }
+    return _vigilantes[loop][tipo]
+
+
+async def ultimo_id(tipo, conversacion_id):
+    """Id del último mensaje de la conversación (0 si no tiene)."""
+    vigilante_tipo = vigilante(tipo)
+    resultado = await vigilante_tipo.modelo.objects.filter(
+        **{vigilante_tipo.campo: conversacion_id}
+    ).aaggregate(ultimo=Max('id'))
+    return resultado['ultimo'] or 0
+
+
+async def esperar_mensajes(tipo, conversacion_id, despues):
+    """Id del último mensaje si hay (o llega) alguno con id > despues; None si se agota la espera."""
+    ultimo = await ultimo_id(tipo, conversacion_id)
+    if ultimo > despues:
+        return ultimo
+    await liberar_hilo_peticion()
+    return await vigilante(tipo).esperar(conversacion_id, despues, settings.CHAT_ESPERA_TIMEOUT)
@@ -0,0 +1,105 @@
+"""
+Revisión de la configuración de producción (`manage.py check` y arranque).
+
+Con GANGAZOS_ENTORNO=produccion avisa de los ajustes que funcionan en
+desarrollo pero degradan el rendimiento con carga real, y de la SECRET_KEY
+de desarrollo (los servidores no ejecutan `check --deploy`).
+"""
+import logging
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+logger = logging.getLogger('gangazos.rendimiento')
+
+CARGADOR_EN_CACHE = 'django.template.loaders.cached.Loader'
+
+
+def _usa_cargador_en_cache(engine):
+    loaders = engine.get('OPTIONS', {}).get('loaders')
+    if loaders is None:
+        # Sin 'loaders' explícitos Django usa el cargador en caché automáticamente
+        return True
+    return any((loader[0] if isinstance(loader, (list, tuple)) else loader) == CARGADOR_EN_CACHE for loader in loaders)
+
+
+@register()
+def revisar_configuracion_produccion(app_configs=None, **kwargs):
+    if getattr(settings, 'GANGAZOS_ENTORNO', 'desarrollo') != 'produccion':
+        return []
+
+    avisos = []
+    if settings.DEBUG:
+        avisos.append(Warning(
+            'DEBUG está activo en producción.',
+            hint='connection.queries crece sin límite en cada petición; defina DJANGO_DEBUG=false.',
+            id='core.W001',
+        ))
+
+    for alias, base in settings.DATABASES.items():
+        motor = base.get('ENGINE', '')
+        if motor.endswith('sqlite3'):
+            if 'journal_mode=wal' not in base.get('OPTIONS', {}).get('init_command', '').lower().replace(' ', ''):
+                avisos.append(Warning(
+                    f"La base de datos '{alias}' es SQLite sin WAL en producción.",
+                    hint='Con escrituras concurrentes aparece "database is locked": use SQLITE_ALTA_CONCURRENCIA=true o USE_SUPABASE=true.',
+                    id='core.W002',
+                ))
+        elif not base.get('CONN_MAX_AGE') and 'pool' not in base.get('OPTIONS', {}):
+            avisos.append(Warning(
+                f"La base de datos '{alias}' abre una conexión nueva en cada petición.",
+                hint='Defina DB_CONN_MAX_AGE > 0 o DB_POOL=true.',
+                id='core.W003',
+            ))
+
+    for engine in settings.TEMPLATES:
+        if engine['BACKEND'].endswith('DjangoTemplates') and not _usa_cargador_en_cache(engine):
+            avisos.append(Warning(
+                'Las plantillas se compilan en cada render (sin cargador en caché).',
+                hint=f"Envuelva los cargadores con '{CARGADOR_EN_CACHE}'.",
+                id='core.W004',
+            ))
+
+    if settings.SESSION_ENGINE == 'django.contrib.sessions.backends.db':
+        avisos.append(Warning(
+            'Las sesiones se leen de la base de datos en cada petición.',
+            hint="Use SESSION_ENGINE='django.contrib.sessions.backends.cached_db'.",
+            id='core.W005',
+        ))
+
+    if settings.CACHES['default']['BACKEND'].endswith('LocMemCache'):
+        avisos.append(Warning(
+            'La caché es memoria local: cada proceso del servidor tiene la suya.',
+            hint='Defina REDIS_URL para compartir la caché (las sesiones cached_db y los límites de intentos) entre procesos.',
+            id='core.W006',
+        ))
+
+    if getattr(settings, 'PERFILADOR_FRACCION_MUESTREO', 0) > 0.01:
+        avisos.append(Warning(
+            f'Se perfila el {settings.PERFILADOR_FRACCION_MUESTREO:.0%} de las peticiones.',
+            hint='Con carga real use PERFILADOR_FRACCION_MUESTREO <= 0.01.',
+            id='core.W007',
+        ))
+
+    from .medios import MODOS_ENVIO
+    if settings.MEDIA_ENVIO not in MODOS_ENVIO:
+        avisos.append(Warning(
+            f"MEDIA_ENVIO='{settings.MEDIA_ENVIO}' no es un modo conocido; los archivos subidos no se entregarán bien.",
+            hint="Use '', 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache/lighttpd).",
+            id='core.W008',
+        ))
+
+    if settings.SECRET_KEY.startswith('django-insecure-'):
+        avisos.append(Warning(
+            'SECRET_KEY es la clave de desarrollo (django-insecure-...) en producción.',
+            hint='Cualquiera que lea el repositorio puede firmar sesiones y tokens: defina DJANGO_SECRET_KEY.',
+            id='core.W009',
+        ))
+
+    return avisos
+
+
+def avisar_al_arrancar():
+    """Escribe en el log los avisos de producción (los servidores WSGI no ejecutan `check`)."""
+    for aviso in revisar_configuracion_produccion():
+        logger.warning(f'[{aviso.id}] {aviso.msg} {aviso.hint}')
@@ -1,3 +1,5 @@
+from django.conf import settings
+
 from .models import Idea, UserClientes, UserEmpresa, MensajeIdea
 
 
@@ -36,5 +38,7 @@ def idea_notifications(request):
         has_notif = False
 
     return {
-        'has_idea_notifications': has_notif
+        'has_idea_notifications': has_notif,
+        # El chat del modal espera mensajes nuevos solo si el sitio corre con ASGI
+        'chat_espera_larga': settings.CHAT_ESPERA_LARGA,
     }
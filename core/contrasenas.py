@@ -0,0 +1,242 @@
+"""
+Contraseñas de clientes (UserClientes) y empresas (EmpresaRegistrada) con los
+hashers de Django.
+
+Los clientes guardaban la contraseña en texto plano y las empresas un
+SHA-256 sin sal. comprobar_contrasena() acepta esos formatos antiguos y, si
+la contraseña es correcta, guarda en su lugar el hash actual; lo mismo hace
+cuando el hash es de Django pero con otro algoritmo o con otro número de
+iteraciones (rehash al iniciar sesión).
+
+migrar_contrasenas() convierte en lote las filas que aún no han iniciado
+sesión: el texto plano pasa a PBKDF2 y el SHA-256 de empresas se envuelve en
+PBKDF2 (pbkdf2_wrapped_sha256) sin necesitar la contraseña original.
+
+El coste lo fija CONTRASENAS_ITERACIONES; medir_coste_hash() ayuda a elegirlo
+según el p99 de login que se quiere a la tasa de logins de hora punta.
+"""
+import hashlib
+import heapq
+import os
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, identify_hasher, make_password
+from django.db import connections, transaction
+from django.utils.crypto import constant_time_compare
+
+from .instrumentacion import percentil
+
+
+class PBKDF2IteracionesPasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 de Django con las iteraciones de settings.CONTRASENAS_ITERACIONES.
+
+    Mantiene el nombre de algoritmo 'pbkdf2_sha256': los hashes son los mismos
+    que los de Django y al cambiar las iteraciones se rehacen al iniciar sesión.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'CONTRASENAS_ITERACIONES', PBKDF2PasswordHasher.iterations)
+
+
+class PBKDF2WrappedSHA256PasswordHasher(PBKDF2IteracionesPasswordHasher):
+    """PBKDF2 aplicado al SHA-256 sin sal que guardaban las empresas."""
+
+    algorithm = 'pbkdf2_wrapped_sha256'
+
+    def encode_sha256_hash(self, sha256_hash, salt, iterations=None):
+        return super().encode(sha256_hash, salt, iterations)
+
+    def encode(self, password, salt, iterations=None):
+        return self.encode_sha256_hash(hashlib.sha256(password.encode()).hexdigest(), salt, iterations)
+
+
+def es_hash_django(valor):
+    try:
+        identify_hasher(valor)
+    except ValueError:
+        return False
+    return True
+
+
+def _texto_plano(contrasena, guardado):
+    return constant_time_compare(contrasena, guardado)
+
+
+def _sha256_sin_sal(contrasena, guardado):
+    return constant_time_compare(hashlib.sha256(contrasena.encode()).hexdigest(), guardado)
+
+
+_SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
+
+# Formato antiguo de cada modelo: 'app.Modelo' -> (campo de la contraseña, comprobación,
+# si un valor guardado se puede migrar sin la contraseña)
+FORMATOS_ANTIGUOS = {
+    'core.UserClientes': ('passwordCliente', _texto_plano, lambda valor: True),
+    'Empresas.EmpresaRegistrada': ('password', _sha256_sin_sal, _SHA256_HEX.match),
+}
+
+
+def comprobar_contrasena(instancia, contrasena):
+    """True si `contrasena` es la de `instancia`; si el hash guardado no es el actual, lo rehace."""
+    campo, comprobar_antiguo, _ = FORMATOS_ANTIGUOS[instancia._meta.label]
+    guardado = getattr(instancia, campo) or ''
+
+    def actualizar(nueva):
+        setattr(instancia, campo, make_password(nueva))
+        # Solo la columna de la contraseña (no pisa cambios concurrentes de otros campos)
+        type(instancia).objects.filter(pk=instancia.pk).update(**{campo: getattr(instancia, campo)})
+
+    if es_hash_django(guardado):
+        return check_password(contrasena, guardado, setter=actualizar)
+    if contrasena and guardado and comprobar_antiguo(contrasena, guardado):
+        actualizar(contrasena)
+        return True
+    return False
+
+
+def simular_comprobacion(contrasena):
+    """Gasta el mismo tiempo que un hash real (el usuario no existe: no se distingue por el tiempo)."""
+    make_password(contrasena)
+
+
+# Migración en lote
+
+def _hash_de_fila(fila):
+    """(pk, hash nuevo) para una fila (pk, valor guardado, modelo); corre en el pool de procesos."""
+    pk, guardado, modelo = fila
+    if modelo == 'Empresas.EmpresaRegistrada':
+        hasher = PBKDF2WrappedSHA256PasswordHasher()
+        return pk, hasher.encode_sha256_hash(guardado, hasher.salt())
+    return pk, make_password(guardado)
+
+
+def _inicializar_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def filas_pendientes(modelo):
+    """(pk, valor) de las filas de `modelo` con contraseña en formato antiguo."""
+    campo, _, migrable = FORMATOS_ANTIGUOS[modelo._meta.label]
+    return [
+        (pk, valor) for pk, valor in modelo.objects.exclude(**{campo: ''}).values_list('pk', campo).iterator()
+        if not es_hash_django(valor) and migrable(valor)
+    ]
+
+
+def migrar_contrasenas(modelo, workers=None, lote=500, progreso=None):
+    """Convierte las contraseñas antiguas de `modelo` a hashes de Django; devuelve cuántas convirtió.
+
+    Los hashes se calculan en un pool de procesos (PBKDF2 usa CPU) y se
+    guardan por lotes con bulk_update. Solo se reescriben filas cuyo valor no
+    cambió mientras tanto (un login pudo rehacerlo antes).
+    """
+    if workers is None:
+        workers = getattr(settings, 'CONTRASENAS_WORKERS', os.cpu_count() or 1)
+    campo = FORMATOS_ANTIGUOS[modelo._meta.label][0]
+    pendientes = filas_pendientes(modelo)
+    total = len(pendientes)
+    if not pendientes:
+        return 0
+
+    filas = [(pk, valor, modelo._meta.label) for pk, valor in pendientes]
+    originales = dict(pendientes)
+    executor = None
+    if workers > 1 and total > 1:
+        # Los procesos hijos no deben heredar conexiones abiertas a la base de datos
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker)
+    try:
+        if executor is None:
+            resultados = map(_hash_de_fila, filas)
+        else:
+            resultados = executor.map(_hash_de_fila, filas, chunksize=max(1, total // (workers * 4)))
+        convertidas = 0
+        por_guardar = []
+        for pk, nuevo in resultados:
+            por_guardar.append((pk, nuevo))
+            if len(por_guardar) >= lote:
+                convertidas += _guardar_lote(modelo, campo, por_guardar, originales)
+                por_guardar = []
+                if progreso:
+                    progreso(convertidas, total)
+        if por_guardar:
+            convertidas += _guardar_lote(modelo, campo, por_guardar, originales)
+            if progreso:
+                progreso(convertidas, total)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    return convertidas
+
+
+def _guardar_lote(modelo, campo, por_guardar, originales):
+    with transaction.atomic():
+        # Se relee el lote: las filas que un login ya rehízo no se tocan
+        actuales = dict(modelo.objects.filter(pk__in=[pk for pk, _ in por_guardar]).select_for_update().values_list('pk', campo))
+        objetos = []
+        for pk, nuevo in por_guardar:
+            if pk in actuales and actuales[pk] == originales[pk]:
+                objeto = modelo(pk=pk)
+                setattr(objeto, campo, nuevo)
+                objetos.append(objeto)
+        modelo.objects.bulk_update(objetos, [campo])
+    return len(objetos)
+
+
+# Elección del coste
+
+ITERACIONES_CANDIDATAS = (100_000, 200_000, 400_000, 600_000, 870_000, 1_000_000, 1_200_000)
+
+
+def _tiempos_hash(iteraciones, muestras):
+    tiempos = []
+    for _ in range(muestras):
+        inicio = time.perf_counter()
+        hashlib.pbkdf2_hmac('sha256', b'contrasena de prueba', os.urandom(16), iteraciones)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def simular_p99(tiempos, logins_por_segundo, workers, logins=5000, semilla=0):
+    """p99 (s) de login con llegadas de Poisson a `workers` procesos y tiempos de hash medidos."""
+    aleatorio = random.Random(semilla)
+    libres = [0.0] * workers
+    llegada = 0.0
+    latencias = []
+    for _ in range(logins):
+        llegada += aleatorio.expovariate(logins_por_segundo)
+        inicio = max(llegada, heapq.heappop(libres))
+        fin = inicio + aleatorio.choice(tiempos)
+        heapq.heappush(libres, fin)
+        latencias.append(fin - llegada)
+    latencias.sort()
+    return percentil(latencias, 99)
+
+
+def medir_coste_hash(objetivo_p99_ms, logins_por_segundo, workers, candidatas=ITERACIONES_CANDIDATAS, muestras=5):
+    """[{iteraciones, hash_ms, p99_ms, utilizacion, cumple}] y la mayor cantidad de iteraciones que cumple el objetivo."""
+    resultados = []
+    recomendadas = None
+    for iteraciones in sorted(candidatas):
+        tiempos = _tiempos_hash(iteraciones, muestras)
+        p99_ms = simular_p99(tiempos, logins_por_segundo, workers) * 1000
+        cumple = p99_ms <= objetivo_p99_ms
+        resultados.append({
+            'iteraciones': iteraciones,
+            'hash_ms': round(percentil(sorted(tiempos), 50) * 1000, 1),
+            'p99_ms': round(p99_ms, 1),
+            # >= 1: los logins llegan más rápido de lo que se pueden atender y la cola crece sin límite
+            'utilizacion': round(logins_por_segundo * sum(tiempos) / len(tiempos) / workers, 2),
+            'cumple': cumple,
+        })
+        if cumple:
+            recomendadas = iteraciones
+    return resultados, recomendadas
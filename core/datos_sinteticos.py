@@ -0,0 +1,247 @@
+"""
+Generador de datos sintéticos para pruebas de carga y benchmarks.
+
+Crea clientes, productos, pagos con su JSON de productos, pedidos, ideas y
+mensajes de chat en volúmenes parecidos a producción. Todo se inserta con
+bulk_create por lotes y los registros llevan el prefijo PREFIJO_SINTETICO
+para poder borrarlos después sin tocar datos reales.
+"""
+import json
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from Empresas.models import EmpresaRegistrada
+
+from .facturas import PRODUCTOS_POR_CATEGORIA
+from .models import Idea, MensajeIdea, MensajePago, Pago, Pedido, UserClientes, UserEmpresa
+
+PREFIJO_SINTETICO = 'bench_'
+
+# Volúmenes con escala=1
+VOLUMENES_BASE = {
+    'clientes': 100_000,
+    'productos': 50_000,
+    'pagos': 500_000,
+    'ideas': 50_000,
+    'mensajes_pago': 1_500_000,
+    'mensajes_idea': 500_000,
+}
+
+EMPRESAS_SINTETICAS = 20
+DIAS_HISTORIA = 730
+METODOS_PAGO = [metodo for metodo, _ in Pago.METODO_PAGO_CHOICES]
+ESTADOS_PEDIDO = [estado for estado, _ in Pedido.ESTADO_PEDIDO_CHOICES]
+
+
+def volumenes(escala):
+    return {clave: max(1, int(cantidad * escala)) for clave, cantidad in VOLUMENES_BASE.items()}
+
+
+@contextmanager
+def _fechas_manuales(*campos):
+    """Desactiva auto_now/auto_now_add para poder repartir fechas en el pasado."""
+    originales = []
+    for modelo, nombre in campos:
+        campo = modelo._meta.get_field(nombre)
+        originales.append((campo, campo.auto_now, campo.auto_now_add))
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in originales:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def _en_lotes(generador, modelo, tamano_lote):
+    """Inserta los objetos de un generador en lotes; devuelve cuántos insertó."""
+    total = 0
+    lote = []
+    for objeto in generador:
+        lote.append(objeto)
+        if len(lote) >= tamano_lote:
+            with transaction.atomic():
+                modelo.objects.bulk_create(lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        with transaction.atomic():
+            modelo.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def _rango_ids(modelo, filtro):
+    """(min_id, max_id) de los registros sintéticos de un modelo (ids contiguos al insertarse en lote)."""
+    ids = modelo.objects.filter(**filtro).values_list('id', flat=True)
+    return ids.order_by('id').first(), ids.order_by('-id').first()
+
+
+def generar_datos(escala=0.01, tamano_lote=5000, semilla=42, informar=print):
+    """Puebla la base de datos con datos sintéticos; devuelve un dict con lo creado."""
+    rng = random.Random(semilla)
+    cantidades = volumenes(escala)
+    ahora = timezone.now()
+    creados = {}
+
+    def fecha_aleatoria():
+        return ahora - timedelta(seconds=rng.randint(0, DIAS_HISTORIA * 86400))
+
+    # Empresas (panel de la empresa y chat)
+    for i in range(EMPRESAS_SINTETICAS):
+        EmpresaRegistrada.objects.get_or_create(
+            username=f'{PREFIJO_SINTETICO}empresa{i}',
+            defaults={
+                'nombre_empresa': f'Empresa Sintética {i}',
+                'nit': f'{PREFIJO_SINTETICO}{i}',
+                'email': f'{PREFIJO_SINTETICO}empresa{i}@ejemplo.com',
+                'password': 'x',
+            },
+        )
+        UserEmpresa.objects.get_or_create(usernameEmpresa=f'{PREFIJO_SINTETICO}empresa{i}', defaults={'passwordEmpresa': 'x'})
+    empresas = list(UserEmpresa.objects.filter(usernameEmpresa__startswith=PREFIJO_SINTETICO))
+
+    # Clientes
+    inicio_clientes = UserClientes.objects.filter(usernameCliente__startswith=PREFIJO_SINTETICO).count()
+    with _fechas_manuales((UserClientes, 'fecha_registro')):
+        creados['clientes'] = _en_lotes((
+            UserClientes(
+                usernameCliente=f'{PREFIJO_SINTETICO}cliente{inicio_clientes + i}',
+                passwordCliente='x',
+                email=f'{PREFIJO_SINTETICO}cliente{inicio_clientes + i}@ejemplo.com',
+                is_active=rng.random() > 0.05,
+                fecha_registro=fecha_aleatoria(),
+                nombre_completo=f'Cliente Sintético {inicio_clientes + i}',
+                ciudad=rng.choice(['Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Bucaramanga']),
+            )
+            for i in range(cantidades['clientes'])
+        ), UserClientes, tamano_lote)
+    informar(f"Clientes: {creados['clientes']}")
+    clientes = _rango_ids(UserClientes, {'usernameCliente__startswith': PREFIJO_SINTETICO})
+
+    # Productos, repartidos entre las categorías
+    catalogo = []
+    por_categoria = cantidades['productos'] // len(PRODUCTOS_POR_CATEGORIA) or 1
+    creados['productos'] = 0
+    for categoria, (modelo, campo_nombre, campo_precio) in PRODUCTOS_POR_CATEGORIA.items():
+        numero = list(PRODUCTOS_POR_CATEGORIA).index(categoria) + 1
+        creados['productos'] += _en_lotes((
+            modelo(**{
+                campo_nombre: f'{PREFIJO_SINTETICO}{categoria} {i}',
+                campo_precio: Decimal(rng.randrange(20_000, 2_000_000, 500)),
+                f'imagen{numero}': 'uploads/productos/sintetico.png',
+                'cantidad_disponible': rng.randint(0, 200),
+                'is_active': rng.random() > 0.1,
+            })
+            for i in range(por_categoria)
+        ), modelo, tamano_lote)
+        for fila in modelo.objects.filter(**{f'{campo_nombre}__startswith': PREFIJO_SINTETICO}).values('id', campo_nombre, campo_precio).iterator(chunk_size=tamano_lote):
+            catalogo.append((categoria[:-1], fila['id'], fila[campo_nombre], fila[campo_precio]))
+    informar(f"Productos: {creados['productos']}")
+
+    def lineas_productos():
+        lineas = []
+        for tipo, producto_id, nombre, precio in rng.sample(catalogo, min(len(catalogo), rng.randint(1, 5))):
+            lineas.append({'id': producto_id, 'tipo': tipo, 'nombre': nombre, 'precio': str(precio), 'cantidad': rng.randint(1, 4)})
+        total = sum(Decimal(linea['precio']) * linea['cantidad'] for linea in lineas)
+        return json.dumps(lineas), total
+
+    # Pagos (60% confirmados) y un pedido por cada pago confirmado
+    inicio_pagos = Pago.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    def pagos():
+        for _ in range(cantidades['pagos']):
+            productos_json, total = lineas_productos()
+            fecha = fecha_aleatoria()
+            estado = rng.choices(['confirmado', 'pendiente', 'rechazado'], weights=[60, 25, 15])[0]
+            yield Pago(
+                cliente_id=rng.randint(*clientes),
+                nombre_completo='Cliente Sintético',
+                email=f'{PREFIJO_SINTETICO}pago@ejemplo.com',
+                metodo_pago=rng.choice(METODOS_PAGO),
+                monto_total=total,
+                comprobante='uploads/comprobantes/sintetico.png',
+                productos=productos_json,
+                estado=estado,
+                fecha_creacion=fecha,
+                fecha_confirmacion=fecha + timedelta(hours=rng.randint(1, 48)) if estado == 'confirmado' else None,
+                notas_empresa=PREFIJO_SINTETICO,
+            )
+
+    with _fechas_manuales((Pago, 'fecha_creacion')):
+        creados['pagos'] = _en_lotes(pagos(), Pago, tamano_lote)
+    informar(f"Pagos: {creados['pagos']}")
+
+    confirmados = Pago.objects.filter(id__gt=inicio_pagos, notas_empresa=PREFIJO_SINTETICO, estado='confirmado').values(
+        'id', 'cliente_id', 'productos', 'monto_total', 'fecha_confirmacion'
+    )
+    with _fechas_manuales((Pedido, 'fecha_creacion'), (Pedido, 'fecha_actualizacion')):
+        creados['pedidos'] = _en_lotes((
+            Pedido(
+                pago_id=pago['id'],
+                cliente_id=pago['cliente_id'],
+                productos=pago['productos'],
+                monto_total=pago['monto_total'],
+                estado=rng.choice(ESTADOS_PEDIDO),
+                ciudad='Bogotá',
+                fecha_creacion=pago['fecha_confirmacion'],
+                fecha_actualizacion=pago['fecha_confirmacion'],
+            )
+            for pago in confirmados.iterator(chunk_size=tamano_lote)
+        ), Pedido, tamano_lote)
+    informar(f"Pedidos: {creados['pedidos']}")
+
+    # Ideas con empresa asignada y su chat
+    inicio_ideas = Idea.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with _fechas_manuales((Idea, 'fecha_creacion')):
+        creados['ideas'] = _en_lotes((
+            Idea(
+                titulo=f'{PREFIJO_SINTETICO}idea {i}',
+                descripcion='Idea generada para pruebas de carga',
+                autor=f'{PREFIJO_SINTETICO}cliente{rng.randint(0, cantidades["clientes"] - 1)}',
+                estado=rng.choice(['pendiente', 'en_proceso', 'completada']),
+                empresa_asignada=rng.choice(empresas),
+                categoria=rng.choice([c for c, _ in Idea.CATEGORIA_CHOICES]),
+                fecha_creacion=fecha_aleatoria(),
+            )
+            for i in range(cantidades['ideas'])
+        ), Idea, tamano_lote)
+    informar(f"Ideas: {creados['ideas']}")
+
+    ideas = (inicio_ideas + 1, Idea.objects.order_by('-id').values_list('id', flat=True).first())
+    pagos_rango = (inicio_pagos + 1, Pago.objects.order_by('-id').values_list('id', flat=True).first())
+
+    def mensajes(modelo, campo, rango, cantidad):
+        for _ in range(cantidad):
+            remitente = rng.choice(['cliente', 'empresa'])
+            yield modelo(**{
+                f'{campo}_id': rng.randint(*rango),
+                'remitente_tipo': remitente,
+                'remitente_nombre': f'{PREFIJO_SINTETICO}{remitente}',
+                'mensaje': 'Mensaje sintético de prueba de carga',
+                'fecha_envio': fecha_aleatoria(),
+                'leido': rng.random() > 0.3,
+            })
+
+    with _fechas_manuales((MensajeIdea, 'fecha_envio'), (MensajePago, 'fecha_envio')):
+        creados['mensajes_idea'] = _en_lotes(mensajes(MensajeIdea, 'idea', ideas, cantidades['mensajes_idea']), MensajeIdea, tamano_lote)
+        informar(f"Mensajes de ideas: {creados['mensajes_idea']}")
+        creados['mensajes_pago'] = _en_lotes(mensajes(MensajePago, 'pago', pagos_rango, cantidades['mensajes_pago']), MensajePago, tamano_lote)
+        informar(f"Mensajes de pagos: {creados['mensajes_pago']}")
+
+    return creados
+
+
+def borrar_datos():
+    """Elimina todos los registros sintéticos (los mensajes, pagos y pedidos caen en cascada)."""
+    with transaction.atomic():
+        Idea.objects.filter(titulo__startswith=PREFIJO_SINTETICO).delete()
+        UserClientes.objects.filter(usernameCliente__startswith=PREFIJO_SINTETICO).delete()
+        for modelo, campo_nombre, _ in PRODUCTOS_POR_CATEGORIA.values():
+            modelo.objects.filter(**{f'{campo_nombre}__startswith': PREFIJO_SINTETICO}).delete()
+        UserEmpresa.objects.filter(usernameEmpresa__startswith=PREFIJO_SINTETICO).delete()
+        EmpresaRegistrada.objects.filter(username__startswith=PREFIJO_SINTETICO).delete()
@@ -0,0 +1,315 @@
+"""
+Pipeline de archivos estáticos: minificado, nombres con hash y precompresión.
+
+ManifestMinificadoStorage (STORAGES['staticfiles'] en producción) minifica
+cada .css y .js al hacer collectstatic, antes de calcular el hash, para que
+el nombre cambie solo cuando cambia el contenido. Después escribe junto a
+cada archivo con hash sus variantes .gz y .br (esta última solo si está
+instalado el paquete brotli). core/views_estaticos.py sirve esas variantes
+con caché de un año.
+
+medir_paginas_html() mide cuántos bytes de HTML y de <style>/<script> en
+línea envía cada página, para comparar contra una medición anterior.
+"""
+import gzip
+import re
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # dependencia opcional
+    brotli = None
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Por debajo de este tamaño la compresión no compensa la cabecera extra
+TAMANO_MINIMO_COMPRESION = 256
+
+# Hash de 12 caracteres que añade ManifestStaticFilesStorage antes de la extensión
+PATRON_NOMBRE_CON_HASH = re.compile(r'\.[0-9a-f]{12}\.[A-Za-z0-9]+$')
+
+
+# Minificado
+
+_CADENA_CSS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+_CADENA_O_COMENTARIO_CSS = re.compile(_CADENA_CSS.pattern + r'|/\*.*?\*/', re.S)
+
+
+def minificar_css(texto):
+    """Quita comentarios y espacios sobrantes sin tocar el contenido de las cadenas."""
+    sin_comentarios = _CADENA_O_COMENTARIO_CSS.sub(lambda coincidencia: coincidencia.group(1) or '', texto)
+    partes = _CADENA_CSS.split(sin_comentarios)
+    for i in range(0, len(partes), 2):
+        parte = re.sub(r'\s+', ' ', partes[i])
+        parte = re.sub(r'\s*([{};,>])\s*', r'\1', parte)
+        parte = re.sub(r':\s+', ':', parte)
+        partes[i] = parte.replace(';}', '}')
+    return ''.join(partes).strip()
+
+
+# Tras estos caracteres o palabras, una '/' abre una expresión regular y no es una división
+_PREVIOS_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+_PALABRAS_REGEX = {'return', 'typeof', 'case', 'do', 'else', 'in', 'instanceof', 'new', 'delete', 'void', 'throw', 'yield', 'await'}
+
+
+def _es_identificador(caracter):
+    return caracter.isalnum() or caracter in '_$'
+
+
+def _fin_cadena(texto, i):
+    """Índice justo después de la cadena '...' o "..." que empieza en i."""
+    comilla = texto[i]
+    i += 1
+    while i < len(texto) and texto[i] != comilla:
+        i += 2 if texto[i] == '\\' else 1
+    return i + 1
+
+
+def _fin_regex(texto, i):
+    """Índice justo después de la expresión regular (con sus flags) que empieza en i."""
+    i += 1
+    en_clase = False
+    while i < len(texto):
+        caracter = texto[i]
+        if caracter == '\\':
+            i += 2
+            continue
+        if caracter == '[':
+            en_clase = True
+        elif caracter == ']':
+            en_clase = False
+        elif caracter == '/' and not en_clase:
+            break
+        i += 1
+    i += 1
+    while i < len(texto) and texto[i].isalpha():
+        i += 1
+    return i
+
+
+def _fin_plantilla(texto, i):
+    """Índice justo después de la plantilla `...` que empieza en i (admite ${...} anidados)."""
+    i += 1
+    while i < len(texto):
+        caracter = texto[i]
+        if caracter == '\\':
+            i += 2
+        elif caracter == '`':
+            return i + 1
+        elif texto.startswith('${', i):
+            i = _fin_codigo(texto, i + 2)
+        else:
+            i += 1
+    return i
+
+
+def _fin_codigo(texto, i):
+    """Índice justo después de la '}' que cierra el código de un ${...}."""
+    profundidad = 0
+    previo = '('
+    while i < len(texto):
+        caracter = texto[i]
+        if caracter in '"\'':
+            i = _fin_cadena(texto, i)
+            previo = '"'
+            continue
+        if caracter == '`':
+            i = _fin_plantilla(texto, i)
+            previo = '"'
+            continue
+        if caracter == '/' and previo in _PREVIOS_REGEX and not texto.startswith(('//', '/*'), i):
+            i = _fin_regex(texto, i)
+            previo = '"'
+            continue
+        if caracter == '{':
+            profundidad += 1
+        elif caracter == '}':
+            if profundidad == 0:
+                return i + 1
+            profundidad -= 1
+        if not caracter.isspace():
+            previo = caracter
+        i += 1
+    return i
+
+
+def minificar_js(texto):
+    """Quita comentarios, sangría y líneas vacías de un script.
+
+    Conserva los saltos de línea (la inserción automática de ';' depende de
+    ellos) y copia sin cambios cadenas, plantillas y expresiones regulares.
+    """
+    salida = []
+    i, n = 0, len(texto)
+    previo = ''     # último carácter significativo escrito
+    palabra = ''    # última palabra escrita (para 'return /x/' y similares)
+    espacio = ''    # espacio pendiente: '', ' ' o '\n'
+
+    def escribir(fragmento):
+        nonlocal espacio
+        if espacio == '\n':
+            if salida:
+                salida.append('\n')
+        elif espacio == ' ' and salida:
+            anterior, siguiente = salida[-1][-1], fragmento[0]
+            if (_es_identificador(anterior) and _es_identificador(siguiente)) or (anterior in '+-' and anterior == siguiente):
+                salida.append(' ')
+        espacio = ''
+        salida.append(fragmento)
+
+    while i < n:
+        caracter = texto[i]
+        if caracter.isspace():
+            if caracter == '\n' or espacio == '\n':
+                espacio = '\n'
+            elif not espacio:
+                espacio = ' '
+            i += 1
+            continue
+        if texto.startswith('//', i):
+            while i < n and texto[i] != '\n':
+                i += 1
+            continue
+        if texto.startswith('/*', i):
+            fin = texto.find('*/', i + 2)
+            fin = n if fin == -1 else fin + 2
+            if '\n' in texto[i:fin]:
+                espacio = '\n'
+            elif not espacio:
+                espacio = ' '
+            i = fin
+            continue
+
+        if caracter in '"\'':
+            fin = _fin_cadena(texto, i)
+        elif caracter == '`':
+            fin = _fin_plantilla(texto, i)
+        elif caracter == '/' and (not previo or previo in _PREVIOS_REGEX or palabra in _PALABRAS_REGEX):
+            fin = _fin_regex(texto, i)
+        elif _es_identificador(caracter):
+            fin = i
+            while fin < n and _es_identificador(texto[fin]):
+                fin += 1
+            escribir(texto[i:fin])
+            palabra = texto[i:fin]
+            previo = 'a'
+            i = fin
+            continue
+        else:
+            escribir(caracter)
+            previo = caracter
+            palabra = ''
+            i += 1
+            continue
+
+        escribir(texto[i:fin])
+        previo = '"'
+        palabra = ''
+        i = fin
+    return ''.join(salida).strip() + '\n'
+
+
+MINIFICADORES = {
+    '.css': minificar_css,
+    '.js': minificar_js,
+}
+
+
+# Precompresión
+
+def escribir_variantes_comprimidas(ruta):
+    """Escribe ruta.gz (y ruta.br si hay brotli) junto al archivo; devuelve las rutas escritas."""
+    ruta = Path(ruta)
+    contenido = ruta.read_bytes()
+    if len(contenido) < TAMANO_MINIMO_COMPRESION:
+        return []
+    escritas = []
+    # mtime=0: la misma entrada da siempre el mismo .gz
+    comprimido = gzip.compress(contenido, compresslevel=9, mtime=0)
+    if len(comprimido) < len(contenido):
+        ruta.with_name(ruta.name + '.gz').write_bytes(comprimido)
+        escritas.append(ruta.with_name(ruta.name + '.gz'))
+    if brotli is not None:
+        comprimido = brotli.compress(contenido, quality=11)
+        if len(comprimido) < len(contenido):
+            ruta.with_name(ruta.name + '.br').write_bytes(comprimido)
+            escritas.append(ruta.with_name(ruta.name + '.br'))
+    return escritas
+
+
+class ManifestMinificadoStorage(ManifestStaticFilesStorage):
+    """Manifest con hash en el nombre + minificado previo + variantes .gz/.br."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        paths = dict(paths)
+        for ruta in list(paths):
+            minificador = MINIFICADORES.get(Path(ruta).suffix)
+            if minificador is None or Path(ruta).stem.endswith('.min'):
+                continue
+            destino = Path(self.path(ruta))
+            try:
+                texto = destino.read_text(encoding='utf-8')
+            except UnicodeDecodeError:
+                continue
+            destino.write_text(minificador(texto), encoding='utf-8')
+            # El hash se calcula leyendo la copia ya minificada de STATIC_ROOT
+            paths[ruta] = (self, ruta)
+
+        yield from super().post_process(paths, dry_run, **options)
+
+        for nombre in set(self.hashed_files.values()):
+            if nombre and nombre.endswith(EXTENSIONES_COMPRIMIBLES):
+                escribir_variantes_comprimidas(self.path(nombre))
+
+
+# Medición del HTML de las páginas
+
+PAGINAS_HTML = [
+    'home',
+    'productos',
+    'carrito',
+    'idea',
+    'mis_pedidos',
+    'comentarios',
+    'empresa_ideas',
+    'gestion_pedidos',
+    'gestion_pagos',
+    'inventario',
+    'estadisticas',
+]
+
+_BLOQUE_EN_LINEA = re.compile(r'<(style|script)(?![^>]*\bsrc=)[^>]*>(.*?)</\1>', re.S | re.I)
+
+
+def bytes_en_linea(html):
+    """Bytes de CSS y JS escritos dentro del HTML (sin contar <script src>)."""
+    return sum(len(contenido.encode('utf-8')) for _, contenido in _BLOQUE_EN_LINEA.findall(html))
+
+
+def medir_paginas_html(paginas=None):
+    """{pagina: {'bytes_html', 'bytes_en_linea', 'bytes_gzip'}} con los datos de core/regresion_consultas."""
+    from django.urls import reverse
+
+    from .regresion_consultas import FILAS_PEQUENO, _cliente_http, _kwargs_ruta, crear_actores, poblar, rutas_con_nombre
+
+    actores = crear_actores()
+    poblar(actores, FILAS_PEQUENO)
+    rutas = rutas_con_nombre()
+    http = _cliente_http(actores, 'cliente')
+    resultado = {}
+    for nombre in paginas or PAGINAS_HTML:
+        response = http.get(reverse(nombre, kwargs=_kwargs_ruta(rutas[nombre], actores)))
+        if response.status_code != 200 or not response['Content-Type'].startswith('text/html'):
+            continue
+        html = response.content
+        resultado[nombre] = {
+            'bytes_html': len(html),
+            'bytes_en_linea': bytes_en_linea(html.decode('utf-8', errors='ignore')),
+            'bytes_gzip': len(gzip.compress(html, mtime=0)),
+        }
+    return resultado
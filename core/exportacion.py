@@ -0,0 +1,182 @@
+"""
+Utilidades para exportar datos contables en streaming (CSV, XLSX y ZIP).
+
+Todo se genera fila por fila sobre un buffer que se vacía en cada paso,
+de modo que la memoria usada no depende de la cantidad de registros.
+"""
+import csv
+import json
+import zipfile
+from decimal import Decimal, InvalidOperation
+from xml.sax.saxutils import escape
+
+
+class _BufferEco:
+    """Pseudo-archivo para csv.writer: devuelve lo escrito en lugar de guardarlo."""
+
+    def write(self, valor):
+        return valor
+
+
+class _SalidaEnStreaming:
+    """Archivo de solo escritura que acumula bytes hasta que se drenan.
+
+    No implementa tell() ni seek(), así zipfile escribe en modo streaming
+    (con descriptores de datos) sin necesitar el archivo completo en memoria.
+    """
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        if datos:
+            self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def drenar(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def productos_de_json(productos_json):
+    """Devuelve la lista de productos de un campo JSON (Pago/Pedido/Factura).
+
+    Normaliza las claves que usa el carrito ('tipo' o 'categoria') y nunca
+    lanza excepción: un JSON inválido se trata como lista vacía.
+    """
+    try:
+        productos = json.loads(productos_json or '[]')
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(productos, list):
+        return []
+
+    items = []
+    for producto in productos:
+        if not isinstance(producto, dict):
+            continue
+        try:
+            cantidad = int(producto.get('cantidad', 0) or 0)
+        except (TypeError, ValueError):
+            cantidad = 0
+        try:
+            precio = Decimal(str(producto.get('precio', 0) or 0))
+        except (InvalidOperation, ValueError):
+            precio = Decimal('0')
+        items.append({
+            'id': producto.get('id'),
+            'categoria': (producto.get('categoria') or producto.get('tipo') or '').lower(),
+            'nombre': producto.get('nombre', ''),
+            'cantidad': cantidad,
+            'precio_unitario': precio,
+            'subtotal': precio * cantidad,
+        })
+    return items
+
+
+def iterar_csv(encabezados, filas):
+    """Genera el contenido CSV (UTF-8 con BOM para Excel) línea por línea."""
+    escritor = csv.writer(_BufferEco())
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow(fila)
+
+
+def iterar_zip(entradas):
+    """Genera un archivo ZIP en streaming.
+
+    `entradas` es un iterable de tuplas (nombre, contenido) donde el contenido
+    son bytes o un iterable de fragmentos de bytes.
+    """
+    salida = _SalidaEnStreaming()
+    with zipfile.ZipFile(salida, mode='w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+        for nombre, contenido in entradas:
+            with archivo_zip.open(nombre, mode='w', force_zip64=True) as destino:
+                if isinstance(contenido, (bytes, bytearray)):
+                    contenido = [contenido]
+                for fragmento in contenido:
+                    destino.write(fragmento)
+                    datos = salida.drenar()
+                    if datos:
+                        yield datos
+            datos = salida.drenar()
+            if datos:
+                yield datos
+    yield salida.drenar()
+
+
+# ==================== XLSX MÍNIMO EN STREAMING ====================
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _celda_xlsx(valor):
+    if valor is None or valor == '':
+        return '<c/>'
+    if isinstance(valor, bool):
+        return f'<c t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, Decimal)):
+        return f'<c><v>{valor}</v></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(valor))}</t></is></c>'
+
+
+def _hoja_xlsx(encabezados, filas):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ).encode('utf-8')
+    yield ('<row>' + ''.join(_celda_xlsx(e) for e in encabezados) + '</row>').encode('utf-8')
+    for fila in filas:
+        yield ('<row>' + ''.join(_celda_xlsx(v) for v in fila) + '</row>').encode('utf-8')
+    yield b'</sheetData></worksheet>'
+
+
+def iterar_xlsx(encabezados, filas, hoja='Datos'):
+    """Genera un libro XLSX de una sola hoja en streaming (sin dependencias externas)."""
+    return iterar_zip([
+        ('[Content_Types].xml', _XLSX_CONTENT_TYPES.encode('utf-8')),
+        ('_rels/.rels', _XLSX_RELS.encode('utf-8')),
+        ('xl/workbook.xml', _XLSX_WORKBOOK.format(hoja=escape(hoja[:31])).encode('utf-8')),
+        ('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS.encode('utf-8')),
+        ('xl/worksheets/sheet1.xml', _hoja_xlsx(encabezados, filas)),
+    ])
@@ -0,0 +1,206 @@
+"""
+Generación de PDFs de facturas con caché en disco y renderizado en paralelo
+(este último solo en el comando exportar_facturas_pdf, nunca en una petición).
+
+Los PDFs se guardan en settings.FACTURAS_PDF_DIR (fuera de MEDIA_ROOT, porque
+son datos privados) con el número de factura como nombre. Una factura no
+cambia después de emitida, así que un PDF ya generado se reutiliza siempre.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from .models import Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios, Factura
+
+# Categoría -> (modelo, campo nombre, campo precio)
+PRODUCTOS_POR_CATEGORIA = {
+    'mesas': (Mesas, 'nombre1', 'precio1'),
+    'sillas': (Sillas, 'nombre2', 'precio2'),
+    'armarios': (Armarios, 'nombre3', 'precio3'),
+    'cajoneras': (Cajoneras, 'nombre4', 'precio4'),
+    'escritorios': (Escritorios, 'nombre5', 'precio5'),
+    'utensilios': (Utensilios, 'nombre6', 'precio6'),
+}
+
+
+def detallar_productos_factura(productos_list):
+    """Convierte la lista JSON de productos de una factura en filas para la plantilla."""
+    productos_detallados = []
+    for item in productos_list:
+        # Manejar tanto 'categoria' como 'tipo' (campo usado en el carrito)
+        categoria = item.get('categoria') or item.get('tipo')
+        producto_id = item.get('id')
+        cantidad = item.get('cantidad', 1)
+
+        # Si el producto ya tiene nombre y precio (del carrito), usarlos directamente
+        if 'nombre' in item and 'precio' in item:
+            productos_detallados.append({
+                'nombre': item['nombre'],
+                'categoria': categoria,
+                'cantidad': cantidad,
+                'precio_unitario': float(item['precio']),
+                'subtotal': float(item['precio']) * cantidad
+            })
+            continue
+
+        # Si no, buscar en la base de datos
+        if not categoria or not producto_id:
+            print(f"Producto sin categoría o ID: {item}")
+            continue
+
+        if categoria in PRODUCTOS_POR_CATEGORIA:
+            modelo, campo_nombre, campo_precio = PRODUCTOS_POR_CATEGORIA[categoria]
+            try:
+                producto = modelo.objects.get(id=producto_id)
+                precio = getattr(producto, campo_precio)
+                productos_detallados.append({
+                    'nombre': getattr(producto, campo_nombre),
+                    'categoria': categoria,
+                    'cantidad': cantidad,
+                    'precio_unitario': precio,
+                    'subtotal': float(precio) * cantidad
+                })
+            except Exception as e:
+                print(f"Error al procesar producto {categoria} #{producto_id}: {e}")
+    return productos_detallados
+
+
+def contexto_factura(factura):
+    """Contexto de la plantilla core/factura_pdf.html para una factura."""
+    try:
+        productos_list = json.loads(factura.productos)
+    except (TypeError, ValueError):
+        productos_list = []
+    return {
+        'factura': factura,
+        'pago': factura.pago,
+        'productos': detallar_productos_factura(productos_list),
+    }
+
+
+def directorio_pdfs():
+    directorio = Path(getattr(settings, 'FACTURAS_PDF_DIR', Path(settings.BASE_DIR) / 'facturas_pdf'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def nombre_pdf_factura(factura):
+    return f"Factura_{factura.numero_factura}.pdf"
+
+
+def ruta_pdf_factura(factura):
+    return directorio_pdfs() / nombre_pdf_factura(factura)
+
+
+def renderizar_pdf_factura(context):
+    """Renderiza core/factura_pdf.html con xhtml2pdf y devuelve los bytes del PDF."""
+    from xhtml2pdf import pisa
+
+    html = get_template('core/factura_pdf.html').render(context)
+    destino = BytesIO()
+    pisa_status = pisa.CreatePDF(html.encode('utf-8'), dest=destino, encoding='utf-8')
+    if pisa_status.err:
+        raise RuntimeError(f"Error en generación PDF: {pisa_status.err}")
+    return destino.getvalue()
+
+
+def obtener_pdf_factura(factura):
+    """Devuelve la ruta del PDF de la factura, generándolo solo si no está en caché."""
+    ruta = ruta_pdf_factura(factura)
+    if ruta.exists():
+        return ruta
+
+    contenido = renderizar_pdf_factura(contexto_factura(factura))
+    # Escritura atómica: otro proceso nunca ve un PDF a medio escribir
+    temporal = ruta.with_name(f"{ruta.name}.{os.getpid()}.tmp")
+    temporal.write_bytes(contenido)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def _inicializar_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _renderizar_en_worker(factura_id):
+    factura = Factura.objects.select_related('pago').get(id=factura_id)
+    return factura_id, str(obtener_pdf_factura(factura))
+
+
+def iterar_pdfs_facturas(facturas, workers=None, progreso=None):
+    """Genera tuplas (nombre_archivo, ruta) con el PDF de cada factura.
+
+    Las facturas con PDF en caché se entregan primero; las demás se renderizan
+    en un pool de procesos y se entregan a medida que terminan. `progreso` es
+    un callable opcional (procesadas, total, nombre_archivo).
+
+    El pool (workers > 1) es solo para procesos propios como el comando
+    exportar_facturas_pdf; las vistas deben pasar workers=1.
+    """
+    if workers is None:
+        workers = getattr(settings, 'FACTURAS_PDF_WORKERS', os.cpu_count() or 1)
+
+    pendientes = {}
+    en_cache = []
+    for factura in facturas:
+        ruta = ruta_pdf_factura(factura)
+        if ruta.exists():
+            en_cache.append((nombre_pdf_factura(factura), ruta))
+        else:
+            pendientes[factura.id] = factura
+
+    total = len(en_cache) + len(pendientes)
+    procesadas = 0
+
+    for nombre, ruta in en_cache:
+        procesadas += 1
+        if progreso:
+            progreso(procesadas, total, nombre)
+        yield nombre, ruta
+
+    if not pendientes:
+        return
+
+    if workers <= 1 or len(pendientes) == 1:
+        for factura in pendientes.values():
+            nombre = nombre_pdf_factura(factura)
+            ruta = obtener_pdf_factura(factura)
+            procesadas += 1
+            if progreso:
+                progreso(procesadas, total, nombre)
+            yield nombre, ruta
+        return
+
+    # Los procesos hijos no deben heredar conexiones abiertas a la base de datos
+    from django.db import connections
+    connections.close_all()
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker)
+    try:
+        futuros = [executor.submit(_renderizar_en_worker, factura_id) for factura_id in pendientes]
+        for futuro in as_completed(futuros):
+            factura_id, ruta = futuro.result()
+            nombre = nombre_pdf_factura(pendientes[factura_id])
+            procesadas += 1
+            if progreso:
+                progreso(procesadas, total, nombre)
+            yield nombre, Path(ruta)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def leer_en_fragmentos(ruta, tamano=64 * 1024):
+    with open(ruta, 'rb') as archivo:
+        while True:
+            fragmento = archivo.read(tamano)
+            if not fragmento:
+                break
+            yield fragmento
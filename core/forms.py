@@ -1,5 +1,6 @@
 from django import forms
 from .models import UserClientes, Idea, Comentario, Pago
+from .modelos3d import FORMATOS_MODELO_3D, validar_archivo_modelo_3d
 import re
 import random
 
@@ -164,19 +165,26 @@ class IdeaForm(forms.ModelForm):
         fields = ['titulo', 'descripcion', 'imagen', 'modelo_3d', 'categoria']
         widgets = {
             'descripcion': forms.Textarea(attrs={'rows': 5}),
+            'modelo_3d': forms.ClearableFileInput(attrs={'accept': ','.join(FORMATOS_MODELO_3D)}),
             'categoria': forms.Select(attrs={
                 'class': 'form-control'
             }),
         }
         labels = {
-            'modelo_3d': 'Modelo 3D (.glb)',
+            'modelo_3d': 'Modelo 3D (.glb, .gltf, .obj, .stl)',
             'categoria': 'Categoría del Producto',
         }
         help_texts = {
-            'modelo_3d': 'Sube un archivo de modelo 3D en formato .glb',
+            'modelo_3d': 'Sube un archivo de modelo 3D en formato .glb, .gltf, .obj o .stl',
             'categoria': 'Selecciona la categoría que mejor se ajuste a tu idea',
         }
 
+    def clean_modelo_3d(self):
+        modelo = self.cleaned_data.get('modelo_3d')
+        if modelo and hasattr(modelo, 'size'):
+            validar_archivo_modelo_3d(modelo)
+        return modelo
+
 class IdeaUpdateForm(forms.ModelForm):
     class Meta:
         model = Idea
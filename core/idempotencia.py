@@ -0,0 +1,116 @@
+"""
+Envíos de pago idempotentes (procesar_pago).
+
+Con una subida lenta del comprobante el cliente pulsa "pagar" dos veces.
+Antes de trabajar, la vista reclama una SolicitudPago por cada identidad
+del envío:
+
+- 'clave:<Idempotency-Key>': la clave que genera el navegador para el
+  intento de pago (se repite en los reintentos), válida PAGOS_IDEMPOTENCIA_HORAS.
+- 'comprobante:<sha256>': el contenido del comprobante, para duplicados sin
+  clave o con clave distinta, durante PAGOS_VENTANA_DUPLICADOS_MINUTOS.
+
+La restricción única (cliente, clave) decide quién gana aunque las dos
+peticiones lleguen a la vez. Si una identidad ya está reclamada se responde
+con la respuesta guardada (o 409 si el primer envío aún se procesa), sin
+crear otro Pago, guardar otro archivo ni tocar el perfil.
+
+Un reclamo sin respuesta más antiguo que PAGOS_PROCESAMIENTO_MAX_SEGUNDOS se
+da por abandonado (el proceso murió entre el reclamo y completar()) y la
+siguiente petición lo toma; si no, el cliente no podría pagar hasta que
+caducara la clave.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import SolicitudPago
+
+LONGITUD_MAXIMA_CLAVE = 80
+
+
+def huella_archivo(archivo):
+    """SHA-256 del contenido de un archivo subido (lo deja listo para volver a leerse)."""
+    resumen = hashlib.sha256()
+    for bloque in archivo.chunks():
+        resumen.update(bloque)
+    archivo.seek(0)
+    return resumen.hexdigest()
+
+
+def claves_envio(request, comprobante):
+    """[(clave, vigencia)] de las identidades de este envío de pago."""
+    claves = []
+    clave_cliente = (request.headers.get('Idempotency-Key') or request.POST.get('clave_idempotencia') or '').strip()
+    if clave_cliente:
+        claves.append((f'clave:{clave_cliente[:LONGITUD_MAXIMA_CLAVE]}', timedelta(hours=settings.PAGOS_IDEMPOTENCIA_HORAS)))
+    claves.append((f'comprobante:{huella_archivo(comprobante)}', timedelta(minutes=settings.PAGOS_VENTANA_DUPLICADOS_MINUTOS)))
+    return claves
+
+
+def _reclamar(cliente, clave, vigencia):
+    """(solicitud, True) si esta petición reclamó la clave; (solicitud existente, False) si no."""
+    try:
+        with transaction.atomic():
+            return SolicitudPago.objects.create(cliente=cliente, clave=clave), True
+    except IntegrityError:
+        pass
+    existente = SolicitudPago.objects.get(cliente=cliente, clave=clave)
+    ahora = timezone.now()
+    caducada = existente.fecha_creacion < ahora - vigencia
+    abandonada = existente.respuesta is None and existente.fecha_creacion < ahora - timedelta(
+        seconds=settings.PAGOS_PROCESAMIENTO_MAX_SEGUNDOS
+    )
+    if caducada or abandonada:
+        # Se reclama de nuevo salvo que otra petición se haya adelantado (o el
+        # primer envío haya guardado su respuesta entretanto)
+        renovada = SolicitudPago.objects.filter(
+            pk=existente.pk, fecha_creacion=existente.fecha_creacion, respuesta__isnull=existente.respuesta is None,
+        ).update(fecha_creacion=ahora, pago=None, respuesta=None, codigo_respuesta=None)
+        existente.refresh_from_db()
+        return existente, bool(renovada)
+    return existente, False
+
+
+class EnvioPago:
+    """Reclamo de las claves de un envío; si ya existía, `repetida` tiene (respuesta, código).
+
+    `reproducida` indica que esa respuesta es la guardada del primer envío (no el 409 de "en proceso").
+    """
+
+    def __init__(self, cliente, claves):
+        self.cliente = cliente
+        self.reclamadas = []
+        self.repetida = None
+        self.reproducida = False
+        for clave, vigencia in claves:
+            solicitud, reclamada = _reclamar(cliente, clave, vigencia)
+            if reclamada:
+                self.reclamadas.append(solicitud)
+                continue
+            if solicitud.respuesta is not None:
+                self.repetida = (solicitud.respuesta, solicitud.codigo_respuesta)
+                self.reproducida = True
+            else:
+                self.repetida = ({
+                    'success': False,
+                    'error': 'Este pago ya se está procesando. Espera unos segundos.',
+                    'en_proceso': True,
+                }, 409)
+            # Las claves reclamadas hasta aquí se liberan: el envío no se procesa
+            self.liberar()
+            break
+
+    def completar(self, respuesta, codigo, pago=None):
+        """Guarda la respuesta para repetirla en los envíos duplicados."""
+        SolicitudPago.objects.filter(pk__in=[solicitud.pk for solicitud in self.reclamadas]).update(
+            respuesta=respuesta, codigo_respuesta=codigo, pago=pago,
+        )
+
+    def liberar(self):
+        """Quita los reclamos (el envío falló y se puede reintentar con las mismas claves)."""
+        SolicitudPago.objects.filter(pk__in=[solicitud.pk for solicitud in self.reclamadas]).delete()
+        self.reclamadas = []
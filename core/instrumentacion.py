@@ -0,0 +1,222 @@
+"""
+Instrumentación por petición: consultas SQL, tiempos y percentiles por ruta.
+
+InstrumentacionMiddleware (core/middleware.py) crea una MedicionRequest por
+petición y la deja en un ContextVar; el wrapper de SQL de Django y la
+medición de plantillas van sumando sobre ella. Al terminar se publican los
+tiempos en la cabecera Server-Timing, se registran en EstadisticasRutas y,
+si la petición supera el umbral, se escribe una línea JSON en el logger
+'gangazos.rendimiento' con las consultas más lentas y desde dónde se hicieron.
+"""
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+import traceback
+from collections import Counter, deque
+
+from django.conf import settings
+
+logger = logging.getLogger('gangazos.rendimiento')
+
+_medicion_actual = contextvars.ContextVar('medicion_actual', default=None)
+
+# Máximo de consultas guardadas con detalle por petición (el resto solo se cuenta)
+MAX_CONSULTAS_DETALLE = 200
+# Consultas lentas que aún se guardan (con su pila) cuando el detalle ya está lleno
+MAX_CONSULTAS_LENTAS = 50
+
+_ESTE_ARCHIVO = os.path.abspath(__file__)
+
+
+def medicion_actual():
+    return _medicion_actual.get()
+
+
+def iniciar_medicion(umbral_sql_lento_ms):
+    """Crea la medición de la petición actual; devuelve (medicion, token)."""
+    medicion = MedicionRequest(umbral_sql_lento_ms)
+    return medicion, _medicion_actual.set(medicion)
+
+
+def terminar_medicion(token):
+    _medicion_actual.reset(token)
+
+
+def _pila_proyecto(limite=8):
+    """Últimos frames de la pila que pertenecen al proyecto (sin librerías)."""
+    base = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(base)
+        and 'site-packages' not in frame.filename
+        and os.path.abspath(frame.filename) != _ESTE_ARCHIVO
+    ]
+    return [f"{os.path.relpath(frame.filename, base)}:{frame.lineno} en {frame.name}" for frame in frames[-limite:]]
+
+
+class MedicionRequest:
+    """Acumula consultas y tiempos de una petición."""
+
+    def __init__(self, umbral_sql_lento_ms=50):
+        self.inicio = time.perf_counter()
+        self.umbral_sql_lento = umbral_sql_lento_ms / 1000
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_plantillas = 0.0
+        self.tiempo_vista = None
+        self.detalle_sql = []
+        self.lentas_omitidas = 0
+        self.repeticiones = Counter()
+        self._profundidad_plantillas = 0
+
+    def registrar_sql(self, execute, sql, params, many, context):
+        """Wrapper para connection.execute_wrapper()."""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tiempo_sql += duracion
+            self.repeticiones[sql] += 1
+            lenta = duracion >= self.umbral_sql_lento
+            if len(self.detalle_sql) < MAX_CONSULTAS_DETALLE or (
+                lenta and len(self.detalle_sql) < MAX_CONSULTAS_DETALLE + MAX_CONSULTAS_LENTAS
+            ):
+                # La pila solo se captura para consultas lentas: extract_stack no es gratis
+                pila = _pila_proyecto() if lenta else None
+                self.detalle_sql.append((duracion, sql, pila))
+            elif lenta:
+                self.lentas_omitidas += 1
+
+    def medir_plantilla(self, render, *args, **kwargs):
+        """Ejecuta render() sumando su tiempo (sin contar dos veces las anidadas)."""
+        if self._profundidad_plantillas:
+            return render(*args, **kwargs)
+        self._profundidad_plantillas += 1
+        inicio = time.perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            self.tiempo_plantillas += time.perf_counter() - inicio
+            self._profundidad_plantillas -= 1
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self, total):
+        """Valor de la cabecera Server-Timing (duraciones en ms)."""
+        partes = [
+            f'db;dur={self.tiempo_sql * 1000:.1f};desc="{self.consultas} consultas"',
+            f'tpl;dur={self.tiempo_plantillas * 1000:.1f}',
+        ]
+        if self.tiempo_vista is not None:
+            partes.append(f'view;dur={self.tiempo_vista * 1000:.1f}')
+        partes.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(partes)
+
+    def reporte(self, request, ruta, total, status, max_consultas=5):
+        """Diccionario serializable para el log de peticiones lentas."""
+        lentas = sorted(self.detalle_sql, key=lambda consulta: consulta[0], reverse=True)[:max_consultas]
+        return {
+            'metodo': request.method,
+            'path': request.path,
+            'ruta': ruta,
+            'status': status,
+            'total_ms': round(total * 1000, 1),
+            'vista_ms': round(self.tiempo_vista * 1000, 1) if self.tiempo_vista is not None else None,
+            'sql_ms': round(self.tiempo_sql * 1000, 1),
+            'plantillas_ms': round(self.tiempo_plantillas * 1000, 1),
+            'consultas': self.consultas,
+            'consultas_lentas': [
+                {'ms': round(duracion * 1000, 1), 'sql': sql, 'pila': pila}
+                for duracion, sql, pila in lentas
+            ],
+            # Lentas que no cupieron en el detalle (no entran en consultas_lentas)
+            'consultas_lentas_omitidas': self.lentas_omitidas,
+            # Consultas idénticas repetidas: la señal típica de un N+1
+            'consultas_repetidas': [
+                {'veces': veces, 'sql': sql}
+                for sql, veces in self.repeticiones.most_common(3) if veces > 1
+            ],
+        }
+
+
+def instalar_medicion_plantillas():
+    """Envuelve el render de las plantillas de Django para medir su tiempo (una sola vez)."""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_instrumentado', False):
+        return
+    render_original = Template.render
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return render_original(self, context, request)
+        return medicion.medir_plantilla(render_original, self, context, request)
+
+    render._instrumentado = True
+    Template.render = render
+
+
+def percentil(valores_ordenados, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not valores_ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+class EstadisticasRutas:
+    """Ventana deslizante de las últimas N peticiones por ruta (en memoria del proceso)."""
+
+    def __init__(self, muestras_por_ruta=500):
+        self.muestras_por_ruta = muestras_por_ruta
+        self._muestras = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, ruta, total_ms, sql_ms, consultas):
+        with self._lock:
+            muestras = self._muestras.get(ruta)
+            if muestras is None:
+                muestras = self._muestras[ruta] = deque(maxlen=self.muestras_por_ruta)
+            muestras.append((total_ms, sql_ms, consultas))
+
+    def reiniciar(self):
+        with self._lock:
+            self._muestras.clear()
+
+    def resumen(self):
+        with self._lock:
+            copia = {ruta: list(muestras) for ruta, muestras in self._muestras.items()}
+
+        rutas = []
+        for ruta, muestras in copia.items():
+            totales = sorted(m[0] for m in muestras)
+            sql = sorted(m[1] for m in muestras)
+            consultas = [m[2] for m in muestras]
+            rutas.append({
+                'ruta': ruta,
+                'muestras': len(muestras),
+                'p50_ms': percentil(totales, 50),
+                'p90_ms': percentil(totales, 90),
+                'p95_ms': percentil(totales, 95),
+                'p99_ms': percentil(totales, 99),
+                'max_ms': totales[-1],
+                'sql_p95_ms': percentil(sql, 95),
+                'consultas_promedio': round(sum(consultas) / len(consultas), 1),
+                'consultas_max': max(consultas),
+            })
+        return rutas
+
+
+estadisticas_rutas = EstadisticasRutas(getattr(settings, 'INSTRUMENTACION_MUESTRAS_POR_RUTA', 500))
+
+
+def registrar_peticion_lenta(reporte):
+    logger.warning(json.dumps(reporte, ensure_ascii=False, default=str))
@@ -0,0 +1,143 @@
+"""
+Umbrales de inventario: reactivación automática y alertas de stock bajo.
+
+Un producto que se agota al confirmar un pago queda inactivo con
+inactivo_por_stock=True; cuando vuelve a tener unidades se reactiva solo
+(los productos inhabilitados a mano no se tocan). Las alertas de stock bajo
+no se calculan en cada petición: las genera evaluar_inventario(), pensado
+para ejecutarse periódicamente con `manage.py evaluar_inventario`.
+
+También calcula la disponibilidad real (stock menos lo reservado en otros
+carritos) de varios productos a la vez para el carrito y el modal de producto.
+"""
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .facturas import PRODUCTOS_POR_CATEGORIA
+from .models import AlertaInventario, CarritoTemporal
+
+
+def marcar_agotado(producto):
+    """Deshabilita un producto sin stock recordando que fue por agotarse (no guarda)."""
+    if producto.cantidad_disponible <= 0:
+        producto.is_active = False
+        producto.inactivo_por_stock = True
+        return True
+    return False
+
+
+def reactivar_si_hay_stock(producto):
+    """Reactiva un producto deshabilitado por agotarse si ya tiene unidades (no guarda)."""
+    if producto.inactivo_por_stock and producto.cantidad_disponible > 0:
+        producto.is_active = True
+        producto.inactivo_por_stock = False
+        return True
+    return False
+
+
+def evaluar_inventario():
+    """Job por lotes: reactiva productos repuestos y sincroniza las alertas de stock.
+
+    Por categoría hace un UPDATE de reactivación y una consulta de productos
+    bajo el umbral; las alertas se crean, actualizan y resuelven en bloque.
+    Devuelve un resumen con los contadores de cada operación.
+    """
+    resumen = {'reactivados': 0, 'alertas_nuevas': 0, 'alertas_actualizadas': 0, 'alertas_resueltas': 0}
+
+    with transaction.atomic():
+        abiertas = {
+            (alerta.categoria, alerta.producto_id): alerta
+            for alerta in AlertaInventario.objects.select_for_update().filter(resuelta=False)
+        }
+        vigentes = set()
+        nuevas = []
+        actualizadas = []
+
+        for categoria, (modelo, campo_nombre, _) in PRODUCTOS_POR_CATEGORIA.items():
+            resumen['reactivados'] += modelo.objects.filter(
+                inactivo_por_stock=True, cantidad_disponible__gt=0
+            ).update(is_active=True, inactivo_por_stock=False)
+
+            bajo_umbral = modelo.objects.filter(
+                Q(is_active=True) | Q(inactivo_por_stock=True),
+                cantidad_disponible__lte=F('stock_minimo'),
+            ).values('id', campo_nombre, 'cantidad_disponible', 'stock_minimo')
+
+            for fila in bajo_umbral:
+                clave = (categoria, fila['id'])
+                vigentes.add(clave)
+                tipo = 'agotado' if fila['cantidad_disponible'] <= 0 else 'stock_bajo'
+                alerta = abiertas.get(clave)
+                if alerta is None:
+                    nuevas.append(AlertaInventario(
+                        categoria=categoria,
+                        producto_id=fila['id'],
+                        nombre=fila[campo_nombre],
+                        tipo=tipo,
+                        cantidad_disponible=fila['cantidad_disponible'],
+                        stock_minimo=fila['stock_minimo'],
+                    ))
+                elif (alerta.tipo, alerta.cantidad_disponible, alerta.stock_minimo) != (tipo, fila['cantidad_disponible'], fila['stock_minimo']):
+                    # Si empeoró (p. ej. pasó a agotado) se vuelve a marcar como no leída
+                    if tipo != alerta.tipo or fila['cantidad_disponible'] < alerta.cantidad_disponible:
+                        alerta.leida = False
+                    alerta.tipo = tipo
+                    alerta.cantidad_disponible = fila['cantidad_disponible']
+                    alerta.stock_minimo = fila['stock_minimo']
+                    actualizadas.append(alerta)
+
+        AlertaInventario.objects.bulk_create(nuevas)
+        AlertaInventario.objects.bulk_update(actualizadas, ['tipo', 'cantidad_disponible', 'stock_minimo', 'leida'])
+
+        resueltas = [alerta.id for clave, alerta in abiertas.items() if clave not in vigentes]
+        if resueltas:
+            AlertaInventario.objects.filter(id__in=resueltas).update(resuelta=True, fecha_resolucion=timezone.now())
+
+    resumen['alertas_nuevas'] = len(nuevas)
+    resumen['alertas_actualizadas'] = len(actualizadas)
+    resumen['alertas_resueltas'] = len(resueltas)
+    return resumen
+
+
+def disponibilidad_productos(pares, username_cliente=None):
+    """Disponibilidad, nombre y precio de varios productos en pocas consultas.
+
+    `pares` es un iterable de (tipo, id) con el tipo en singular como en el
+    carrito ('mesa', 'silla', ...). Hace una consulta por categoría pedida y una
+    sola consulta agrupada de reservas en CarritoTemporal (excluyendo el
+    carrito del propio cliente). Devuelve un dict {"tipo:id": {...}}.
+    """
+    ids_por_tipo = {}
+    for tipo, producto_id in pares:
+        ids_por_tipo.setdefault(tipo, set()).add(producto_id)
+
+    reservas_filtro = Q()
+    for tipo, ids in ids_por_tipo.items():
+        reservas_filtro |= Q(producto_tipo=tipo, producto_id__in=ids)
+    reservas = CarritoTemporal.objects.filter(reservas_filtro)
+    if username_cliente:
+        reservas = reservas.exclude(usuario__usernameCliente=username_cliente)
+    reservado = {
+        (fila['producto_tipo'], fila['producto_id']): fila['total']
+        for fila in reservas.values('producto_tipo', 'producto_id').annotate(total=Sum('cantidad')).order_by()
+    }
+
+    resultado = {}
+    for tipo, ids in ids_por_tipo.items():
+        modelo, campo_nombre, campo_precio = PRODUCTOS_POR_CATEGORIA[f'{tipo}s']
+        encontrados = {
+            fila['id']: fila
+            for fila in modelo.objects.filter(id__in=ids).values('id', campo_nombre, campo_precio, 'cantidad_disponible', 'is_active')
+        }
+        for producto_id in ids:
+            fila = encontrados.get(producto_id)
+            datos = {'tipo': tipo, 'id': producto_id, 'existe': fila is not None, 'producto_activo': False, 'cantidad_disponible': 0}
+            if fila:
+                datos['nombre'] = fila[campo_nombre]
+                datos['precio'] = float(fila[campo_precio])
+                datos['producto_activo'] = fila['is_active']
+                if fila['is_active']:
+                    datos['cantidad_disponible'] = max(0, fila['cantidad_disponible'] - reservado.get((tipo, producto_id), 0))
+            resultado[f'{tipo}:{producto_id}'] = datos
+    return resultado
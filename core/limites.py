@@ -0,0 +1,134 @@
+"""
+Límites de intentos por IP y por cuenta (login, 2FA, códigos de verificación y chat).
+
+@limitar('login', cuenta=campo_post('usernameCliente')) cuenta los intentos
+de la vista en la caché con una ventana deslizante aproximada: el contador
+de la ventana actual más el de la anterior, ponderado por la parte de ella
+que aún cae dentro de los últimos `ventana` segundos. Solo usa add/incr/get
+de la caché (atómicos en Redis y en memoria local), así que con REDIS_URL el
+límite es compartido por todos los procesos.
+
+Por encima del límite la vista no se ejecuta: se responde 429 con
+Retry-After antes de cualquier consulta. El límite por IP se comprueba
+primero porque no necesita la sesión. Los usuarios staff quedan exentos;
+solo se comprueba al superar el límite y si la petición trae cookie de
+sesión, para que el camino normal no consulte al usuario.
+
+Los límites de cada regla están en settings.LIMITES_PETICIONES.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+MENSAJE_LIMITE = 'Demasiados intentos. Espera un momento antes de volver a intentarlo.'
+
+
+def ip_cliente(request):
+    """IP del cliente; con LIMITES_PROXIES_CONFIABLES > 0 se toma de X-Forwarded-For."""
+    proxies = getattr(settings, 'LIMITES_PROXIES_CONFIABLES', 0)
+    reenviada = request.META.get('HTTP_X_FORWARDED_FOR')
+    if proxies and reenviada:
+        # Cada proxy confiable añade una IP al final: la del cliente es la anterior a ellas
+        ips = [ip.strip() for ip in reenviada.split(',') if ip.strip()]
+        if ips:
+            return ips[-min(proxies, len(ips))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def campo_post(nombre):
+    """Cuenta tomada de un campo del formulario (login)."""
+    def cuenta(request):
+        return (request.POST.get(nombre) or '').strip().lower() or None
+    return cuenta
+
+
+def clave_sesion(*nombres):
+    """Cuenta tomada de la primera clave de sesión que exista (2FA, chat)."""
+    def cuenta(request):
+        for nombre in nombres:
+            valor = request.session.get(nombre)
+            if valor:
+                return str(valor)
+        return None
+    return cuenta
+
+
+def _clave(regla, tipo, valor, ventana, numero):
+    # Hash: los nombres de usuario pueden tener caracteres que algunas cachés no aceptan en claves
+    resumen = hashlib.sha1(str(valor).encode()).hexdigest()[:20]
+    return f'limite:{regla}:{tipo}:{resumen}:{ventana}:{numero}'
+
+
+def registrar_intento(regla, tipo, valor, limite, ventana, ahora=None):
+    """Suma un intento; devuelve los segundos a esperar si se superó el límite, o 0."""
+    ahora = time.time() if ahora is None else ahora
+    numero = int(ahora // ventana)
+    clave = _clave(regla, tipo, valor, ventana, numero)
+    # La entrada dura dos ventanas: la siguiente la usa como "ventana anterior"
+    cache.add(clave, 0, ventana * 2)
+    try:
+        intentos = cache.incr(clave)
+    except ValueError:
+        # Expulsada de la caché entre add e incr
+        cache.set(clave, 1, ventana * 2)
+        intentos = 1
+    anteriores = cache.get(_clave(regla, tipo, valor, ventana, numero - 1), 0)
+    transcurrido = ahora - numero * ventana
+    estimado = intentos + anteriores * (1 - transcurrido / ventana)
+    if estimado <= limite:
+        return 0
+    return max(1, math.ceil(ventana - transcurrido))
+
+
+def _es_staff(request):
+    if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+        return False
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and user.is_staff)
+
+
+def _respuesta_limite(espera, json):
+    if json:
+        response = JsonResponse({'success': False, 'error': MENSAJE_LIMITE}, status=429)
+    else:
+        response = HttpResponse(MENSAJE_LIMITE, status=429, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(espera)
+    return response
+
+
+def limitar(regla, cuenta=None, json=False, metodos=('POST',)):
+    """Decorador: limita los intentos de la vista según settings.LIMITES_PETICIONES[regla].
+
+    cuenta(request) devuelve el identificador de la cuenta (o None) para el
+    límite por cuenta; json=True responde el 429 en el formato de las APIs.
+    Solo cuentan las peticiones con los `metodos` indicados.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            limites = getattr(settings, 'LIMITES_PETICIONES', {}).get(regla)
+            if not getattr(settings, 'LIMITES_ACTIVOS', True) or not limites or request.method not in metodos:
+                return vista(request, *args, **kwargs)
+
+            comprobaciones = [('ip', lambda: ip_cliente(request))]
+            if cuenta is not None:
+                comprobaciones.append(('cuenta', lambda: cuenta(request)))
+            for tipo, obtener_valor in comprobaciones:
+                if tipo not in limites:
+                    continue
+                valor = obtener_valor()
+                if not valor:
+                    continue
+                limite, ventana = limites[tipo]
+                espera = registrar_intento(regla, tipo, valor, limite, ventana)
+                if espera and not _es_staff(request):
+                    print(f"⚠️ Límite '{regla}' superado por {tipo} (reintentar en {espera} s)")
+                    return _respuesta_limite(espera, json)
+            return vista(request, *args, **kwargs)
+        return envoltura
+    return decorador
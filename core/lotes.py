@@ -0,0 +1,46 @@
+"""
+Parámetros comunes de las APIs de listados paginados y acciones en lote
+(gestión de usuarios del panel, cola de moderación de comentarios).
+
+leer_lote() valida el cuerpo JSON de una acción en lote: un objeto con una
+lista "ids" de enteros, no vacía y de como mucho `maximo` elementos. Cada
+vista comprueba después sus propios campos (accion, tipo...).
+"""
+import json
+
+from django.http import JsonResponse
+
+# Tamaño de página por defecto y máximo de los listados
+POR_PAGINA = 50
+MAX_POR_PAGINA = 200
+
+
+def parametro_entero(valor, por_defecto, minimo, maximo):
+    """Entero de un parámetro GET dentro de [minimo, maximo]; None si no es un número."""
+    if valor in (None, ''):
+        return por_defecto
+    try:
+        return min(max(int(valor), minimo), maximo)
+    except ValueError:
+        return None
+
+
+def leer_lote(request, maximo, elementos):
+    """(datos, None) con el JSON de la acción en lote, o (None, JsonResponse 400) si no es válido.
+
+    `elementos` nombra lo que se modifica en el mensaje del límite ('usuarios').
+    """
+    try:
+        datos = json.loads(request.body)
+    except json.JSONDecodeError:
+        return None, JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+    if not isinstance(datos, dict):
+        return None, JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+
+    ids = datos.get('ids')
+    # bool es subclase de int: true/false no son ids
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return None, JsonResponse({'success': False, 'error': 'Lista de ids inválida'}, status=400)
+    if len(ids) > maximo:
+        return None, JsonResponse({'success': False, 'error': f'Máximo {maximo} {elementos} por petición'}, status=400)
+    return datos, None
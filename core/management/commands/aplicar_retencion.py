@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from core.retencion import POLITICAS, aplicar_retencion
+
+
+class Command(BaseCommand):
+    help = 'Archiva o borra las filas vencidas según las políticas de retención (ejecutar periódicamente, p. ej. con cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--politicas', nargs='+', choices=list(POLITICAS), help='Políticas a aplicar (todas por defecto)')
+        parser.add_argument('--lote', type=int, default=None, help='Filas por transacción (RETENCION_LOTE por defecto)')
+        parser.add_argument('--simular', action='store_true', help='Solo contar las filas vencidas, sin tocarlas')
+
+    def handle(self, *args, **options):
+        resumen = aplicar_retencion(options['politicas'], options['lote'], options['simular'])
+        for nombre, filas in resumen.items():
+            modelo, accion, _ = POLITICAS[nombre]
+            verbo = {'archivar': 'archivadas', 'purgar': 'borradas'}[accion]
+            if options['simular']:
+                verbo = f'por ser {verbo}'
+            self.stdout.write(f"{nombre:20} {modelo.__name__}: {filas} filas {verbo}")
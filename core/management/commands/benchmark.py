@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import ESCENARIOS, cargar_resultados, comparar_con_baseline, ejecutar_benchmarks, guardar_resultados
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia y consultas de los endpoints principales y los compara con una línea base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('escenarios', nargs='*', help=f"Escenarios a medir (por defecto todos: {', '.join(ESCENARIOS)})")
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--calentamiento', type=int, default=2)
+        parser.add_argument('--baseline', help='Archivo JSON de línea base con el que comparar')
+        parser.add_argument('--guardar', help='Guarda los resultados en este archivo JSON (nueva línea base)')
+        parser.add_argument('--tolerancia', type=float, default=0.25,
+                            help='Aumento máximo permitido del p95 respecto a la línea base (0.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        desconocidos = set(options['escenarios']) - set(ESCENARIOS)
+        if desconocidos:
+            raise CommandError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+
+        resultados = ejecutar_benchmarks(options['escenarios'], options['repeticiones'], options['calentamiento'])
+        for nombre, medido in resultados['escenarios'].items():
+            self.stdout.write(
+                f"{nombre:22} p50 {medido['p50_ms']:8.2f} ms  p95 {medido['p95_ms']:8.2f} ms  "
+                f"p99 {medido['p99_ms']:8.2f} ms  {medido['consultas']:4} consultas"
+            )
+        omitidos = set(options['escenarios'] or ESCENARIOS) - set(resultados['escenarios'])
+        if omitidos:
+            self.stdout.write(self.style.WARNING(f"Sin datos para: {', '.join(sorted(omitidos))} (ver generar_datos_sinteticos)"))
+
+        if options['guardar']:
+            guardar_resultados(resultados, options['guardar'])
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['guardar']}"))
+
+        if options['baseline']:
+            regresiones = comparar_con_baseline(resultados, cargar_resultados(options['baseline']), options['tolerancia'])
+            if regresiones:
+                raise CommandError('Regresiones de rendimiento:\n' + '\n'.join(regresiones))
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto a la línea base'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.benchmarks import benchmark_numeracion_facturas
+
+
+class Command(BaseCommand):
+    help = 'Mide los números de factura reservados por segundo con varios hilos a la vez (SQLite o PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--transacciones', type=int, default=50, help='Transacciones por hilo')
+        parser.add_argument('--bloques', type=int, nargs='+', default=[1, 10], help='Números reservados por transacción')
+
+    def handle(self, *args, **options):
+        resumen = benchmark_numeracion_facturas(options['hilos'], options['transacciones'], options['bloques'])
+        self.stdout.write(f"Base de datos: {connection.vendor}, {options['hilos']} hilos")
+        for bloque, datos in resumen.items():
+            correcto = datos['sin_huecos'] and datos['bloqueos'] == 0 and datos['otros_errores'] == 0
+            estilo = self.style.SUCCESS if correcto else self.style.ERROR
+            self.stdout.write(estilo(
+                f"bloque {bloque:4}: {datos['numeros']} números en {datos['transacciones']} transacciones, "
+                f"{datos['numeros_por_segundo']} números/s, p50 {datos['p50_ms']} ms, p95 {datos['p95_ms']} ms, "
+                f"{datos['bloqueos']} errores 'database is locked', {datos['otros_errores']} otros errores, "
+                f"{'sin huecos' if datos['sin_huecos'] else 'CON HUECOS O DUPLICADOS'}"
+            ))
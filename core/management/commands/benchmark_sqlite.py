@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import MODOS_SQLITE, benchmark_concurrencia_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Mide errores "database is locked" con carritos y pagos concurrentes en SQLite (journal vs WAL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=8, help='Procesos escribiendo a la vez')
+        parser.add_argument('--iteraciones', type=int, default=20, help='Sincronizaciones y pagos por proceso')
+        parser.add_argument('--timeout', type=float, help='Busy timeout en segundos para todos los modos (por defecto el de cada modo)')
+        parser.add_argument('--modos', nargs='+', choices=list(MODOS_SQLITE), default=list(MODOS_SQLITE))
+
+    def handle(self, *args, **options):
+        try:
+            resumen = benchmark_concurrencia_sqlite(options['procesos'], options['iteraciones'], options['modos'], options['timeout'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for modo, datos in resumen.items():
+            estilo = self.style.SUCCESS if datos['bloqueos'] == 0 else self.style.ERROR
+            self.stdout.write(estilo(
+                f"{modo:8} {datos['peticiones']} peticiones, {datos['peticiones_por_segundo']} pet/s, "
+                f"{datos['bloqueos']} errores 'database is locked'"
+            ))
+            for operacion, medidas in datos['operaciones'].items():
+                self.stdout.write(
+                    f"    {operacion:20} ok {medidas['ok']:5}  bloqueos {medidas['bloqueos']:4}  "
+                    f"otros errores {medidas['otros_errores']:4}  p50 {medidas['p50_ms']} ms  p95 {medidas['p95_ms']} ms"
+                )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from core.replicas import alias_replica, copiar_replica_sqlite
+
+
+class Command(BaseCommand):
+    help = 'Refresca la réplica SQLite local (SQLITE_REPLICA) con una copia del primario'
+
+    def handle(self, *args, **options):
+        replica = alias_replica()
+        if replica is None:
+            raise CommandError('No hay réplica configurada (define SQLITE_REPLICA con la ruta del archivo)')
+        primario = settings.DATABASES[DEFAULT_DB_ALIAS]
+        destino = settings.DATABASES[replica]
+        if primario['ENGINE'] != 'django.db.backends.sqlite3' or destino['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('Este comando solo copia réplicas SQLite; en PostgreSQL la replicación la hace el servidor')
+
+        copiar_replica_sqlite(str(primario['NAME']), str(destino['NAME']))
+        self.stdout.write(self.style.SUCCESS(f"Réplica actualizada: {primario['NAME']} -> {destino['NAME']}"))
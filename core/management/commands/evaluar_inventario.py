@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.inventario import evaluar_inventario
+
+
+class Command(BaseCommand):
+    help = 'Reactiva productos repuestos y genera las alertas de stock bajo (ejecutar periódicamente, p. ej. con cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cada', type=int, default=0, help='Repetir cada N segundos en lugar de ejecutar una sola vez')
+
+    def handle(self, *args, **options):
+        while True:
+            resumen = evaluar_inventario()
+            self.stdout.write(
+                f"Reactivados: {resumen['reactivados']} | Alertas nuevas: {resumen['alertas_nuevas']} | "
+                f"Actualizadas: {resumen['alertas_actualizadas']} | Resueltas: {resumen['alertas_resueltas']}"
+            )
+            if not options['cada']:
+                break
+            time.sleep(options['cada'])
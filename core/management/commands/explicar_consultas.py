@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bd_prueba import base_de_prueba
+from core.planes_consulta import VISTAS_CALIENTES, generar_planes, problemas_de_planes
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas de las vistas más usadas y marca los recorridos completos de tablas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('vistas', nargs='*', help=f"Vistas a revisar (por defecto: {', '.join(VISTAS_CALIENTES)})")
+        parser.add_argument('--planes', action='store_true', help='Muestra el plan de cada consulta, no solo los problemas')
+
+    def handle(self, *args, **options):
+        desconocidas = set(options['vistas']) - set(VISTAS_CALIENTES)
+        if desconocidas:
+            raise CommandError(f"Vistas desconocidas: {', '.join(sorted(desconocidas))}")
+
+        # Los datos de prueba se crean en una base de datos de prueba, no en la real
+        with base_de_prueba():
+            resultado = generar_planes(options['vistas'] or None)
+
+        for vista, consultas in resultado.items():
+            escaneos = sum(len(consulta['escaneos']) for consulta in consultas)
+            self.stdout.write(f'{vista:32} {len(consultas):3} consultas distintas, {escaneos} recorridos completos')
+            if options['planes']:
+                for consulta in consultas:
+                    self.stdout.write(f"    {consulta['sql']}")
+                    for linea in consulta['plan']:
+                        self.stdout.write(f'        {linea}')
+
+        problemas = problemas_de_planes(resultado)
+        if problemas:
+            self.stdout.write(self.style.WARNING('\n'.join(problemas)))
+        else:
+            self.stdout.write(self.style.SUCCESS('Ninguna consulta recorre tablas enteras sin motivo'))
@@ -0,0 +1,53 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core.exportacion import iterar_zip
+from core.facturas import iterar_pdfs_facturas, leer_en_fragmentos
+from core.models import Factura
+
+
+class Command(BaseCommand):
+    help = 'Genera un ZIP con los PDFs de todas las facturas de un período (renderizado en paralelo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial AAAA-MM-DD (inclusive)')
+        parser.add_argument('--hasta', help='Fecha final AAAA-MM-DD (inclusive)')
+        parser.add_argument('--salida', help='Ruta del archivo ZIP (por defecto facturas_<desde>_<hasta>.zip)')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos para renderizar PDFs')
+
+    def _fecha(self, valor, nombre):
+        fecha = parse_date(valor)
+        if not fecha:
+            raise CommandError(f'Fecha --{nombre} inválida (use AAAA-MM-DD)')
+        return fecha
+
+    def handle(self, *args, **options):
+        facturas = Factura.objects.select_related('pago').order_by('fecha_emision', 'id')
+
+        etiqueta_desde = 'inicio'
+        etiqueta_hasta = 'hoy'
+        if options['desde']:
+            desde = self._fecha(options['desde'], 'desde')
+            facturas = facturas.filter(fecha_emision__gte=timezone.make_aware(datetime.combine(desde, time.min)))
+            etiqueta_desde = desde.isoformat()
+        if options['hasta']:
+            hasta = self._fecha(options['hasta'], 'hasta')
+            facturas = facturas.filter(fecha_emision__lt=timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min)))
+            etiqueta_hasta = hasta.isoformat()
+
+        salida = options['salida'] or f'facturas_{etiqueta_desde}_{etiqueta_hasta}.zip'
+
+        def progreso(procesadas, total, nombre):
+            self.stdout.write(f'[{procesadas}/{total}] {nombre}')
+
+        pdfs = iterar_pdfs_facturas(facturas.iterator(), workers=options['workers'], progreso=progreso)
+        entradas = ((nombre, leer_en_fragmentos(ruta)) for nombre, ruta in pdfs)
+
+        with open(salida, 'wb') as archivo:
+            for fragmento in iterar_zip(entradas):
+                archivo.write(fragmento)
+
+        self.stdout.write(self.style.SUCCESS(f'ZIP generado: {salida}'))
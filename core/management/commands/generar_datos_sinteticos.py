@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.datos_sinteticos import borrar_datos, generar_datos, volumenes
+
+
+class Command(BaseCommand):
+    help = 'Puebla la base de datos con clientes, productos, pagos, pedidos y mensajes sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, default=0.01,
+                            help='Fracción de los volúmenes de producción (1 = 100k clientes, 500k pagos, 2M mensajes)')
+        parser.add_argument('--lote', type=int, default=5000, help='Registros por bulk_create')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--borrar', action='store_true', help='Elimina los datos sintéticos en lugar de crearlos')
+
+    def handle(self, *args, **options):
+        if options['borrar']:
+            borrar_datos()
+            self.stdout.write(self.style.SUCCESS('Datos sintéticos eliminados'))
+            return
+
+        if options['escala'] <= 0:
+            raise CommandError('--escala debe ser mayor que 0')
+        self.stdout.write(f"Generando: {volumenes(options['escala'])}")
+        creados = generar_datos(
+            escala=options['escala'],
+            tamano_lote=options['lote'],
+            semilla=options['semilla'],
+            informar=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Datos sintéticos creados: {creados}'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.retencion import recolectar_medios
+
+
+def _tamano(bytes_):
+    if bytes_ < 1024:
+        return f'{bytes_} B'
+    for unidad in ('KB', 'MB', 'GB'):
+        bytes_ /= 1024
+        if bytes_ < 1024 or unidad == 'GB':
+            return f'{bytes_:.1f} {unidad}'
+
+
+class Command(BaseCommand):
+    help = 'Busca archivos de MEDIA_ROOT que ninguna fila usa; informa los bytes recuperables y con --borrar los elimina'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--borrar', action='store_true', help='Eliminar los archivos huérfanos (por defecto solo se informa)')
+        parser.add_argument('--gracia-horas', type=int, default=None, help='Ignorar archivos más nuevos (MEDIOS_GC_GRACIA_HORAS por defecto)')
+
+    def handle(self, *args, **options):
+        resumen = recolectar_medios(options['borrar'], options['gracia_horas'])
+        for carpeta, datos in sorted(resumen['por_carpeta'].items()):
+            self.stdout.write(f"  {carpeta or '.'}: {datos['archivos']} archivos, {_tamano(datos['bytes'])}")
+        total = f"{resumen['archivos']} archivos huérfanos, {_tamano(resumen['bytes'])}"
+        if options['borrar']:
+            self.stdout.write(self.style.SUCCESS(f"{total}; borrados {resumen['borrados']}"))
+        else:
+            self.stdout.write(self.style.WARNING(f"{total} recuperables (use --borrar para eliminarlos)"))
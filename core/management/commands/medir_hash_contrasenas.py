@@ -0,0 +1,37 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.contrasenas import ITERACIONES_CANDIDATAS, medir_coste_hash
+
+
+class Command(BaseCommand):
+    help = 'Mide el coste del hash de contraseñas y sugiere CONTRASENAS_ITERACIONES para un p99 de login objetivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--objetivo-p99-ms', type=float, default=500, help='p99 máximo aceptable del hash en el login')
+        parser.add_argument('--logins-por-segundo', type=float, default=5, help='Tasa de logins en hora punta')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos del servidor que atienden logins')
+        parser.add_argument('--iteraciones', type=int, nargs='+', default=list(ITERACIONES_CANDIDATAS))
+        parser.add_argument('--muestras', type=int, default=5, help='Hashes medidos por candidato')
+
+    def handle(self, *args, **options):
+        resultados, recomendadas = medir_coste_hash(
+            options['objetivo_p99_ms'], options['logins_por_segundo'], options['workers'],
+            options['iteraciones'], options['muestras'],
+        )
+        self.stdout.write(
+            f"{options['logins_por_segundo']} logins/s con {options['workers']} workers, "
+            f"objetivo p99 {options['objetivo_p99_ms']} ms (actual: {settings.CONTRASENAS_ITERACIONES} iteraciones)"
+        )
+        for fila in resultados:
+            estilo = self.style.SUCCESS if fila['cumple'] else self.style.ERROR
+            self.stdout.write(estilo(
+                f"  {fila['iteraciones']:>9} iteraciones: hash {fila['hash_ms']} ms, p99 login {fila['p99_ms']} ms, "
+                f"uso de CPU {fila['utilizacion']:.0%}"
+            ))
+        if recomendadas is None:
+            self.stdout.write(self.style.ERROR('Ningún candidato cumple el objetivo: añada workers o baje la tasa objetivo'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'CONTRASENAS_ITERACIONES={recomendadas}'))
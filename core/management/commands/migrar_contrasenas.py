@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from core.contrasenas import filas_pendientes, migrar_contrasenas
+from core.models import UserClientes
+from Empresas.models import EmpresaRegistrada
+
+MODELOS = {
+    'clientes': UserClientes,
+    'empresas': EmpresaRegistrada,
+}
+
+
+class Command(BaseCommand):
+    help = 'Convierte las contraseñas en texto plano (clientes) y SHA-256 sin sal (empresas) a hashes de Django'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo', choices=list(MODELOS), help='Migra solo clientes o solo empresas')
+        parser.add_argument('--workers', type=int, default=None, help='Procesos para calcular los hashes')
+        parser.add_argument('--lote', type=int, default=500, help='Filas guardadas por transacción')
+        parser.add_argument('--simular', action='store_true', help='Solo cuenta las filas pendientes')
+
+    def handle(self, *args, **options):
+        for nombre, modelo in MODELOS.items():
+            if options['solo'] and options['solo'] != nombre:
+                continue
+            if options['simular']:
+                self.stdout.write(f'{nombre}: {len(filas_pendientes(modelo))} contraseñas por migrar')
+                continue
+
+            def progreso(hechas, total, nombre=nombre):
+                self.stdout.write(f'  {nombre}: {hechas}/{total}')
+
+            convertidas = migrar_contrasenas(modelo, options['workers'], options['lote'], progreso)
+            self.stdout.write(self.style.SUCCESS(f'{nombre}: {convertidas} contraseñas migradas'))
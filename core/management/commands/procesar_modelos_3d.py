@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from core.modelos3d import procesar_modelo_3d
+from core.models import Idea
+
+
+class Command(BaseCommand):
+    help = 'Valida los modelos 3D de las ideas y genera su vista previa y miniatura (pendientes y subidos antes del procesamiento)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reintentar', action='store_true', help='Incluye los que fallaron o quedaron a medias')
+        parser.add_argument('--todas', action='store_true', help='Reprocesa todos los modelos')
+        parser.add_argument('--idea', type=int, action='append', help='Procesa solo estas ideas (se puede repetir)')
+
+    def handle(self, *args, **options):
+        ideas = Idea.objects.exclude(modelo_3d='').exclude(modelo_3d__isnull=True).order_by('id')
+        if options['idea']:
+            ideas = ideas.filter(id__in=options['idea'])
+        elif not options['todas']:
+            estados = ['', 'pendiente'] + (['error', 'procesando'] if options['reintentar'] else [])
+            ideas = ideas.filter(modelo_3d_estado__in=estados)
+
+        listos = errores = 0
+        for idea in ideas.iterator():
+            try:
+                procesado = procesar_modelo_3d(idea)
+            except Exception as e:
+                # Un fallo al guardar el estado de una idea no detiene el resto
+                errores += 1
+                self.stdout.write(self.style.ERROR(f"Idea {idea.id}: {type(e).__name__}: {e}"))
+                continue
+            if procesado:
+                listos += 1
+                info = idea.modelo_3d_info
+                self.stdout.write(
+                    f"Idea {idea.id}: {info['triangulos']} -> {info['triangulos_preview']} triángulos, "
+                    f"{info['ancho_cm']} x {info['alto_cm']} x {info['profundidad_cm']} cm"
+                )
+                for aviso in info['avisos_medidas']:
+                    self.stdout.write(self.style.WARNING(f'  {aviso}'))
+            else:
+                errores += 1
+                self.stdout.write(self.style.ERROR(f"Idea {idea.id}: {idea.modelo_3d_info['error']}"))
+        self.stdout.write(self.style.SUCCESS(f'{listos} modelos procesados, {errores} con errores'))
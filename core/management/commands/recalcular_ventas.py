@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.ventas import recalcular_ventas
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye las tablas de ventas por producto desde los pagos confirmados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=2000, help='Pagos leídos por consulta')
+
+    def handle(self, *args, **options):
+        pagos, productos = recalcular_ventas(tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'{pagos} pagos confirmados procesados, {productos} productos con ventas'))
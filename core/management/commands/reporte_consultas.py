@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from core.bd_prueba import base_de_prueba
+from core.regresion_consultas import (
+    ESCALAN_CON_DATOS, FILAS_GRANDE, FILAS_PEQUENO, PRESUPUESTOS_CONSULTAS, comparar_conjuntos, problemas_de_consultas,
+)
+
+
+class Command(BaseCommand):
+    help = 'Lista las vistas cuyas consultas SQL crecen con la cantidad de datos (N+1)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pequeno', type=int, default=FILAS_PEQUENO, help='Filas por relación del conjunto pequeño')
+        parser.add_argument('--grande', type=int, default=FILAS_GRANDE, help='Filas por relación del conjunto grande')
+        parser.add_argument('--todas', action='store_true', help='Muestra también las vistas que no escalan')
+
+    def handle(self, *args, **options):
+        # Los datos de prueba se crean en una base de datos de prueba, no en la real
+        with base_de_prueba():
+            resultado = comparar_conjuntos(options['pequeno'], options['grande'])
+
+        filas = sorted(resultado.items(), key=lambda item: (-item[1]['por_fila'], item[0]))
+        self.stdout.write(f"{'vista':40} {'pequeño':>8} {'grande':>8} {'por fila':>9} {'presupuesto':>12}")
+        for nombre, medida in filas:
+            if medida['por_fila'] <= 0 and not options['todas']:
+                continue
+            marca = ' (conocida)' if nombre in ESCALAN_CON_DATOS else ''
+            self.stdout.write(
+                f"{nombre:40} {medida['pequeno']:8} {medida['grande']:8} {medida['por_fila']:9} "
+                f"{PRESUPUESTOS_CONSULTAS.get(nombre, '-'):>12}{marca}"
+            )
+
+        problemas = problemas_de_consultas(resultado)
+        if problemas:
+            self.stdout.write(self.style.WARNING('\n'.join(problemas)))
+        else:
+            self.stdout.write(self.style.SUCCESS('Todas las vistas cumplen su presupuesto'))
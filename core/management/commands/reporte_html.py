@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.bd_prueba import base_de_prueba
+from core.benchmarks import cargar_resultados, guardar_resultados
+from core.estaticos import PAGINAS_HTML, medir_paginas_html
+
+
+class Command(BaseCommand):
+    help = 'Mide los bytes de HTML (y de CSS/JS en línea) de cada página y los compara con una medición anterior'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paginas', nargs='*', help=f"Páginas a medir (por defecto: {', '.join(PAGINAS_HTML)})")
+        parser.add_argument('--baseline', help='JSON de una medición anterior para calcular los bytes ahorrados')
+        parser.add_argument('--guardar', help='Guarda la medición en este JSON')
+
+    def handle(self, *args, **options):
+        # Los datos de prueba se crean en una base de datos de prueba, no en la real
+        with base_de_prueba():
+            medidas = medir_paginas_html(options['paginas'] or None)
+
+        base = cargar_resultados(options['baseline']) if options['baseline'] else {}
+        self.stdout.write(f"{'página':20} {'HTML':>9} {'en línea':>9} {'gzip':>8} {'ahorro':>9}")
+        total_ahorro = 0
+        for pagina, medida in medidas.items():
+            anterior = base.get(pagina)
+            ahorro = anterior['bytes_html'] - medida['bytes_html'] if anterior else None
+            total_ahorro += ahorro or 0
+            self.stdout.write(
+                f"{pagina:20} {medida['bytes_html']:9} {medida['bytes_en_linea']:9} {medida['bytes_gzip']:8} "
+                f"{ahorro if ahorro is not None else '-':>9}"
+            )
+        if base:
+            self.stdout.write(self.style.SUCCESS(f'Bytes de HTML ahorrados en total: {total_ahorro}'))
+        if options['guardar']:
+            guardar_resultados(medidas, options['guardar'])
+            self.stdout.write(f"Medición guardada en {options['guardar']}")
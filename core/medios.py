@@ -0,0 +1,198 @@
+"""
+Entrega de archivos subidos (MEDIA_ROOT): rangos de bytes, validadores de
+caché y descarga delegada al proxy.
+
+respuesta_archivo() responde 304 si el navegador ya tiene la versión actual
+(ETag / Last-Modified), 206 con el tramo pedido en la cabecera Range (los
+visores de modelos 3D y los <video> piden el archivo por partes) y, si
+MEDIA_ENVIO lo indica, deja la transferencia a nginx (X-Accel-Redirect) o a
+Apache/lighttpd (X-Sendfile) para no ocupar un worker de Python.
+
+Los comprobantes de pago y las imágenes del chat de pagos son privados:
+puede_ver_media() solo los entrega a la empresa y al cliente dueño del pago.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .models import MensajePago, Pago
+
+# Carpetas (relativas a MEDIA_ROOT) que solo pueden ver la empresa y el dueño del pago
+MEDIA_PRIVADOS = ('uploads/comprobantes/', 'uploads/chat_pagos/')
+
+CACHE_MEDIA_PUBLICO = 'public, max-age=86400'
+# Sin caché compartida: un proxy no debe guardar el comprobante de un cliente
+CACHE_MEDIA_PRIVADO = 'private, max-age=0, must-revalidate'
+
+# Modos de MEDIA_ENVIO: '' (Django transmite el archivo), 'x-accel-redirect' o 'x-sendfile'
+MODOS_ENVIO = ('', 'x-accel-redirect', 'x-sendfile')
+
+TAMANO_BLOQUE = 64 * 1024
+
+_RANGO_UNICO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def es_privado(ruta_relativa):
+    # Sin distinguir mayúsculas: en Windows/macOS 'uploads/Comprobantes/x.png' es el mismo archivo
+    return ruta_relativa.casefold().startswith(MEDIA_PRIVADOS)
+
+
+def _es_el_archivo(guardadas, ruta_relativa):
+    """Si alguna de las rutas `guardadas` es el archivo pedido (igual, o el mismo archivo escrito con otras mayúsculas)."""
+    pedido = os.path.join(settings.MEDIA_ROOT, ruta_relativa)
+    for guardada in guardadas:
+        if guardada == ruta_relativa:
+            return True
+        try:
+            # En un sistema de archivos que distingue mayúsculas son archivos distintos
+            if os.path.samefile(os.path.join(settings.MEDIA_ROOT, guardada), pedido):
+                return True
+        except OSError:
+            continue
+    return False
+
+
+def puede_ver_media(request, ruta_relativa):
+    """Si la sesión actual puede descargar el archivo `ruta_relativa` de MEDIA_ROOT."""
+    if not es_privado(ruta_relativa):
+        return True
+    # Panel de empresa y empresa del chat gestionan todos los pagos
+    if request.session.get('empresa_id') or request.session.get('usernameEmpresa'):
+        return True
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    username = request.session.get('usernameCliente')
+    if not username:
+        return False
+    if ruta_relativa.casefold().startswith('uploads/comprobantes/'):
+        guardadas = Pago.objects.filter(comprobante__iexact=ruta_relativa, cliente__usernameCliente=username).values_list('comprobante', flat=True)
+    else:
+        guardadas = MensajePago.objects.filter(imagen__iexact=ruta_relativa, pago__cliente__usernameCliente=username).values_list('imagen', flat=True)
+    return _es_el_archivo(guardadas, ruta_relativa)
+
+
+def etag_archivo(estado):
+    """ETag a partir de fecha de modificación y tamaño (cambia si el archivo se reemplaza)."""
+    return quote_etag(f'{estado.st_mtime_ns:x}-{estado.st_size:x}')
+
+
+def parsear_rango(cabecera, tamano):
+    """(inicio, fin) inclusivos del único rango pedido en `cabecera`.
+
+    Devuelve None si no hay rango utilizable (se responde el archivo entero,
+    como permite la RFC 9110 con rangos múltiples o mal formados) y
+    ValueError si el rango no cae dentro del archivo (416).
+    """
+    coincidencia = _RANGO_UNICO.match(cabecera.replace(' ', '')) if cabecera else None
+    if not coincidencia or coincidencia.groups() == ('', ''):
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio:
+        # bytes=-N: los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0 or tamano == 0:
+            raise ValueError('Rango vacío')
+        return max(tamano - sufijo, 0), tamano - 1
+    inicio = int(inicio)
+    if fin and int(fin) < inicio:
+        return None
+    if inicio >= tamano:
+        raise ValueError('Rango fuera del archivo')
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    return inicio, fin
+
+
+def _rango_vigente(request, etag, ultima_modificacion):
+    """If-Range: el rango solo vale si el navegador tiene la versión actual."""
+    condicion = request.headers.get('If-Range')
+    if not condicion:
+        return True
+    if condicion.startswith(('"', 'W/')):
+        return condicion == etag
+    fecha = parse_http_date_safe(condicion)
+    return fecha is not None and ultima_modificacion <= fecha
+
+
+class _TramoArchivo:
+    """Lectura limitada a `longitud` bytes desde la posición actual del archivo.
+
+    Sin fileno() a propósito: así el file_wrapper del servidor WSGI no usa
+    sendfile() con el archivo entero y respeta el tramo.
+    """
+
+    def __init__(self, archivo, longitud):
+        self.archivo = archivo
+        self.restante = longitud
+
+    def read(self, tamano=-1):
+        if self.restante <= 0:
+            return b''
+        if tamano < 0 or tamano > self.restante:
+            tamano = self.restante
+        datos = self.archivo.read(tamano)
+        self.restante -= len(datos)
+        return datos
+
+    def close(self):
+        self.archivo.close()
+
+
+def _respuesta_delegada(ruta, ruta_relativa, tipo):
+    """Respuesta vacía con la cabecera que indica al proxy qué archivo enviar."""
+    response = HttpResponse(content_type=tipo)
+    if settings.MEDIA_ENVIO == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_PREFIJO_INTERNO.rstrip('/') + '/' + ruta_relativa
+    else:
+        response['X-Sendfile'] = str(ruta)
+    return response
+
+
+def respuesta_archivo(request, ruta, ruta_relativa, cache_control):
+    """Respuesta para el archivo `ruta` (ya validado) con 304/206/416 según las cabeceras."""
+    estado = os.stat(ruta)
+    tipo, _ = mimetypes.guess_type(ruta.name)
+    tipo = tipo or 'application/octet-stream'
+    etag = etag_archivo(estado)
+    # Last-Modified tiene resolución de segundos
+    ultima_modificacion = int(estado.st_mtime)
+
+    condicional = get_conditional_response(request, etag=etag, last_modified=ultima_modificacion)
+    if condicional is not None:
+        condicional['Cache-Control'] = cache_control
+        return condicional
+
+    if settings.MEDIA_ENVIO:
+        # El proxy resuelve Range y condicionales con el archivo real
+        response = _respuesta_delegada(ruta, ruta_relativa, tipo)
+    else:
+        try:
+            rango = parsear_rango(request.headers.get('Range'), estado.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{estado.st_size}'
+            return response
+        if rango and not _rango_vigente(request, etag, ultima_modificacion):
+            rango = None
+
+        archivo = open(ruta, 'rb')
+        if rango is None:
+            # Archivo entero: el file_wrapper del servidor puede usar sendfile() sin copiar
+            response = FileResponse(archivo, content_type=tipo)
+        else:
+            inicio, fin = rango
+            archivo.seek(inicio)
+            response = FileResponse(_TramoArchivo(archivo, fin - inicio + 1), content_type=tipo, status=206)
+            response['Content-Length'] = fin - inicio + 1
+            response['Content-Range'] = f'bytes {inicio}-{fin}/{estado.st_size}'
+        response.block_size = TAMANO_BLOQUE
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(ultima_modificacion)
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,232 @@
+"""
+Middlewares de instrumentación de rendimiento (ver core/instrumentacion.py).
+
+InstrumentacionMiddleware debe ir PRIMERO en MIDDLEWARE para contar también
+las consultas de sesión y mensajes; TiempoVistaMiddleware va ÚLTIMO para
+medir solo la vista (incluido el render de su plantilla).
+
+PerfiladorMiddleware va después de AuthenticationMiddleware (necesita
+request.user para comprobar que quien pide el perfil es staff).
+
+ReplicaMiddleware va después de SessionMiddleware (guarda en la sesión hasta
+cuándo el usuario debe leer del primario; ver core/replicas.py).
+
+Todos funcionan en modo síncrono (WSGI) y asíncrono (ASGI). Con ASGI un
+middleware solo síncrono obligaría a Django a ocupar un hilo durante toda la
+petición, incluidas las esperas largas del chat (core/chat_espera.py). En
+esas rutas InstrumentacionMiddleware y PerfiladorMiddleware no hacen nada:
+instalarían su medición en el hilo de la petición, que la vista cierra antes
+de esperar.
+"""
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .chat_espera import es_espera_larga, es_ruta_espera_larga
+from .instrumentacion import (
+    estadisticas_rutas,
+    iniciar_medicion,
+    instalar_medicion_plantillas,
+    medicion_actual,
+    registrar_peticion_lenta,
+    terminar_medicion,
+)
+from .perfilador import modo_solicitado, perfilar
+from .replicas import CLAVE_SESION_PEGADO, alias_replica, iniciar_peticion, terminar_peticion
+
+
+def _nombre_ruta(request):
+    """Patrón de URL de la petición (p. ej. 'GET api/mensajes-pago/<int:pago_id>/')."""
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        return f'{request.method} (sin ruta)'
+    return f'{request.method} {coincidencia.route or coincidencia.view_name}'
+
+
+class _MiddlewareSyncAsync:
+    """Base de los middlewares del proyecto: funcionan con get_response síncrono o asíncrono."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.procesar(request)
+
+
+class InstrumentacionMiddleware(_MiddlewareSyncAsync):
+    """Mide consultas SQL, tiempo de plantillas, de vista y total de cada petición."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_ACTIVA', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.umbral_lento_ms = getattr(settings, 'INSTRUMENTACION_UMBRAL_LENTO_MS', 500)
+        self.umbral_sql_lento_ms = getattr(settings, 'INSTRUMENTACION_UMBRAL_SQL_LENTO_MS', 50)
+        # Archivos estáticos y media no se miden
+        self.prefijos_excluidos = tuple(
+            '/' + prefijo.lstrip('/') for prefijo in (settings.STATIC_URL, settings.MEDIA_URL) if prefijo
+        )
+        instalar_medicion_plantillas()
+
+    def _excluida(self, request):
+        return bool(self.prefijos_excluidos) and request.path.startswith(self.prefijos_excluidos)
+
+    @staticmethod
+    def _envolver_conexiones(medicion):
+        pila = ExitStack()
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(medicion.registrar_sql))
+        return pila
+
+    def procesar(self, request):
+        if self._excluida(request):
+            return self.get_response(request)
+
+        medicion, token = iniciar_medicion(self.umbral_sql_lento_ms)
+        try:
+            with self._envolver_conexiones(medicion):
+                response = self.get_response(request)
+        finally:
+            terminar_medicion(token)
+        return self._publicar(request, response, medicion)
+
+    async def __acall__(self, request):
+        if self._excluida(request) or es_ruta_espera_larga(request.path_info):
+            return await self.get_response(request)
+
+        medicion, token = iniciar_medicion(self.umbral_sql_lento_ms)
+        # Las conexiones son por hilo: el wrapper se instala en el hilo donde el ORM
+        # ejecuta las consultas de esta petición (el mismo para todo sync_to_async)
+        pila = await sync_to_async(self._envolver_conexiones)(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+            terminar_medicion(token)
+        return self._publicar(request, response, medicion)
+
+    def _publicar(self, request, response, medicion):
+        total = medicion.total()
+        ruta = _nombre_ruta(request)
+        response['Server-Timing'] = medicion.server_timing(total)
+        estadisticas_rutas.registrar(ruta, round(total * 1000, 1), round(medicion.tiempo_sql * 1000, 1), medicion.consultas)
+
+        # Las esperas largas del chat duran lo que dura su timeout a propósito
+        if total * 1000 >= self.umbral_lento_ms and not es_espera_larga(request):
+            registrar_peticion_lenta(medicion.reporte(request, ruta, total, response.status_code))
+
+        return response
+
+
+class TiempoVistaMiddleware(_MiddlewareSyncAsync):
+    """Mide el tiempo de la vista para InstrumentacionMiddleware (debe ir al final)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION_ACTIVA', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def procesar(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        self._registrar(inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self._registrar(inicio)
+        return response
+
+    @staticmethod
+    def _registrar(inicio):
+        medicion = medicion_actual()
+        if medicion is not None:
+            medicion.tiempo_vista = time.perf_counter() - inicio
+
+
+class PerfiladorMiddleware(_MiddlewareSyncAsync):
+    """Perfila la petición si la pide un staff o si cae en la fracción de muestreo."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.fraccion_muestreo = getattr(settings, 'PERFILADOR_FRACCION_MUESTREO', 0)
+
+    def _modo(self, request):
+        modo = modo_solicitado(request)
+        if modo is None and self.fraccion_muestreo and random.random() < self.fraccion_muestreo:
+            modo = 'muestreo'
+        return modo
+
+    def procesar(self, request):
+        modo = self._modo(request)
+        if modo is None:
+            return self.get_response(request)
+
+        response, nombre = perfilar(self.get_response, request, modo)
+        response['X-Perfil'] = nombre
+        return response
+
+    async def __acall__(self, request):
+        if es_ruta_espera_larga(request.path_info):
+            return await self.get_response(request)
+        # modo_solicitado lee request.user (sesión en base de datos): va a un hilo
+        modo = await sync_to_async(self._modo)(request)
+        if modo is None:
+            return await self.get_response(request)
+
+        # El perfilador mide un hilo: la petición perfilada se ejecuta en uno
+        response, nombre = await sync_to_async(perfilar)(async_to_sync(self.get_response), request, modo)
+        response['X-Perfil'] = nombre
+        return response
+
+
+class ReplicaMiddleware(_MiddlewareSyncAsync):
+    """Lectura de lo propio: tras escribir, el usuario lee del primario durante REPLICA_PEGADO_SEGUNDOS."""
+
+    def procesar(self, request):
+        if not alias_replica():
+            return self.get_response(request)
+
+        ahora = time.time()
+        pegado_hasta = request.session.get(CLAVE_SESION_PEGADO)
+        token = iniciar_peticion(pegado=bool(pegado_hasta and pegado_hasta > ahora))
+        try:
+            response = self.get_response(request)
+        finally:
+            escribio = terminar_peticion(token)
+        if escribio:
+            request.session[CLAVE_SESION_PEGADO] = ahora + getattr(settings, 'REPLICA_PEGADO_SEGUNDOS', 10)
+        elif pegado_hasta and pegado_hasta <= ahora:
+            del request.session[CLAVE_SESION_PEGADO]
+        return response
+
+    async def __acall__(self, request):
+        if not alias_replica():
+            return await self.get_response(request)
+
+        ahora = time.time()
+        pegado_hasta = await request.session.aget(CLAVE_SESION_PEGADO)
+        token = iniciar_peticion(pegado=bool(pegado_hasta and pegado_hasta > ahora))
+        try:
+            response = await self.get_response(request)
+        finally:
+            escribio = terminar_peticion(token)
+        if escribio:
+            await request.session.aset(CLAVE_SESION_PEGADO, ahora + getattr(settings, 'REPLICA_PEGADO_SEGUNDOS', 10))
+        elif pegado_hasta and pegado_hasta <= ahora:
+            await request.session.apop(CLAVE_SESION_PEGADO)
+        return response
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0038_pago_pedido_estado_fecha_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(max_length=20)),
+                ('producto_id', models.IntegerField()),
+                ('nombre', models.CharField(blank=True, default='', max_length=200)),
+                ('unidades_vendidas', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ultima_venta', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-unidades_vendidas'],
+                'indexes': [models.Index(fields=['-unidades_vendidas'], name='venta_producto_unidades_idx')],
+                'unique_together': {('categoria', 'producto_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaProductoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(max_length=20)),
+                ('producto_id', models.IntegerField()),
+                ('fecha', models.DateField()),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='venta_diaria_fecha_idx')],
+                'unique_together': {('categoria', 'producto_id', 'fecha')},
+            },
+        ),
+    ]
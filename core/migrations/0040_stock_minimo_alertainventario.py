@@ -0,0 +1,93 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_ventaproducto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='armarios',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='armarios',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='cajoneras',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='cajoneras',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='escritorios',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='escritorios',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='mesas',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='mesas',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='sillas',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sillas',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.AddField(
+            model_name='utensilios',
+            name='inactivo_por_stock',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='utensilios',
+            name='stock_minimo',
+            field=models.IntegerField(default=5),
+        ),
+        migrations.CreateModel(
+            name='AlertaInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('categoria', models.CharField(max_length=20)),
+                ('producto_id', models.IntegerField()),
+                ('nombre', models.CharField(blank=True, default='', max_length=200)),
+                ('tipo', models.CharField(choices=[('stock_bajo', 'Stock bajo'), ('agotado', 'Agotado')], default='stock_bajo', max_length=20)),
+                ('cantidad_disponible', models.IntegerField(default=0)),
+                ('stock_minimo', models.IntegerField(default=0)),
+                ('leida', models.BooleanField(default=False)),
+                ('resuelta', models.BooleanField(default=False)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_resolucion', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['resuelta', 'categoria', 'producto_id'], name='alerta_inv_abierta_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_stock_minimo_alertainventario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carritotemporal',
+            index=models.Index(fields=['producto_tipo', 'producto_id'], name='carrito_producto_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['estado', '-fecha_aprobacion'], name='comentario_estado_aprob_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='idea',
+            index=models.Index(fields=['autor', 'fecha_creacion'], name='idea_autor_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensajeidea',
+            index=models.Index(fields=['idea', 'remitente_tipo', 'leido'], name='mensaje_idea_no_leido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensajepago',
+            index=models.Index(fields=['pago', 'remitente_tipo', 'leido'], name='mensaje_pago_no_leido_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['cliente', 'estado'], name='pago_cliente_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['cliente', 'fecha_creacion'], name='pedido_cliente_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idea',
+            name='modelo_3d_estado',
+            field=models.CharField(blank=True, choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('listo', 'Listo'), ('error', 'Error')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='modelo_3d_info',
+            field=models.JSONField(blank=True, help_text='Dimensiones, triángulos y avisos del modelo 3D procesado', null=True),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='modelo_3d_miniatura',
+            field=models.ImageField(blank=True, null=True, upload_to='uploads/ideas/modelos3d/miniaturas/'),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='modelo_3d_normalizado',
+            field=models.FileField(blank=True, null=True, upload_to='uploads/ideas/modelos3d/normalizados/'),
+        ),
+        migrations.AddField(
+            model_name='idea',
+            name='modelo_3d_preview',
+            field=models.FileField(blank=True, null=True, upload_to='uploads/ideas/modelos3d/previews/'),
+        ),
+    ]
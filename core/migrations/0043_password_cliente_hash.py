@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_modelo_3d_procesado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userclientes',
+            name='passwordCliente',
+            field=models.CharField(max_length=128),
+        ),
+    ]
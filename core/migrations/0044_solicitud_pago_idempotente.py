@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0043_password_cliente_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudPago',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100)),
+                ('respuesta', models.JSONField(blank=True, null=True)),
+                ('codigo_respuesta', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_pago', to='core.userclientes')),
+                ('pago', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='solicitudes', to='core.pago')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('cliente', 'clave'), name='solicitud_pago_cliente_clave_uniq')],
+            },
+        ),
+    ]
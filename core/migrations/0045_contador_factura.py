@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0044_solicitud_pago_idempotente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorFactura',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefijo', models.CharField(max_length=20)),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('ultimo', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('prefijo', 'anio'), name='contador_factura_prefijo_anio_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0046_registro_archivado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userclientes',
+            index=models.Index(fields=['is_active', 'fecha_registro'], name='cliente_estado_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userclientes',
+            index=models.Index(fields=['fecha_registro'], name='cliente_registro_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userclientes',
+            index=models.Index(fields=['email'], name='cliente_email_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0047_usuarios_indices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comentario',
+            name='puntuacion_spam',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comentario',
+            name='rechazo_automatico',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['estado', 'id'], name='comentario_estado_id_idx'),
+        ),
+    ]
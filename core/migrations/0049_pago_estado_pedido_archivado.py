@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0048_comentario_moderacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pago',
+            name='estado_pedido_archivado',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0049_pago_estado_pedido_archivado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['estado_pedido_archivado', 'fecha_confirmacion'], name='pago_archivado_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,582 @@
+"""
+Procesamiento de los modelos 3D que suben los clientes con sus ideas.
+
+Al guardar una idea con modelo, encolar_modelo_3d() deja el trabajo para
+después del commit (en un hilo o para el comando procesar_modelos_3d, según
+MODELOS_3D_PROCESAMIENTO). procesar_modelo_3d() entonces:
+
+1. Lee la malla (OBJ, STL, glTF o GLB) a arreglos de NumPy y la valida.
+2. La normaliza: eje Y hacia arriba, metros, centrada y apoyada en y=0. Los
+   formatos que no son GLB se guardan también como GLB para los visores.
+3. Calcula las dimensiones de la caja envolvente y las compara con las
+   medidas que escribió el cliente (Idea.medidas).
+4. Genera una vista previa de pocos polígonos (agrupando vértices en una
+   rejilla) y una miniatura PNG renderizada en CPU.
+
+Las listas muestran la miniatura; la malla completa solo se descarga cuando
+la empresa la pide.
+"""
+import base64
+import json
+import math
+import re
+import struct
+import threading
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageDraw
+
+FORMATOS_MODELO_3D = ('.glb', '.gltf', '.obj', '.stl')
+
+
+class ErrorModelo3D(Exception):
+    """El archivo no se puede leer como malla 3D (mensaje apto para el usuario)."""
+
+
+# ==================== VALIDACIÓN AL SUBIR ====================
+
+def validar_archivo_modelo_3d(archivo):
+    """Comprobación rápida al subir: extensión, tamaño y cabecera. El resto se valida en segundo plano."""
+    extension = Path(archivo.name).suffix.lower()
+    if extension not in FORMATOS_MODELO_3D:
+        raise ValidationError(f"Formato no soportado. Usa: {', '.join(FORMATOS_MODELO_3D)}")
+    limite = settings.MODELOS_3D_TAMANO_MAXIMO_MB * 1024 * 1024
+    if archivo.size > limite:
+        raise ValidationError(f'El modelo 3D no puede superar {settings.MODELOS_3D_TAMANO_MAXIMO_MB} MB')
+
+    archivo.seek(0)
+    cabecera = archivo.read(84)
+    archivo.seek(0)
+    if extension == '.glb' and cabecera[:4] != b'glTF':
+        raise ValidationError('El archivo .glb no es un glTF binario válido')
+    if extension == '.stl' and not cabecera.lstrip().startswith(b'solid'):
+        triangulos = int.from_bytes(cabecera[80:84], 'little') if len(cabecera) == 84 else -1
+        if archivo.size != 84 + 50 * triangulos:
+            raise ValidationError('El archivo .stl está incompleto o no es un STL')
+    if extension in ('.gltf', '.obj') and b'\x00' in cabecera:
+        raise ValidationError(f'El archivo {extension} debe ser de texto')
+    return archivo
+
+
+# ==================== LECTURA DE MALLAS ====================
+
+_DTYPE_STL = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('atributo', '<u2')])
+
+
+def _leer_stl(datos):
+    if len(datos) >= 84:
+        cantidad = int.from_bytes(datos[80:84], 'little')
+        if len(datos) == 84 + 50 * cantidad:
+            registros = np.frombuffer(datos, dtype=_DTYPE_STL, count=cantidad, offset=84)
+            return _soldar(registros['vertices'].reshape(-1, 3).astype(np.float64))
+    texto = datos.decode('ascii', errors='replace')
+    if not texto.lstrip().startswith('solid'):
+        raise ErrorModelo3D('El archivo STL no es válido')
+    coordenadas = re.findall(r'vertex\s+(\S+)\s+(\S+)\s+(\S+)', texto)
+    try:
+        vertices = np.array(coordenadas, dtype=np.float64).reshape(-1, 3)
+    except ValueError:
+        raise ErrorModelo3D('El archivo STL tiene coordenadas inválidas')
+    if len(vertices) % 3:
+        raise ErrorModelo3D('El archivo STL tiene triángulos incompletos')
+    return _soldar(vertices)
+
+
+def _soldar(vertices_sueltos):
+    """Une los vértices repetidos de una lista de triángulos sin índices (STL)."""
+    vertices, inversos = np.unique(vertices_sueltos, axis=0, return_inverse=True)
+    return vertices, inversos.reshape(-1, 3)
+
+
+def _leer_obj(datos):
+    vertices = []
+    triangulos = []
+    for linea in datos.decode('utf-8', errors='replace').splitlines():
+        partes = linea.split()
+        if not partes:
+            continue
+        if partes[0] == 'v' and len(partes) >= 4:
+            vertices.append(partes[1:4])
+        elif partes[0] == 'f' and len(partes) >= 4:
+            try:
+                indices = [int(parte.split('/')[0]) for parte in partes[1:]]
+            except ValueError:
+                raise ErrorModelo3D('El archivo OBJ tiene caras inválidas')
+            # Índices desde 1; los negativos cuentan desde el último vértice leído
+            indices = [i - 1 if i > 0 else len(vertices) + i for i in indices]
+            # Polígonos en abanico desde el primer vértice
+            triangulos.extend((indices[0], indices[k], indices[k + 1]) for k in range(1, len(indices) - 1))
+    try:
+        vertices = np.array(vertices, dtype=np.float64).reshape(-1, 3)
+    except ValueError:
+        raise ErrorModelo3D('El archivo OBJ tiene coordenadas inválidas')
+    return vertices, np.array(triangulos, dtype=np.int64).reshape(-1, 3)
+
+
+_COMPONENTES_GLTF = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT4': 16}
+_TIPOS_GLTF = {5120: 'i1', 5121: 'u1', 5122: '<i2', 5123: '<u2', 5125: '<u4', 5126: '<f4'}
+_EXTENSIONES_NO_SOPORTADAS = {'KHR_draco_mesh_compression', 'EXT_meshopt_compression', 'KHR_mesh_quantization'}
+
+
+def _leer_glb(datos):
+    if len(datos) < 20 or datos[:4] != b'glTF':
+        raise ErrorModelo3D('El archivo GLB no es válido')
+    _, version, longitud = struct.unpack_from('<4sII', datos)
+    if version != 2:
+        raise ErrorModelo3D('Solo se admite glTF 2.0')
+    gltf, binario = None, None
+    posicion = 12
+    while posicion + 8 <= min(longitud, len(datos)):
+        largo, tipo = struct.unpack_from('<II', datos, posicion)
+        contenido = datos[posicion + 8:posicion + 8 + largo]
+        if tipo == 0x4E4F534A:
+            gltf = json.loads(contenido)
+        elif tipo == 0x004E4942 and binario is None:
+            binario = contenido
+        posicion += 8 + largo
+    if gltf is None:
+        raise ErrorModelo3D('El archivo GLB no tiene descripción JSON')
+    return _malla_gltf(gltf, binario)
+
+
+def _leer_gltf(datos):
+    try:
+        gltf = json.loads(datos)
+    except ValueError:
+        raise ErrorModelo3D('El archivo glTF no es JSON válido')
+    return _malla_gltf(gltf, None)
+
+
+def _buffers_gltf(gltf, binario):
+    buffers = []
+    for i, buffer in enumerate(gltf.get('buffers', [])):
+        uri = buffer.get('uri')
+        if uri is None:
+            if i != 0 or binario is None:
+                raise ErrorModelo3D('El glTF hace referencia a un buffer que no existe')
+            buffers.append(binario)
+        elif uri.startswith('data:'):
+            buffers.append(base64.b64decode(uri.split(',', 1)[1]))
+        else:
+            raise ErrorModelo3D('El .gltf usa archivos .bin externos; súbelo como .glb')
+    return buffers
+
+
+def _leer_accessor(gltf, buffers, indice):
+    accessor = gltf['accessors'][indice]
+    if 'bufferView' not in accessor or 'sparse' in accessor:
+        raise ErrorModelo3D('El glTF usa accessors dispersos, no soportados')
+    vista = gltf['bufferViews'][accessor['bufferView']]
+    componentes = _COMPONENTES_GLTF[accessor['type']]
+    tipo = np.dtype(_TIPOS_GLTF[accessor['componentType']])
+    buffer = buffers[vista['buffer']]
+    inicio = vista.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+    paso = vista.get('byteStride') or tipo.itemsize * componentes
+    cantidad = accessor['count']
+    if cantidad == 0:
+        return np.zeros((0, componentes), dtype=tipo)
+    if inicio + paso * (cantidad - 1) + tipo.itemsize * componentes > len(buffer):
+        raise ErrorModelo3D('El glTF tiene datos fuera de su buffer')
+    return np.ndarray((cantidad, componentes), dtype=tipo, buffer=buffer, offset=inicio, strides=(paso, tipo.itemsize)).copy()
+
+
+def _matriz_nodo(nodo):
+    if 'matrix' in nodo:
+        return np.array(nodo['matrix'], dtype=np.float64).reshape(4, 4).T
+    x, y, z, w = nodo.get('rotation', (0, 0, 0, 1))
+    rotacion = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matriz = np.eye(4)
+    matriz[:3, :3] = rotacion * np.array(nodo.get('scale', (1, 1, 1)))
+    matriz[:3, 3] = nodo.get('translation', (0, 0, 0))
+    return matriz
+
+
+def _triangulos_primitiva(indices, modo):
+    if modo == 4:
+        return indices.reshape(-1, 3)
+    if modo == 5 and len(indices) >= 3:
+        # Tira: alterna la orientación para que todas las caras miren igual
+        k = np.arange(len(indices) - 2)
+        pares = k % 2 == 0
+        return np.stack([indices[k], np.where(pares, indices[k + 1], indices[k + 2]), np.where(pares, indices[k + 2], indices[k + 1])], axis=1)
+    if modo == 6 and len(indices) >= 3:
+        k = np.arange(1, len(indices) - 1)
+        return np.stack([np.full(len(k), indices[0]), indices[k], indices[k + 1]], axis=1)
+    # Puntos y líneas no forman superficie
+    return np.zeros((0, 3), dtype=np.int64)
+
+
+def _malla_gltf(gltf, binario):
+    requeridas = set(gltf.get('extensionsRequired', [])) & _EXTENSIONES_NO_SOPORTADAS
+    if requeridas:
+        raise ErrorModelo3D(f"El glTF usa compresión no soportada ({', '.join(sorted(requeridas))})")
+    buffers = _buffers_gltf(gltf, binario)
+    nodos = gltf.get('nodes', [])
+    escenas = gltf.get('scenes', [])
+
+    # (mesh, matriz de mundo) de cada nodo visible de la escena principal
+    instancias = []
+    pendientes = [(i, np.eye(4)) for i in escenas[gltf.get('scene', 0)].get('nodes', [])] if escenas else []
+    visitados = 0
+    while pendientes:
+        indice, padre = pendientes.pop()
+        visitados += 1
+        if visitados > 100000:
+            raise ErrorModelo3D('El glTF tiene una jerarquía de nodos inválida')
+        nodo = nodos[indice]
+        matriz = padre @ _matriz_nodo(nodo)
+        if 'mesh' in nodo:
+            instancias.append((nodo['mesh'], matriz))
+        pendientes.extend((hijo, matriz) for hijo in nodo.get('children', []))
+    if not escenas:
+        instancias = [(i, np.eye(4)) for i in range(len(gltf.get('meshes', [])))]
+
+    todos_vertices, todos_triangulos = [], []
+    desplazamiento = 0
+    for indice_malla, matriz in instancias:
+        for primitiva in gltf['meshes'][indice_malla].get('primitives', []):
+            if 'POSITION' not in primitiva.get('attributes', {}):
+                continue
+            posiciones = _leer_accessor(gltf, buffers, primitiva['attributes']['POSITION']).astype(np.float64)
+            if 'indices' in primitiva:
+                indices = _leer_accessor(gltf, buffers, primitiva['indices']).reshape(-1).astype(np.int64)
+            else:
+                indices = np.arange(len(posiciones), dtype=np.int64)
+            triangulos = _triangulos_primitiva(indices, primitiva.get('mode', 4))
+            mundo = posiciones @ matriz[:3, :3].T + matriz[:3, 3]
+            todos_vertices.append(mundo)
+            todos_triangulos.append(triangulos + desplazamiento)
+            desplazamiento += len(mundo)
+    if not todos_vertices:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(todos_vertices), np.concatenate(todos_triangulos)
+
+
+LECTORES = {
+    '.stl': _leer_stl,
+    '.obj': _leer_obj,
+    '.glb': _leer_glb,
+    '.gltf': _leer_gltf,
+}
+
+
+def leer_malla(datos, extension):
+    """(vertices float64 (N, 3), triangulos int64 (M, 3)) ya validados."""
+    try:
+        vertices, triangulos = LECTORES[extension](datos)
+    except ErrorModelo3D:
+        raise
+    except (KeyError, IndexError, TypeError, ValueError, struct.error) as e:
+        raise ErrorModelo3D(f'No se pudo leer el modelo 3D ({e.__class__.__name__})')
+
+    if len(triangulos) == 0 or len(vertices) == 0:
+        raise ErrorModelo3D('El modelo 3D no tiene caras')
+    if len(triangulos) > settings.MODELOS_3D_TRIANGULOS_MAXIMOS:
+        raise ErrorModelo3D(f'El modelo 3D tiene demasiados triángulos ({len(triangulos)})')
+    if triangulos.min() < 0 or triangulos.max() >= len(vertices):
+        raise ErrorModelo3D('El modelo 3D tiene caras que apuntan a vértices inexistentes')
+    if not np.isfinite(vertices).all():
+        raise ErrorModelo3D('El modelo 3D tiene coordenadas no numéricas')
+    triangulos = _sin_degenerados(triangulos)
+    if len(triangulos) == 0:
+        raise ErrorModelo3D('El modelo 3D no tiene caras')
+    return vertices, triangulos
+
+
+def _sin_degenerados(triangulos):
+    a, b, c = triangulos.T
+    return triangulos[(a != b) & (b != c) & (a != c)]
+
+
+# ==================== NORMALIZACIÓN Y MEDIDAS ====================
+
+# Eje vertical habitual de cada formato: los programas CAD exportan STL con Z hacia arriba
+EJE_VERTICAL = {'.stl': 'z', '.obj': 'y', '.glb': 'y', '.gltf': 'y'}
+
+# glTF está en metros por especificación; OBJ y STL no tienen unidades
+UNIDADES = {'mm': 0.001, 'cm': 0.01, 'm': 1.0}
+# Un mueble mide entre 10 cm y 5 m en su lado mayor: se elige la primera unidad que cae en ese rango
+RANGO_MUEBLE_M = (0.1, 5.0)
+
+
+def _adivinar_unidad(extension_mayor):
+    for unidad in ('mm', 'cm', 'm'):
+        if RANGO_MUEBLE_M[0] <= extension_mayor * UNIDADES[unidad] <= RANGO_MUEBLE_M[1]:
+            return unidad
+    return 'mm'
+
+
+def normalizar(vertices, extension):
+    """Pasa a Y hacia arriba y metros, centra en X/Z y apoya en y=0. Devuelve (vertices, unidad de origen)."""
+    if EJE_VERTICAL[extension] == 'z':
+        vertices = np.column_stack([vertices[:, 0], vertices[:, 2], -vertices[:, 1]])
+    if extension in ('.glb', '.gltf'):
+        unidad = 'm'
+    else:
+        unidad = _adivinar_unidad(float(np.ptp(vertices, axis=0).max()))
+    vertices = vertices * UNIDADES[unidad]
+    minimo, maximo = vertices.min(axis=0), vertices.max(axis=0)
+    centro = (minimo + maximo) / 2
+    return vertices - np.array([centro[0], minimo[1], centro[2]]), unidad
+
+
+def dimensiones_cm(vertices):
+    ancho, alto, profundidad = np.ptp(vertices, axis=0) * 100
+    return {'ancho_cm': round(float(ancho), 1), 'alto_cm': round(float(alto), 1), 'profundidad_cm': round(float(profundidad), 1)}
+
+
+# Las medidas de altura se comparan con el alto del modelo; el resto con su lado horizontal mayor
+CAMPOS_ALTURA = ('altura', 'espacio_piernas')
+TOLERANCIA_MEDIDAS = 0.10
+
+
+def comparar_con_medidas(dimensiones, medidas):
+    """Avisos (textos) de medidas del cliente que no caben en la caja del modelo."""
+    if not isinstance(medidas, dict):
+        return []
+    from .forms import CATEGORIA_MEDIDAS
+    nombres = {m['campo']: m['nombre'] for campos in CATEGORIA_MEDIDAS.values() for m in campos}
+    horizontal = max(dimensiones['ancho_cm'], dimensiones['profundidad_cm'])
+    avisos = []
+    for campo, valor in medidas.items():
+        try:
+            valor = float(valor)
+        except (TypeError, ValueError):
+            continue
+        es_altura = campo.startswith(CAMPOS_ALTURA)
+        limite = dimensiones['alto_cm'] if es_altura else horizontal
+        if valor > limite * (1 + TOLERANCIA_MEDIDAS):
+            eje = 'el alto' if es_altura else 'el lado mayor'
+            avisos.append(f"{nombres.get(campo, campo)}: {valor:g} cm, pero {eje} del modelo es {limite:g} cm")
+    return avisos
+
+
+# ==================== VISTA PREVIA (DECIMADO) ====================
+
+def decimar(vertices, triangulos, objetivo):
+    """Reduce la malla a como mucho `objetivo` triángulos agrupando vértices en una rejilla.
+
+    Cada celda se sustituye por el promedio de sus vértices; se descartan los
+    triángulos que quedan degenerados o repetidos. La rejilla se hace más
+    gruesa hasta cumplir el objetivo.
+    """
+    if len(triangulos) <= objetivo:
+        return vertices, triangulos
+    minimo = vertices.min(axis=0)
+    extension = float(np.ptp(vertices, axis=0).max()) or 1.0
+    resolucion = max(int(math.sqrt(objetivo) * 2), 4)
+    while True:
+        celdas = np.clip(((vertices - minimo) / extension * resolucion).astype(np.int64), 0, resolucion - 1)
+        claves = (celdas[:, 0] * resolucion + celdas[:, 1]) * resolucion + celdas[:, 2]
+        _, grupo = np.unique(claves, return_inverse=True)
+        cantidad_grupos = grupo.max() + 1
+        conteo = np.bincount(grupo, minlength=cantidad_grupos)[:, None]
+        nuevos_vertices = np.column_stack([np.bincount(grupo, weights=vertices[:, eje], minlength=cantidad_grupos) for eje in range(3)]) / conteo
+        nuevos_triangulos = _sin_degenerados(grupo[triangulos])
+        _, unicos = np.unique(np.sort(nuevos_triangulos, axis=1), axis=0, return_index=True)
+        nuevos_triangulos = nuevos_triangulos[np.sort(unicos)]
+        if len(nuevos_triangulos) <= objetivo or resolucion <= 4:
+            return nuevos_vertices, nuevos_triangulos
+        resolucion = max(int(resolucion * 0.75), 4)
+
+
+def normales_por_vertice(vertices, triangulos):
+    a, b, c = (vertices[triangulos[:, i]] for i in range(3))
+    caras = np.cross(b - a, c - a)
+    normales = np.zeros_like(vertices)
+    for i in range(3):
+        np.add.at(normales, triangulos[:, i], caras)
+    largo = np.linalg.norm(normales, axis=1, keepdims=True)
+    return np.divide(normales, largo, out=np.tile([0.0, 1.0, 0.0], (len(vertices), 1)), where=largo > 0)
+
+
+# ==================== ESCRITURA GLB ====================
+
+def _alinear(datos, relleno=b'\x00'):
+    return datos + relleno * (-len(datos) % 4)
+
+
+def escribir_glb(vertices, triangulos):
+    """GLB mínimo (posiciones, normales e índices) que abren model-viewer y three.js."""
+    posiciones = vertices.astype('<f4')
+    normales = normales_por_vertice(vertices, triangulos).astype('<f4')
+    indices = triangulos.astype('<u2' if len(vertices) < 65536 else '<u4').reshape(-1)
+    partes = [posiciones.tobytes(), normales.tobytes(), _alinear(indices.tobytes())]
+    binario = b''.join(partes)
+    vistas = []
+    desplazamiento = 0
+    for parte, destino in zip(partes, (34962, 34962, 34963)):
+        vistas.append({'buffer': 0, 'byteOffset': desplazamiento, 'byteLength': len(parte), 'target': destino})
+        desplazamiento += len(parte)
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'Gangazos modelos3d'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'mesh': 0}],
+        'meshes': [{'primitives': [{'attributes': {'POSITION': 0, 'NORMAL': 1}, 'indices': 2, 'material': 0}]}],
+        'materials': [{'pbrMetallicRoughness': {'baseColorFactor': [0.8, 0.8, 0.8, 1.0], 'metallicFactor': 0.0, 'roughnessFactor': 0.8}}],
+        'accessors': [
+            {'bufferView': 0, 'componentType': 5126, 'count': len(posiciones), 'type': 'VEC3',
+             'min': posiciones.min(axis=0).tolist(), 'max': posiciones.max(axis=0).tolist()},
+            {'bufferView': 1, 'componentType': 5126, 'count': len(normales), 'type': 'VEC3'},
+            {'bufferView': 2, 'componentType': 5123 if indices.dtype == np.dtype('<u2') else 5125, 'count': len(indices), 'type': 'SCALAR'},
+        ],
+        'bufferViews': vistas,
+        'buffers': [{'byteLength': len(binario)}],
+    }
+    texto = _alinear(json.dumps(gltf, separators=(',', ':')).encode('utf-8'), b' ')
+    total = 12 + 8 + len(texto) + 8 + len(binario)
+    return (
+        struct.pack('<4sII', b'glTF', 2, total)
+        + struct.pack('<II', len(texto), 0x4E4F534A) + texto
+        + struct.pack('<II', len(binario), 0x004E4942) + binario
+    )
+
+
+# ==================== MINIATURA ====================
+
+COLOR_MODELO = np.array([205, 170, 125])
+DIRECCION_LUZ = np.array([0.4, 0.8, 0.45]) / np.linalg.norm([0.4, 0.8, 0.45])
+
+
+def renderizar_miniatura(vertices, triangulos, tamano=256, sobremuestreo=2):
+    """PNG de la malla vista en tres cuartos, con sombreado Lambert y orden de pintor.
+
+    NumPy proyecta, sombrea y ordena por profundidad; Pillow solo rellena los
+    polígonos (a doble resolución para suavizar bordes) y codifica el PNG.
+    """
+    giro, inclinacion = math.radians(35), math.radians(25)
+    rotacion_y = np.array([[math.cos(giro), 0, math.sin(giro)], [0, 1, 0], [-math.sin(giro), 0, math.cos(giro)]])
+    rotacion_x = np.array([[1, 0, 0], [0, math.cos(inclinacion), -math.sin(inclinacion)], [0, math.sin(inclinacion), math.cos(inclinacion)]])
+    vista = (vertices - (vertices.min(axis=0) + vertices.max(axis=0)) / 2) @ (rotacion_x @ rotacion_y).T
+
+    lado = tamano * sobremuestreo
+    plano = vista[:, :2]
+    escala = 0.9 * lado / (float(np.ptp(plano, axis=0).max()) or 1.0)
+    pantalla = np.column_stack([plano[:, 0] * escala + lado / 2, lado / 2 - plano[:, 1] * escala])
+
+    a, b, c = (vista[triangulos[:, i]] for i in range(3))
+    normales = np.cross(b - a, c - a)
+    largo = np.linalg.norm(normales, axis=1, keepdims=True)
+    normales = np.divide(normales, largo, out=np.zeros_like(normales), where=largo > 0)
+    luz = DIRECCION_LUZ @ (rotacion_x @ rotacion_y).T
+    # Valor absoluto (dos caras): muchos modelos tienen la orientación de los triángulos mezclada
+    intensidad = 0.35 + 0.65 * np.clip(np.abs(normales @ luz), 0, 1)
+    colores = (COLOR_MODELO * intensidad[:, None]).astype(np.uint8)
+
+    # Lejanos primero (z menor queda detrás)
+    orden = np.argsort((a[:, 2] + b[:, 2] + c[:, 2]))
+    imagen = Image.new('RGBA', (lado, lado), (0, 0, 0, 0))
+    dibujo = ImageDraw.Draw(imagen)
+    esquinas = pantalla[triangulos]
+    for i in orden:
+        color = tuple(int(v) for v in colores[i]) + (255,)
+        dibujo.polygon([tuple(punto) for punto in esquinas[i]], fill=color, outline=color)
+    imagen = imagen.resize((tamano, tamano), Image.LANCZOS)
+    salida = BytesIO()
+    imagen.save(salida, format='PNG', optimize=True)
+    return salida.getvalue()
+
+
+# ==================== PROCESAMIENTO DE UNA IDEA ====================
+
+def _reemplazar_archivo(campo, nombre, contenido):
+    if campo:
+        campo.delete(save=False)
+    campo.save(nombre, ContentFile(contenido), save=False)
+
+
+def procesar_modelo_3d(idea):
+    """Valida y procesa el modelo de `idea`; guarda el resultado en sus campos modelo_3d_*.
+
+    Cualquier fallo deja la idea en estado 'error' con el mensaje (nunca en
+    'procesando'): los ErrorModelo3D son problemas del archivo y el resto,
+    errores inesperados (memoria, Pillow...).
+    """
+    idea.modelo_3d_estado = 'procesando'
+    idea.save(update_fields=['modelo_3d_estado'])
+    try:
+        return _procesar(idea)
+    except Exception as e:
+        if isinstance(e, ErrorModelo3D):
+            mensaje = str(e)
+        else:
+            mensaje = f'Error inesperado al procesar el modelo ({type(e).__name__}: {e})'
+            print(f"Error procesando modelo 3D de la idea {idea.pk}: {mensaje}")
+        idea.modelo_3d_estado = 'error'
+        idea.modelo_3d_info = {'error': mensaje}
+        idea.save(update_fields=['modelo_3d_estado', 'modelo_3d_info'])
+        return False
+
+
+def _procesar(idea):
+    extension = Path(idea.modelo_3d.name).suffix.lower()
+    if extension not in LECTORES:
+        raise ErrorModelo3D(f'Formato no soportado ({extension})')
+    with idea.modelo_3d.open('rb') as archivo:
+        datos = archivo.read()
+    vertices, triangulos = leer_malla(datos, extension)
+    vertices, unidad = normalizar(vertices, extension)
+    vertices_preview, triangulos_preview = decimar(vertices, triangulos, settings.MODELOS_3D_TRIANGULOS_PREVIEW)
+    if not len(triangulos_preview):
+        raise ErrorModelo3D('El modelo se queda sin triángulos al simplificarlo para la vista previa')
+
+    base = Path(idea.modelo_3d.name).stem
+    if extension == '.glb':
+        # El GLB original conserva materiales y texturas: los visores lo usan tal cual
+        if idea.modelo_3d_normalizado:
+            idea.modelo_3d_normalizado.delete(save=False)
+    else:
+        _reemplazar_archivo(idea.modelo_3d_normalizado, f'{base}.glb', escribir_glb(vertices, triangulos))
+    _reemplazar_archivo(idea.modelo_3d_preview, f'{base}_preview.glb', escribir_glb(vertices_preview, triangulos_preview))
+    _reemplazar_archivo(idea.modelo_3d_miniatura, f'{base}.png', renderizar_miniatura(vertices_preview, triangulos_preview))
+
+    dimensiones = dimensiones_cm(vertices)
+    idea.modelo_3d_info = {
+        'formato': extension.lstrip('.'),
+        'unidad_origen': unidad,
+        **dimensiones,
+        'triangulos': int(len(triangulos)),
+        'triangulos_preview': int(len(triangulos_preview)),
+        'avisos_medidas': comparar_con_medidas(dimensiones, idea.medidas),
+    }
+    idea.modelo_3d_estado = 'listo'
+    idea.save(update_fields=['modelo_3d_estado', 'modelo_3d_info', 'modelo_3d_normalizado', 'modelo_3d_preview', 'modelo_3d_miniatura'])
+    return True
+
+
+def _procesar_en_hilo(idea_id):
+    from .models import Idea
+    try:
+        idea = Idea.objects.filter(pk=idea_id).exclude(modelo_3d='').first()
+        if idea is not None:
+            procesar_modelo_3d(idea)
+    except Exception as e:
+        print(f"Error procesando modelo 3D de la idea {idea_id}: {str(e)}")
+    finally:
+        # El hilo tiene su propia conexión; no debe quedar abierta
+        connection.close()
+
+
+def encolar_modelo_3d(idea):
+    """Marca el modelo como pendiente y lo procesa tras el commit según MODELOS_3D_PROCESAMIENTO.
+
+    'hilo': en un hilo del proceso web. 'comando': lo recoge
+    `manage.py procesar_modelos_3d` (cron o worker aparte).
+    """
+    idea.modelo_3d_estado = 'pendiente'
+    idea.save(update_fields=['modelo_3d_estado'])
+    if settings.MODELOS_3D_PROCESAMIENTO == 'hilo':
+        transaction.on_commit(lambda: threading.Thread(
+            target=_procesar_en_hilo, args=(idea.id,), name=f'modelo3d-{idea.id}', daemon=True,
+        ).start())
@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils import timezone
 from django.core.validators import RegexValidator
@@ -16,6 +17,8 @@ class Mesas(models.Model):
     imagen1 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
     
 class Sillas(models.Model):
     nombre2 = models.CharField(max_length=100)
@@ -24,6 +27,8 @@ class Sillas(models.Model):
     imagen2 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
     
 class Armarios(models.Model):
     nombre3 = models.CharField(max_length=100)
@@ -32,6 +37,8 @@ class Armarios(models.Model):
     imagen3 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
     
 class Cajoneras(models.Model):
     nombre4 = models.CharField(max_length=100)
@@ -40,6 +47,8 @@ class Cajoneras(models.Model):
     imagen4 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
     
 class Escritorios(models.Model):
     nombre5 = models.CharField(max_length=100)
@@ -48,6 +57,8 @@ class Escritorios(models.Model):
     imagen5 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
     
 class Utensilios(models.Model):
     nombre6 = models.CharField(max_length=100)
@@ -56,10 +67,13 @@ class Utensilios(models.Model):
     imagen6 = models.ImageField(upload_to='uploads/productos/')
     cantidad_disponible = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
+    stock_minimo = models.IntegerField(default=5)  # Nivel de reorden para alertas de stock bajo
+    inactivo_por_stock = models.BooleanField(default=False)  # Deshabilitado automáticamente al agotarse
 
 class UserClientes(models.Model):
     usernameCliente = models.CharField(max_length=100, unique=True)
-    passwordCliente = models.CharField(max_length=100)
+    # Hash de Django (core/contrasenas.py); las filas antiguas en texto plano se migran al iniciar sesión
+    passwordCliente = models.CharField(max_length=128)
     email = models.EmailField(max_length=100, blank=True)
     is_active = models.BooleanField(default=True)
     last_modified = models.DateTimeField(auto_now=True)
@@ -86,6 +100,14 @@ class UserClientes(models.Model):
         super().save(*args, **kwargs)
         self._original_is_active = self.is_active
     
+    class Meta:
+        indexes = [
+            # Listado paginado de gestión de usuarios (Empresas/views_usuarios.py): filtro por estado y orden
+            models.Index(fields=['is_active', 'fecha_registro'], name='cliente_estado_registro_idx'),
+            models.Index(fields=['fecha_registro'], name='cliente_registro_idx'),
+            models.Index(fields=['email'], name='cliente_email_idx'),
+        ]
+    
     def __str__(self):
         return self.usernameCliente
     
@@ -118,6 +140,12 @@ class Idea(models.Model):
         ('finalizada', 'Finalizada'),
         ('rechazada', 'Rechazada'),
     ]
+    MODELO_3D_ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('listo', 'Listo'),
+        ('error', 'Error'),
+    ]
     CATEGORIA_CHOICES = [
         ('mesas', 'Mesas'),
         ('sillas', 'Sillas'),
@@ -132,6 +160,12 @@ class Idea(models.Model):
     autor = models.CharField(max_length=100)
     imagen = models.ImageField(upload_to='uploads/ideas/', blank=True, null=True)
     modelo_3d = models.FileField(upload_to='uploads/ideas/modelos3d/', blank=True, null=True)
+    # Resultado del procesamiento en segundo plano del modelo 3D (core/modelos3d.py)
+    modelo_3d_estado = models.CharField(max_length=20, choices=MODELO_3D_ESTADO_CHOICES, blank=True, default='')
+    modelo_3d_info = models.JSONField(blank=True, null=True, help_text='Dimensiones, triángulos y avisos del modelo 3D procesado')
+    modelo_3d_normalizado = models.FileField(upload_to='uploads/ideas/modelos3d/normalizados/', blank=True, null=True)
+    modelo_3d_preview = models.FileField(upload_to='uploads/ideas/modelos3d/previews/', blank=True, null=True)
+    modelo_3d_miniatura = models.ImageField(upload_to='uploads/ideas/modelos3d/miniaturas/', blank=True, null=True)
     estado = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendiente')
     empresa_asignada = models.ForeignKey(UserEmpresa, on_delete=models.SET_NULL, null=True, blank=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
@@ -148,9 +182,22 @@ class Idea(models.Model):
     medidas = models.JSONField(blank=True, null=True, help_text='Medidas personalizadas del producto')
     veces_editada = models.IntegerField(default=0, help_text='Número de veces que se ha editado la idea')
     
+    class Meta:
+        indexes = [
+            # Ideas de un cliente (también sirve para filtrar solo por autor)
+            models.Index(fields=['autor', 'fecha_creacion'], name='idea_autor_fecha_idx'),
+        ]
+    
     def __str__(self):
         return self.titulo
 
+    @property
+    def url_modelo_3d_completo(self):
+        """Malla completa para los visores: el GLB normalizado o, si el original ya era GLB, el original."""
+        if self.modelo_3d_normalizado:
+            return self.modelo_3d_normalizado.url
+        return self.modelo_3d.url if self.modelo_3d else None
+
 class MensajeIdea(models.Model):
     """Modelo para almacenar mensajes entre empresa y cliente sobre una idea"""
     idea = models.ForeignKey(Idea, on_delete=models.CASCADE, related_name='mensajes')
@@ -165,6 +212,10 @@ class MensajeIdea(models.Model):
     
     class Meta:
         ordering = ['fecha_envio']
+        indexes = [
+            # Mensajes no leídos del otro lado en cada idea
+            models.Index(fields=['idea', 'remitente_tipo', 'leido'], name='mensaje_idea_no_leido_idx'),
+        ]
     
     def __str__(self):
         return f"{self.remitente_tipo} - {self.idea.titulo} - {self.fecha_envio}"
@@ -182,9 +233,17 @@ class Comentario(models.Model):
     fecha_modificacion = models.DateTimeField(auto_now=True)
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
     fecha_aprobacion = models.DateTimeField(null=True, blank=True)
+    # Preclasificación al crearlo (core/moderacion.py): 0-100, y si se rechazó sin pasar por la cola
+    puntuacion_spam = models.PositiveSmallIntegerField(default=0)
+    rechazo_automatico = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', '-fecha_aprobacion'], name='comentario_estado_aprob_idx'),
+            # Cola de moderación: pendientes en orden de id (paginación por clave)
+            models.Index(fields=['estado', 'id'], name='comentario_estado_id_idx'),
+        ]
     
     def __str__(self):
         return f"Comentario de {self.usuario.usernameCliente} - {self.fecha_creacion.strftime('%d/%m/%Y')}"
@@ -216,13 +275,41 @@ class Pago(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_confirmacion = models.DateTimeField(null=True, blank=True)
     notas_empresa = models.TextField(max_length=500, blank=True, null=True)
+    # Estado del pedido cuando la retención lo archivó (core/retencion.py); vacío si el pedido sigue en su tabla
+    estado_pedido_archivado = models.CharField(max_length=20, blank=True, default='')
     
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='pago_estado_fecha_idx'),
+            models.Index(fields=['cliente', 'estado'], name='pago_cliente_estado_idx'),
+            models.Index(fields=['estado_pedido_archivado', 'fecha_confirmacion'], name='pago_archivado_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Pago de {self.cliente.usernameCliente} - ${self.monto_total} - {self.get_estado_display()}"
 
+class SolicitudPago(models.Model):
+    """Envío de un pago ya reclamado: evita registrar dos veces el mismo pago (core/idempotencia.py).
+
+    `clave` es 'clave:<Idempotency-Key del navegador>' o 'comprobante:<sha256 del archivo>'.
+    Mientras se procesa, `respuesta` es nula; después guarda la respuesta que se repite.
+    """
+    cliente = models.ForeignKey(UserClientes, on_delete=models.CASCADE, related_name='solicitudes_pago')
+    clave = models.CharField(max_length=100)
+    pago = models.ForeignKey(Pago, on_delete=models.SET_NULL, null=True, blank=True, related_name='solicitudes')
+    respuesta = models.JSONField(null=True, blank=True)
+    codigo_respuesta = models.PositiveSmallIntegerField(null=True, blank=True)
+    fecha_creacion = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cliente', 'clave'], name='solicitud_pago_cliente_clave_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.cliente.usernameCliente} - {self.clave}"
+
 class Pedido(models.Model):
     ESTADO_PEDIDO_CHOICES = [
         ('procesando', 'Procesando'),
@@ -262,6 +349,10 @@ class Pedido(models.Model):
     
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_creacion'], name='pedido_estado_fecha_idx'),
+            models.Index(fields=['cliente', 'fecha_creacion'], name='pedido_cliente_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Pedido #{self.id} - {self.cliente.usernameCliente} - {self.get_estado_display()}"
@@ -279,6 +370,9 @@ class MensajePago(models.Model):
     
     class Meta:
         ordering = ['fecha_envio']
+        indexes = [
+            models.Index(fields=['pago', 'remitente_tipo', 'leido'], name='mensaje_pago_no_leido_idx'),
+        ]
     
     def __str__(self):
         return f"{self.remitente_tipo} - Pago #{self.pago.id} - {self.fecha_envio}"
@@ -296,6 +390,10 @@ class CarritoTemporal(models.Model):
     class Meta:
         unique_together = ('usuario', 'producto_tipo', 'producto_id')
         ordering = ['-fecha_actualizacion']
+        indexes = [
+            # Reservas de un producto en todos los carritos (unique_together empieza por usuario)
+            models.Index(fields=['producto_tipo', 'producto_id'], name='carrito_producto_idx'),
+        ]
     
     def __str__(self):
         return f"{self.usuario.usernameCliente} - {self.producto_tipo} #{self.producto_id} ({self.cantidad})"
@@ -329,3 +427,102 @@ class Factura(models.Model):
     
     def __str__(self):
         return f"Factura {self.numero_factura} - {self.nombre_cliente}"
+
+
+class ContadorFactura(models.Model):
+    """Último número de factura emitido por prefijo y año (core/numeracion.py)"""
+    prefijo = models.CharField(max_length=20)
+    anio = models.PositiveSmallIntegerField()
+    ultimo = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['prefijo', 'anio'], name='contador_factura_prefijo_anio_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.prefijo}-{self.anio}: {self.ultimo}"
+
+
+class RegistroArchivado(models.Model):
+    """Copia de una fila retirada de su tabla por una política de retención (core/retencion.py)"""
+    politica = models.CharField(max_length=50)
+    modelo = models.CharField(max_length=100)  # 'core.Pedido'
+    objeto_id = models.BigIntegerField()
+    datos = models.JSONField(encoder=DjangoJSONEncoder)
+    fecha_archivado = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['modelo', 'objeto_id'], name='registro_archivado_objeto_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.modelo} #{self.objeto_id} ({self.politica})"
+
+
+class VentaProducto(models.Model):
+    """Totales acumulados de ventas por producto (se actualiza al confirmar pagos)"""
+    categoria = models.CharField(max_length=20)  # mesas, sillas, armarios, cajoneras, escritorios, utensilios
+    producto_id = models.IntegerField()
+    nombre = models.CharField(max_length=200, blank=True, default='')
+    unidades_vendidas = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ultima_venta = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ('categoria', 'producto_id')
+        ordering = ['-unidades_vendidas']
+        indexes = [
+            models.Index(fields=['-unidades_vendidas'], name='venta_producto_unidades_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.categoria} #{self.producto_id} - {self.unidades_vendidas} vendidas"
+
+
+class VentaProductoDiaria(models.Model):
+    """Ventas de un producto en un día, para calcular el ritmo de venta reciente"""
+    categoria = models.CharField(max_length=20)
+    producto_id = models.IntegerField()
+    fecha = models.DateField()
+    unidades = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    class Meta:
+        unique_together = ('categoria', 'producto_id', 'fecha')
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['fecha'], name='venta_diaria_fecha_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.categoria} #{self.producto_id} - {self.fecha}: {self.unidades}"
+
+
+class AlertaInventario(models.Model):
+    """Alerta de stock bajo o agotado generada por el job periódico de inventario"""
+    TIPO_CHOICES = [
+        ('stock_bajo', 'Stock bajo'),
+        ('agotado', 'Agotado'),
+    ]
+    
+    categoria = models.CharField(max_length=20)  # mesas, sillas, armarios, cajoneras, escritorios, utensilios
+    producto_id = models.IntegerField()
+    nombre = models.CharField(max_length=200, blank=True, default='')
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, default='stock_bajo')
+    cantidad_disponible = models.IntegerField(default=0)
+    stock_minimo = models.IntegerField(default=0)
+    leida = models.BooleanField(default=False)
+    resuelta = models.BooleanField(default=False)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_resolucion = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['resuelta', 'categoria', 'producto_id'], name='alerta_inv_abierta_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.categoria} #{self.producto_id} ({self.cantidad_disponible}/{self.stock_minimo})"
@@ -0,0 +1,143 @@
+"""
+Moderación de comentarios: preclasificación de spam, cola de pendientes y
+testimonios de la página de inicio.
+
+puntuar_spam() da a cada comentario nuevo una puntuación de 0 a 100 con
+reglas simples (palabras bloqueadas, enlaces, datos de contacto, texto
+gritado o con caracteres repetidos). Si llega a COMENTARIOS_UMBRAL_SPAM el
+comentario se guarda ya rechazado y no aparece en la cola.
+
+La cola se recorre por id (paginación por clave con el índice (estado, id)):
+cada página pide los pendientes con id mayor que el último visto, así que
+no se saltan ni se repiten comentarios aunque otros se moderen mientras
+tanto. moderar_comentarios() aprueba o rechaza muchos con un solo UPDATE.
+
+Los testimonios de home se guardan en la caché; cualquier cambio de estado,
+comentario nuevo o borrado la invalida, y también el cambio de nombre o de
+foto de un cliente.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Comentario, UserClientes
+
+CLAVE_TESTIMONIOS = 'home:testimonios'
+TESTIMONIOS_HOME = 10
+
+# Palabras y frases que casi solo aparecen en spam (sin tildes, en minúsculas);
+# settings.COMENTARIOS_PALABRAS_BLOQUEADAS añade otras
+PALABRAS_BLOQUEADAS = (
+    'casino', 'apuestas', 'viagra', 'porno', 'xxx', 'bitcoin', 'criptomonedas', 'forex',
+    'gana dinero', 'dinero facil', 'ingresos extra', 'trabaja desde casa', 'prestamo rapido',
+    'haz clic', 'click aqui', 'compra seguidores', 'seguidores gratis', 'oferta exclusiva',
+)
+
+# (patrón, puntos por coincidencia, máximo de puntos por la regla)
+REGLAS_SPAM = (
+    (re.compile(r'https?://|www\.|\b[a-z0-9-]+\.(?:com|net|org|info|xyz|ru|io|co)\b'), 30, 60),
+    (re.compile(r'[\w.+-]+@[\w-]+\.\w+'), 25, 25),
+    (re.compile(r'(?:\+?\d[\s-]?){9,}'), 20, 20),
+    (re.compile(r'(.)\1{5,}'), 15, 15),
+)
+PUNTOS_PALABRA_BLOQUEADA = 40
+PUNTOS_MAYUSCULAS = 15
+
+ACCIONES = {'aprobar': 'aprobado', 'rechazar': 'rechazado'}
+
+
+def _normalizar(texto):
+    sin_tildes = unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode()
+    return sin_tildes.lower()
+
+
+@lru_cache(maxsize=8)
+def _patron_bloqueadas(palabras):
+    return re.compile(r'\b(?:' + '|'.join(re.escape(palabra) for palabra in palabras) + r')\b')
+
+
+def puntuar_spam(texto):
+    """Puntuación de spam (0-100) de un comentario."""
+    normalizado = _normalizar(texto or '')
+    palabras = tuple(sorted(set(PALABRAS_BLOQUEADAS) | {
+        _normalizar(palabra) for palabra in getattr(settings, 'COMENTARIOS_PALABRAS_BLOQUEADAS', ())
+    }))
+    puntos = PUNTOS_PALABRA_BLOQUEADA * len(set(_patron_bloqueadas(palabras).findall(normalizado)))
+    for patron, por_coincidencia, maximo in REGLAS_SPAM:
+        puntos += min(por_coincidencia * len(patron.findall(normalizado)), maximo)
+    letras = [caracter for caracter in texto or '' if caracter.isalpha()]
+    if len(letras) >= 20 and sum(caracter.isupper() for caracter in letras) > 0.7 * len(letras):
+        puntos += PUNTOS_MAYUSCULAS
+    return min(puntos, 100)
+
+
+def preclasificar(comentario):
+    """Puntúa un comentario nuevo (sin guardarlo) y lo rechaza si es spam evidente."""
+    comentario.puntuacion_spam = puntuar_spam(comentario.contenido)
+    if comentario.puntuacion_spam >= settings.COMENTARIOS_UMBRAL_SPAM:
+        comentario.estado = 'rechazado'
+        comentario.rechazo_automatico = True
+    return comentario
+
+
+def cola_moderacion(despues=0, limite=50):
+    """(comentarios pendientes con id > despues, id para pedir la página siguiente o None)."""
+    filas = list(
+        Comentario.objects
+        .filter(estado='pendiente', id__gt=despues)
+        .order_by('id')
+        .values('id', 'contenido', 'fecha_creacion', 'puntuacion_spam', 'usuario__usernameCliente')[:limite]
+    )
+    siguiente = filas[-1]['id'] if len(filas) == limite else None
+    return filas, siguiente
+
+
+def moderar_comentarios(ids, accion):
+    """Aprueba o rechaza los comentarios `ids` con un solo UPDATE; devuelve cuántos cambiaron."""
+    estado = ACCIONES[accion]
+    ahora = timezone.now()
+    actualizados = Comentario.objects.filter(pk__in=ids).exclude(estado=estado).update(
+        estado=estado,
+        fecha_aprobacion=ahora if estado == 'aprobado' else None,
+        # fecha_modificacion es auto_now, que update() no rellena
+        fecha_modificacion=ahora,
+        rechazo_automatico=False,
+    )
+    if actualizados:
+        invalidar_testimonios()
+    return actualizados
+
+
+def testimonios_home():
+    """Comentarios que muestra la página de inicio (aprobados primero, luego pendientes).
+
+    Se guardan en la caché como diccionarios con solo lo que usa la plantilla:
+    guardar los objetos con su usuario metería en la caché contraseñas y
+    secretos de 2FA.
+    """
+    testimonios = cache.get(CLAVE_TESTIMONIOS)
+    if testimonios is None:
+        almacenamiento = UserClientes._meta.get_field('foto_perfil').storage
+        # El orden alfabético de estado coincide, así que se recorre el índice (estado, -fecha_aprobacion)
+        filas = (
+            Comentario.objects.exclude(estado='rechazado')
+            .order_by('estado', '-fecha_aprobacion', '-fecha_creacion')
+            .values('contenido', 'usuario__usernameCliente', 'usuario__foto_perfil')[:TESTIMONIOS_HOME]
+        )
+        testimonios = [{
+            'contenido': fila['contenido'],
+            'usuario': fila['usuario__usernameCliente'],
+            'foto_url': almacenamiento.url(fila['usuario__foto_perfil']) if fila['usuario__foto_perfil'] else '',
+        } for fila in filas]
+        cache.set(CLAVE_TESTIMONIOS, testimonios, settings.TESTIMONIOS_CACHE_SEGUNDOS)
+    return testimonios
+
+
+def invalidar_testimonios():
+    # Tras el commit: antes, otra petición podría volver a guardar en la caché los datos viejos
+    transaction.on_commit(lambda: cache.delete(CLAVE_TESTIMONIOS))
@@ -0,0 +1,63 @@
+"""
+Numeración consecutiva de facturas: FACT-2026-000001, FACT-2026-000002...
+
+Cada (prefijo, año) tiene una fila en ContadorFactura con el último número
+emitido. reservar_numeros() la incrementa con un UPDATE ... SET ultimo =
+ultimo + n DENTRO de la transacción que inserta las facturas: la fila queda
+bloqueada hasta el commit, así que dos confirmaciones simultáneas no pueden
+recibir el mismo número, y si la factura no llega a guardarse el rollback
+deshace también el incremento (no quedan huecos).
+
+El bloqueo de la fila es el punto de contención: por eso el número se
+reserva al final de la transacción, justo antes de insertar, y se escribe
+antes de leer (en SQLite la transacción pide el bloqueo de escritura desde
+la primera sentencia y no falla al pasar de lectura a escritura). Las
+facturas emitidas en lote reservan un bloque de números consecutivos con
+una sola actualización.
+
+No se reservan bloques por proceso por adelantado: los números que un
+proceso no llegara a usar (reinicio, error) serían huecos en la numeración.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ContadorFactura
+
+DIGITOS = 6
+
+
+def formatear_numero(prefijo, anio, numero):
+    return f'{prefijo}-{anio}-{numero:0{DIGITOS}d}'
+
+
+def reservar_numeros(cantidad=1, prefijo=None, fecha=None):
+    """Lista de `cantidad` números de factura consecutivos para el prefijo y el año de `fecha`.
+
+    Debe llamarse dentro de la transacción que guarda las facturas (si no,
+    un error al insertarlas dejaría huecos en la numeración).
+    """
+    if cantidad < 1:
+        raise ValueError('La cantidad de números a reservar debe ser positiva')
+    if not transaction.get_connection().in_atomic_block:
+        raise RuntimeError('reservar_numeros() debe llamarse dentro de transaction.atomic()')
+    prefijo = prefijo or settings.FACTURAS_PREFIJO
+    anio = timezone.localdate(fecha).year
+    contador = ContadorFactura.objects.filter(prefijo=prefijo, anio=anio)
+
+    if not contador.update(ultimo=F('ultimo') + cantidad):
+        # Primera factura del año para este prefijo
+        try:
+            with transaction.atomic():
+                ContadorFactura.objects.create(prefijo=prefijo, anio=anio, ultimo=cantidad)
+        except IntegrityError:
+            # Otra transacción creó el contador a la vez
+            contador.update(ultimo=F('ultimo') + cantidad)
+    ultimo = contador.values_list('ultimo', flat=True).get()
+    return [formatear_numero(prefijo, anio, numero) for numero in range(ultimo - cantidad + 1, ultimo + 1)]
+
+
+def siguiente_numero_factura(prefijo=None, fecha=None):
+    """Número de la próxima factura (ver reservar_numeros)."""
+    return reservar_numeros(1, prefijo, fecha)[0]
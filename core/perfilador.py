@@ -0,0 +1,157 @@
+"""
+Perfilado bajo demanda de peticiones (cProfile y muestreo de pila).
+
+Un usuario staff puede perfilar cualquier petición añadiendo ?perfilar=1 (o
+la cabecera X-Perfilar: 1); con ?perfilar=muestreo se usa solo el muestreo,
+que apenas añade overhead. Además, PERFILADOR_FRACCION_MUESTREO perfila por
+muestreo una fracción aleatoria de todas las peticiones.
+
+Cada perfil se guarda en PERFILES_DIR como:
+  - <nombre>.prof: estadísticas de cProfile (se abre con pstats o snakeviz).
+  - <nombre>.collapsed: pilas colapsadas ("a;b;c N") para flamegraph.pl o speedscope.
+  - <nombre>.json: metadatos (ruta, duración, modo, usuario).
+"""
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+MODOS_PERFIL = ('cprofile', 'muestreo')
+
+# Solo se aceptan nombres generados por guardar_perfil() al servir archivos
+PATRON_NOMBRE_PERFIL = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9]{6}_[A-Za-z0-9_-]+$')
+
+
+def directorio_perfiles():
+    return Path(getattr(settings, 'PERFILES_DIR', settings.BASE_DIR / 'perfiles'))
+
+
+class MuestreadorPila:
+    """Toma la pila de un hilo cada `intervalo` segundos desde un hilo aparte.
+
+    Cuenta cuántas veces aparece cada pila completa, que es justo el formato
+    de "pilas colapsadas" que esperan las herramientas de flamegraph.
+    """
+
+    def __init__(self, hilo_id, intervalo=0.005):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._bucle, name='muestreador-pila', daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+
+    def _bucle(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            if frame is None:
+                continue
+            marcos = []
+            while frame is not None:
+                codigo = frame.f_code
+                marcos.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})')
+                frame = frame.f_back
+            self.pilas[';'.join(reversed(marcos))] += 1
+
+    def colapsadas(self):
+        return ''.join(f'{pila} {veces}\n' for pila, veces in self.pilas.most_common())
+
+
+def modo_solicitado(request):
+    """Modo de perfilado pedido explícitamente por un staff, o None."""
+    valor = request.GET.get('perfilar') or request.headers.get('X-Perfilar')
+    if not valor:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_staff:
+        return None
+    return 'muestreo' if valor == 'muestreo' else 'cprofile'
+
+
+def perfilar(get_response, request, modo):
+    """Ejecuta get_response(request) bajo el perfilador; devuelve (response, nombre del perfil)."""
+    inicio = time.perf_counter()
+    perfil = cProfile.Profile() if modo == 'cprofile' else None
+    with MuestreadorPila(threading.get_ident(), getattr(settings, 'PERFILADOR_INTERVALO_MUESTREO', 0.005)) as muestreador:
+        if perfil is not None:
+            perfil.enable()
+        try:
+            response = get_response(request)
+        finally:
+            if perfil is not None:
+                perfil.disable()
+    duracion_ms = round((time.perf_counter() - inicio) * 1000, 1)
+
+    nombre = guardar_perfil(request, modo, duracion_ms, response.status_code, perfil, muestreador)
+    return response, nombre
+
+
+def _slug_ruta(path):
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_')
+    return (slug or 'raiz')[:60]
+
+
+def guardar_perfil(request, modo, duracion_ms, status, perfil, muestreador):
+    directorio = directorio_perfiles()
+    directorio.mkdir(parents=True, exist_ok=True)
+    nombre = f"{timezone.now():%Y%m%d-%H%M%S-%f}_{_slug_ruta(request.path)}"
+
+    if perfil is not None:
+        perfil.dump_stats(directorio / f'{nombre}.prof')
+    (directorio / f'{nombre}.collapsed').write_text(muestreador.colapsadas(), encoding='utf-8')
+    user = getattr(request, 'user', None)
+    metadatos = {
+        'nombre': nombre,
+        'fecha': timezone.now().isoformat(),
+        'metodo': request.method,
+        'path': request.get_full_path(),
+        'modo': modo,
+        'duracion_ms': duracion_ms,
+        'status': status,
+        'muestras': sum(muestreador.pilas.values()),
+        'usuario': user.get_username() if user is not None and user.is_authenticated else None,
+    }
+    (directorio / f'{nombre}.json').write_text(json.dumps(metadatos, ensure_ascii=False), encoding='utf-8')
+
+    _limpiar_perfiles_antiguos(directorio)
+    return nombre
+
+
+def _limpiar_perfiles_antiguos(directorio):
+    """Conserva solo los PERFILADOR_MAX_PERFILES perfiles más recientes."""
+    maximo = getattr(settings, 'PERFILADOR_MAX_PERFILES', 200)
+    nombres = sorted(archivo.stem for archivo in directorio.glob('*.json'))
+    for nombre in nombres[:-maximo] if len(nombres) > maximo else []:
+        for extension in ('.json', '.prof', '.collapsed'):
+            (directorio / f'{nombre}{extension}').unlink(missing_ok=True)
+
+
+def perfiles_recientes(limite=50):
+    """Metadatos de los perfiles guardados, del más reciente al más antiguo."""
+    directorio = directorio_perfiles()
+    if not directorio.exists():
+        return []
+    perfiles = []
+    for archivo in sorted(directorio.glob('*.json'), reverse=True)[:limite]:
+        try:
+            metadatos = json.loads(archivo.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            continue
+        metadatos['tiene_prof'] = (directorio / f'{archivo.stem}.prof').exists()
+        perfiles.append(metadatos)
+    return perfiles
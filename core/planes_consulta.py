@@ -0,0 +1,135 @@
+"""
+Planes de ejecución (EXPLAIN) de las consultas de las vistas más usadas.
+
+Pide cada vista de VISTAS_CALIENTES con los datos de core/regresion_consultas,
+captura sus SELECT y pide a la base de datos el plan de cada uno. Un
+recorrido completo de una tabla ("SCAN tabla" en SQLite, "Seq Scan on tabla"
+en PostgreSQL) indica que falta un índice para ese filtro u orden, salvo en
+las tablas de TABLAS_LISTADAS (se listan enteras a propósito) y los casos de
+ESCANEOS_PERMITIDOS.
+"""
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .regresion_consultas import FILAS_GRANDE, SESIONES, _cliente_http, _kwargs_ruta, crear_actores, poblar, rutas_con_nombre
+
+VISTAS_CALIENTES = [
+    'home',
+    'productos',
+    'carrito',
+    'api_disponibilidad_productos',
+    'mis_pedidos',
+    'obtener_ideas_usuario',
+    'api_conversaciones',
+    'api_conversaciones_pagos',
+    'api_mensajes_idea',
+    'api_mensajes_pago',
+    'comentarios',
+    'empresa_comentarios',
+    'gestion_pedidos',
+    'gestion_pagos',
+    'obtener_pedidos_cliente',
+    'obtener_pagos_cliente',
+    'estadisticas',
+    'inventario',
+]
+
+# Parámetros GET que necesitan algunas vistas para llegar a la base de datos
+PARAMETROS_VISTAS = {
+    'api_disponibilidad_productos': lambda actores: {'items': f"mesa:{actores['producto'].id}"},
+}
+
+# Tablas que las vistas listan enteras a propósito: tabla -> motivo
+TABLAS_LISTADAS = {
+    'core_mesas': 'el catálogo y el inventario listan todos los productos',
+    'core_sillas': 'el catálogo y el inventario listan todos los productos',
+    'core_armarios': 'el catálogo y el inventario listan todos los productos',
+    'core_cajoneras': 'el catálogo y el inventario listan todos los productos',
+    'core_escritorios': 'el catálogo y el inventario listan todos los productos',
+    'core_utensilios': 'el catálogo y el inventario listan todos los productos',
+}
+
+# Recorridos completos aceptados en una vista concreta: (vista, tabla) -> motivo
+ESCANEOS_PERMITIDOS = {
+    ('comentarios', 'core_comentario'): 'lista todos los comentarios',
+    ('estadisticas', 'core_userclientes'): 'cuenta los clientes activos (casi todos; un índice no ayuda)',
+}
+
+_ESCANEO_SQLITE = re.compile(r'\bSCAN (?:TABLE )?("?)(\w+)\1(?!.*\bUSING\b.*\bINDEX\b)')
+_ESCANEO_POSTGRES = re.compile(r'Seq Scan on "?(\w+)"?')
+
+
+def explicar(sql):
+    """Líneas del plan de ejecución de una consulta (con los parámetros ya interpolados)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [fila[-1] for fila in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def escaneos_completos(plan):
+    """Tablas que el plan recorre enteras (sin índice)."""
+    tablas = []
+    for linea in plan:
+        if connection.vendor == 'sqlite':
+            coincidencia = _ESCANEO_SQLITE.search(linea)
+            tabla = coincidencia.group(2) if coincidencia else None
+        else:
+            coincidencia = _ESCANEO_POSTGRES.search(linea)
+            tabla = coincidencia.group(1) if coincidencia else None
+        if tabla and tabla not in tablas:
+            tablas.append(tabla)
+    return tablas
+
+
+def _consultas_de_vista(http, url, parametros):
+    with CaptureQueriesContext(connection) as capturadas:
+        response = http.get(url, parametros)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return [
+        q['sql'] for q in capturadas.captured_queries
+        if q['sql'].lstrip().upper().startswith('SELECT') and 'django_session' not in q['sql']
+    ]
+
+
+def planes_de_vistas(actores, vistas=None):
+    """{vista: [{'sql', 'plan', 'escaneos'}]} con cada SELECT distinto que hace la vista."""
+    rutas = rutas_con_nombre()
+    clientes_http = [_cliente_http(actores, sesion) for sesion in SESIONES]
+    resultado = {}
+    for nombre in vistas or VISTAS_CALIENTES:
+        url = reverse(nombre, kwargs=_kwargs_ruta(rutas[nombre], actores))
+        parametros = PARAMETROS_VISTAS[nombre](actores) if nombre in PARAMETROS_VISTAS else {}
+        consultas = []
+        for http in clientes_http:
+            for sql in _consultas_de_vista(http, url, parametros):
+                if sql not in consultas:
+                    consultas.append(sql)
+        resultado[nombre] = []
+        for sql in consultas:
+            plan = explicar(sql)
+            resultado[nombre].append({'sql': sql, 'plan': plan, 'escaneos': escaneos_completos(plan)})
+    return resultado
+
+
+def generar_planes(vistas=None, filas=FILAS_GRANDE):
+    actores = crear_actores()
+    poblar(actores, filas)
+    return planes_de_vistas(actores, vistas)
+
+
+def problemas_de_planes(resultado):
+    """Textos con cada consulta que recorre entera una tabla no permitida."""
+    problemas = []
+    for vista, consultas in resultado.items():
+        for consulta in consultas:
+            for tabla in consulta['escaneos']:
+                if tabla not in TABLAS_LISTADAS and (vista, tabla) not in ESCANEOS_PERMITIDOS:
+                    problemas.append(f"{vista}: recorre entera {tabla} -> {consulta['sql'][:200]}")
+    return problemas
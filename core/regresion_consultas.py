@@ -0,0 +1,356 @@
+"""
+Control de regresiones en el número de consultas SQL de cada vista.
+
+Recorre todas las rutas con nombre del proyecto (menos el admin), las pide
+por GET con un conjunto de datos pequeño y otro grande, y compara cuántas
+consultas hace cada una. Una vista bien escrita hace las mismas consultas
+con 2 filas que con 20; si crece con los datos hay un N+1.
+
+Cada ruta declara su presupuesto en PRESUPUESTOS_CONSULTAS (máximo con el
+conjunto grande). Las que todavía escalan con los datos están listadas en
+ESCALAN_CON_DATOS como deuda conocida: la prueba falla si aparece una nueva
+o si una de la lista deja de escalar (para sacarla de la lista).
+"""
+import json
+import logging
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from Empresas.models import EmpresaRegistrada
+
+from .facturas import PRODUCTOS_POR_CATEGORIA
+from .models import (
+    CarritoTemporal, Comentario, Factura, Idea, MensajeIdea, MensajePago, Pago, Pedido,
+    UserClientes, UserEmpresa,
+)
+
+FILAS_PEQUENO = 2
+FILAS_GRANDE = 8
+
+# Rutas que no se pueden medir con un GET: cambian datos o generan archivos pesados
+EXCLUIDAS = {
+    'logout': 'cierra la sesión',
+    'eliminar_producto2': 'el GET activa/desactiva el producto',
+    'publicar_idea_producto': 'el GET publica la idea como producto',
+    'eliminar_comentario': 'el GET borra el comentario',
+    'aprobar_comentario': 'el GET cambia el estado del comentario',
+    'rechazar_comentario': 'el GET cambia el estado del comentario',
+    'exportar_facturas_pdf': 'lanza una exportación en segundo plano',
+    'exportar_facturas_pdf_progreso': 'depende de una exportación en curso',
+    'descargar_estadisticas_pdf': 'renderiza un PDF',
+    'chatbot': 'comparte la ruta vacía con home',
+    'servir_media': 'entrega archivos subidos (necesita un archivo concreto)',
+    'api_esperar_mensajes_idea': 'espera larga: queda abierta hasta CHAT_ESPERA_TIMEOUT',
+    'api_esperar_mensajes_pago': 'espera larga: queda abierta hasta CHAT_ESPERA_TIMEOUT',
+}
+
+# Rutas que hoy fallan con un GET normal (se informan pero no rompen la prueba)
+ERRORES_CONOCIDOS = {
+    'MetodosPago': 'falta la plantilla core/MetodosPago.html',
+    'home2': 'falta la plantilla core/home2.html',
+    'home3': 'falta la plantilla core/home3.html',
+    'crear_comentario': 'falta la plantilla core/crear_comentario.html',
+    'detalle_pedido': 'falta la plantilla core/detalle_pedido.html',
+    'editar_ubicacion_pedido': 'el GET no devuelve respuesta',
+}
+
+# Máximo de consultas por ruta con el conjunto de datos grande
+PRESUPUESTOS_CONSULTAS = {
+    'activar_2fa': 2,
+    'admin_perfiles': 3,
+    'agregar_producto2': 2,
+    'api_alertas_inventario': 2,
+    'api_cantidad_disponible': 0,
+    'api_conversaciones': 28,
+    'api_conversaciones_pagos': 37,
+    'api_disponibilidad_productos': 0,
+    'api_mensajes_idea': 4,
+    'api_mensajes_pago': 5,
+    'api_metricas_rutas': 1,
+    'api_cola_moderacion': 2,
+    'api_usuarios': 2,
+    'carpinteria': 3,
+    'carrito': 2,
+    'ceramica': 3,
+    'comentarios': 12,
+    'completar_datos_envio': 0,
+    'configurar_2fa_empresa': 0,
+    'contact': 2,
+    'crear_comentario': 1,
+    'crear_pedido': 3,
+    'dashboardEmpresa': 2,
+    'desactivar_2fa': 1,
+    'descargar_perfil': 1,
+    'detalle_pedido': 4,
+    'editar_perfil': 2,
+    'editar_producto2': 3,
+    'editar_ubicacion_pedido': 1,
+    'empresa_comentarios': 3,
+    'empresa_ideas': 10,
+    'estadisticas': 35,
+    'estadisticas_series': 2,
+    'exportar_facturas': 1,
+    'exportar_pagos': 1,
+    'exportar_pedidos': 1,
+    'gestion_pagos': 3,
+    'gestion_pedidos': 3,
+    'GestiProductos': 8,
+    'get_csrf_token': 0,
+    'home': 11,
+    'home2': 1,
+    'home3': 2,
+    'idea': 36,
+    'inventario': 15,
+    'login': 2,
+    'login_empresa': 2,
+    'loginEmpresa': 2,
+    'loginEmpresa_login': 2,
+    'marroquineria': 3,
+    'metaleria': 3,
+    'MetodosPago': 1,
+    'mis_pedidos': 19,
+    'mostrar_qr_2fa': 0,
+    'mostrar_qr_2fa_empresa': 0,
+    'obtener_comentarios_cliente': 2,
+    'obtener_detalle_idea': 2,
+    'obtener_ideas_usuario': 10,
+    'obtener_mensajes_pago': 2,
+    'obtener_pagos_cliente': 2,
+    'obtener_pedidos_cliente': 2,
+    'perfilUsuario': 4,
+    'productos': 68,
+    'registro': 2,
+    'registro_empresa': 11,
+    'registro_empresa_alt': 2,
+    'reglas': 2,
+    'tapiceria': 3,
+    'test_session': 0,
+    'usuarios': 3,
+    'ver_factura': 5,
+    'ver_factura_cliente': 4,
+    'ver_imagen_idea': 3,
+    'ver_modelo_3d_idea': 3,
+    'verificar_2fa_empresa_login': 0,
+    'verificar_2fa_login': 0,
+    'verificar_2fa_login_empresa': 0,
+    'verificar_2fa_setup': 0,
+    'verificar_2fa_setup_empresa': 0,
+    'verificar_codigo': 0,
+    'vidrieria': 3,
+}
+
+# N+1 conocidos: rutas cuyas consultas crecen con las filas (pendientes de arreglar)
+ESCALAN_CON_DATOS = {
+    'api_conversaciones',
+    'api_conversaciones_pagos',
+    'comentarios',
+    'idea',
+    'mis_pedidos',
+    'obtener_ideas_usuario',
+    'productos',
+}
+
+SESIONES = ('cliente', 'empresa_chat')
+
+
+def rutas_con_nombre():
+    """(nombre, patrón) de todas las rutas con nombre fuera del admin, sin repetir nombres."""
+    rutas = {}
+
+    def recorrer(patrones):
+        for patron in patrones:
+            if isinstance(patron, URLResolver):
+                if patron.namespace != 'admin':
+                    recorrer(patron.url_patterns)
+            elif isinstance(patron, URLPattern) and patron.name and patron.name not in rutas:
+                rutas[patron.name] = patron
+
+    recorrer(get_resolver().url_patterns)
+    return rutas
+
+
+def crear_actores():
+    """Cliente, empresa del panel, empresa del chat (mismo username) y un staff."""
+    cliente = UserClientes.objects.create(
+        usernameCliente='regresion_cliente', passwordCliente='x', email='regresion@ejemplo.com',
+        nombre_completo='Cliente Regresión', ciudad='Bogotá',
+    )
+    empresa = EmpresaRegistrada.objects.create(
+        nombre_empresa='Empresa Regresión', nit='regresion', email='regresion_empresa@ejemplo.com',
+        username='regresion_empresa', password='x',
+    )
+    empresa_chat = UserEmpresa.objects.create(usernameEmpresa='regresion_empresa', passwordEmpresa='x')
+    staff = User.objects.create_user('regresion_staff', password='x', is_staff=True)
+    return {'cliente': cliente, 'empresa': empresa, 'empresa_chat': empresa_chat, 'staff': staff, 'filas': 0}
+
+
+def poblar(actores, filas):
+    """Agrega `filas` registros de cada relación que muestran las vistas."""
+    cliente = actores['cliente']
+    inicio = actores['filas']
+    for i in range(inicio, inicio + filas):
+        productos = []
+        for categoria, (modelo, campo_nombre, campo_precio) in PRODUCTOS_POR_CATEGORIA.items():
+            numero = list(PRODUCTOS_POR_CATEGORIA).index(categoria) + 1
+            producto = modelo.objects.create(**{
+                campo_nombre: f'{categoria} regresión {i}', campo_precio: 1000,
+                f'imagen{numero}': 'uploads/productos/regresion.png', 'cantidad_disponible': 10,
+            })
+            productos.append((categoria[:-1], producto))
+        tipo, producto = productos[0]
+        CarritoTemporal.objects.create(usuario=cliente, producto_tipo=tipo, producto_id=producto.id, cantidad=1)
+        productos_json = json.dumps([
+            {'id': producto.id, 'tipo': tipo, 'categoria': f'{tipo}s', 'nombre': f'Producto {i}', 'precio': '1000', 'cantidad': 1}
+        ])
+
+        otro = UserClientes.objects.create(usernameCliente=f'regresion_otro{i}', passwordCliente='x')
+        for dueno in (cliente, otro):
+            pago = Pago.objects.create(
+                cliente=dueno, metodo_pago='nequi', monto_total=1000, comprobante='uploads/comprobantes/regresion.png',
+                productos=productos_json, estado='confirmado', fecha_confirmacion=timezone.now(),
+            )
+            Pedido.objects.create(pago=pago, cliente=dueno, productos=productos_json, monto_total=1000)
+            Factura.objects.create(
+                pago=pago, numero_factura=f'REG-{pago.id}', cliente=dueno, nombre_cliente=dueno.usernameCliente,
+                productos=productos_json, subtotal=1000, total=1000,
+            )
+            MensajePago.objects.create(pago=pago, remitente_tipo='cliente', remitente_nombre=dueno.usernameCliente, mensaje='Hola')
+            MensajePago.objects.create(pago=pago, remitente_tipo='empresa', remitente_nombre='regresion_empresa', mensaje='Hola')
+            actores.setdefault('pago', pago)
+            actores.setdefault('pedido', pago.pedido)
+
+        idea = Idea.objects.create(
+            titulo=f'Idea {i}', autor=cliente.usernameCliente, empresa_asignada=actores['empresa_chat'], estado='en_proceso',
+        )
+        MensajeIdea.objects.create(idea=idea, remitente_tipo='cliente', remitente_nombre=cliente.usernameCliente, mensaje='Hola')
+        MensajeIdea.objects.create(idea=idea, remitente_tipo='empresa', remitente_nombre='regresion_empresa', mensaje='Hola')
+        comentario = Comentario.objects.create(usuario=cliente, contenido=f'Comentario {i}', estado='aprobado' if i % 2 else 'pendiente')
+        actores.setdefault('idea', idea)
+        actores.setdefault('comentario', comentario)
+        actores.setdefault('producto', productos[0][1])
+    actores['filas'] = inicio + filas
+
+
+def _kwargs_ruta(patron, actores):
+    valores = {
+        'idea_id': actores['idea'].id,
+        'pago_id': actores['pago'].id,
+        'pedido_id': actores['pedido'].id,
+        'comentario_id': actores['comentario'].id,
+        'cliente_id': actores['cliente'].id,
+        'usuario_id': actores['cliente'].id,
+        'user_id': actores['cliente'].id,
+        'producto_id': actores['producto'].id,
+        'categoria': 'mesas',
+        'user_type': 'cliente',
+        'action': 'activar',
+        'token': 'regresion',
+        'nombre': 'regresion',
+        'extension': 'prof',
+    }
+    return {nombre: valores[nombre] for nombre in patron.pattern.converters}
+
+
+def _cliente_http(actores, sesion):
+    """Cliente HTTP con sesión de cliente o de empresa del chat (ambos con panel de empresa y staff)."""
+    http = Client(raise_request_exception=False)
+    http.force_login(actores['staff'])
+    session = http.session
+    session.update({
+        'empresa_id': actores['empresa'].id,
+        'empresa_username': actores['empresa'].username,
+        'empresa_nombre': actores['empresa'].nombre_empresa,
+    })
+    if sesion == 'cliente':
+        session['usernameCliente'] = actores['cliente'].usernameCliente
+    else:
+        session['usernameEmpresa'] = actores['empresa_chat'].usernameEmpresa
+    session.save()
+    return http
+
+
+def _contar(http, url):
+    with CaptureQueriesContext(connection) as capturadas:
+        response = http.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    consultas = [
+        q['sql'] for q in capturadas.captured_queries
+        if 'django_session' not in q['sql'] and 'SAVEPOINT' not in q['sql']
+    ]
+    return response.status_code, len(consultas)
+
+
+def medir_rutas(actores):
+    """{nombre: {'status', 'consultas'}} con el máximo de consultas entre las sesiones."""
+    rutas = rutas_con_nombre()
+    clientes_http = {sesion: _cliente_http(actores, sesion) for sesion in SESIONES}
+    medidas = {}
+    # Los errores conocidos no deben llenar la salida de trazas de django.request
+    logger_peticiones = logging.getLogger('django.request')
+    nivel_anterior = logger_peticiones.level
+    logger_peticiones.setLevel(logging.CRITICAL)
+    # Sin caché: se mide siempre el camino que llega a la base de datos
+    try:
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            for nombre, patron in rutas.items():
+                if nombre in EXCLUIDAS:
+                    continue
+                url = reverse(nombre, kwargs=_kwargs_ruta(patron, actores))
+                for sesion, http in clientes_http.items():
+                    status, consultas = _contar(http, url)
+                    anterior = medidas.get(nombre)
+                    if anterior is None or consultas > anterior['consultas']:
+                        medidas[nombre] = {'status': status, 'consultas': consultas}
+    finally:
+        logger_peticiones.setLevel(nivel_anterior)
+    # Las rutas solo POST responden 405 sin tocar la base de datos
+    return {nombre: medida for nombre, medida in medidas.items() if medida['status'] != 405}
+
+
+def comparar_conjuntos(filas_pequeno=FILAS_PEQUENO, filas_grande=FILAS_GRANDE):
+    """Mide todas las rutas con los dos tamaños de datos.
+
+    Devuelve {nombre: {'status', 'pequeno', 'grande', 'por_fila'}}; por_fila es
+    cuántas consultas de más hace la vista por cada fila adicional.
+    """
+    actores = crear_actores()
+    poblar(actores, filas_pequeno)
+    pequeno = medir_rutas(actores)
+    poblar(actores, filas_grande - filas_pequeno)
+    grande = medir_rutas(actores)
+
+    resultado = {}
+    for nombre, medida in grande.items():
+        consultas_pequeno = pequeno.get(nombre, {}).get('consultas', medida['consultas'])
+        resultado[nombre] = {
+            'status': medida['status'],
+            'pequeno': consultas_pequeno,
+            'grande': medida['consultas'],
+            'por_fila': round((medida['consultas'] - consultas_pequeno) / (filas_grande - filas_pequeno), 2),
+        }
+    return resultado
+
+
+def problemas_de_consultas(resultado):
+    """Textos con cada ruta que incumple su presupuesto o cambia de comportamiento."""
+    problemas = []
+    for nombre, medida in sorted(resultado.items()):
+        if medida['status'] >= 500 and nombre not in ERRORES_CONOCIDOS:
+            problemas.append(f"{nombre}: respondió {medida['status']}")
+        presupuesto = PRESUPUESTOS_CONSULTAS.get(nombre)
+        if presupuesto is None:
+            problemas.append(f"{nombre}: sin presupuesto declarado ({medida['grande']} consultas)")
+        elif medida['grande'] > presupuesto:
+            problemas.append(f"{nombre}: {medida['grande']} consultas > presupuesto {presupuesto}")
+        escala = medida['grande'] > medida['pequeno']
+        if escala and nombre not in ESCALAN_CON_DATOS:
+            problemas.append(f"{nombre}: las consultas crecen con los datos ({medida['pequeno']} -> {medida['grande']})")
+        elif not escala and nombre in ESCALAN_CON_DATOS:
+            problemas.append(f"{nombre}: ya no escala con los datos, quítala de ESCALAN_CON_DATOS")
+    return problemas
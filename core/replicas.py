@@ -0,0 +1,93 @@
+"""
+Lecturas en una réplica de la base de datos para reportes y listados.
+
+Las vistas marcadas con @lectura_en_replica leen de REPLICA_DB_ALIAS; todo
+lo demás (y todas las escrituras) va a 'default'. Para que un usuario vea
+enseguida lo que acaba de escribir, ReplicaMiddleware guarda en la sesión
+"leer del primario hasta X" durante REPLICA_PEGADO_SEGUNDOS después de
+cualquier escritura, cubriendo el retraso de replicación.
+
+En local la réplica puede ser un segundo archivo SQLite (SQLITE_REPLICA) que
+copiar_replica_sqlite() refresca desde el primario.
+"""
+import contextvars
+import sqlite3
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# True mientras se ejecuta una vista marcada con @lectura_en_replica
+_lectura_en_replica = contextvars.ContextVar('lectura_en_replica', default=False)
+# Estado de la petición actual: {'pegado': bool, 'escribio': bool} (lo crea ReplicaMiddleware)
+_estado_peticion = contextvars.ContextVar('estado_replica', default=None)
+
+CLAVE_SESION_PEGADO = 'replica_pegado_hasta'
+
+# Las escrituras de sesión ocurren en cada petición y no cuentan como escritura del usuario
+APPS_SIN_PEGADO = {'sessions'}
+
+
+def alias_replica():
+    """Alias de la réplica configurada, o None si no hay réplica."""
+    return getattr(settings, 'REPLICA_DB_ALIAS', None) or None
+
+
+def lectura_en_replica(vista):
+    """Marca una vista de solo lectura para que sus consultas vayan a la réplica."""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        token = _lectura_en_replica.set(True)
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _lectura_en_replica.reset(token)
+    return envoltura
+
+
+def iniciar_peticion(pegado):
+    return _estado_peticion.set({'pegado': pegado, 'escribio': False})
+
+
+def terminar_peticion(token):
+    """Devuelve si la petición escribió en el primario y limpia el estado."""
+    estado = _estado_peticion.get()
+    _estado_peticion.reset(token)
+    return bool(estado and estado['escribio'])
+
+
+class ReplicaLecturaRouter:
+    """Envía a la réplica las lecturas de las vistas marcadas, salvo si el usuario acaba de escribir."""
+
+    def db_for_read(self, model, **hints):
+        replica = alias_replica()
+        if not replica or not _lectura_en_replica.get():
+            return None
+        estado = _estado_peticion.get()
+        if estado and (estado['pegado'] or estado['escribio']):
+            return DEFAULT_DB_ALIAS
+        return replica
+
+    def db_for_write(self, model, **hints):
+        estado = _estado_peticion.get()
+        if estado is not None and model._meta.app_label not in APPS_SIN_PEGADO:
+            estado['escribio'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primario tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación, nunca por migrate
+        replica = alias_replica()
+        return db != replica if replica else None
+
+
+def copiar_replica_sqlite(origen, destino):
+    """Copia la base SQLite `origen` en `destino` con la API de backup (consistente aunque haya escrituras)."""
+    with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+        fuente.backup(copia)
+    # `with` de sqlite3 solo confirma la transacción; las conexiones se cierran aparte
+    fuente.close()
+    copia.close()
@@ -0,0 +1,184 @@
+"""
+Retención de datos y limpieza de archivos huérfanos de MEDIA_ROOT.
+
+Cada política de POLITICAS elige las filas vencidas de un modelo y las
+archiva (copia en RegistroArchivado y borra de la tabla) o las purga (solo
+borra). Al archivar un pedido su pago se conserva con el estado que tenía el
+pedido en Pago.estado_pedido_archivado: crear_pedido no le crea otro, las
+exportaciones de facturas lo siguen filtrando y los totales de estadísticas
+lo cuentan. aplicar_politica() trabaja por lotes de RETENCION_LOTE filas,
+cada uno en su propia transacción, para no bloquear la tabla ni cargar en
+memoria todas las filas de una vez. Los plazos están en settings; un plazo
+de 0 desactiva la política.
+
+Borrar un Pago, una Idea o un MensajePago no borra sus archivos, así que
+uploads/ solo crece. recolectar_medios() recorre MEDIA_ROOT y compara cada
+archivo con las rutas que guardan los FileField/ImageField de todos los
+modelos (leídas con iterator(), sin instanciar los objetos). Por defecto
+solo informa cuántos archivos y bytes se liberarían; con borrar=True los
+elimina. Los archivos recientes (MEDIOS_GC_GRACIA_HORAS) se respetan: pueden
+ser subidas cuya fila aún no se ha guardado.
+"""
+import calendar
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CarritoTemporal, Pago, Pedido, RegistroArchivado, SolicitudPago
+
+
+def _meses_atras(fecha, meses):
+    """La misma fecha `meses` meses antes (el día se ajusta al último del mes si no existe)."""
+    total = fecha.year * 12 + fecha.month - 1 - meses
+    anio, mes = divmod(total, 12)
+    dia = min(fecha.day, calendar.monthrange(anio, mes + 1)[1])
+    return fecha.replace(year=anio, month=mes + 1, day=dia)
+
+
+def _pedidos_entregados(ahora):
+    meses = settings.RETENCION_PEDIDOS_ENTREGADOS_MESES
+    if not meses:
+        return None
+    limite = _meses_atras(ahora, meses)
+    # Los pedidos antiguos no tienen fecha de entrega: se usa la de su última actualización
+    return Q(estado='entregado') & (
+        Q(fecha_entrega_real__lt=limite) | Q(fecha_entrega_real__isnull=True, fecha_actualizacion__lt=limite)
+    )
+
+
+def _carritos_expirados(ahora):
+    horas = settings.RETENCION_CARRITOS_HORAS
+    if not horas:
+        return None
+    # Un carrito abandonado sigue reservando stock para los demás clientes hasta borrarse
+    return Q(fecha_actualizacion__lt=ahora - timedelta(hours=horas))
+
+
+def _solicitudes_pago_vencidas(ahora):
+    # Pasada la vigencia de la clave y la ventana de duplicados ya no se repiten
+    vigencia = max(
+        timedelta(hours=settings.PAGOS_IDEMPOTENCIA_HORAS),
+        timedelta(minutes=settings.PAGOS_VENTANA_DUPLICADOS_MINUTOS),
+    )
+    return Q(fecha_creacion__lt=ahora - vigencia)
+
+
+# nombre: (modelo, 'archivar' | 'purgar', función(ahora) -> Q de las filas vencidas o None si está desactivada)
+POLITICAS = {
+    'pedidos_entregados': (Pedido, 'archivar', _pedidos_entregados),
+    'carritos_expirados': (CarritoTemporal, 'purgar', _carritos_expirados),
+    'solicitudes_pago': (SolicitudPago, 'purgar', _solicitudes_pago_vencidas),
+}
+
+
+def _archivar(nombre, objetos):
+    RegistroArchivado.objects.bulk_create([
+        RegistroArchivado(politica=nombre, modelo=fila['model'], objeto_id=fila['pk'], datos=fila['fields'])
+        for fila in serializers.serialize('python', objetos)
+    ])
+    if isinstance(objetos[0], Pedido):
+        # El pago (y su factura) se conservan: queda marcado para que no se le cree
+        # otro pedido y las exportaciones sigan filtrándolo por el estado que tenía
+        for estado in {pedido.estado for pedido in objetos}:
+            Pago.objects.filter(pk__in=[pedido.pago_id for pedido in objetos if pedido.estado == estado]).update(
+                estado_pedido_archivado=estado
+            )
+
+
+def aplicar_politica(nombre, lote=None, simular=False, ahora=None):
+    """Filas archivadas o purgadas por la política `nombre` (con simular=True, las que lo serían)."""
+    modelo, accion, vencidas = POLITICAS[nombre]
+    filtro = vencidas(ahora or timezone.now())
+    if filtro is None:
+        return 0
+    pendientes = modelo.objects.filter(filtro).order_by('pk')
+    if simular:
+        return pendientes.count()
+
+    lote = lote or settings.RETENCION_LOTE
+    total = 0
+    while True:
+        with transaction.atomic():
+            if accion == 'archivar':
+                objetos = list(pendientes.select_for_update()[:lote])
+                ids = [objeto.pk for objeto in objetos]
+                if ids:
+                    _archivar(nombre, objetos)
+            else:
+                ids = list(pendientes.values_list('pk', flat=True)[:lote])
+            if not ids:
+                break
+            modelo.objects.filter(pk__in=ids).delete()
+        total += len(ids)
+        if len(ids) < lote:
+            break
+    return total
+
+
+def aplicar_retencion(politicas=None, lote=None, simular=False):
+    """{política: filas} de las políticas pedidas (todas por defecto)."""
+    ahora = timezone.now()
+    return {nombre: aplicar_politica(nombre, lote, simular, ahora) for nombre in politicas or POLITICAS}
+
+
+# Archivos huérfanos
+
+def referencias_medios():
+    """Rutas (relativas a MEDIA_ROOT) que guarda algún FileField de la base de datos."""
+    referencias = set()
+    for modelo in apps.get_models():
+        campos = [campo.attname for campo in modelo._meta.concrete_fields if isinstance(campo, models.FileField)]
+        if not campos:
+            continue
+        filas = modelo._default_manager.order_by().values_list(*campos).iterator(chunk_size=2000)
+        for fila in filas:
+            referencias.update(valor for valor in fila if valor)
+    return referencias
+
+
+def archivos_huerfanos(gracia_horas=None):
+    """(ruta relativa, bytes) de los archivos de MEDIA_ROOT que ninguna fila usa."""
+    if gracia_horas is None:
+        gracia_horas = settings.MEDIOS_GC_GRACIA_HORAS
+    raiz = Path(settings.MEDIA_ROOT)
+    limite = time.time() - gracia_horas * 3600
+    referencias = referencias_medios()
+    for carpeta, _, archivos in os.walk(raiz):
+        for nombre in archivos:
+            if nombre.startswith('.'):
+                continue
+            ruta = Path(carpeta) / nombre
+            relativa = ruta.relative_to(raiz).as_posix()
+            if relativa in referencias:
+                continue
+            estado = ruta.stat()
+            if estado.st_mtime > limite:
+                continue
+            yield relativa, estado.st_size
+
+
+def recolectar_medios(borrar=False, gracia_horas=None):
+    """Resumen de los archivos huérfanos (total y por carpeta); con borrar=True los elimina."""
+    resumen = {'archivos': 0, 'bytes': 0, 'borrados': 0, 'por_carpeta': {}}
+    raiz = Path(settings.MEDIA_ROOT)
+    for relativa, tamano in archivos_huerfanos(gracia_horas):
+        resumen['archivos'] += 1
+        resumen['bytes'] += tamano
+        carpeta = resumen['por_carpeta'].setdefault(relativa.rpartition('/')[0], {'archivos': 0, 'bytes': 0})
+        carpeta['archivos'] += 1
+        carpeta['bytes'] += tamano
+        if borrar:
+            try:
+                (raiz / relativa).unlink()
+                resumen['borrados'] += 1
+            except OSError as e:
+                print(f"No se pudo borrar {relativa}: {str(e)}")
+    return resumen
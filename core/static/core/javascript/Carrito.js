@@ -35,3 +35,15 @@ window.addEventListener('storage', function(e) {
         updateCartBadgeGlobal();
     }
 });
+
+// URL de la API de disponibilidad en lote para una lista de productos [{tipo, id}, ...]
+function urlDisponibilidad(items) {
+    const parametro = items.map(item => `${item.tipo}:${item.id}`).join(',');
+    return `/api/productos/disponibilidad/?items=${encodeURIComponent(parametro)}`;
+}
+
+// Disponibilidad de un producto dentro de la respuesta en lote
+function disponibilidadDe(data, tipo, id) {
+    const productos = (data && data.productos) || {};
+    return productos[`${tipo}:${id}`] || { cantidad_disponible: 0, error: data && data.error };
+}
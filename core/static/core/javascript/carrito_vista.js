@@ -0,0 +1,568 @@
+// Usuario del carrito: atributo data-usuario de la etiqueta <script> (core/carrito.html)
+const usuarioCarrito = document.currentScript.dataset.usuario || 'guest';
+
+// Función para obtener la clave del carrito única por usuario
+function getCarritoKey() {
+    const username = usuarioCarrito;
+    return `carrito_${username}`;
+}
+
+// Obtener elementos del DOM
+const cartContainer = document.getElementById('cart-container');
+const emptyCartMessage = document.getElementById('empty-cart-message');
+const checkoutSection = document.getElementById('checkout-section');
+const checkoutButton = document.getElementById('checkout-button');
+const clearCartButton = document.getElementById('clear-cart-button');
+
+// Función para obtener el carrito de sessionStorage
+function getCart() {
+    return JSON.parse(sessionStorage.getItem(getCarritoKey()) || '[]');
+}
+
+// Función para guardar el carrito en sessionStorage
+function saveCart(cart) {
+    sessionStorage.setItem(getCarritoKey(), JSON.stringify(cart));
+}
+
+// Función para calcular el total del carrito
+function calculateTotal(cart) {
+    return cart.reduce((total, item) => total + (item.precio * item.cantidad), 0);
+}
+
+// Función para cambiar la cantidad de un producto
+async function changeQuantity(index, delta) {
+    let cart = getCart();
+    cart[index].cantidad += delta;
+    
+    if (cart[index].cantidad <= 0) {
+        removeFromCart(index);
+        return;
+    }
+    
+    saveCart(cart);
+    
+    // Sincronizar con el backend
+    try {
+        await fetch('/api/carrito/sincronizar/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(cart)
+        });
+    } catch (error) {
+        console.error('Error al sincronizar carrito:', error);
+    }
+    
+    renderCart();
+}
+
+// Disponibilidad de los productos del carrito, consultada en una sola petición
+let disponibilidadCarrito = {};
+
+async function verificarDisponibilidadCarrito() {
+    const cart = getCart();
+    if (cart.length === 0) {
+        return;
+    }
+    try {
+        const response = await fetch(urlDisponibilidad(cart));
+        if (!response.ok) {
+            return;
+        }
+        disponibilidadCarrito = (await response.json()).productos || {};
+        renderCart();
+    } catch (error) {
+        console.error('Error al verificar disponibilidad del carrito:', error);
+    }
+}
+
+// Botones +/- del carrito: no permitir superar la disponibilidad conocida
+function updateQuantity(index, delta) {
+    const item = getCart()[index];
+    const disponible = disponibilidadCarrito[`${item.tipo}:${item.id}`];
+    if (delta > 0 && disponible && item.cantidad + delta > disponible.cantidad_disponible) {
+        alert(`Solo hay ${disponible.cantidad_disponible} unidades disponibles de ${item.nombre}.`);
+        return;
+    }
+    changeQuantity(index, delta);
+}
+
+// Función para eliminar un producto del carrito
+async function removeFromCart(index) {
+    let cart = getCart();
+    cart.splice(index, 1);
+    saveCart(cart);
+    
+    // Sincronizar con el backend
+    try {
+        await fetch('/api/carrito/sincronizar/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(cart)
+        });
+    } catch (error) {
+        console.error('Error al sincronizar carrito:', error);
+    }
+    
+    renderCart();
+}
+
+// Función para vaciar el carrito
+async function clearCart() {
+    if (confirm('¿Estás seguro de que deseas vaciar el carrito?')) {
+        sessionStorage.removeItem(getCarritoKey());
+        
+        // Limpiar carrito en el backend
+        try {
+            await fetch('/api/carrito/limpiar/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                }
+            });
+        } catch (error) {
+            console.error('Error al limpiar carrito en el servidor:', error);
+        }
+        
+        renderCart();
+    }
+}
+
+// Función para renderizar el carrito
+function renderCart() {
+    const cart = getCart();
+    cartContainer.innerHTML = '';
+
+    if (cart.length === 0) {
+        emptyCartMessage.style.display = 'block';
+        checkoutSection.style.display = 'none';
+        return;
+    }
+
+    emptyCartMessage.style.display = 'none';
+    checkoutSection.style.display = 'block';
+
+    cart.forEach((item, index) => {
+        const subtotal = item.precio * item.cantidad;
+        const disponible = disponibilidadCarrito[`${item.tipo}:${item.id}`];
+        const avisoStock = disponible && item.cantidad > disponible.cantidad_disponible
+            ? `<p class="cart-item-aviso">Solo quedan ${disponible.cantidad_disponible} unidades disponibles</p>`
+            : '';
+        
+        const cartItem = document.createElement('div');
+        cartItem.className = 'cart-item';
+        cartItem.innerHTML = `
+            <img src="${item.imagen}" alt="${item.nombre}" class="cart-item-image">
+            <div class="cart-item-details">
+                <h3 class="cart-item-name">${item.nombre}</h3>
+                <p class="cart-item-description">${item.descripcion || 'Sin descripción'}</p>
+                <p class="cart-item-price">Precio unitario: $${item.precio.toFixed(2)}</p>
+                ${avisoStock}
+            </div>
+            <div class="cart-item-actions">
+                <div class="cart-quantity-controls">
+                    <button class="cart-quantity-btn" onclick="updateQuantity(${index}, -1)">-</button>
+                    <span class="cart-quantity-display">${item.cantidad}</span>
+                    <button class="cart-quantity-btn" onclick="updateQuantity(${index}, 1)">+</button>
+                </div>
+                <p class="cart-item-subtotal">Subtotal: <span>$${subtotal.toFixed(2)}</span></p>
+                <button class="cart-remove-btn" onclick="removeFromCart(${index})">
+                    Eliminar
+                </button>
+            </div>
+        `;
+        
+        cartContainer.appendChild(cartItem);
+    });
+
+    // Actualizar resumen del carrito
+    const total = calculateTotal(cart);
+    document.getElementById('cart-subtotal').textContent = `$${total.toFixed(2)}`;
+    document.getElementById('cart-total').textContent = `$${total.toFixed(2)}`;
+}
+
+// Event listener para el botón de pago - abrir modal
+checkoutButton.addEventListener('click', () => {
+    const cart = getCart();
+    if (cart.length === 0) {
+        alert('Tu carrito está vacío');
+        return;
+    }
+    
+    // Abrir modal de pago
+    openPaymentModal();
+});
+
+// Event listener para vaciar el carrito
+clearCartButton.addEventListener('click', clearCart);
+
+// ============================================
+// FUNCIONALIDAD DEL MODAL DE PAGO
+// ============================================
+
+const paymentModal = document.getElementById('payment-modal');
+const paymentClose = document.querySelector('.payment-close');
+const paymentOptionButtons = document.querySelectorAll('.payment-option-btn');
+const confirmPaymentBtn = document.getElementById('confirm-payment-btn');
+const qrDisplays = document.querySelectorAll('.qr-display');
+const customerDataSection = document.getElementById('customer-data-section');
+const uploadSection = document.getElementById('upload-section');
+const uploadBtn = document.getElementById('upload-btn');
+const comprobanteInput = document.getElementById('comprobante-input');
+const previewArea = document.getElementById('preview-area');
+const previewImage = document.getElementById('preview-image');
+const removeImageBtn = document.getElementById('remove-image-btn');
+
+// Campos del formulario
+const nombreCompletoInput = document.getElementById('nombre-completo');
+const cedulaInput = document.getElementById('cedula');
+const emailInput = document.getElementById('email');
+const telefonoInput = document.getElementById('telefono');
+const direccionInput = document.getElementById('direccion');
+
+let selectedPaymentMethod = null;
+let comprobanteFile = null;
+// Clave del intento de pago: se repite en los reintentos para que el servidor no registre dos pagos
+let clavePago = null;
+let enviandoPago = false;
+
+function nuevaClavePago() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+}
+
+// Abrir modal de pago
+function openPaymentModal() {
+    paymentModal.style.display = 'block';
+    document.body.style.overflow = 'hidden'; // Prevenir scroll del body
+    document.body.classList.add('modal-open'); // Clase para ocultar botones flotantes
+}
+
+// Cerrar modal de pago
+function closePaymentModal() {
+    paymentModal.style.display = 'none';
+    document.body.style.overflow = 'auto';
+    document.body.classList.remove('modal-open'); // Remover clase
+    // Resetear selecciones
+    paymentOptionButtons.forEach(btn => btn.classList.remove('active'));
+    qrDisplays.forEach(display => display.classList.remove('active'));
+    customerDataSection.style.display = 'none';
+    uploadSection.style.display = 'none';
+    previewArea.style.display = 'none';
+    confirmPaymentBtn.disabled = true;
+    selectedPaymentMethod = null;
+    comprobanteFile = null;
+    clavePago = null;
+    comprobanteInput.value = '';
+    // Limpiar campos del formulario
+    nombreCompletoInput.value = '';
+    cedulaInput.value = '';
+    telefonoInput.value = '';
+    direccionInput.value = '';
+    document.getElementById('nombre-error').textContent = '';
+    document.getElementById('cedula-error').textContent = '';
+    document.getElementById('telefono-error').textContent = '';
+    document.getElementById('direccion-error').textContent = '';
+}
+
+// Cerrar modal al hacer clic en X
+paymentClose.addEventListener('click', closePaymentModal);
+
+// Cerrar modal al hacer clic fuera del contenido
+window.addEventListener('click', function(event) {
+    if (event.target === paymentModal) {
+        closePaymentModal();
+    }
+});
+
+// Manejar selección de método de pago
+paymentOptionButtons.forEach(button => {
+    button.addEventListener('click', function() {
+        const paymentType = this.getAttribute('data-payment');
+        selectedPaymentMethod = paymentType;
+        
+        // Remover clase active de todos los botones y QR displays
+        paymentOptionButtons.forEach(btn => btn.classList.remove('active'));
+        qrDisplays.forEach(display => display.classList.remove('active'));
+        
+        // Activar el botón seleccionado
+        this.classList.add('active');
+        
+        // Mostrar el QR correspondiente
+        const qrDisplay = document.getElementById('qr-' + paymentType);
+        if (qrDisplay) {
+            qrDisplay.classList.add('active');
+        }
+        
+        // Mostrar sección de datos del cliente
+        customerDataSection.style.display = 'block';
+        
+        // Mostrar sección de carga de comprobante
+        uploadSection.style.display = 'block';
+        
+        // Verificar si se debe habilitar el botón de confirmación
+        checkConfirmButtonState();
+    });
+});
+
+// Manejar clic en botón de cargar
+uploadBtn.addEventListener('click', function() {
+    comprobanteInput.click();
+});
+
+// Manejar cambio de archivo
+comprobanteInput.addEventListener('change', function(e) {
+    const file = e.target.files[0];
+    if (file && file.type.startsWith('image/')) {
+        comprobanteFile = file;
+        
+        // Mostrar vista previa
+        const reader = new FileReader();
+        reader.onload = function(e) {
+            previewImage.src = e.target.result;
+            previewArea.style.display = 'block';
+            uploadBtn.style.display = 'none';
+            checkConfirmButtonState();
+        };
+        reader.readAsDataURL(file);
+    } else {
+        alert('Por favor, selecciona una imagen válida');
+    }
+});
+
+// Manejar eliminación de imagen
+removeImageBtn.addEventListener('click', function() {
+    comprobanteFile = null;
+    comprobanteInput.value = '';
+    previewArea.style.display = 'none';
+    uploadBtn.style.display = 'inline-block';
+    checkConfirmButtonState();
+});
+
+// Verificar estado del botón de confirmación
+function checkConfirmButtonState() {
+    const nombreCompleto = nombreCompletoInput.value.trim();
+    const cedula = cedulaInput.value.trim();
+    const telefono = telefonoInput.value.trim();
+    const direccion = direccionInput.value.trim();
+    
+    if (selectedPaymentMethod && comprobanteFile && nombreCompleto && cedula && telefono && direccion) {
+        confirmPaymentBtn.disabled = false;
+    } else {
+        confirmPaymentBtn.disabled = true;
+    }
+}
+
+// Validar campos en tiempo real
+nombreCompletoInput.addEventListener('input', function() {
+    const value = this.value.trim();
+    const errorElement = document.getElementById('nombre-error');
+    
+    if (value.length < 3) {
+        errorElement.textContent = 'El nombre debe tener al menos 3 caracteres';
+    } else {
+        errorElement.textContent = '';
+    }
+    checkConfirmButtonState();
+});
+
+cedulaInput.addEventListener('input', function() {
+    const value = this.value.trim();
+    const errorElement = document.getElementById('cedula-error');
+    
+    // Validar que solo contenga números
+    if (!/^\d*$/.test(value)) {
+        this.value = value.replace(/\D/g, '');
+    }
+    
+    if (value.length < 6 || value.length > 20) {
+        errorElement.textContent = 'La cédula debe tener entre 6 y 20 dígitos';
+    } else if (!/^\d+$/.test(value)) {
+        errorElement.textContent = 'La cédula debe contener solo números';
+    } else {
+        errorElement.textContent = '';
+    }
+    checkConfirmButtonState();
+});
+
+telefonoInput.addEventListener('input', function() {
+    const value = this.value.trim();
+    const errorElement = document.getElementById('telefono-error');
+    
+    // Validar que solo contenga números
+    if (!/^\d*$/.test(value)) {
+        this.value = value.replace(/\D/g, '');
+    }
+    
+    if (value.length < 7 || value.length > 15) {
+        errorElement.textContent = 'El teléfono debe tener entre 7 y 15 dígitos';
+    } else if (!/^\d+$/.test(value)) {
+        errorElement.textContent = 'El teléfono debe contener solo números';
+    } else {
+        errorElement.textContent = '';
+    }
+    checkConfirmButtonState();
+});
+
+direccionInput.addEventListener('input', function() {
+    const value = this.value.trim();
+    const errorElement = document.getElementById('direccion-error');
+    
+    if (value.length < 10) {
+        errorElement.textContent = 'La dirección debe tener al menos 10 caracteres';
+    } else {
+        errorElement.textContent = '';
+    }
+    checkConfirmButtonState();
+});
+
+// Confirmar pago realizado
+confirmPaymentBtn.addEventListener('click', function() {
+    if (!comprobanteFile) {
+        alert('Por favor, carga el comprobante de pago antes de confirmar');
+        return;
+    }
+    
+    // Validar campos del formulario
+    const nombreCompleto = nombreCompletoInput.value.trim();
+    const cedula = cedulaInput.value.trim();
+    const telefono = telefonoInput.value.trim();
+    const direccion = direccionInput.value.trim();
+    
+    if (!nombreCompleto || nombreCompleto.length < 3) {
+        alert('Por favor, ingresa tu nombre completo');
+        nombreCompletoInput.focus();
+        return;
+    }
+    
+    if (!cedula || cedula.length < 6 || cedula.length > 20 || !/^\d+$/.test(cedula)) {
+        alert('Por favor, ingresa una cédula válida (solo números, entre 6 y 20 dígitos)');
+        cedulaInput.focus();
+        return;
+    }
+    
+    if (!telefono || telefono.length < 7 || telefono.length > 15 || !/^\d+$/.test(telefono)) {
+        alert('Por favor, ingresa un teléfono válido (solo números, entre 7 y 15 dígitos)');
+        telefonoInput.focus();
+        return;
+    }
+    
+    if (!direccion || direccion.length < 10) {
+        alert('Por favor, ingresa una dirección válida (mínimo 10 caracteres)');
+        direccionInput.focus();
+        return;
+    }
+
+    if (confirm('¿Confirmas que has realizado el pago y los datos son correctos?')) {
+        // Enviar el pago al servidor
+        enviarPago();
+    }
+});
+
+// Función para enviar el pago al servidor
+function enviarPago() {
+    if (enviandoPago) {
+        return; // El envío anterior sigue en curso
+    }
+    if (!clavePago) {
+        clavePago = nuevaClavePago();
+    }
+    enviandoPago = true;
+    confirmPaymentBtn.disabled = true;
+
+    const cart = getCart();
+    const total = calculateTotal(cart);
+    
+    const formData = new FormData();
+    formData.append('nombre_completo', nombreCompletoInput.value.trim());
+    formData.append('cedula', cedulaInput.value.trim());
+    formData.append('email', emailInput.value);
+    formData.append('telefono', telefonoInput.value.trim());
+    formData.append('direccion', direccionInput.value.trim());
+    formData.append('metodo_pago', selectedPaymentMethod);
+    formData.append('monto_total', total.toFixed(2));
+    formData.append('comprobante', comprobanteFile);
+    formData.append('productos', JSON.stringify(cart));
+    
+    // Obtener el token CSRF
+    const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    
+    fetch('/procesar-pago/', {
+        method: 'POST',
+        headers: {
+            'X-CSRFToken': csrftoken,
+            'Idempotency-Key': clavePago,
+        },
+        body: formData
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            clavePago = null;
+            // Vaciar el carrito
+            sessionStorage.removeItem(getCarritoKey());
+            
+            // Limpiar carrito en el backend
+            fetch('/api/carrito/limpiar/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                }
+            }).catch(error => console.error('Error al limpiar carrito:', error));
+            
+            renderCart();
+            updateCartBadge();
+            
+            // Cerrar modal
+            closePaymentModal();
+            
+            // Mostrar mensaje de éxito
+            alert('¡Gracias por tu compra! Tu pago está siendo verificado y recibirás confirmación pronto.');
+        } else if (data.en_proceso) {
+            alert(data.error);
+        } else {
+            alert('Error al procesar el pago: ' + data.error);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        alert('Ocurrió un error al procesar tu pago. Por favor, intenta de nuevo.');
+    })
+    .finally(() => {
+        enviandoPago = false;
+        checkConfirmButtonState();
+    });
+}
+
+// Cerrar modal con tecla ESC
+document.addEventListener('keydown', function(event) {
+    if (event.key === 'Escape' && paymentModal.style.display === 'block') {
+        closePaymentModal();
+    }
+});
+
+// Cargar el carrito al iniciar la página
+document.addEventListener('DOMContentLoaded', () => {
+    renderCart();
+    updateCartBadge();
+    verificarDisponibilidadCarrito();
+});
+
+// Función para actualizar el badge del carrito en el menú
+function updateCartBadge() {
+    const cart = getCart();
+    const badge = document.getElementById('cart-count-badge');
+    const totalItems = cart.reduce((sum, item) => sum + item.cantidad, 0);
+    
+    if (totalItems > 0) {
+        badge.textContent = totalItems;
+        badge.style.display = 'flex';
+    } else {
+        badge.style.display = 'none';
+    }
+}
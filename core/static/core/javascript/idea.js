@@ -0,0 +1,246 @@
+  function aplicarFiltros() {
+        const categoria = document.getElementById('categoria').value;
+        console.log('Aplicando filtros y redirigiendo...');
+        console.log('Categoría seleccionada:', categoria);
+
+        if (categoria) {
+            const urlRedireccion = '/' + categoria + '/';
+            
+            console.log('Redirigiendo a:', urlRedireccion);
+            window.location.href = urlRedireccion;
+        } else {
+            window.location.href = '/productos/'; 
+        }
+    }
+
+  // Función para responder a la empresa
+  function responderEmpresa(ideaId) {
+    const respuesta = prompt('Escribe tu respuesta a la empresa:');
+    if (respuesta && respuesta.trim()) {
+      const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+      const formData = new FormData();
+      formData.append('respuesta', respuesta.trim());
+      
+      fetch(`/idea/responder/${ideaId}/`, {
+        method: 'POST',
+        headers: {
+          'X-CSRFToken': csrftoken,
+        },
+        body: formData
+      })
+      .then(response => response.json())
+      .then(data => {
+        if (data.success) {
+          alert(data.mensaje);
+          location.reload();
+        } else {
+          alert('Error: ' + data.error);
+        }
+      })
+      .catch(error => {
+        console.error('Error:', error);
+        alert('Error al enviar la respuesta');
+      });
+    }
+  }
+
+  // Función para otorgar permiso de publicación
+  function otorgarPermiso(ideaId) {
+    if (confirm('¿Estás seguro de que deseas otorgar permiso a la empresa para publicar tu idea como producto en la tienda?')) {
+      const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+      
+      fetch(`/idea/otorgar-permiso/${ideaId}/`, {
+        method: 'POST',
+        headers: {
+          'X-CSRFToken': csrftoken,
+        }
+      })
+      .then(response => response.json())
+      .then(data => {
+        if (data.success) {
+          alert(data.mensaje);
+          location.reload();
+        } else {
+          alert('Error: ' + data.error);
+        }
+      })
+      .catch(error => {
+        console.error('Error:', error);
+        alert('Error al otorgar el permiso');
+      });
+    }
+  }
+
+  // Función para revocar permiso de publicación
+  function revocarPermiso(ideaId) {
+    if (confirm('¿Estás seguro de que deseas revocar el permiso de publicación?')) {
+      const csrftoken = document.querySelector('[name=csrfmiddlewaretoken]').value;
+      
+      fetch(`/idea/revocar-permiso/${ideaId}/`, {
+        method: 'POST',
+        headers: {
+          'X-CSRFToken': csrftoken,
+        }
+      })
+      .then(response => response.json())
+      .then(data => {
+        if (data.success) {
+          alert(data.mensaje);
+          location.reload();
+        } else {
+          alert('Error: ' + data.error);
+        }
+      })
+      .catch(error => {
+        console.error('Error:', error);
+        alert('Error al revocar el permiso');
+      });
+    }
+  }
+
+// Medidas y recomendaciones por categoría
+const CATEGORIA_MEDIDAS = {
+  mesas: {
+    campos: [
+      {nombre: 'Altura de la Superficie', campo: 'altura_superficie', unidad: 'cm', estandar: '73 - 75'},
+      {nombre: 'Profundidad de Escritorio (Min.)', campo: 'profundidad_escritorio', unidad: 'cm', estandar: '60'},
+      {nombre: 'Espacio Libre para Piernas (Altura)', campo: 'espacio_piernas', unidad: 'cm', estandar: '65 (mínimo)'},
+      {nombre: 'Ancho por Persona (Comedor)', campo: 'ancho_persona', unidad: 'cm', estandar: '60 (mínimo)'}
+    ],
+    recomendacion: 'La altura es crucial para la ergonomía; la diferencia ideal entre la mesa y el asiento de la silla es de <b>30 cm</b>.'
+  },
+  sillas: {
+    campos: [
+      {nombre: 'Altura del Asiento', campo: 'altura_asiento', unidad: 'cm', estandar: '40 - 45'},
+      {nombre: 'Profundidad del Asiento', campo: 'profundidad_asiento', unidad: 'cm', estandar: '42 - 49'},
+      {nombre: 'Ancho del Asiento (Min.)', campo: 'ancho_asiento', unidad: 'cm', estandar: '42'}
+    ],
+    recomendacion: 'La altura del asiento debe permitir que los pies toquen el suelo y las rodillas formen un ángulo de 90°. Debe haber soporte lumbar.'
+  },
+  armarios: {
+    campos: [
+      {nombre: 'Profundidad Total (Ropa Colgada)', campo: 'profundidad_total', unidad: 'cm', estandar: '55 - 60'},
+      {nombre: 'Altura Libre para Ropa Corta', campo: 'altura_ropa_corta', unidad: 'cm', estandar: '90 - 110'},
+      {nombre: 'Altura Libre para Ropa Larga', campo: 'altura_ropa_larga', unidad: 'cm', estandar: '150 - 170'},
+      {nombre: 'Altura de Estantes (Separación)', campo: 'altura_estantes', unidad: 'cm', estandar: '30 - 40'}
+    ],
+    recomendacion: 'La profundidad de 60 cm es la necesaria para que una percha cuelgue sin que la ropa choque contra la puerta.'
+  },
+  cajoneras: {
+    campos: [
+      {nombre: 'Profundidad Total', campo: 'profundidad_total', unidad: 'cm', estandar: '40 - 60'},
+      {nombre: 'Altura Frontal de Cajón Chico', campo: 'altura_cajon_chico', unidad: 'cm', estandar: '10 - 15'},
+      {nombre: 'Altura Frontal de Cajón Grande', campo: 'altura_cajon_grande', unidad: 'cm', estandar: '20 - 30'}
+    ],
+    recomendacion: 'Se requiere una buena calidad de <b>correderas</b> que soporten la carga y permitan la extracción completa del cajón.'
+  },
+  escritorios: {
+    campos: [
+      {nombre: 'Altura de la Superficie', campo: 'altura_superficie', unidad: 'cm', estandar: '70 - 75'},
+      {nombre: 'Profundidad', campo: 'profundidad', unidad: 'cm', estandar: '60 - 80'},
+      {nombre: 'Ancho (Mínimo)', campo: 'ancho', unidad: 'cm', estandar: '100 - 120'}
+    ],
+    recomendacion: 'Debe proporcionar suficiente profundidad para mantener la pantalla a una distancia cómoda y tener espacio para apoyar los antebrazos.'
+  },
+  utensilios: {
+    campos: [],
+    recomendacion: ''
+  }
+};
+
+const categoriaSelect = document.getElementById('id_categoria');
+const medidasSection = document.getElementById('medidas-section');
+const medidasCampos = document.getElementById('medidas-campos');
+const medidasRecomendacion = document.getElementById('medidas-recomendacion');
+const medidasInput = document.getElementById('id_medidas');
+const medidasError = document.getElementById('medidas-error');
+
+function renderMedidasCampos(categoria) {
+  medidasCampos.innerHTML = '';
+  medidasError.style.display = 'none';
+  if (!categoria || !CATEGORIA_MEDIDAS[categoria] || CATEGORIA_MEDIDAS[categoria].campos.length === 0) {
+    medidasSection.style.display = 'none';
+    medidasInput.value = '';
+    medidasRecomendacion.innerHTML = '';
+    return;
+  }
+  medidasSection.style.display = 'block';
+  CATEGORIA_MEDIDAS[categoria].campos.forEach(function(campo) {
+    const div = document.createElement('div');
+    div.className = 'medida-campo';
+    div.style.display = 'flex';
+    div.style.flexDirection = 'column';
+    div.style.alignItems = 'center';
+    div.style.marginBottom = '12px';
+    div.innerHTML = `<label style='margin-bottom:4px;'><b>${campo.nombre}</b> <span style='color:#888;'>(Estandar: ${campo.estandar} ${campo.unidad})</span></label><input type='number' min='0' step='any' class='input-medida' name='${campo.campo}' placeholder='Tu medida en ${campo.unidad}' required style='margin-bottom:8px; text-align:center; width: 220px;'> <span>${campo.unidad}</span>`;
+    medidasCampos.appendChild(div);
+  });
+  medidasRecomendacion.innerHTML = `<div class='recomendacion-box'><b>Recomendación:</b> ${CATEGORIA_MEDIDAS[categoria].recomendacion}</div>`;
+}
+
+categoriaSelect.addEventListener('change', function() {
+  renderMedidasCampos(this.value);
+});
+
+// Validación antes de enviar
+const ideaForm = document.getElementById('ideaForm');
+ideaForm.addEventListener('submit', function(e) {
+  const categoria = categoriaSelect.value;
+  if (!categoria || !CATEGORIA_MEDIDAS[categoria]) return;
+  const campos = CATEGORIA_MEDIDAS[categoria].campos;
+  let medidas = {};
+  let incompletos = [];
+  campos.forEach(function(campo) {
+    const input = ideaForm.querySelector(`[name='${campo.campo}']`);
+    if (!input || !input.value) {
+      incompletos.push(campo.nombre);
+    } else {
+      medidas[campo.campo] = input.value;
+    }
+  });
+  if (incompletos.length > 0) {
+    e.preventDefault();
+    medidasError.innerText = 'Termina de adjuntar las medidas necesarias para poder publicar tu idea.';
+    medidasError.style.display = 'block';
+    return false;
+  }
+  medidasInput.value = JSON.stringify(medidas);
+  medidasError.style.display = 'none';
+});
+// Render inicial si hay valor
+if (categoriaSelect.value) renderMedidasCampos(categoriaSelect.value);
+
+// Event listener para los botones de editar
+document.addEventListener('DOMContentLoaded', function() {
+  console.log('DOM Cargado - Buscando botones de editar');
+  const botonesEditar = document.querySelectorAll('.btn-editar-idea');
+  console.log('Botones encontrados:', botonesEditar.length);
+  
+  botonesEditar.forEach(function(boton) {
+    boton.addEventListener('click', function(e) {
+      e.preventDefault();
+      console.log('Botón clickeado');
+      
+      const ideaId = this.getAttribute('data-id');
+      const titulo = this.getAttribute('data-titulo');
+      const descripcion = this.getAttribute('data-descripcion');
+      const categoria = this.getAttribute('data-categoria');
+      const medidasStr = this.getAttribute('data-medidas');
+      const vecesEditada = parseInt(this.getAttribute('data-veces') || '0');
+      const imagenUrl = this.getAttribute('data-imagen');
+      
+      console.log('Datos:', {ideaId, titulo, categoria, vecesEditada});
+      
+      let medidas = null;
+      if (medidasStr && medidasStr !== 'null' && medidasStr !== 'None') {
+        try {
+          medidas = JSON.parse(medidasStr);
+        } catch(err) {
+          console.error('Error parseando medidas:', err);
+        }
+      }
+      
+      abrirModalEditar(ideaId, titulo, descripcion, categoria, medidas, vecesEditada, imagenUrl);
+    });
+  });
+});
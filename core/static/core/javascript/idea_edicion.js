@@ -0,0 +1,202 @@
+function abrirModalEditar(ideaId, titulo, descripcion, categoria, medidas, vecesEditada, imagenUrl) {
+  console.log('abrirModalEditar llamada con:', {ideaId, titulo, categoria, vecesEditada, medidas});
+  console.log('Tipo de medidas:', typeof medidas, 'Valor:', medidas);
+  
+  // Validar límite de ediciones
+  if (vecesEditada >= 3) {
+    alert('Has alcanzado el límite de 3 ediciones para esta idea.');
+    return;
+  }
+  
+  document.getElementById('editIdeaId').value = ideaId;
+  document.getElementById('editTitulo').value = titulo;
+  document.getElementById('editDescripcion').value = descripcion;
+  document.getElementById('editCategoria').value = categoria;
+  document.getElementById('editVecesEditada').value = vecesEditada;
+  
+  // Guardar las medidas en un atributo data para usarlas al cambiar de categoría
+  const medidasStr = typeof medidas === 'object' ? JSON.stringify(medidas) : medidas;
+  document.getElementById('editIdeaId').dataset.medidas = medidasStr;
+  console.log('Medidas guardadas en dataset:', medidasStr);
+  
+  // Mostrar contador de ediciones
+  const edicionesRestantes = 3 - vecesEditada;
+  document.getElementById('editContadorEdiciones').textContent = `(${vecesEditada}/3 ediciones - ${edicionesRestantes} restantes)`;
+  
+  // Mostrar imagen actual si existe
+  const imagenContainer = document.getElementById('imagenActualContainer');
+  const imagenPreview = document.getElementById('imagenActualPreview');
+  if (imagenUrl && imagenUrl !== '') {
+    imagenPreview.src = imagenUrl;
+    imagenContainer.style.display = 'block';
+  } else {
+    imagenContainer.style.display = 'none';
+  }
+  
+  // Renderizar medidas para la categoría CON LOS VALORES ACTUALES
+  console.log('Llamando a renderEditMedidasCampos con medidas:', medidas);
+  renderEditMedidasCampos(categoria, medidas);
+  
+  // Mostrar el modal
+  document.getElementById('modalEditarIdea').style.display = 'block';
+  console.log('Modal abierto');
+}
+
+function cerrarModalEditar() {
+  document.getElementById('modalEditarIdea').style.display = 'none';
+  document.getElementById('edit-medidas-campos').innerHTML = '';
+  document.getElementById('edit-medidas-section').style.display = 'none';
+}
+
+// Renderizar campos de medidas en el modal de edición
+function renderEditMedidasCampos(categoria, medidasActuales) {
+  const medidasCampos = document.getElementById('edit-medidas-campos');
+  const medidasSection = document.getElementById('edit-medidas-section');
+  const medidasRecomendacion = document.getElementById('edit-medidas-recomendacion');
+  
+  console.log('renderEditMedidasCampos - categoria:', categoria, 'medidas:', medidasActuales);
+  
+  medidasCampos.innerHTML = '';
+  
+  if (!categoria || !CATEGORIA_MEDIDAS[categoria] || CATEGORIA_MEDIDAS[categoria].campos.length === 0) {
+    medidasSection.style.display = 'none';
+    return;
+  }
+  
+  medidasSection.style.display = 'block';
+  
+  // Parsear medidasActuales si es string
+  let medidas = {};
+  if (medidasActuales) {
+    if (typeof medidasActuales === 'string') {
+      try {
+        medidas = JSON.parse(medidasActuales);
+      } catch(e) {
+        console.error('Error parseando medidas:', e);
+      }
+    } else if (typeof medidasActuales === 'object') {
+      medidas = medidasActuales;
+    }
+  }
+  console.log('Medidas parseadas:', medidas);
+  
+  CATEGORIA_MEDIDAS[categoria].campos.forEach(function(campo) {
+    const valorActual = medidas[campo.campo] || '';
+    console.log('Campo:', campo.campo, 'Valor actual:', valorActual);
+    
+    const div = document.createElement('div');
+    div.className = 'medida-campo';
+    div.style.marginBottom = '12px';
+    
+    const label = document.createElement('label');
+    label.style.display = 'block';
+    label.style.marginBottom = '4px';
+    label.style.fontWeight = '600';
+    label.innerHTML = `${campo.nombre} <span style='color:#888; font-weight: normal;'>(Estándar: ${campo.estandar} ${campo.unidad})</span>`;
+    
+    const inputContainer = document.createElement('div');
+    inputContainer.style.display = 'flex';
+    inputContainer.style.alignItems = 'center';
+    inputContainer.style.gap = '8px';
+    
+    const input = document.createElement('input');
+    input.type = 'number';
+    input.min = '0';
+    input.step = 'any';
+    input.className = 'edit-input-medida';
+    input.name = campo.campo;
+    input.value = valorActual;
+    input.placeholder = `Tu medida en ${campo.unidad}`;
+    input.required = true;
+    input.style.flex = '1';
+    input.style.padding = '8px';
+    input.style.border = '1px solid #ddd';
+    input.style.borderRadius = '4px';
+    input.style.fontSize = '14px';
+    
+    const unidad = document.createElement('span');
+    unidad.style.color = '#666';
+    unidad.textContent = campo.unidad;
+    
+    inputContainer.appendChild(input);
+    inputContainer.appendChild(unidad);
+    
+    div.appendChild(label);
+    div.appendChild(inputContainer);
+    medidasCampos.appendChild(div);
+  });
+  
+  medidasRecomendacion.innerHTML = `<strong>💡 Recomendación:</strong> ${CATEGORIA_MEDIDAS[categoria].recomendacion}`;
+  console.log('Medidas renderizadas correctamente');
+}
+
+// Actualizar medidas cuando cambie la categoría en el modal de edición
+document.getElementById('editCategoria').addEventListener('change', function() {
+  const medidasActualesGuardadas = document.getElementById('editIdeaId').dataset.medidas;
+  let medidas = null;
+  if (medidasActualesGuardadas && medidasActualesGuardadas !== 'null') {
+    try {
+      medidas = JSON.parse(medidasActualesGuardadas);
+    } catch(e) {
+      console.error('Error al parsear medidas guardadas:', e);
+    }
+  }
+  renderEditMedidasCampos(this.value, medidas);
+});
+
+// Cerrar modal al hacer clic fuera
+window.onclick = function(event) {
+  const modal = document.getElementById('modalEditarIdea');
+  if (event.target === modal) {
+    cerrarModalEditar();
+  }
+}
+
+// Manejar envío del formulario de edición
+document.getElementById('formEditarIdea').addEventListener('submit', function(e) {
+  e.preventDefault();
+  
+  const categoria = document.getElementById('editCategoria').value;
+  const formData = new FormData(this);
+  const ideaId = document.getElementById('editIdeaId').value;
+  
+  // Recopilar medidas si existen
+  if (CATEGORIA_MEDIDAS[categoria] && CATEGORIA_MEDIDAS[categoria].campos.length > 0) {
+    let medidas = {};
+    let incompletos = [];
+    
+    CATEGORIA_MEDIDAS[categoria].campos.forEach(function(campo) {
+      const input = document.querySelector(`.edit-input-medida[name='${campo.campo}']`);
+      if (!input || !input.value) {
+        incompletos.push(campo.nombre);
+      } else {
+        medidas[campo.campo] = input.value;
+      }
+    });
+    
+    if (incompletos.length > 0) {
+      alert('Por favor completa todas las medidas: ' + incompletos.join(', '));
+      return false;
+    }
+    
+    formData.set('medidas', JSON.stringify(medidas));
+  }
+  
+  fetch(`/editar-idea/${ideaId}/`, {
+    method: 'POST',
+    body: formData
+  })
+  .then(response => response.json())
+  .then(data => {
+    if (data.success) {
+      alert(data.mensaje);
+      location.reload();
+    } else {
+      alert('Error: ' + (data.error || 'No se pudo actualizar la idea'));
+    }
+  })
+  .catch(error => {
+    console.error('Error:', error);
+    alert('Error al actualizar la idea');
+  });
+});
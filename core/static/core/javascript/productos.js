@@ -0,0 +1,413 @@
+// Atributos data-* de la etiqueta <script> (core/productos.html)
+const configProductos = document.currentScript.dataset;
+
+  // Función para formatear números con separador de miles
+  function formatNumber(num) {
+      return Math.floor(num).toString().replace(/\B(?=(\d{3})+(?!\d))/g, ",");
+  }
+  
+  // Función para obtener la clave del carrito única por usuario
+  function getCarritoKey() {
+      const username = configProductos.usuario || 'guest';
+      return `carrito_${username}`;
+  }
+  
+  let currentProduct = {};
+
+  async function mostrarDetalles(tipo, id, nombre, descripcion, precio, imagen) {
+      console.log('Mostrando detalles:', tipo, id, nombre);
+      
+      currentProduct = {
+          tipo: tipo,
+          id: id,
+          nombre: nombre,
+          descripcion: descripcion,
+          precio: parseFloat(precio),
+          imagen: imagen,
+          cantidad_disponible: 0,
+          cantidad_restante: 0
+      };
+      
+      // Obtener cantidad disponible del servidor
+      try {
+          const url = urlDisponibilidad([{ tipo: tipo, id: id }]);
+          console.log('Fetching:', url);
+          
+          const response = await fetch(url);
+          console.log('Response status:', response.status);
+          
+          if (!response.ok) {
+              let errorMsg = `Error HTTP ${response.status}`;
+              try {
+                  const errorData = await response.json();
+                  errorMsg = errorData.error || errorMsg;
+              } catch (e) {
+                  console.error('Error parsing error response:', e);
+              }
+              alert('Error al obtener disponibilidad: ' + errorMsg);
+              return;
+          }
+          
+          const data = disponibilidadDe(await response.json(), tipo, id);
+          console.log('Data received:', data);
+          
+          currentProduct.cantidad_disponible = data.cantidad_disponible || 0;
+          
+          // Obtener cantidad ya en el carrito
+          let carrito = JSON.parse(sessionStorage.getItem(getCarritoKey()) || '[]');
+          let existente = carrito.find(item => item.tipo === tipo && item.id === id);
+          let cantidadEnCarrito = existente ? existente.cantidad : 0;
+          
+          currentProduct.cantidad_restante = currentProduct.cantidad_disponible - cantidadEnCarrito;
+          
+          if (currentProduct.cantidad_disponible === 0) {
+              alert('Este producto no está disponible en inventario.');
+              return;
+          }
+          
+          if (currentProduct.cantidad_restante <= 0) {
+              alert(`Ya tienes todas las unidades disponibles (${currentProduct.cantidad_disponible}) de este producto en tu carrito.`);
+              return;
+          }
+          
+          // Actualizar elementos del modal
+          document.getElementById('modalProductName').textContent = nombre;
+          document.getElementById('modalProductDescription').textContent = descripcion;
+          document.getElementById('modalProductPrice').textContent = formatNumber(precio);
+          document.getElementById('modalImage').src = imagen;
+          document.getElementById('quantity').value = 1;
+          document.getElementById('quantity').max = currentProduct.cantidad_restante;
+          
+          // Actualizar texto de disponibilidad
+          const dispText = document.getElementById('disponibilidadText');
+          if (cantidadEnCarrito > 0) {
+              dispText.textContent = `Disponibles: ${currentProduct.cantidad_restante} unidades (${cantidadEnCarrito} ya en tu carrito)`;
+              dispText.style.color = currentProduct.cantidad_restante < 5 ? '#ff9800' : '#28a745';
+          } else {
+              dispText.textContent = `Disponibles: ${currentProduct.cantidad_disponible} unidades`;
+              dispText.style.color = currentProduct.cantidad_disponible < 5 ? '#ff9800' : '#28a745';
+          }
+          
+          actualizarTotal();
+          document.getElementById('productModal').style.display = 'block';
+          
+      } catch (error) {
+          console.error('Error completo:', error);
+          console.error('Error stack:', error.stack);
+          alert('Error al cargar la información del producto: ' + error.message);
+      }
+  }
+  
+  function cerrarModal() {
+      document.getElementById('productModal').style.display = 'none';
+  }
+  
+  function cambiarCantidad(delta) {
+      let input = document.getElementById('quantity');
+      let newValue = parseInt(input.value) + delta;
+      let maxCantidad = currentProduct.cantidad_restante || 1;
+      
+      if (newValue < 1) {
+          return;
+      }
+      
+      if (newValue > maxCantidad) {
+          alert(`Solo puedes agregar ${maxCantidad} unidades más de este producto.`);
+          return;
+      }
+      
+      input.value = newValue;
+      actualizarTotal();
+  }
+  
+  function actualizarTotal() {
+      let cantidad = parseInt(document.getElementById('quantity').value);
+      let total = currentProduct.precio * cantidad;
+      document.getElementById('totalPrice').textContent = formatNumber(total);
+  }
+  
+  async function agregarAlCarrito() {
+      let cantidad = parseInt(document.getElementById('quantity').value);
+      
+      // Validación previa
+      if (!currentProduct.tipo || !currentProduct.id) {
+          alert('Error: Información del producto no disponible');
+          return;
+      }
+      
+      // Verificar cantidad disponible en el inventario
+      try {
+          const response = await fetch(urlDisponibilidad([{ tipo: currentProduct.tipo, id: currentProduct.id }]));
+          
+          if (!response.ok) {
+              alert('Error al verificar disponibilidad del producto. Código: ' + response.status);
+              return;
+          }
+          
+          const data = disponibilidadDe(await response.json(), currentProduct.tipo, currentProduct.id);
+          
+          // Obtener cantidad ya en el carrito
+          let carrito = JSON.parse(sessionStorage.getItem(getCarritoKey()) || '[]');
+          let existente = carrito.find(item => item.tipo === currentProduct.tipo && item.id === currentProduct.id);
+          let cantidadEnCarrito = existente ? existente.cantidad : 0;
+          let cantidadTotal = cantidadEnCarrito + cantidad;
+          
+          // Validar que no exceda el inventario
+          if (data.cantidad_disponible === 0) {
+              alert('Este producto no está disponible en inventario en este momento.');
+              return;
+          }
+          
+          if (cantidadTotal > data.cantidad_disponible) {
+              alert(`Solo hay ${data.cantidad_disponible} unidades disponibles en inventario. Ya tienes ${cantidadEnCarrito} en tu carrito.`);
+              return;
+          }
+          
+          // Agregar al carrito
+          if (existente) {
+              existente.cantidad += cantidad;
+          } else {
+              carrito.push({
+                  tipo: currentProduct.tipo,
+                  id: currentProduct.id,
+                  nombre: currentProduct.nombre,
+                  precio: currentProduct.precio,
+                  cantidad: cantidad,
+                  imagen: currentProduct.imagen,
+                  descripcion: currentProduct.descripcion
+              });
+          }
+          
+          sessionStorage.setItem(getCarritoKey(), JSON.stringify(carrito));
+          
+          // Sincronizar carrito con el backend
+          await sincronizarCarritoConBackend(carrito);
+          
+          // Actualizar el badge del carrito (tanto en menú como botón flotante)
+          updateCartBadge();
+          
+          alert('¡Producto agregado al carrito!');
+          cerrarModal();
+          
+          // Preguntar si desea ir al carrito
+          if (confirm('¿Desea ir al carrito ahora?')) {
+              window.location.href = configProductos.urlCarrito;
+          }
+      } catch (error) {
+          console.error('Error:', error);
+          alert('Error al agregar el producto al carrito');
+      }
+  }
+  
+  // Función para sincronizar carrito con el backend
+  async function sincronizarCarritoConBackend(carrito) {
+      try {
+          const response = await fetch('/api/carrito/sincronizar/', {
+              method: 'POST',
+              headers: {
+                  'Content-Type': 'application/json',
+              },
+              body: JSON.stringify(carrito)
+          });
+          
+          if (!response.ok) {
+              console.error('Error al sincronizar carrito con el servidor');
+          }
+      } catch (error) {
+          console.error('Error en sincronización:', error);
+      }
+  }
+  
+  // Función para actualizar el badge del carrito
+  function updateCartBadge() {
+      const carrito = JSON.parse(sessionStorage.getItem(getCarritoKey()) || '[]');
+      const totalItems = carrito.reduce((sum, item) => sum + item.cantidad, 0);
+      
+      // Actualizar botón flotante si existe la función global
+      if (typeof updateFloatingCartButton === 'function') {
+          updateFloatingCartButton();
+      }
+  }
+  
+  // Actualizar badge al cargar la página
+  document.addEventListener('DOMContentLoaded', function() {
+      updateCartBadge();
+      
+      // Inicializar solo los carruseles que existen en el DOM
+      const categorias = ['mesas', 'sillas', 'armarios', 'cajoneras', 'escritorios', 'utensilios'];
+      categorias.forEach(categoria => {
+          const track = document.getElementById(categoria + 'Track');
+          if (track && track.querySelectorAll('.carousel-item').length > 0) {
+              initProductosCarousel(categoria);
+          }
+      });
+  });
+  
+  // Cerrar el modal si se hace clic fuera de él
+  window.onclick = function(event) {
+      let modal = document.getElementById('productModal');
+      if (event.target == modal) {
+          cerrarModal();
+      }
+  }
+
+function aplicarFiltros() {
+      const categoria = document.getElementById('categoria').value;
+      console.log('Aplicando filtros y redirigiendo...');
+      console.log('Categoría seleccionada:', categoria);
+
+      if (categoria) {
+          const urlRedireccion = '/' + categoria + '/';
+          
+          console.log('Redirigiendo a:', urlRedireccion);
+          window.location.href = urlRedireccion;
+      } else {
+          window.location.href = '/productos/'; 
+      }
+  }
+
+  // Carruseles de Productos
+  const productosCarousels = {};
+  const PRODUCTOS_AUTOPLAY_DELAY = 1500;
+  const PRODUCTOS_RESUME_DELAY = 3000;
+
+  function initProductosCarousel(categoria) {
+      if (!productosCarousels[categoria]) {
+          productosCarousels[categoria] = {
+              currentIndex: 0,
+              autoplayInterval: null,
+              lastInteraction: Date.now(),
+              isAutoplay: false
+          };
+      }
+
+      const track = document.getElementById(categoria + 'Track');
+      if (!track) return;
+
+      const items = track.querySelectorAll('.carousel-item');
+      const indicatorsContainer = document.getElementById(categoria + 'Indicators');
+      
+      if (indicatorsContainer && indicatorsContainer.children.length === 0) {
+          // Calcular cuántos "grupos" de items hay según el viewport
+          const itemsPerView = window.innerWidth < 768 ? 1 : window.innerWidth < 1024 ? 2 : 3;
+          const maxIndex = Math.max(0, items.length - itemsPerView);
+          
+          // Crear indicadores solo para los grupos necesarios
+          for (let i = 0; i <= maxIndex; i++) {
+              const indicator = document.createElement('span');
+              indicator.className = 'indicator';
+              indicator.onclick = () => goToProducto(categoria, i);
+              indicatorsContainer.appendChild(indicator);
+          }
+      }
+      
+      updateProductosCarousel(categoria);
+      startProductosAutoplay(categoria);
+      
+      // Event listeners para pausar en hover
+      const container = document.querySelector(`.carousel-productos-container[data-categoria="${categoria}"]`);
+      if (container) {
+          container.addEventListener('mouseenter', () => pauseProductosAutoplay(categoria));
+          container.addEventListener('mouseleave', () => scheduleProductosResume(categoria));
+          container.addEventListener('click', () => handleProductosInteraction(categoria));
+      }
+  }
+
+  function updateProductosCarousel(categoria) {
+      const track = document.getElementById(categoria + 'Track');
+      if (!track) return;
+
+      const items = track.querySelectorAll('.carousel-item');
+      const indicators = document.querySelectorAll(`#${categoria}Indicators .indicator`);
+      
+      if (items.length === 0) return;
+      
+      const carousel = productosCarousels[categoria];
+      const itemsPerView = window.innerWidth < 768 ? 1 : window.innerWidth < 1024 ? 2 : 3;
+      const maxIndex = Math.max(0, items.length - itemsPerView);
+      
+      if (carousel.currentIndex > maxIndex) {
+          carousel.currentIndex = maxIndex;
+      }
+      
+      const offset = -(carousel.currentIndex * (100 / itemsPerView));
+      track.style.transform = `translateX(${offset}%)`;
+      
+      // Actualizar indicadores
+      indicators.forEach((indicator, index) => {
+          indicator.classList.toggle('active', index === carousel.currentIndex);
+      });
+  }
+
+  function moveProductosCarousel(categoria, direction) {
+      const track = document.getElementById(categoria + 'Track');
+      if (!track) return;
+
+      const items = track.querySelectorAll('.carousel-item');
+      const carousel = productosCarousels[categoria];
+      const itemsPerView = window.innerWidth < 768 ? 1 : window.innerWidth < 1024 ? 2 : 3;
+      const maxIndex = Math.max(0, items.length - itemsPerView);
+      
+      carousel.currentIndex += direction;
+      
+      if (carousel.currentIndex < 0) {
+          carousel.currentIndex = maxIndex;
+      } else if (carousel.currentIndex > maxIndex) {
+          carousel.currentIndex = 0;
+      }
+      
+      updateProductosCarousel(categoria);
+      handleProductosInteraction(categoria);
+  }
+
+  function goToProducto(categoria, index) {
+      const carousel = productosCarousels[categoria];
+      carousel.currentIndex = index;
+      updateProductosCarousel(categoria);
+      handleProductosInteraction(categoria);
+  }
+
+  function startProductosAutoplay(categoria) {
+      const carousel = productosCarousels[categoria];
+      if (carousel.autoplayInterval) {
+          clearInterval(carousel.autoplayInterval);
+      }
+      carousel.isAutoplay = true;
+      carousel.autoplayInterval = setInterval(() => {
+          moveProductosCarousel(categoria, 1);
+      }, PRODUCTOS_AUTOPLAY_DELAY);
+  }
+
+  function pauseProductosAutoplay(categoria) {
+      const carousel = productosCarousels[categoria];
+      if (carousel.autoplayInterval) {
+          clearInterval(carousel.autoplayInterval);
+          carousel.autoplayInterval = null;
+      }
+      carousel.isAutoplay = false;
+  }
+
+  function handleProductosInteraction(categoria) {
+      const carousel = productosCarousels[categoria];
+      carousel.lastInteraction = Date.now();
+      pauseProductosAutoplay(categoria);
+      scheduleProductosResume(categoria);
+  }
+
+  function scheduleProductosResume(categoria) {
+      const carousel = productosCarousels[categoria];
+      setTimeout(() => {
+          const timeSinceLastInteraction = Date.now() - carousel.lastInteraction;
+          if (timeSinceLastInteraction >= PRODUCTOS_RESUME_DELAY && !carousel.isAutoplay) {
+              startProductosAutoplay(categoria);
+          }
+      }, PRODUCTOS_RESUME_DELAY);
+  }
+  
+  // Actualizar en resize
+  window.addEventListener('resize', function() {
+      const categorias = ['mesas', 'sillas', 'armarios', 'cajoneras', 'escritorios', 'utensilios'];
+      categorias.forEach(categoria => {
+          updateProductosCarousel(categoria);
+      });
+  });
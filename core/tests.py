@@ -1,3 +1,1124 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import pstats
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_save
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from Empresas.models import EmpresaRegistrada
+
+from .benchmarks import (
+    PREFIJO_CONCURRENCIA, benchmark_concurrencia_sqlite, benchmark_numeracion_facturas, comparar_con_baseline, ejecutar_benchmarks,
+)
+from .chat_espera import vigilante
+from .checks import revisar_configuracion_produccion
+from .contrasenas import migrar_contrasenas, simular_p99
+from .datos_sinteticos import PREFIJO_SINTETICO, borrar_datos, generar_datos
+from .estaticos import minificar_css, minificar_js
+from .modelos3d import ErrorModelo3D, escribir_glb, leer_malla, normalizar, procesar_modelo_3d, validar_archivo_modelo_3d
+from .instrumentacion import MAX_CONSULTAS_DETALLE, MAX_CONSULTAS_LENTAS, MedicionRequest, estadisticas_rutas
+from .limites import registrar_intento
+from .models import Mesas, Sillas, Utensilios, UserClientes, UserEmpresa, CarritoTemporal, Pago, Pedido, MensajeIdea, MensajePago, Idea, RegistroArchivado, Comentario, Factura, SolicitudPago
+from .moderacion import CLAVE_TESTIMONIOS, puntuar_spam
+from .numeracion import reservar_numeros, siguiente_numero_factura
+from .planes_consulta import escaneos_completos, generar_planes, problemas_de_planes
+from .regresion_consultas import comparar_conjuntos, problemas_de_consultas
+from .replicas import CLAVE_SESION_PEGADO, ReplicaLecturaRouter, copiar_replica_sqlite, iniciar_peticion, lectura_en_replica, terminar_peticion
+from .retencion import aplicar_retencion, recolectar_medios
+from .views_estaticos import servir_estatico
+
+
+def _consultas_de_datos(consultas):
+    """Consultas ejecutadas fuera de la tabla de sesiones."""
+    return [q['sql'] for q in consultas.captured_queries if 'django_session' not in q['sql'] and 'SAVEPOINT' not in q['sql']]
+
+
+class DisponibilidadEnLoteTests(TestCase):
+    """Pruebas de la API de disponibilidad de varios productos"""
+
+    def setUp(self):
+        cache.clear()
+        self.mesas = [Mesas.objects.create(nombre1=f'Mesa {i}', precio1=Decimal('100'), imagen1='m.png', cantidad_disponible=10) for i in range(5)]
+        self.sillas = [Sillas.objects.create(nombre2=f'Silla {i}', precio2=Decimal('50'), imagen2='s.png', cantidad_disponible=4) for i in range(5)]
+        self.utensilios = [Utensilios.objects.create(nombre6=f'Utensilio {i}', precio6=Decimal('10'), imagen6='u.png', cantidad_disponible=2) for i in range(5)]
+        self.cliente = UserClientes.objects.create(usernameCliente='comprador', passwordCliente='x')
+        otro = UserClientes.objects.create(usernameCliente='otro', passwordCliente='x')
+        CarritoTemporal.objects.create(usuario=otro, producto_tipo='mesa', producto_id=self.mesas[0].id, cantidad=3)
+        CarritoTemporal.objects.create(usuario=self.cliente, producto_tipo='mesa', producto_id=self.mesas[0].id, cantidad=2)
+        self.items = ','.join(
+            [f'mesa:{m.id}' for m in self.mesas] + [f'silla:{s.id}' for s in self.sillas] + [f'utensilio:{u.id}' for u in self.utensilios]
+        )
+
+    def test_quince_productos_en_una_consulta_por_categoria_mas_reservas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            data = self.client.get(reverse('api_disponibilidad_productos'), {'items': self.items}).json()
+        self.assertEqual(len(data['productos']), 15)
+        # 3 categorías + 1 consulta agrupada de reservas
+        self.assertEqual(len(_consultas_de_datos(consultas)), 4)
+        # Anónimo: se descuentan todas las reservas
+        self.assertEqual(data['productos'][f'mesa:{self.mesas[0].id}']['cantidad_disponible'], 5)
+        self.assertEqual(data['productos'][f'silla:{self.sillas[0].id}']['nombre'], 'Silla 0')
+
+    def test_anonimo_usa_cache_y_cliente_excluye_su_carrito(self):
+        self.client.get(reverse('api_disponibilidad_productos'), {'items': self.items})
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse('api_disponibilidad_productos'), {'items': self.items})
+        self.assertEqual(_consultas_de_datos(consultas), [])
+
+        session = self.client.session
+        session['usernameCliente'] = 'comprador'
+        session.save()
+        data = self.client.get(reverse('api_disponibilidad_productos'), {'items': f'mesa:{self.mesas[0].id}'}).json()
+        self.assertEqual(data['productos'][f'mesa:{self.mesas[0].id}']['cantidad_disponible'], 7)
+
+    def test_parametros_invalidos(self):
+        url = reverse('api_disponibilidad_productos')
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'items': 'sofa:1'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'items': 'mesa:abc'}).status_code, 400)
+
+
+class InstrumentacionTests(TestCase):
+    """Pruebas de la cabecera Server-Timing, el log de lentas y las métricas por ruta"""
+
+    def setUp(self):
+        cache.clear()
+        estadisticas_rutas.reiniciar()
+        self.url = reverse('api_disponibilidad_productos')
+
+    def test_cabecera_server_timing(self):
+        response = self.client.get(self.url, {'items': 'mesa:1'})
+        timing = response['Server-Timing']
+        for metrica in ('db;dur=', 'tpl;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metrica, timing)
+
+    def test_peticion_lenta_se_registra_con_sql(self):
+        with self.settings(INSTRUMENTACION_UMBRAL_LENTO_MS=0, INSTRUMENTACION_UMBRAL_SQL_LENTO_MS=0):
+            # El middleware lee los umbrales al construirse: se usa un cliente nuevo
+            self.client = self.client_class()
+            with self.assertLogs('gangazos.rendimiento', level='WARNING') as logs:
+                self.client.get(self.url, {'items': 'mesa:1'})
+        reporte = json.loads(logs.records[0].getMessage())
+        self.assertEqual(reporte['ruta'], 'GET api/productos/disponibilidad/')
+        self.assertGreater(reporte['consultas'], 0)
+        self.assertTrue(any(consulta['pila'] for consulta in reporte['consultas_lentas']))
+
+    def test_el_detalle_de_consultas_lentas_tiene_tope(self):
+        medicion = MedicionRequest(umbral_sql_lento_ms=0)
+        total = MAX_CONSULTAS_DETALLE + MAX_CONSULTAS_LENTAS + 30
+        for _ in range(total):
+            medicion.registrar_sql(lambda *args: None, 'SELECT 1', (), False, {})
+        self.assertEqual(len(medicion.detalle_sql), MAX_CONSULTAS_DETALLE + MAX_CONSULTAS_LENTAS)
+        reporte = medicion.reporte(RequestFactory().get('/'), 'GET /', medicion.total(), 200)
+        self.assertEqual((reporte['consultas'], reporte['consultas_lentas_omitidas']), (total, 30))
+
+    def test_metricas_por_ruta_solo_staff(self):
+        metricas = reverse('api_metricas_rutas')
+        self.assertEqual(self.client.get(metricas).status_code, 403)
+
+        for _ in range(3):
+            self.client.get(self.url, {'items': 'mesa:1'})
+        staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.client.force_login(staff)
+        data = self.client.get(metricas).json()
+        ruta = next(r for r in data['rutas'] if r['ruta'] == 'GET api/productos/disponibilidad/')
+        self.assertEqual(ruta['muestras'], 3)
+        self.assertLessEqual(ruta['p50_ms'], ruta['p99_ms'])
+
+        self.client.post(metricas)
+        # Solo queda la propia petición de reinicio
+        self.assertEqual([r['ruta'] for r in estadisticas_rutas.resumen()], ['POST api/rendimiento/rutas/'])
+
+
+class PerfiladorTests(TestCase):
+    """Pruebas del perfilado bajo demanda para staff"""
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        ajustes = self.settings(PERFILES_DIR=Path(self.directorio.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.staff = User.objects.create_user('admin', password='x', is_staff=True)
+        self.url = reverse('api_disponibilidad_productos')
+
+    def test_solo_staff_puede_perfilar(self):
+        response = self.client.get(self.url, {'items': 'mesa:1', 'perfilar': '1'})
+        self.assertNotIn('X-Perfil', response)
+        self.assertEqual(list(Path(self.directorio.name).iterdir()), [])
+
+    def test_perfil_cprofile_y_pagina_admin(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'items': 'mesa:1', 'perfilar': '1'})
+        nombre = response['X-Perfil']
+        directorio = Path(self.directorio.name)
+        self.assertGreater(pstats.Stats(str(directorio / f'{nombre}.prof')).total_calls, 0)
+        self.assertTrue((directorio / f'{nombre}.collapsed').exists())
+
+        pagina = self.client.get(reverse('admin_perfiles'))
+        self.assertContains(pagina, '/api/productos/disponibilidad/')
+        descarga = self.client.get(reverse('descargar_perfil', args=[nombre, 'collapsed']))
+        self.assertEqual(descarga.status_code, 200)
+        self.assertEqual(self.client.get(reverse('descargar_perfil', args=['..', 'prof'])).status_code, 404)
+
+    def test_muestreo_por_cabecera_sin_cprofile(self):
+        self.client.force_login(self.staff)
+        nombre = self.client.get(self.url, {'items': 'mesa:1'}, HTTP_X_PERFILAR='muestreo')['X-Perfil']
+        directorio = Path(self.directorio.name)
+        self.assertFalse((directorio / f'{nombre}.prof').exists())
+        self.assertEqual(json.loads((directorio / f'{nombre}.json').read_text())['modo'], 'muestreo')
+
+
+class BenchmarksTests(TestCase):
+    """Pruebas del generador de datos sintéticos y de la comparación con la línea base"""
+
+    def test_generar_medir_y_borrar(self):
+        creados = generar_datos(escala=0.0002, tamano_lote=50, informar=lambda texto: None)
+        self.assertEqual(UserClientes.objects.filter(usernameCliente__startswith=PREFIJO_SINTETICO).count(), creados['clientes'])
+        self.assertEqual(Pedido.objects.count(), Pago.objects.filter(estado='confirmado').count())
+        self.assertEqual(MensajePago.objects.count(), creados['mensajes_pago'])
+
+        resultados = ejecutar_benchmarks(['productos', 'mis_pedidos', 'estadisticas'], repeticiones=2, calentamiento=0)
+        self.assertEqual(set(resultados['escenarios']), {'productos', 'mis_pedidos', 'estadisticas'})
+        self.assertEqual(comparar_con_baseline(resultados, resultados), [])
+
+        borrar_datos()
+        self.assertFalse(Pago.objects.exists())
+
+    def test_regresiones_de_latencia_y_consultas(self):
+        base = {'escenarios': {'productos': {'p95_ms': 100.0, 'consultas': 6}}}
+        actual = {'escenarios': {'productos': {'p95_ms': 140.0, 'consultas': 7}}}
+        regresiones = comparar_con_baseline(actual, base, tolerancia=0.25)
+        self.assertEqual(len(regresiones), 2)
+        self.assertEqual(comparar_con_baseline(actual, base, tolerancia=0.5), ['productos: 7 consultas > 6 (base)'])
+
+    def test_concurrencia_sqlite_wal_reduce_los_bloqueos(self):
+        # Busy timeout corto para ver los "database is locked" con pocas peticiones
+        resumen = benchmark_concurrencia_sqlite(procesos=6, iteraciones=5, timeout=0.01)
+        self.assertEqual(resumen['journal']['peticiones'], 60)
+        self.assertEqual(resumen['wal']['peticiones'], 60)
+        self.assertGreater(resumen['journal']['bloqueos'], resumen['wal']['bloqueos'])
+        # Los procesos escriben en copias temporales, no en la base de datos configurada
+        self.assertFalse(UserClientes.objects.filter(usernameCliente__startswith=PREFIJO_CONCURRENCIA).exists())
+
+
+class RegresionConsultasTests(TestCase):
+    """Presupuesto de consultas de todas las rutas con datos pequeños y grandes"""
+
+    def test_presupuestos_y_crecimiento_con_los_datos(self):
+        problemas = problemas_de_consultas(comparar_conjuntos())
+        self.assertEqual(problemas, [], '\n'.join(problemas))
+
+
+class PlanesConsultaTests(TestCase):
+    """Pruebas de los planes de ejecución de las vistas más usadas"""
+
+    def test_vistas_calientes_usan_indices(self):
+        problemas = problemas_de_planes(generar_planes())
+        self.assertEqual(problemas, [], '\n'.join(problemas))
+
+    def test_detecta_recorridos_completos(self):
+        plan = ['SCAN core_pago', 'SEARCH core_pedido USING INDEX pedido_cliente_fecha_idx (cliente_id=?)', 'SCAN U0 USING COVERING INDEX x']
+        self.assertEqual(escaneos_completos(plan), ['core_pago'])
+
+
+class ConfiguracionProduccionTests(TestCase):
+    """Pruebas de la revisión de ajustes de producción"""
+
+    def _ids(self):
+        return {aviso.id for aviso in revisar_configuracion_produccion()}
+
+    def test_solo_avisa_en_produccion(self):
+        with self.settings(GANGAZOS_ENTORNO='desarrollo', DEBUG=True):
+            self.assertEqual(self._ids(), set())
+
+    def test_ajustes_de_desarrollo_en_produccion(self):
+        with self.settings(GANGAZOS_ENTORNO='produccion', DEBUG=True, SESSION_ENGINE='django.contrib.sessions.backends.db'):
+            self.assertTrue({'core.W001', 'core.W002', 'core.W005', 'core.W006', 'core.W009'} <= self._ids())
+
+    def test_produccion_bien_configurada(self):
+        postgres = {'default': {'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 600, 'OPTIONS': {}}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+        with self.settings(
+            GANGAZOS_ENTORNO='produccion', DEBUG=False, DATABASES=postgres, CACHES=redis,
+            SESSION_ENGINE='django.contrib.sessions.backends.cached_db', PERFILADOR_FRACCION_MUESTREO=0,
+            SECRET_KEY='clave-de-produccion-larga-y-aleatoria',
+        ):
+            self.assertEqual(self._ids(), set())
+
+    def test_sqlite_con_wal_no_avisa(self):
+        sqlite_wal = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': dict(settings.SQLITE_OPCIONES_ALTA_CONCURRENCIA)}}
+        with self.settings(GANGAZOS_ENTORNO='produccion', DATABASES=sqlite_wal):
+            self.assertNotIn('core.W002', self._ids())
+
+
+class ReplicaLecturaTests(TestCase):
+    """Pruebas del router de réplica y de la lectura de lo propio tras escribir"""
+
+    def setUp(self):
+        self.router = ReplicaLecturaRouter()
+
+    def _alias_lectura(self, pegado=False, escribir=False):
+        @lectura_en_replica
+        def vista(request):
+            if escribir:
+                self.router.db_for_write(Pedido)
+            return self.router.db_for_read(Pedido)
+
+        token = iniciar_peticion(pegado)
+        try:
+            return vista(None)
+        finally:
+            terminar_peticion(token)
+
+    def test_sin_replica_configurada_no_enruta(self):
+        with self.settings(REPLICA_DB_ALIAS=None):
+            self.assertIsNone(self._alias_lectura())
+
+    def test_vistas_marcadas_leen_de_la_replica(self):
+        with self.settings(REPLICA_DB_ALIAS='replica'):
+            self.assertEqual(self._alias_lectura(), 'replica')
+            # Fuera de una vista marcada se usa el primario
+            self.assertIsNone(self.router.db_for_read(Pedido))
+            # Usuario que escribió hace poco, o que escribe en esta misma petición
+            self.assertEqual(self._alias_lectura(pegado=True), 'default')
+            self.assertEqual(self._alias_lectura(escribir=True), 'default')
+            self.assertFalse(self.router.allow_migrate('replica', 'core'))
+
+    def test_escritura_deja_al_usuario_en_el_primario(self):
+        UserClientes.objects.create(usernameCliente='comprador', passwordCliente='x')
+        mesa = Mesas.objects.create(nombre1='Mesa', precio1=Decimal('100'), imagen1='m.png', cantidad_disponible=5)
+        session = self.client.session
+        session['usernameCliente'] = 'comprador'
+        session.save()
+
+        with self.settings(REPLICA_DB_ALIAS='replica', REPLICA_PEGADO_SEGUNDOS=10):
+            # Las escrituras de sesión no cuentan
+            self.client.get(reverse('productos'))
+            self.assertNotIn(CLAVE_SESION_PEGADO, self.client.session)
+
+            carrito = json.dumps([{'tipo': 'mesa', 'id': mesa.id, 'cantidad': 1}])
+            self.client.post(reverse('sincronizar_carrito'), carrito, content_type='application/json')
+            self.assertIn(CLAVE_SESION_PEGADO, self.client.session)
+
+    def test_copiar_replica_sqlite(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            origen, destino = str(Path(directorio) / 'primario.sqlite3'), str(Path(directorio) / 'replica.sqlite3')
+            with sqlite3.connect(origen) as conexion:
+                conexion.execute('CREATE TABLE t (x INTEGER)')
+                conexion.execute('INSERT INTO t VALUES (1)')
+            conexion.close()
+            copiar_replica_sqlite(origen, destino)
+            copia = sqlite3.connect(destino)
+            self.assertEqual(copia.execute('SELECT x FROM t').fetchall(), [(1,)])
+            copia.close()
+
+
+class EstaticosTests(TestCase):
+    """Pruebas del pipeline de estáticos (minificado, hash, precompresión) y de cómo se sirven"""
+
+    def test_minificar_css_respeta_cadenas(self):
+        css = 'a :hover , b > c { width : calc(100% - 10px) ; content: "x  /* y */" } /* fuera */'
+        self.assertEqual(minificar_css(css), 'a :hover,b>c{width :calc(100% - 10px);content:"x  /* y */"}')
+
+    def test_minificar_js_respeta_regex_plantillas_y_saltos(self):
+        js = "a = b / c; // comentario\nx = y++ + +z;\nif (q) return /a\\/b[/]/.test(s)\nlet t = `a ${ {k: `q${1}`}.k }  b`; /* fin */"
+        self.assertEqual(minificar_js(js), "a=b/c;\nx=y++ + +z;\nif(q)return/a\\/b[/]/.test(s)\nlet t=`a ${ {k: `q${1}`}.k }  b`;\n")
+
+    def test_collectstatic_minifica_con_hash_y_precomprime(self):
+        with tempfile.TemporaryDirectory() as destino, self.settings(
+            STATIC_ROOT=destino,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'core.estaticos.ManifestMinificadoStorage'}},
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            manifest = json.loads((Path(destino) / 'staticfiles.json').read_text())
+            nombre = manifest['paths']['core/javascript/notificaciones.js']
+            self.assertRegex(nombre, r'notificaciones\.[0-9a-f]{12}\.js$')
+            original = (settings.BASE_DIR / 'core/static/core/javascript/notificaciones.js').read_text(encoding='utf-8')
+            procesado = (Path(destino) / nombre).read_text(encoding='utf-8')
+            self.assertLess(len(procesado), len(original))
+            self.assertNotIn('// Abrir modal de notificaciones', procesado)
+            self.assertTrue((Path(destino) / f'{nombre}.gz').exists())
+
+    def test_servir_estatico_precomprimido_con_cache_larga(self):
+        with tempfile.TemporaryDirectory() as destino, self.settings(STATIC_ROOT=destino):
+            (Path(destino) / 'app.0123456789ab.js').write_text('console.log(1);')
+            (Path(destino) / 'app.0123456789ab.js.gz').write_bytes(b'gz')
+            (Path(destino) / 'app.js').write_text('console.log(1);')
+            factory = RequestFactory()
+
+            response = servir_estatico(factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate'), 'app.0123456789ab.js')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(b''.join(response.streaming_content), b'gz')
+
+            response = servir_estatico(factory.get('/'), 'app.js')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+
+    def test_scripts_compartidos_reciben_datos_de_sesion(self):
+        UserClientes.objects.create(usernameCliente='comprador', passwordCliente='x')
+        session = self.client.session
+        session['usernameCliente'] = 'comprador'
+        session.save()
+        html = self.client.get(reverse('comentarios')).content.decode()
+        self.assertIn('core/javascript/notificaciones.js', html)
+        self.assertIn('data-username-cliente="comprador"', html)
+        self.assertNotIn('function abrirNotificaciones', html)
+
+
+class MediaTests(TestCase):
+    """Pruebas de la entrega de archivos subidos: rangos, validadores, proxy y permisos"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=self.media.name, MEDIA_ENVIO='')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        for carpeta, nombre, contenido in (('ideas/modelos3d', 'silla.glb', bytes(range(256)) * 4), ('comprobantes', 'pago.png', b'\x89PNG')):
+            destino = Path(self.media.name) / 'uploads' / carpeta
+            destino.mkdir(parents=True)
+            (destino / nombre).write_bytes(contenido)
+        self.url_modelo = f'{settings.MEDIA_URL}uploads/ideas/modelos3d/silla.glb'
+        self.url_comprobante = f'{settings.MEDIA_URL}uploads/comprobantes/pago.png'
+
+    def _iniciar_sesion(self, **datos):
+        session = self.client.session
+        session.update(datos)
+        session.save()
+
+    def test_rango_parcial_y_fuera_del_archivo(self):
+        response = self.client.get(self.url_modelo, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        response = self.client.get(self.url_modelo, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(252, 256)))
+
+        response = self.client.get(self.url_modelo, HTTP_RANGE='bytes=2048-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_etag_y_last_modified_devuelven_304(self):
+        response = self.client.get(self.url_modelo)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], '1024')
+
+        self.assertEqual(self.client.get(self.url_modelo, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(self.url_modelo, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        # If-Range con otra versión: se entrega el archivo entero
+        response = self.client.get(self.url_modelo, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"otra"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_modo_x_accel_redirect_delega_en_el_proxy(self):
+        with self.settings(MEDIA_ENVIO='x-accel-redirect', MEDIA_PREFIJO_INTERNO='/media-interno/'):
+            response = self.client.get(self.url_modelo)
+        self.assertEqual(response['X-Accel-Redirect'], '/media-interno/uploads/ideas/modelos3d/silla.glb')
+        self.assertEqual(response.content, b'')
+        self.assertIn('ETag', response)
+
+    def test_comprobante_solo_para_su_dueno_y_la_empresa(self):
+        dueno = UserClientes.objects.create(usernameCliente='dueno', passwordCliente='x')
+        UserClientes.objects.create(usernameCliente='otro', passwordCliente='x')
+        Pago.objects.create(cliente=dueno, metodo_pago='nequi', monto_total=Decimal('1000'), comprobante='uploads/comprobantes/pago.png', productos='[]')
+
+        self.assertEqual(self.client.get(self.url_comprobante).status_code, 403)
+        self.assertEqual(self.client.get(f'{settings.MEDIA_URL}uploads/ideas/../comprobantes/pago.png').status_code, 403)
+        self._iniciar_sesion(usernameCliente='otro')
+        self.assertEqual(self.client.get(self.url_comprobante).status_code, 403)
+
+        self._iniciar_sesion(usernameCliente='dueno')
+        response = self.client.get(self.url_comprobante)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+        self.client.logout()
+        self._iniciar_sesion(empresa_id=1)
+        self.assertEqual(self.client.get(self.url_comprobante).status_code, 200)
+
+    def test_comprobante_con_otras_mayusculas_sigue_siendo_privado(self):
+        # Simula un sistema de archivos que no distingue mayúsculas (Windows/macOS)
+        (Path(self.media.name) / 'uploads' / 'Comprobantes').symlink_to(Path(self.media.name) / 'uploads' / 'comprobantes')
+        dueno = UserClientes.objects.create(usernameCliente='dueno', passwordCliente='x')
+        Pago.objects.create(cliente=dueno, metodo_pago='nequi', monto_total=Decimal('1000'), comprobante='uploads/comprobantes/pago.png', productos='[]')
+        url = f'{settings.MEDIA_URL}uploads/Comprobantes/pago.png'
+
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self._iniciar_sesion(usernameCliente='dueno')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+
+def _stl_binario(vertices, triangulos):
+    registros = np.zeros(len(triangulos), dtype=[('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('atributo', '<u2')])
+    registros['vertices'] = np.asarray(vertices, dtype='<f4')[np.asarray(triangulos)]
+    return b'\x00' * 80 + len(triangulos).to_bytes(4, 'little') + registros.tobytes()
+
+
+# Caja de 800 x 400 x 750 mm (STL con Z hacia arriba)
+VERTICES_CAJA = [(x, y, z) for x in (0, 800) for y in (0, 400) for z in (0, 750)]
+TRIANGULOS_CAJA = [
+    (0, 1, 3), (0, 3, 2), (4, 6, 7), (4, 7, 5), (0, 4, 5), (0, 5, 1),
+    (2, 3, 7), (2, 7, 6), (0, 2, 6), (0, 6, 4), (1, 5, 7), (1, 7, 3),
+]
+
+
+class Modelos3DTests(TestCase):
+    """Pruebas de la lectura, normalización y procesamiento de los modelos 3D de las ideas"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=self.media.name, MODELOS_3D_PROCESAMIENTO='comando')
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_obj_con_poligonos_e_indices_negativos(self):
+        obj = b'v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1/1/1 2/2/2 3/3/3 4/4/4\nf -4 -2 -1\n'
+        vertices, triangulos = leer_malla(obj, '.obj')
+        self.assertEqual(len(vertices), 4)
+        self.assertEqual(triangulos.tolist(), [[0, 1, 2], [0, 2, 3], [0, 2, 3]])
+        with self.assertRaises(ErrorModelo3D):
+            leer_malla(b'v 0 0 0\nf 1 2 3\n', '.obj')
+
+    def test_gltf_aplica_transformaciones_de_nodos(self):
+        glb = escribir_glb(np.array([[0.0, 0, 0], [1, 0, 0], [0, 1, 0]]), np.array([[0, 1, 2]]))
+        json_len = int.from_bytes(glb[12:16], 'little')
+        gltf = json.loads(glb[20:20 + json_len])
+        binario = glb[20 + json_len + 8:]
+        gltf['buffers'] = [{'byteLength': len(binario), 'uri': 'data:application/octet-stream;base64,' + base64.b64encode(binario).decode()}]
+        gltf['nodes'] = [{'children': [1], 'scale': [2, 2, 2]}, {'mesh': 0, 'translation': [5, 0, 0]}]
+        vertices, _ = leer_malla(json.dumps(gltf).encode(), '.gltf')
+        self.assertEqual(vertices.min(axis=0).tolist(), [10, 0, 0])
+        self.assertEqual(vertices.max(axis=0).tolist(), [12, 2, 0])
+
+    def test_procesar_stl_genera_vista_previa_miniatura_y_avisos(self):
+        idea = Idea(titulo='Mesa', autor='cliente', categoria='mesas', medidas={'altura_superficie': 120, 'ancho': 80})
+        idea.modelo_3d.save('mesa.stl', ContentFile(_stl_binario(VERTICES_CAJA, TRIANGULOS_CAJA)), save=False)
+        idea.save()
+
+        self.assertTrue(procesar_modelo_3d(idea))
+        idea.refresh_from_db()
+        self.assertEqual(idea.modelo_3d_estado, 'listo')
+        info = idea.modelo_3d_info
+        # Z del STL pasa a ser el alto; milímetros detectados por el tamaño
+        self.assertEqual((info['unidad_origen'], info['ancho_cm'], info['alto_cm'], info['profundidad_cm']), ('mm', 80.0, 75.0, 40.0))
+        self.assertEqual(len(info['avisos_medidas']), 1)
+        self.assertIn('Altura de la Superficie', info['avisos_medidas'][0])
+        self.assertTrue(idea.url_modelo_3d_completo.endswith('.glb'))
+        with idea.modelo_3d_miniatura.open('rb') as miniatura:
+            self.assertEqual(miniatura.read(8), b'\x89PNG\r\n\x1a\n')
+        vertices, triangulos = leer_malla(idea.modelo_3d_preview.read(), '.glb')
+        self.assertEqual(len(triangulos), 12)
+        self.assertAlmostEqual(float(vertices[:, 1].min()), 0.0)
+
+    def test_procesar_marca_error_con_archivo_invalido(self):
+        idea = Idea(titulo='Rota', autor='cliente')
+        idea.modelo_3d.save('rota.obj', ContentFile(b'esto no es un modelo'), save=False)
+        idea.save()
+        self.assertFalse(procesar_modelo_3d(idea))
+        self.assertEqual(idea.modelo_3d_estado, 'error')
+        self.assertIn('error', idea.modelo_3d_info)
+
+    def test_un_error_inesperado_deja_la_idea_en_error_y_el_comando_sigue(self):
+        ideas = []
+        for nombre in ('primera', 'segunda'):
+            idea = Idea(titulo=nombre, autor='cliente', modelo_3d_estado='pendiente')
+            idea.modelo_3d.save(f'{nombre}.stl', ContentFile(_stl_binario(VERTICES_CAJA, TRIANGULOS_CAJA)), save=False)
+            idea.save()
+            ideas.append(idea)
+
+        with patch('core.modelos3d.renderizar_miniatura', side_effect=MemoryError()):
+            self.assertFalse(procesar_modelo_3d(ideas[0]))
+        ideas[0].refresh_from_db()
+        self.assertEqual(ideas[0].modelo_3d_estado, 'error')
+        self.assertIn('MemoryError', ideas[0].modelo_3d_info['error'])
+
+        # Si falla hasta guardar el estado de una idea, el comando pasa a la siguiente
+        reales = procesar_modelo_3d
+        def fallar_la_primera(idea):
+            if idea.pk == ideas[0].pk:
+                raise RuntimeError('base de datos bloqueada')
+            return reales(idea)
+        salida = StringIO()
+        with patch('core.management.commands.procesar_modelos_3d.procesar_modelo_3d', side_effect=fallar_la_primera):
+            call_command('procesar_modelos_3d', '--reintentar', stdout=salida)
+        self.assertIn('1 modelos procesados, 1 con errores', salida.getvalue())
+        ideas[1].refresh_from_db()
+        self.assertEqual(ideas[1].modelo_3d_estado, 'listo')
+
+    def test_subida_valida_formato_y_queda_pendiente_para_el_comando(self):
+        with self.assertRaises(ValidationError):
+            validar_archivo_modelo_3d(SimpleUploadedFile('modelo.glb', b'no es glb'))
+        with self.assertRaises(ValidationError):
+            validar_archivo_modelo_3d(SimpleUploadedFile('modelo.fbx', b'x'))
+
+        UserClientes.objects.create(usernameCliente='creador', passwordCliente='x')
+        session = self.client.session
+        session['usernameCliente'] = 'creador'
+        session.save()
+        self.client.post(reverse('idea'), {
+            'titulo': 'Escritorio', 'descripcion': 'Con cajones', 'categoria': 'escritorios',
+            'modelo_3d': SimpleUploadedFile('escritorio.stl', _stl_binario(VERTICES_CAJA, TRIANGULOS_CAJA)),
+        })
+        idea = Idea.objects.get(titulo='Escritorio')
+        self.assertEqual(idea.modelo_3d_estado, 'pendiente')
+
+        call_command('procesar_modelos_3d', stdout=StringIO())
+        idea.refresh_from_db()
+        self.assertEqual(idea.modelo_3d_estado, 'listo')
+
+
+class ChatEsperaTests(TransactionTestCase):
+    """Pruebas de la espera larga del chat (vistas asíncronas, consultas compartidas)"""
+
+    def setUp(self):
+        ajustes = self.settings(CHAT_ESPERA_INTERVALO=0.05, CHAT_ESPERA_TIMEOUT=1)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        UserClientes.objects.create(usernameCliente='autor', passwordCliente='x')
+        self.empresa = UserEmpresa.objects.create(usernameEmpresa='taller', passwordEmpresa='x')
+        self.idea = Idea.objects.create(titulo='Banco', autor='autor', empresa_asignada=self.empresa)
+        self.otra_idea = Idea.objects.create(titulo='Repisa', autor='autor', empresa_asignada=self.empresa)
+        self.primero = MensajeIdea.objects.create(idea=self.idea, remitente_tipo='empresa', remitente_nombre='taller', mensaje='Hola')
+
+    async def _cliente_async(self, **datos):
+        session = SessionStore()
+        await session.aupdate(datos)
+        await session.asave()
+        cliente = AsyncClient()
+        cliente.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+        return cliente
+
+    def _clave_sesion(self, **datos):
+        session = SessionStore()
+        session.update(datos)
+        session.save()
+        return session.session_key
+
+    @staticmethod
+    async def _get_asgi(handler, url, clave_sesion, despues):
+        """GET directo al ASGIHandler, como lo haría uvicorn; devuelve (status, JSON)."""
+        mensajes = []
+        cuerpo_enviado = False
+        desconexion = asyncio.Event()
+
+        async def receive():
+            nonlocal cuerpo_enviado
+            if not cuerpo_enviado:
+                cuerpo_enviado = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await desconexion.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(mensaje):
+            mensajes.append(mensaje)
+
+        await handler({
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+            'path': url, 'raw_path': url.encode(), 'query_string': f'despues={despues}'.encode(), 'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', f'{settings.SESSION_COOKIE_NAME}={clave_sesion}'.encode())],
+            'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+        }, receive, send)
+        return mensajes[0]['status'], json.loads(b''.join(mensaje.get('body', b'') for mensaje in mensajes[1:]))
+
+    def test_las_esperas_bajo_asgi_no_ocupan_hilos_y_comparten_consultas(self):
+        cliente = self._clave_sesion(usernameCliente='autor')
+        empresa = self._clave_sesion(usernameEmpresa='taller')
+        url = reverse('api_esperar_mensajes_idea', args=[self.idea.id])
+        url_otra = reverse('api_esperar_mensajes_idea', args=[self.otra_idea.id])
+
+        async def escenario():
+            # Un event loop propio, sin hilo síncrono por encima: como en el servidor
+            handler = ASGIHandler()
+            hilos_antes = threading.active_count()
+            esperas = [
+                asyncio.ensure_future(self._get_asgi(handler, url, cliente if i % 2 else empresa, self.primero.id))
+                for i in range(50)
+            ] + [asyncio.ensure_future(self._get_asgi(handler, url_otra, cliente, 0)) for _ in range(10)]
+
+            vigilante_idea = vigilante('idea')
+            while sum(len(abiertas) for abiertas in vigilante_idea.esperas.values()) < 60:
+                await asyncio.sleep(0.01)
+            hilos_esperando = threading.active_count()
+            consultas_antes = vigilante_idea.consultas
+            nuevo = await MensajeIdea.objects.acreate(idea=self.idea, remitente_tipo='cliente', remitente_nombre='autor', mensaje='¿Precio?')
+            respuestas = await asyncio.gather(*esperas)
+            return hilos_antes, hilos_esperando, vigilante_idea.consultas - consultas_antes, nuevo, respuestas
+
+        # La base de pruebas en memoria rechaza escrituras simultáneas en vez de esperar:
+        # las 60 respuestas no guardan la sesión a la vez
+        with self.settings(SESSION_SAVE_EVERY_REQUEST=False):
+            hilos_antes, hilos_esperando, consultas, nuevo, respuestas = asyncio.run(escenario())
+        self.assertEqual({status for status, _ in respuestas}, {200})
+        for _, datos in respuestas[:50]:
+            self.assertEqual(datos, {'success': True, 'hay_nuevos': True, 'ultimo_id': nuevo.id})
+        # La otra idea no tiene mensajes: sus esperas acaban por timeout
+        for _, datos in respuestas[50:]:
+            self.assertEqual(datos, {'success': True, 'hay_nuevos': False, 'ultimo_id': 0})
+        # Cada petición cierra su hilo antes de esperar: sin eso habría 60 hilos más
+        self.assertLess(hilos_esperando - hilos_antes, 5)
+        # Una consulta por revisión para todas las esperas, no una por espera
+        self.assertLess(consultas, 30)
+
+    async def test_responde_sin_esperar_si_ya_hay_nuevos_y_comprueba_permisos(self):
+        cliente = await self._cliente_async(usernameCliente='autor')
+        url = reverse('api_esperar_mensajes_idea', args=[self.idea.id])
+
+        datos = json.loads((await cliente.get(url, {'despues': 0})).content)
+        self.assertEqual(datos['ultimo_id'], self.primero.id)
+        self.assertTrue(datos['hay_nuevos'])
+        self.assertEqual((await cliente.get(url, {'despues': 'x'})).status_code, 400)
+
+        ajeno = await self._cliente_async(usernameCliente='otro')
+        self.assertEqual((await ajeno.get(url)).status_code, 403)
+        self.assertEqual((await AsyncClient().get(url)).status_code, 401)
+        otra_empresa = await self._cliente_async(usernameEmpresa='otra')
+        self.assertEqual((await otra_empresa.get(url)).status_code, 403)
+
+        pago = await Pago.objects.acreate(cliente=await UserClientes.objects.aget(usernameCliente='autor'), monto_total=Decimal('10'))
+        url_pago = reverse('api_esperar_mensajes_pago', args=[pago.id])
+        self.assertEqual((await ajeno.get(url_pago)).status_code, 403)
+        datos = json.loads((await cliente.get(url_pago)).content)
+        self.assertEqual(datos, {'success': True, 'hay_nuevos': False, 'ultimo_id': 0})
+
+
+class LimitesTests(TestCase):
+    """Pruebas del límite de intentos por IP y por cuenta"""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        ajustes = self.settings(CONTRASENAS_ITERACIONES=1000, LIMITES_PETICIONES={
+            'login': {'ip': (5, 60), 'cuenta': (3, 60)},
+            'enviar_mensaje': {'cuenta': (2, 60)},
+        })
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_ventana_deslizante_pondera_la_ventana_anterior(self):
+        for _ in range(4):
+            self.assertEqual(registrar_intento('prueba', 'ip', '1.2.3.4', 4, 60, ahora=119), 0)
+        # A mitad de la ventana siguiente cuentan la mitad de los 4 anteriores
+        self.assertEqual(registrar_intento('prueba', 'ip', '1.2.3.4', 4, 60, ahora=150), 0)
+        self.assertEqual(registrar_intento('prueba', 'ip', '1.2.3.4', 4, 60, ahora=150), 0)
+        self.assertEqual(registrar_intento('prueba', 'ip', '1.2.3.4', 4, 60, ahora=150), 30)
+
+    def test_login_responde_429_sin_consultas_por_cuenta_y_por_ip(self):
+        for _ in range(3):
+            self.assertEqual(self.client.post(reverse('login'), {'usernameCliente': 'victima', 'passwordCliente': 'x'}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('login'), {'usernameCliente': 'Victima', 'passwordCliente': 'y'})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+
+        # Otra cuenta desde la misma IP: la IP ya lleva 4 de 5 intentos
+        self.assertEqual(self.client.post(reverse('login'), {'usernameCliente': 'otra', 'passwordCliente': 'x'}).status_code, 200)
+        self.assertEqual(self.client.post(reverse('login'), {'usernameCliente': 'tercera', 'passwordCliente': 'x'}).status_code, 429)
+        # El GET del formulario no cuenta
+        self.assertEqual(self.client.get(reverse('login')).status_code, 200)
+
+    def test_staff_exento_y_chat_responde_json(self):
+        staff = User.objects.create_user('soporte', password='x', is_staff=True)
+        self.client.force_login(staff)
+        for _ in range(6):
+            self.assertNotEqual(self.client.post(reverse('login'), {'usernameCliente': 'victima', 'passwordCliente': 'x'}).status_code, 429)
+
+        self.client.logout()
+        session = self.client.session
+        session['usernameCliente'] = 'comprador'
+        session.save()
+        url = reverse('api_enviar_mensaje', args=[999])
+        for _ in range(2):
+            self.assertNotEqual(self.client.post(url, {'mensaje': 'hola'}).status_code, 429)
+        response = self.client.post(url, {'mensaje': 'hola'})
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(json.loads(response.content)['success'])
+
+
+class ContrasenasTests(TestCase):
+    """Pruebas del paso a hashers de Django con migración al iniciar sesión y en lote"""
+
+    def setUp(self):
+        cache.clear()
+        ajustes = self.settings(CONTRASENAS_ITERACIONES=1000)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def test_login_de_cliente_en_texto_plano_rehace_el_hash(self):
+        UserClientes.objects.create(usernameCliente='antiguo', passwordCliente='secreta1')
+        response = self.client.post(reverse('login'), {'usernameCliente': 'antiguo', 'passwordCliente': 'mal'})
+        self.assertContains(response, 'Usuario o contraseña incorrectos')
+        self.assertEqual(UserClientes.objects.get(usernameCliente='antiguo').passwordCliente, 'secreta1')
+
+        response = self.client.post(reverse('login'), {'usernameCliente': 'antiguo', 'passwordCliente': 'secreta1'})
+        self.assertRedirects(response, reverse('productos'), fetch_redirect_response=False)
+        guardado = UserClientes.objects.get(usernameCliente='antiguo').passwordCliente
+        self.assertTrue(guardado.startswith('pbkdf2_sha256$1000$'))
+
+        # Al subir el coste, el siguiente login rehace el hash con las iteraciones nuevas
+        with self.settings(CONTRASENAS_ITERACIONES=2000):
+            self.client.post(reverse('login'), {'usernameCliente': 'antiguo', 'passwordCliente': 'secreta1'})
+        self.assertTrue(UserClientes.objects.get(usernameCliente='antiguo').passwordCliente.startswith('pbkdf2_sha256$2000$'))
+
+    def test_migracion_en_lote_envuelve_sha256_de_empresas(self):
+        empresa = EmpresaRegistrada.objects.create(
+            nombre_empresa='Maderas', nit='900', email='m@x.co', username='empresa_900',
+            password=hashlib.sha256(b'clave-empresa').hexdigest(),
+        )
+        UserClientes.objects.create(usernameCliente='plano', passwordCliente='x1')
+
+        self.assertEqual(migrar_contrasenas(EmpresaRegistrada, workers=1), 1)
+        self.assertEqual(migrar_contrasenas(UserClientes, workers=1), 1)
+        self.assertEqual(migrar_contrasenas(UserClientes, workers=1), 0)
+        empresa.refresh_from_db()
+        self.assertTrue(empresa.password.startswith('pbkdf2_wrapped_sha256$'))
+
+        # El login con el hash envuelto funciona y lo cambia por el hash normal
+        self.client.post(reverse('loginEmpresa_login'), {'username': 'Maderas', 'password': 'clave-empresa'})
+        empresa.refresh_from_db()
+        self.assertTrue(empresa.password.startswith('pbkdf2_sha256$'))
+        self.assertEqual(self.client.session.get('empresa_temp_id'), empresa.id)
+
+    def test_simulacion_p99_crece_al_saturar(self):
+        self.assertLess(simular_p99([0.05], logins_por_segundo=5, workers=2), 0.2)
+        self.assertGreater(simular_p99([0.5], logins_por_segundo=5, workers=2), 1)
+
+
+class PagoIdempotenteTests(TransactionTestCase):
+    """Pruebas de los envíos de pago repetidos (clave de idempotencia y mismo comprobante)"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        ajustes = self.settings(MEDIA_ROOT=self.media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        UserClientes.objects.create(usernameCliente='comprador', passwordCliente='x')
+        self.url = reverse('procesar_pago')
+
+    def _http(self):
+        http = Client()
+        session = http.session
+        session['usernameCliente'] = 'comprador'
+        session.save()
+        return http
+
+    def _datos(self, contenido=b'\x89PNG-recibo-1'):
+        return {
+            'nombre_completo': 'Ana Pérez', 'cedula': '123456', 'email': 'ana@ejemplo.com',
+            'telefono': '3001234567', 'direccion': 'Calle 1 # 2-3 Bogotá', 'metodo_pago': 'nequi',
+            'monto_total': '1000', 'productos': '[]',
+            'comprobante': SimpleUploadedFile('recibo.png', contenido, content_type='image/png'),
+        }
+
+    def _comprobantes_guardados(self):
+        return list((Path(self.media.name) / 'uploads' / 'comprobantes').glob('*'))
+
+    def test_envios_concurrentes_con_la_misma_clave_registran_un_pago(self):
+        en_vuelo = threading.Event()
+        segundo_terminado = threading.Event()
+        hilo_primero = {}
+
+        def pausar_primero(sender, instance, created, **kwargs):
+            # El primer envío se detiene con el pago ya creado pero sin respuesta guardada
+            if created and threading.get_ident() == hilo_primero.get('id'):
+                en_vuelo.set()
+                segundo_terminado.wait(5)
+
+        post_save.connect(pausar_primero, sender=Pago, dispatch_uid='pausar_primero')
+        self.addCleanup(post_save.disconnect, sender=Pago, dispatch_uid='pausar_primero')
+
+        respuestas = {}
+
+        def enviar(nombre):
+            if nombre == 'primero':
+                hilo_primero['id'] = threading.get_ident()
+            try:
+                respuestas[nombre] = self._http().post(self.url, self._datos(), HTTP_IDEMPOTENCY_KEY='intento-1')
+            finally:
+                connections.close_all()
+
+        primero = threading.Thread(target=enviar, args=('primero',))
+        primero.start()
+        self.assertTrue(en_vuelo.wait(5))
+        segundo = threading.Thread(target=enviar, args=('segundo',))
+        segundo.start()
+        segundo.join(5)
+        segundo_terminado.set()
+        primero.join(5)
+
+        self.assertEqual(respuestas['segundo'].status_code, 409)
+        self.assertTrue(json.loads(respuestas['segundo'].content)['en_proceso'])
+        # Nada se repite todavía: el 409 no lleva la cabecera de respuesta reproducida
+        self.assertNotIn('Idempotent-Replayed', respuestas['segundo'])
+        self.assertEqual(respuestas['primero'].status_code, 200)
+        pago_id = json.loads(respuestas['primero'].content)['pago_id']
+
+        # Un reintento posterior recibe la respuesta guardada
+        response = self._http().post(self.url, self._datos(), HTTP_IDEMPOTENCY_KEY='intento-1')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(response.content)['pago_id'], pago_id)
+        self.assertEqual(Pago.objects.count(), 1)
+        self.assertEqual(len(self._comprobantes_guardados()), 1)
+
+    def test_mismo_comprobante_dentro_de_la_ventana_es_el_mismo_pago(self):
+        http = self._http()
+        primero = json.loads(http.post(self.url, self._datos(), HTTP_IDEMPOTENCY_KEY='a').content)
+        # Otra clave (recargó la página) pero el mismo archivo
+        repetido = http.post(self.url, self._datos(), HTTP_IDEMPOTENCY_KEY='b')
+        self.assertEqual(json.loads(repetido.content)['pago_id'], primero['pago_id'])
+        # La clave 'b' no quedó reclamada: sirve para un pago con otro comprobante
+        otro = json.loads(http.post(self.url, self._datos(b'\x89PNG-recibo-2'), HTTP_IDEMPOTENCY_KEY='b').content)
+        self.assertNotEqual(otro['pago_id'], primero['pago_id'])
+        self.assertEqual(Pago.objects.count(), 2)
+
+        with self.settings(PAGOS_VENTANA_DUPLICADOS_MINUTOS=0):
+            nuevo = json.loads(http.post(self.url, self._datos()).content)
+        self.assertNotIn(nuevo['pago_id'], (primero['pago_id'], otro['pago_id']))
+
+    def test_un_reclamo_abandonado_lo_toma_el_siguiente_envio(self):
+        # El proceso murió entre el reclamo y completar(): quedó sin respuesta
+        cliente = UserClientes.objects.get(usernameCliente='comprador')
+        hace_rato = timezone.now() - timedelta(seconds=settings.PAGOS_PROCESAMIENTO_MAX_SEGUNDOS + 1)
+        SolicitudPago.objects.create(cliente=cliente, clave='clave:intento-1', fecha_creacion=hace_rato)
+
+        response = self._http().post(self.url, self._datos(), HTTP_IDEMPOTENCY_KEY='intento-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Pago.objects.count(), 1)
+        self.assertEqual(SolicitudPago.objects.get(clave='clave:intento-1').pago_id, json.loads(response.content)['pago_id'])
+
+        # Uno reciente sin respuesta todavía se considera en proceso
+        SolicitudPago.objects.create(cliente=cliente, clave='clave:intento-2')
+        response = self._http().post(self.url, self._datos(b'\x89PNG-recibo-2'), HTTP_IDEMPOTENCY_KEY='intento-2')
+        self.assertEqual(response.status_code, 409)
+
+
+class NumeracionFacturasTests(TransactionTestCase):
+    """Pruebas de la numeración consecutiva de facturas"""
+
+    def test_reservas_concurrentes_son_consecutivas_y_sin_huecos(self):
+        resumen = benchmark_numeracion_facturas(hilos=6, transacciones=10, bloques=(1, 4))
+        for bloque, datos in resumen.items():
+            # La base de pruebas en memoria rechaza escrituras simultáneas en vez de esperar:
+            # las transacciones que fallan no deben consumir números
+            self.assertEqual(datos['transacciones'] + datos['bloqueos'] + datos['otros_errores'], 60)
+            self.assertEqual(datos['numeros'], datos['transacciones'] * bloque)
+            self.assertTrue(datos['sin_huecos'], bloque)
+
+    def test_rollback_devuelve_el_numero_y_cada_anio_empieza_en_uno(self):
+        with self.assertRaises(RuntimeError):
+            siguiente_numero_factura()
+
+        anterior = datetime(2025, 12, 31, 12, tzinfo=dt_timezone.utc)
+        with self.assertRaises(ValueError), transaction.atomic():
+            siguiente_numero_factura(fecha=anterior)
+            raise ValueError('la factura no se guardó')
+
+        with transaction.atomic():
+            self.assertEqual(siguiente_numero_factura(fecha=anterior), 'FACT-2025-000001')
+            self.assertEqual(reservar_numeros(3, 'NC', anterior), ['NC-2025-000001', 'NC-2025-000002', 'NC-2025-000003'])
+            self.assertEqual(siguiente_numero_factura(fecha=anterior), 'FACT-2025-000002')
+            self.assertEqual(siguiente_numero_factura(), f'FACT-{timezone.localdate().year}-000001')
+
+
+class RetencionTests(TestCase):
+    """Pruebas de las políticas de retención y de la limpieza de archivos huérfanos"""
+
+    def setUp(self):
+        self.cliente = UserClientes.objects.create(usernameCliente='cliente_retencion', passwordCliente='x')
+
+    def _pedido(self, estado, dias):
+        pago = Pago.objects.create(cliente=self.cliente, metodo_pago='nequi', monto_total=1000, comprobante='uploads/comprobantes/r.png', productos='[]')
+        pedido = Pedido.objects.create(pago=pago, cliente=self.cliente, productos='[]', monto_total=1000, estado=estado)
+        Pedido.objects.filter(pk=pedido.pk).update(fecha_actualizacion=timezone.now() - timedelta(days=dias))
+        return pedido
+
+    def test_archiva_pedidos_entregados_y_purga_carritos_por_lotes(self):
+        antiguos = [self._pedido('entregado', 800) for _ in range(3)]
+        self._pedido('entregado', 10)
+        self._pedido('enviado', 800)
+        CarritoTemporal.objects.create(usuario=self.cliente, producto_tipo='mesa', producto_id=1)
+        CarritoTemporal.objects.create(usuario=self.cliente, producto_tipo='mesa', producto_id=2)
+        CarritoTemporal.objects.filter(producto_id=1).update(fecha_actualizacion=timezone.now() - timedelta(days=4))
+
+        self.assertEqual(aplicar_retencion(simular=True), {'pedidos_entregados': 3, 'carritos_expirados': 1, 'solicitudes_pago': 0})
+        self.assertEqual(Pedido.objects.count(), 5)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = aplicar_retencion(['pedidos_entregados'], lote=2)
+        self.assertEqual(resumen, {'pedidos_entregados': 3})
+        # Dos lotes (2 + 1): las consultas no crecen con cada fila
+        self.assertLessEqual(len(consultas.captured_queries), 14)
+        self.assertEqual(Pedido.objects.count(), 2)
+        archivado = RegistroArchivado.objects.get(objeto_id=antiguos[0].pk)
+        self.assertEqual((archivado.modelo, archivado.datos['estado'], archivado.datos['pago']), ('core.pedido', 'entregado', antiguos[0].pago_id))
+        # El pago (y su factura) se conservan
+        self.assertEqual(Pago.objects.count(), 5)
+
+        self.assertEqual(aplicar_retencion(['carritos_expirados']), {'carritos_expirados': 1})
+        self.assertEqual(list(CarritoTemporal.objects.values_list('producto_id', flat=True)), [2])
+
+        with self.settings(RETENCION_CARRITOS_HORAS=0):
+            self.assertEqual(aplicar_retencion(['carritos_expirados'], simular=True), {'carritos_expirados': 0})
+
+    def test_el_pago_de_un_pedido_archivado_no_admite_otro_pedido_y_sigue_exportandose(self):
+        pedido = self._pedido('entregado', 800)
+        pago = pedido.pago
+        Pago.objects.filter(pk=pago.pk).update(estado='confirmado')
+        Factura.objects.create(
+            pago=pago, numero_factura='FACT-ARCHIVADA-1', cliente=self.cliente, nombre_cliente='Cliente',
+            productos='[]', subtotal=1000, total=1000,
+        )
+        self.assertEqual(aplicar_retencion(['pedidos_entregados']), {'pedidos_entregados': 1})
+        self.assertEqual(Pago.objects.get(pk=pago.pk).estado_pedido_archivado, 'entregado')
+
+        session = self.client.session
+        session['usernameCliente'] = self.cliente.usernameCliente
+        session['empresa_id'] = 1
+        session.save()
+        respuesta = self.client.post(reverse('crear_pedido', args=[pago.pk]), {'nombre_completo': 'Cliente', 'direccion': 'Calle 1'})
+        self.assertRedirects(respuesta, reverse('mis_pedidos'), fetch_redirect_response=False)
+        self.assertFalse(Pedido.objects.filter(pago=pago).exists())
+
+        # La factura sigue saliendo al exportar las de pedidos entregados
+        respuesta = self.client.get(reverse('exportar_facturas'), {'estado': 'entregado'})
+        self.assertIn('FACT-ARCHIVADA-1', b''.join(respuesta.streaming_content).decode('utf-8-sig'))
+        respuesta = self.client.get(reverse('exportar_facturas'), {'estado': 'cancelado'})
+        self.assertNotIn('FACT-ARCHIVADA-1', b''.join(respuesta.streaming_content).decode('utf-8-sig'))
+
+        # Y los totales de estadísticas lo siguen contando
+        respuesta = self.client.get(reverse('estadisticas'))
+        self.assertEqual((respuesta.context['total_pedidos'], respuesta.context['pedidos_entregado']), (1, 1))
+
+    def test_medios_huerfanos_solo_se_borran_con_borrar_y_pasada_la_gracia(self):
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            raiz = Path(media)
+            (raiz / 'uploads' / 'comprobantes').mkdir(parents=True)
+            antiguo = time.time() - 48 * 3600
+            for nombre, contenido in (('usado.png', b'u' * 10), ('huerfano.png', b'h' * 300), ('reciente.png', b'r' * 5)):
+                ruta = raiz / 'uploads' / 'comprobantes' / nombre
+                ruta.write_bytes(contenido)
+                if nombre != 'reciente.png':
+                    os.utime(ruta, (antiguo, antiguo))
+            Pago.objects.create(cliente=self.cliente, metodo_pago='nequi', monto_total=1, comprobante='uploads/comprobantes/usado.png', productos='[]')
+
+            informe = recolectar_medios()
+            self.assertEqual((informe['archivos'], informe['bytes'], informe['borrados']), (1, 300, 0))
+            self.assertEqual(informe['por_carpeta'], {'uploads/comprobantes': {'archivos': 1, 'bytes': 300}})
+            self.assertTrue((raiz / 'uploads' / 'comprobantes' / 'huerfano.png').exists())
+
+            self.assertEqual(recolectar_medios(borrar=True)['borrados'], 1)
+            self.assertEqual(sorted(p.name for p in (raiz / 'uploads' / 'comprobantes').iterdir()), ['reciente.png', 'usado.png'])
+
+
+class ModeracionComentariosTests(TestCase):
+    """Pruebas de la preclasificación de spam, la cola de moderación y los testimonios de home"""
+
+    def setUp(self):
+        cache.clear()
+        self.cliente = UserClientes.objects.create(usernameCliente='cliente_moderacion', passwordCliente='x')
+        session = self.client.session
+        session['empresa_id'] = 1
+        session['usernameCliente'] = self.cliente.usernameCliente
+        session.save()
+
+    def _moderar(self, ids, accion):
+        return self.client.post(reverse('api_moderar_comentarios'), json.dumps({'ids': ids, 'accion': accion}), content_type='application/json')
+
+    def test_puntuacion_de_spam(self):
+        self.assertEqual(puntuar_spam('La mesa llegó rápido y en perfecto estado, muy recomendados.'), 0)
+        self.assertLess(puntuar_spam('EXCELENTE SERVICIO, MUY CONTENTO CON LA COMPRA'), settings.COMENTARIOS_UMBRAL_SPAM)
+        self.assertGreaterEqual(puntuar_spam('Gana dinero fácil en el CASINO: www.premios-ya.xyz'), settings.COMENTARIOS_UMBRAL_SPAM)
+        with self.settings(COMENTARIOS_PALABRAS_BLOQUEADAS=['réplicas baratas']):
+            self.assertEqual(puntuar_spam('Replicas baratas aquí'), 40)
+
+    def test_el_spam_evidente_se_rechaza_sin_llegar_a_la_cola(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('crear_comentario'), {'contenido': 'Muy buena atención, volveré a comprar'})
+            self.client.post(reverse('crear_comentario'), {'contenido': 'Haz clic aquí y gana dinero: https://spam.example.com'})
+        legitimo, spam = Comentario.objects.order_by('id')
+        self.assertEqual((legitimo.estado, legitimo.rechazo_automatico), ('pendiente', False))
+        self.assertEqual((spam.estado, spam.rechazo_automatico), ('rechazado', True))
+
+        datos = self.client.get(reverse('api_cola_moderacion')).json()
+        self.assertEqual((datos['pendientes'], [c['id'] for c in datos['comentarios']]), (1, [legitimo.id]))
+
+    def test_cola_por_clave_y_moderacion_en_lote_con_un_update(self):
+        comentarios = Comentario.objects.bulk_create([Comentario(usuario=self.cliente, contenido=f'Comentario {i}') for i in range(5)])
+        ids = [comentario.id for comentario in comentarios]
+        url = reverse('api_cola_moderacion')
+
+        pagina = self.client.get(url, {'limite': 2}).json()
+        self.assertEqual(([c['id'] for c in pagina['comentarios']], pagina['siguiente']), (ids[:2], ids[1]))
+        # Moderar mientras se recorre la cola no hace saltar ni repetir comentarios
+        self._moderar([ids[0], ids[2]], 'rechazar')
+        pagina = self.client.get(url, {'limite': 2, 'despues': pagina['siguiente']}).json()
+        self.assertEqual(([c['id'] for c in pagina['comentarios']], pagina['siguiente']), (ids[3:5], ids[4]))
+        self.assertEqual(self.client.get(url, {'limite': 2, 'despues': ids[4]}).json()['siguiente'], None)
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self._moderar(ids, 'aprobar')
+        self.assertEqual(respuesta.json()['actualizados'], 5)
+        self.assertEqual([q['sql'] for q in consultas.captured_queries if 'core_comentario' in q['sql']][0][:6], 'UPDATE')
+        self.assertEqual(sum(1 for q in consultas.captured_queries if 'core_comentario' in q['sql']), 1)
+        self.assertFalse(Comentario.objects.exclude(estado='aprobado').exists())
+        self.assertFalse(Comentario.objects.filter(fecha_aprobacion__isnull=True).exists())
+        # Los que ya están aprobados no se vuelven a tocar
+        self.assertEqual(self._moderar(ids, 'aprobar').json()['actualizados'], 0)
+
+        for cuerpo in ({'ids': ids, 'accion': 'borrar'}, {'ids': [], 'accion': 'aprobar'}, {'ids': ['1'], 'accion': 'aprobar'}):
+            self.assertEqual(self.client.post(reverse('api_moderar_comentarios'), json.dumps(cuerpo), content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.get(url, {'limite': 'x'}).status_code, 400)
+        self.assertEqual(Client().get(url).status_code, 401)
+
+    def test_home_cachea_los_testimonios_y_se_invalida_al_moderar(self):
+        comentario = Comentario.objects.create(usuario=self.cliente, contenido='Testimonio para la portada')
+        self.assertContains(self.client.get(reverse('home')), 'Testimonio para la portada')
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertContains(self.client.get(reverse('home')), 'Testimonio para la portada')
+        self.assertFalse(any('core_comentario' in q['sql'] for q in consultas.captured_queries))
+
+        # En la caché solo va lo que muestra la plantilla, nunca el usuario completo
+        self.assertEqual(cache.get(CLAVE_TESTIMONIOS), [{'contenido': 'Testimonio para la portada', 'usuario': 'cliente_moderacion', 'foto_url': ''}])
+
+        # Cambiar el nombre de usuario en el perfil se refleja en los testimonios
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('editar_perfil'), {'usernameCliente': 'cliente_renombrado', 'email': 'renombrado@ejemplo.com'})
+        self.assertEqual(UserClientes.objects.get(pk=self.cliente.pk).usernameCliente, 'cliente_renombrado')
+        self.assertContains(self.client.get(reverse('home')), 'cliente_renombrado')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._moderar([comentario.id], 'rechazar')
+        self.assertNotContains(self.client.get(reverse('home')), 'Testimonio para la portada')
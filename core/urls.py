@@ -1,12 +1,15 @@
 from django.urls import path, include
 from . import views
 from . import views_chat
+from . import views_moderacion
+from . import views_rendimiento
 
 urlpatterns = [
     # APIs para sistema de chat
     path('api/test-session/', views_chat.test_session, name='test_session'),
     path('api/conversaciones/', views_chat.api_conversaciones, name='api_conversaciones'),
     path('api/mensajes-idea/<int:idea_id>/', views_chat.api_mensajes_idea, name='api_mensajes_idea'),
+    path('api/mensajes-idea/<int:idea_id>/esperar/', views_chat.api_esperar_mensajes_idea, name='api_esperar_mensajes_idea'),
     path('api/enviar-mensaje/<int:idea_id>/', views_chat.api_enviar_mensaje, name='api_enviar_mensaje'),
     path('api/marcar-leidos/<int:idea_id>/', views_chat.api_marcar_leidos, name='api_marcar_leidos'),
     # URLs para ideas - interacción cliente
@@ -15,7 +18,16 @@ urlpatterns = [
     path('idea/revocar-permiso/<int:idea_id>/', views.revocar_permiso_publicacion, name='revocar_permiso_publicacion'),
     # URLs para chat de pagos - interacción cliente y empresa
     path('api/mensajes-pago/<int:pago_id>/', views_chat.api_mensajes_pago, name='api_mensajes_pago'),
+    path('api/mensajes-pago/<int:pago_id>/esperar/', views_chat.api_esperar_mensajes_pago, name='api_esperar_mensajes_pago'),
     path('api/enviar-mensaje-pago/<int:pago_id>/', views_chat.api_enviar_mensaje_pago, name='api_enviar_mensaje_pago'),
     path('api/conversaciones-pagos/', views_chat.api_conversaciones_pagos, name='api_conversaciones_pagos'),
     path('api/marcar-leidos-pago/<int:pago_id>/', views_chat.api_marcar_leidos_pago, name='api_marcar_leidos_pago'),
+    # Cola de moderación de comentarios (empresa)
+    path('api/comentarios/moderacion/', views_moderacion.api_cola_moderacion, name='api_cola_moderacion'),
+    path('api/comentarios/moderacion/acciones/', views_moderacion.api_moderar_comentarios, name='api_moderar_comentarios'),
+    # Métricas de rendimiento por ruta (solo staff)
+    path('api/rendimiento/rutas/', views_rendimiento.metricas_rutas_view, name='api_metricas_rutas'),
+    # Perfiles de peticiones (solo staff, dentro del admin)
+    path('admin/perfiles/', views_rendimiento.perfiles_view, name='admin_perfiles'),
+    path('admin/perfiles/<str:nombre>.<str:extension>', views_rendimiento.descargar_perfil_view, name='descargar_perfil'),
 ]
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Analítica de ventas por producto a partir de tablas precalculadas.
+
+Las cantidades vendidas solo existen dentro del JSON de Pago.productos, así
+que se acumulan en VentaProducto (totales) y VentaProductoDiaria (por día)
+en el momento de confirmar cada pago. Las consultas del panel leen solo esas
+tablas y nunca vuelven a recorrer el JSON de los pagos.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .exportacion import productos_de_json
+from .facturas import PRODUCTOS_POR_CATEGORIA
+from .models import Pago, VentaProducto, VentaProductoDiaria
+
+# Ventana (en días) para calcular el ritmo de venta reciente
+DIAS_RITMO_VENTAS = 30
+
+
+def normalizar_categoria(categoria):
+    """Convierte 'mesa'/'Mesas'/... en la categoría en plural que usan las tablas."""
+    categoria = (categoria or '').lower()
+    if categoria in PRODUCTOS_POR_CATEGORIA:
+        return categoria
+    if f'{categoria}s' in PRODUCTOS_POR_CATEGORIA:
+        return f'{categoria}s'
+    return None
+
+
+def _agrupar_items(productos_json):
+    """Suma unidades e ingresos por (categoria, producto_id) de un JSON de productos."""
+    agrupados = {}
+    for item in productos_de_json(productos_json):
+        categoria = normalizar_categoria(item['categoria'])
+        try:
+            producto_id = int(item['id'])
+        except (TypeError, ValueError):
+            continue
+        if not categoria or item['cantidad'] <= 0:
+            continue
+        nombre, unidades, ingresos = agrupados.get((categoria, producto_id), (item['nombre'], 0, Decimal('0')))
+        agrupados[(categoria, producto_id)] = (nombre, unidades + item['cantidad'], ingresos + item['subtotal'])
+    return agrupados
+
+
+def registrar_venta(pago):
+    """Suma los productos de un pago confirmado a las tablas de ventas."""
+    fecha_venta = pago.fecha_confirmacion or timezone.now()
+    dia = timezone.localdate(fecha_venta)
+
+    with transaction.atomic():
+        for (categoria, producto_id), (nombre, unidades, ingresos) in _agrupar_items(pago.productos).items():
+            total, creado = VentaProducto.objects.get_or_create(
+                categoria=categoria,
+                producto_id=producto_id,
+                defaults={'nombre': nombre, 'unidades_vendidas': unidades, 'ingresos': ingresos, 'ultima_venta': fecha_venta},
+            )
+            if not creado:
+                VentaProducto.objects.filter(id=total.id).update(
+                    nombre=nombre or total.nombre,
+                    unidades_vendidas=F('unidades_vendidas') + unidades,
+                    ingresos=F('ingresos') + ingresos,
+                    ultima_venta=fecha_venta,
+                )
+
+            diaria, creado = VentaProductoDiaria.objects.get_or_create(
+                categoria=categoria,
+                producto_id=producto_id,
+                fecha=dia,
+                defaults={'unidades': unidades, 'ingresos': ingresos},
+            )
+            if not creado:
+                VentaProductoDiaria.objects.filter(id=diaria.id).update(
+                    unidades=F('unidades') + unidades,
+                    ingresos=F('ingresos') + ingresos,
+                )
+
+
+def recalcular_ventas(tamano_lote=2000):
+    """Reconstruye las tablas de ventas desde todos los pagos confirmados.
+
+    Devuelve (pagos procesados, productos con ventas).
+    """
+    totales = {}
+    diarias = defaultdict(lambda: [0, Decimal('0')])
+    pagos_procesados = 0
+
+    pagos = Pago.objects.filter(estado='confirmado').only('productos', 'fecha_confirmacion', 'fecha_creacion').order_by('id')
+    for pago in pagos.iterator(chunk_size=tamano_lote):
+        pagos_procesados += 1
+        fecha_venta = pago.fecha_confirmacion or pago.fecha_creacion
+        dia = timezone.localdate(fecha_venta)
+        for clave, (nombre, unidades, ingresos) in _agrupar_items(pago.productos).items():
+            total = totales.setdefault(clave, {'nombre': nombre, 'unidades': 0, 'ingresos': Decimal('0'), 'ultima_venta': fecha_venta})
+            total['unidades'] += unidades
+            total['ingresos'] += ingresos
+            if fecha_venta >= total['ultima_venta']:
+                total['ultima_venta'] = fecha_venta
+                total['nombre'] = nombre or total['nombre']
+            diarias[clave + (dia,)][0] += unidades
+            diarias[clave + (dia,)][1] += ingresos
+
+    with transaction.atomic():
+        VentaProducto.objects.all().delete()
+        VentaProductoDiaria.objects.all().delete()
+        VentaProducto.objects.bulk_create([
+            VentaProducto(
+                categoria=categoria,
+                producto_id=producto_id,
+                nombre=datos['nombre'],
+                unidades_vendidas=datos['unidades'],
+                ingresos=datos['ingresos'],
+                ultima_venta=datos['ultima_venta'],
+            )
+            for (categoria, producto_id), datos in totales.items()
+        ], batch_size=tamano_lote)
+        VentaProductoDiaria.objects.bulk_create([
+            VentaProductoDiaria(categoria=categoria, producto_id=producto_id, fecha=dia, unidades=unidades, ingresos=ingresos)
+            for (categoria, producto_id, dia), (unidades, ingresos) in diarias.items()
+        ], batch_size=tamano_lote)
+
+    return pagos_procesados, len(totales)
+
+
+def mas_vendidos(limite=10):
+    """Top-N de productos por unidades vendidas (histórico)."""
+    return list(VentaProducto.objects.order_by('-unidades_vendidas', '-ingresos')[:limite])
+
+
+def analisis_inventario(dias=DIAS_RITMO_VENTAS, limite=10):
+    """Productos de venta lenta y riesgo de agotamiento según el ritmo reciente.
+
+    El ritmo diario es lo vendido en los últimos `dias` dividido por `dias`;
+    los días de stock restantes son cantidad_disponible / ritmo diario.
+    """
+    desde = timezone.localdate() - timedelta(days=dias - 1)
+    vendidas = {
+        (fila['categoria'], fila['producto_id']): fila['unidades']
+        for fila in VentaProductoDiaria.objects.filter(fecha__gte=desde)
+        .values('categoria', 'producto_id')
+        .annotate(unidades=Sum('unidades'))
+        .order_by()
+    }
+
+    productos = []
+    for categoria, (modelo, campo_nombre, _) in PRODUCTOS_POR_CATEGORIA.items():
+        for fila in modelo.objects.filter(is_active=True).values('id', campo_nombre, 'cantidad_disponible'):
+            unidades = vendidas.get((categoria, fila['id']), 0)
+            ritmo = unidades / dias
+            productos.append({
+                'categoria': categoria,
+                'producto_id': fila['id'],
+                'nombre': fila[campo_nombre],
+                'stock': fila['cantidad_disponible'],
+                'unidades_periodo': unidades,
+                'ritmo_diario': round(ritmo, 2),
+                'dias_restantes': round(fila['cantidad_disponible'] / ritmo, 1) if ritmo else None,
+            })
+
+    menos_vendidos = sorted(productos, key=lambda p: (p['unidades_periodo'], -p['stock']))[:limite]
+    riesgo_agotamiento = sorted(
+        (p for p in productos if p['dias_restantes'] is not None),
+        key=lambda p: p['dias_restantes'],
+    )[:limite]
+
+    return {
+        'dias': dias,
+        'menos_vendidos': menos_vendidos,
+        'riesgo_agotamiento': riesgo_agotamiento,
+    }
@@ -1,14 +1,24 @@
 from django.contrib.auth import logout
+from django.contrib.auth.hashers import make_password
 from django.shortcuts import render, redirect
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, HttpResponse, FileResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q, Sum, Case, When, IntegerField
+from django.db.models import Q, Sum
 from django.contrib.auth.decorators import login_required
 from django.template.loader import render_to_string
 from .forms import LoginForm, AgregarForm, LoginFormEmpresa, IdeaForm
 from .logic import obtener_respuesta
+from .contrasenas import comprobar_contrasena, simular_comprobacion
+from .facturas import detallar_productos_factura, obtener_pdf_factura, nombre_pdf_factura
+from .idempotencia import EnvioPago, claves_envio
+from .inventario import disponibilidad_productos
+from .limites import campo_post, clave_sesion, limitar
+from .modelos3d import encolar_modelo_3d
+from .moderacion import invalidar_testimonios, moderar_comentarios, preclasificar, testimonios_home
 import json
 import pyotp
 import qrcode
@@ -17,15 +27,8 @@ import base64
 from .models import UserClientes, Mesas, Sillas, Armarios, Cajoneras, Escritorios, Utensilios, Pedido, Pago, UserEmpresa, CarritoTemporal, Idea, Factura, Comentario
 # Create your views here.
 def home(request):
-    # Obtener comentarios aprobados primero, luego otros estados, limitado a 10
-    comentarios = Comentario.objects.annotate(
-        orden_estado=Case(
-            When(estado='aprobado', then=1),
-            When(estado='rechazado', then=3),
-            When(estado='pendiente', then=2),
-            output_field=IntegerField(),
-        )
-    ).order_by('orden_estado', '-fecha_aprobacion', '-fecha_creacion')[:10]
+    # Comentarios aprobados primero, luego pendientes (los rechazados no se muestran), limitado a 10
+    comentarios = testimonios_home()
     
     # Obtener un producto activo de cada categoría para mostrar en el landing
     mesa_destacada = Mesas.objects.filter(is_active=True).first()
@@ -193,6 +196,7 @@ Este mensaje fue enviado desde el formulario de contacto de Tu Idea Hecha Realid
         'error_mensaje': error_mensaje
     })
 
+@limitar('login', cuenta=campo_post('usernameCliente'))
 def Login_view(request):
     if request.method == 'POST':
         form = LoginForm(request.POST)
@@ -200,27 +204,32 @@ def Login_view(request):
             usernameCliente = form.cleaned_data['usernameCliente']
             passwordCliente = form.cleaned_data['passwordCliente']
             try:
-                user = UserClientes.objects.get(usernameCliente=usernameCliente, passwordCliente=passwordCliente)
-                
-                # Verificar si el usuario está deshabilitado
-                if not user.is_active:
-                    error_message = "Tu cuenta ha sido inhabilitada. Contacta con la empresa por el correo: tuideahecharealidad01@gmail.com"
-                    return render(request, 'core/login.html', {'error_message': error_message, 'form': form})
-                
-                # Verificar si tiene 2FA habilitado
-                if user.two_factor_enabled:
-                    # Guardar temporalmente el username y redirigir a verificación 2FA
-                    request.session['username_2fa_temp'] = usernameCliente
-                    request.session.modified = True
-                    return redirect('verificar_2fa_login')
-                
-                # Login normal sin 2FA
-                request.session['usernameCliente'] = usernameCliente
-                request.session.modified = True
-                return redirect('productos')
+                user = UserClientes.objects.get(usernameCliente=usernameCliente)
             except UserClientes.DoesNotExist:
+                user = None
+                # Mismo tiempo de respuesta exista o no el usuario
+                simular_comprobacion(passwordCliente)
+            # Comprueba el hash (y rehace los formatos antiguos) sin filtrar por contraseña en la consulta
+            if user is None or not comprobar_contrasena(user, passwordCliente):
                 error_message = "Usuario o contraseña incorrectos"
                 return render(request, 'core/login.html', {'error_message': error_message, 'form': form})
+            
+            # Verificar si el usuario está deshabilitado
+            if not user.is_active:
+                error_message = "Tu cuenta ha sido inhabilitada. Contacta con la empresa por el correo: tuideahecharealidad01@gmail.com"
+                return render(request, 'core/login.html', {'error_message': error_message, 'form': form})
+            
+            # Verificar si tiene 2FA habilitado
+            if user.two_factor_enabled:
+                # Guardar temporalmente el username y redirigir a verificación 2FA
+                request.session['username_2fa_temp'] = usernameCliente
+                request.session.modified = True
+                return redirect('verificar_2fa_login')
+            
+            # Login normal sin 2FA
+            request.session['usernameCliente'] = usernameCliente
+            request.session.modified = True
+            return redirect('productos')
     else:
         form = LoginForm()
     return render(request,'core/login.html', {'form': form})
@@ -293,7 +302,8 @@ def registro(request):
                 'usernameCliente': form.cleaned_data['usernameCliente'],
                 'email': form.cleaned_data['email'],
                 'telefono': form.cleaned_data['telefono'],
-                'passwordCliente': form.cleaned_data['passwordCliente'],
+                # En la sesión solo el hash: nunca la contraseña en claro
+                'passwordCliente': make_password(form.cleaned_data['passwordCliente']),
                 'codigo_verificacion': codigo_verificacion
             }
             
@@ -344,6 +354,7 @@ Tu Idea Hecha Realidad
     context = {'form': form}
     return render(request, 'core/registro.html', context)
 
+@limitar('verificar_codigo', cuenta=lambda request: request.session.get('registro_temp', {}).get('email'))
 def verificar_codigo(request):
     if 'registro_temp' not in request.session:
         from django.contrib import messages
@@ -462,6 +473,9 @@ def ideas_view(request):
                     idea.medidas = None
             
             idea.save()
+            if idea.modelo_3d:
+                # Validación completa, miniatura y vista previa en segundo plano
+                encolar_modelo_3d(idea)
             return redirect('idea')
     else:
         form = IdeaForm()
@@ -666,7 +680,10 @@ def crear_comentario_view(request):
                 if username:
                     usuario = UserClientes.objects.get(usernameCliente=username)
                     comentario.usuario = usuario
+                    # El spam evidente se guarda ya rechazado y no llega a la cola de moderación
+                    preclasificar(comentario)
                     comentario.save()
+                    invalidar_testimonios()
                     messages.success(request, 'Comentario publicado exitosamente')
                     return redirect('comentarios')
                 else:
@@ -689,6 +706,7 @@ def eliminar_comentario_view(request, comentario_id):
             usuario = UserClientes.objects.get(usernameCliente=username)
             if comentario.usuario == usuario:
                 comentario.delete()
+                invalidar_testimonios()
                 messages.success(request, 'Comentario eliminado exitosamente')
             else:
                 messages.error(request, 'No tienes permiso para eliminar este comentario')
@@ -720,14 +738,17 @@ def editar_perfil_view(request):
                 
                 if password_actual and password_nueva:
                     # Verificar que la contrase�a actual sea correcta
-                    if usuario.passwordCliente == password_actual:
-                        usuario.passwordCliente = password_nueva
+                    if comprobar_contrasena(usuario, password_actual):
+                        usuario.passwordCliente = make_password(password_nueva)
                     else:
                         messages.error(request, 'La contrase�a actual es incorrecta')
                         return render(request, 'core/editar_perfil.html', {'form': form})
                 
                 # Guardar el formulario
                 form.save()
+                # El nombre y la foto aparecen en los testimonios de home
+                if {'usernameCliente', 'foto_perfil'} & set(form.changed_data):
+                    invalidar_testimonios()
                 
                 # Actualizar el username en la sesi�n si cambi�
                 request.session['usernameCliente'] = usuario.usernameCliente
@@ -812,13 +833,9 @@ def aprobar_comentario_view(request, comentario_id):
         messages.error(request, 'Debes iniciar sesión como empresa')
         return redirect('login_empresa')
     
-    try:
-        comentario = Comentario.objects.get(id=comentario_id)
-        comentario.estado = 'aprobado'
-        comentario.fecha_aprobacion = timezone.now()
-        comentario.save()
+    if moderar_comentarios([comentario_id], 'aprobar') or Comentario.objects.filter(id=comentario_id).exists():
         messages.success(request, 'Comentario aprobado exitosamente')
-    except Comentario.DoesNotExist:
+    else:
         messages.error(request, 'Comentario no encontrado')
     
     return redirect('empresa_comentarios')
@@ -831,13 +848,9 @@ def rechazar_comentario_view(request, comentario_id):
         messages.error(request, 'Debes iniciar sesión como empresa')
         return redirect('login_empresa')
     
-    try:
-        comentario = Comentario.objects.get(id=comentario_id)
-        comentario.estado = 'rechazado'
-        comentario.fecha_aprobacion = None
-        comentario.save()
+    if moderar_comentarios([comentario_id], 'rechazar') or Comentario.objects.filter(id=comentario_id).exists():
         messages.success(request, 'Comentario rechazado')
-    except Comentario.DoesNotExist:
+    else:
         messages.error(request, 'Comentario no encontrado')
     
     return redirect('empresa_comentarios')
@@ -881,34 +894,51 @@ def procesar_pago(request):
         if len(direccion) < 10:
             return JsonResponse({'success': False, 'error': 'La dirección debe tener al menos 10 caracteres'}, status=400)
         
-        # Actualizar perfil del usuario con la información del formulario
-        cliente.nombre_completo = nombre_completo
-        cliente.telefono = telefono
-        cliente.direccion = direccion
-        if not cliente.email:
-            cliente.email = email
-        cliente.save()
-        
-        # Crear el registro de pago
-        pago = Pago.objects.create(
-            cliente=cliente,
-            nombre_completo=nombre_completo,
-            cedula=cedula,
-            email=email,
-            telefono=telefono,
-            direccion=direccion,
-            metodo_pago=metodo_pago,
-            monto_total=float(monto_total),
-            comprobante=comprobante,
-            productos=productos,
-            estado='pendiente'
-        )
+        # Envío repetido (doble clic, reintento o el mismo comprobante): se responde lo
+        # mismo que al primero sin crear otro pago ni guardar otra vez el archivo
+        envio = EnvioPago(cliente, claves_envio(request, comprobante))
+        if envio.repetida:
+            respuesta, codigo = envio.repetida
+            response = JsonResponse(respuesta, status=codigo)
+            if envio.reproducida:
+                response['Idempotent-Replayed'] = 'true'
+            return response
         
-        return JsonResponse({
+        try:
+            # Actualizar perfil del usuario con la información del formulario
+            cliente.nombre_completo = nombre_completo
+            cliente.telefono = telefono
+            cliente.direccion = direccion
+            if not cliente.email:
+                cliente.email = email
+            cliente.save()
+            
+            # Crear el registro de pago
+            pago = Pago.objects.create(
+                cliente=cliente,
+                nombre_completo=nombre_completo,
+                cedula=cedula,
+                email=email,
+                telefono=telefono,
+                direccion=direccion,
+                metodo_pago=metodo_pago,
+                monto_total=float(monto_total),
+                comprobante=comprobante,
+                productos=productos,
+                estado='pendiente'
+            )
+        except Exception:
+            # Sin pago registrado: el cliente puede reintentar con la misma clave
+            envio.liberar()
+            raise
+        
+        respuesta = {
             'success': True,
             'mensaje': 'Pago registrado exitosamente',
             'pago_id': pago.id
-        })
+        }
+        envio.completar(respuesta, 200, pago)
+        return JsonResponse(respuesta)
         
     except UserClientes.DoesNotExist:
         return JsonResponse({'success': False, 'error': 'Cliente no encontrado'}, status=404)
@@ -930,8 +960,8 @@ def crear_pedido_view(request, pago_id):
         if pago.estado != 'confirmado':
             return redirect('carrito')
         
-        # Verificar que no exista ya un pedido para este pago
-        if hasattr(pago, 'pedido'):
+        # Verificar que no exista ya un pedido para este pago (ni archivado por la retención)
+        if hasattr(pago, 'pedido') or pago.estado_pedido_archivado:
             return redirect('mis_pedidos')
         
         if request.method == 'POST':
@@ -1243,78 +1273,7 @@ def ver_factura_cliente_view(request, pago_id):
         productos_list = json.loads(factura.productos)
         
         # Procesar cada producto para agregar información adicional
-        productos_detallados = []
-        for item in productos_list:
-            # Manejar tanto 'categoria' como 'tipo' (campo usado en el carrito)
-            categoria = item.get('categoria') or item.get('tipo')
-            producto_id = item.get('id')
-            cantidad = item.get('cantidad', 1)
-            
-            # Si el producto ya tiene nombre y precio (del carrito), usarlos directamente
-            if 'nombre' in item and 'precio' in item:
-                productos_detallados.append({
-                    'nombre': item['nombre'],
-                    'categoria': categoria,
-                    'cantidad': cantidad,
-                    'precio_unitario': float(item['precio']),
-                    'subtotal': float(item['precio']) * cantidad
-                })
-                continue
-            
-            # Si no, buscar en la base de datos
-            if not categoria or not producto_id:
-                print(f"Producto sin categoría o ID: {item}")
-                continue
-            
-            # Obtener el producto según la categoría
-            modelo_map = {
-                'mesas': Mesas,
-                'sillas': Sillas,
-                'armarios': Armarios,
-                'cajoneras': Cajoneras,
-                'escritorios': Escritorios,
-                'utensilios': Utensilios
-            }
-            
-            if categoria in modelo_map:
-                try:
-                    Modelo = modelo_map[categoria]
-                    if categoria == 'mesas':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre1
-                        precio = producto.precio1
-                    elif categoria == 'sillas':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre2
-                        precio = producto.precio2
-                    elif categoria == 'armarios':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre3
-                        precio = producto.precio3
-                    elif categoria == 'cajoneras':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre4
-                        precio = producto.precio4
-                    elif categoria == 'escritorios':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre5
-                        precio = producto.precio5
-                    elif categoria == 'utensilios':
-                        producto = Modelo.objects.get(id=producto_id)
-                        nombre = producto.nombre6
-                        precio = producto.precio6
-                    
-                    subtotal = float(precio) * cantidad
-                    
-                    productos_detallados.append({
-                        'nombre': nombre,
-                        'categoria': categoria,
-                        'cantidad': cantidad,
-                        'precio_unitario': precio,
-                        'subtotal': subtotal
-                    })
-                except Exception as e:
-                    print(f"Error al procesar producto {categoria} #{producto_id}: {e}")
+        productos_detallados = detallar_productos_factura(productos_list)
         
         # Verificar si se quiere descargar como PDF
         formato = request.GET.get('formato', 'html')
@@ -1346,37 +1305,19 @@ def ver_factura_cliente_view(request, pago_id):
         return redirect('mis_pedidos')
 
 def generar_factura_pdf(context):
-    """Genera un PDF de la factura usando xhtml2pdf"""
+    """Devuelve el PDF de la factura, reutilizando el que ya esté en caché"""
     try:
-        from xhtml2pdf import pisa
-        from django.template.loader import get_template
-        
-        # Usar plantilla específica para PDF
-        template = get_template('core/factura_pdf.html')
-        html = template.render(context)
-        
-        # Crear respuesta HTTP para PDF
-        response = HttpResponse(content_type='application/pdf')
-        factura_numero = context['factura'].numero_factura
-        response['Content-Disposition'] = f'attachment; filename="Factura_{factura_numero}.pdf"'
-        
-        # Generar PDF con encoding UTF-8
-        pisa_status = pisa.CreatePDF(
-            html.encode('utf-8'),
-            dest=response,
-            encoding='utf-8'
-        )
-        
-        if pisa_status.err:
-            # Log del error para debugging
-            print(f"Error en generación PDF: {pisa_status.err}")
-            return HttpResponse('Error al generar el PDF. Por favor, contacte al administrador.', status=500)
-        
-        return response
+        factura = context['factura']
+        ruta = obtener_pdf_factura(factura)
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=nombre_pdf_factura(factura), content_type='application/pdf')
         
     except ImportError as ie:
         print(f"Error de importación: {ie}")
         return HttpResponse('La librería xhtml2pdf no está instalada. Por favor, ejecute: pip install xhtml2pdf', status=500)
+    except RuntimeError as e:
+        # Log del error para debugging
+        print(e)
+        return HttpResponse('Error al generar el PDF. Por favor, contacte al administrador.', status=500)
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -1392,75 +1333,75 @@ def get_cantidad_disponible_view(request):
     if not tipo or not producto_id:
         return JsonResponse({'error': 'Parámetros incompletos'}, status=400)
     
+    if tipo not in TIPOS_PRODUCTO_CARRITO:
+        return JsonResponse({'error': 'Tipo de producto no válido'}, status=400)
+    
     try:
-        modelos = {
-            'mesa': Mesas,
-            'silla': Sillas,
-            'armario': Armarios,
-            'cajonera': Cajoneras,
-            'escritorio': Escritorios,
-            'utensilio': Utensilios,
-        }
+        producto_id = int(producto_id)
+        datos = disponibilidad_productos([(tipo, producto_id)], request.session.get('usernameCliente'))[f'{tipo}:{producto_id}']
         
-        modelo = modelos.get(tipo)
-        if not modelo:
-            return JsonResponse({'error': 'Tipo de producto no válido'}, status=400)
-        
-        producto = modelo.objects.get(id=producto_id)
+        if not datos['existe']:
+            return JsonResponse({'error': 'Producto no encontrado'}, status=404)
         
         # Verificar si el producto está activo
-        if not producto.is_active:
+        if not datos['producto_activo']:
             return JsonResponse({
                 'cantidad_disponible': 0,
                 'producto_activo': False,
                 'mensaje': 'Producto no disponible'
             })
         
-        # Obtener el usuario actual
-        usernameCliente = request.session.get('usernameCliente')
-        usuario = None
-        if usernameCliente:
-            try:
-                usuario = UserClientes.objects.get(usernameCliente=usernameCliente)
-            except UserClientes.DoesNotExist:
-                pass
-        
-        # Calcular cantidad en otros carritos (excluyendo el usuario actual)
-        if usuario:
-            en_otros_carritos = CarritoTemporal.objects.filter(
-                producto_tipo=tipo,
-                producto_id=producto_id
-            ).exclude(usuario=usuario).aggregate(Sum('cantidad'))['cantidad__sum'] or 0
-        else:
-            en_otros_carritos = CarritoTemporal.objects.filter(
-                producto_tipo=tipo,
-                producto_id=producto_id
-            ).aggregate(Sum('cantidad'))['cantidad__sum'] or 0
-        
-        # Disponibilidad real
-        cantidad_disponible_real = producto.cantidad_disponible - en_otros_carritos
-        
-        # Obtener el nombre del producto según el tipo
-        campo_nombre_map = {
-            'mesa': 'nombre1',
-            'silla': 'nombre2',
-            'armario': 'nombre3',
-            'cajonera': 'nombre4',
-            'escritorio': 'nombre5',
-            'utensilio': 'nombre6',
-        }
-        
-        campo_nombre = campo_nombre_map.get(tipo)
-        nombre_producto = getattr(producto, campo_nombre, 'Producto')
-        
         return JsonResponse({
-            'cantidad_disponible': max(0, cantidad_disponible_real),
-            'nombre': nombre_producto
+            'cantidad_disponible': datos['cantidad_disponible'],
+            'nombre': datos['nombre']
         })
         
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+# Tipos de producto (en singular, como en el carrito) y límite de productos por consulta en lote
+TIPOS_PRODUCTO_CARRITO = ('mesa', 'silla', 'armario', 'cajonera', 'escritorio', 'utensilio')
+MAX_PRODUCTOS_DISPONIBILIDAD = 100
+
+def disponibilidad_productos_view(request):
+    """Vista API para consultar la disponibilidad de varios productos en una sola petición.
+    
+    Parámetro: ?items=mesa:1,silla:4,... Para visitantes anónimos el resultado
+    de cada producto se guarda unos segundos en caché (no depende del usuario).
+    """
+    pares = []
+    for item in request.GET.get('items', '').split(','):
+        if not item.strip():
+            continue
+        tipo, _, producto_id = item.strip().partition(':')
+        if tipo not in TIPOS_PRODUCTO_CARRITO or not producto_id.isdigit():
+            return JsonResponse({'success': False, 'error': f'Producto no válido: {item}'}, status=400)
+        pares.append((tipo, int(producto_id)))
+    
+    if not pares:
+        return JsonResponse({'success': False, 'error': 'Parámetros incompletos'}, status=400)
+    if len(pares) > MAX_PRODUCTOS_DISPONIBILIDAD:
+        return JsonResponse({'success': False, 'error': f'Máximo {MAX_PRODUCTOS_DISPONIBILIDAD} productos por consulta'}, status=400)
+    
+    username_cliente = request.session.get('usernameCliente')
+    if username_cliente:
+        # Con sesión se excluye el carrito propio: la respuesta es por usuario y no se cachea
+        return JsonResponse({'success': True, 'productos': disponibilidad_productos(pares, username_cliente)})
+    
+    claves = {f'disponibilidad:{tipo}:{producto_id}': (tipo, producto_id) for tipo, producto_id in pares}
+    en_cache = cache.get_many(claves.keys())
+    faltantes = [par for clave, par in claves.items() if clave not in en_cache]
+    if faltantes:
+        calculados = disponibilidad_productos(faltantes)
+        cache.set_many(
+            {f'disponibilidad:{clave}': datos for clave, datos in calculados.items()},
+            getattr(settings, 'DISPONIBILIDAD_CACHE_SEGUNDOS', 15)
+        )
+        en_cache.update({f'disponibilidad:{clave}': datos for clave, datos in calculados.items()})
+    
+    productos = {clave.split(':', 1)[1]: datos for clave, datos in en_cache.items()}
+    return JsonResponse({'success': True, 'productos': productos})
+
 def verificar_notificaciones_ideas(request):
     """Vista API para verificar si el usuario tiene notificaciones de ideas"""
     usernameCliente = request.session.get('usernameCliente')
@@ -1585,7 +1526,7 @@ def activar_2fa_view(request):
                 return render(request, 'core/activar_2fa.html', {'usuario': usuario})
             
             # Validar la contraseña
-            if password != usuario.passwordCliente:
+            if not comprobar_contrasena(usuario, password):
                 messages.error(request, 'La contraseña es incorrecta')
                 return render(request, 'core/activar_2fa.html', {'usuario': usuario})
             
@@ -1693,6 +1634,7 @@ def verificar_2fa_setup_view(request):
     except UserClientes.DoesNotExist:
         return redirect('login')
 
+@limitar('verificar_2fa', cuenta=clave_sesion('username_2fa_temp'))
 def verificar_2fa_login_view(request):
     """Vista para verificar el código 2FA durante el login"""
     username_temp = request.session.get('username_2fa_temp')
@@ -1745,7 +1687,7 @@ def desactivar_2fa_view(request):
             password = request.POST.get('passwordCliente')
             
             # Validar la contraseña
-            if password != usuario.passwordCliente:
+            if not comprobar_contrasena(usuario, password):
                 messages.error(request, 'La contraseña es incorrecta')
                 return redirect('perfilUsuario')
             
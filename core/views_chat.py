@@ -1,5 +1,7 @@
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods, require_POST
+from .chat_espera import espera_larga, esperar_mensajes
+from .limites import clave_sesion, limitar
 from .models import Idea, UserEmpresa, MensajeIdea
 
 # ========== ENDPOINT DE PRUEBA ==========
@@ -181,6 +183,7 @@ def api_mensajes_idea(request, idea_id):
 
 
 @require_POST
+@limitar('enviar_mensaje', cuenta=clave_sesion('usernameCliente', 'usernameEmpresa'), json=True)
 def api_enviar_mensaje(request, idea_id):
     """API para enviar un mensaje en una conversación"""
     try:
@@ -350,6 +353,7 @@ def api_mensajes_pago(request, pago_id):
 
 
 @require_POST
+@limitar('enviar_mensaje', cuenta=clave_sesion('usernameCliente', 'usernameEmpresa'), json=True)
 def api_enviar_mensaje_pago(request, pago_id):
     """API para enviar un mensaje en el chat de un pago"""
     from .models import Pago, MensajePago, UserClientes
@@ -448,7 +452,7 @@ def api_conversaciones_pagos(request):
         else:
             # Empresa: ver TODOS los pagos que tienen mensajes (cualquier estado)
             # Obtener IDs de pagos que tienen al menos un mensaje
-            pagos_con_mensajes_ids = MensajePago.objects.values_list('pago_id', flat=True).distinct()
+            pagos_con_mensajes_ids = MensajePago.objects.order_by().values_list('pago_id', flat=True).distinct()
             print(f"✓ Pagos con mensajes IDs: {list(pagos_con_mensajes_ids)}")
             
             pagos = Pago.objects.filter(
@@ -542,3 +546,89 @@ def api_marcar_leidos_pago(request, pago_id):
     except Exception as e:
         print(f"Error en api_marcar_leidos_pago: {str(e)}")
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+# ========== APIs DE ESPERA (LONG-POLL) ==========
+# Vistas asíncronas: con ASGI la petición queda abierta sin ocupar un hilo
+# hasta que hay mensajes nuevos (ver core/chat_espera.py)
+
+def _parametro_despues(request):
+    """Último id de mensaje que ya tiene el navegador (?despues=), o None si no es válido."""
+    try:
+        despues = int(request.GET.get('despues', 0))
+    except ValueError:
+        return None
+    return despues if despues >= 0 else None
+
+
+def _respuesta_espera(ultimo, despues):
+    return JsonResponse({
+        'success': True,
+        'hay_nuevos': ultimo is not None,
+        'ultimo_id': ultimo if ultimo is not None else despues,
+    })
+
+
+@espera_larga
+@require_http_methods(["GET"])
+async def api_esperar_mensajes_idea(request, idea_id):
+    """API que responde cuando la idea tiene mensajes más nuevos que ?despues= (o al agotar la espera)"""
+    try:
+        username_cliente = await request.session.aget('usernameCliente')
+        username_empresa = await request.session.aget('usernameEmpresa')
+
+        if not username_cliente and not username_empresa:
+            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=401)
+
+        despues = _parametro_despues(request)
+        if despues is None:
+            return JsonResponse({'success': False, 'error': 'Parámetro despues inválido'}, status=400)
+
+        idea = await Idea.objects.select_related('empresa_asignada').aget(id=idea_id)
+
+        # Verificar permisos (los mismos que api_mensajes_idea)
+        if username_cliente and idea.autor != username_cliente:
+            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+        elif username_empresa:
+            if idea.empresa_asignada is None or idea.empresa_asignada.usernameEmpresa != username_empresa:
+                return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+        return _respuesta_espera(await esperar_mensajes('idea', idea.id, despues), despues)
+
+    except Idea.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Idea no encontrada'}, status=404)
+    except Exception as e:
+        print(f"Error en api_esperar_mensajes_idea: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+
+@espera_larga
+@require_http_methods(["GET"])
+async def api_esperar_mensajes_pago(request, pago_id):
+    """API que responde cuando el pago tiene mensajes más nuevos que ?despues= (o al agotar la espera)"""
+    from .models import Pago
+
+    try:
+        username_cliente = await request.session.aget('usernameCliente')
+        username_empresa = await request.session.aget('usernameEmpresa')
+
+        if not username_cliente and not username_empresa:
+            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=401)
+
+        despues = _parametro_despues(request)
+        if despues is None:
+            return JsonResponse({'success': False, 'error': 'Parámetro despues inválido'}, status=400)
+
+        pago = await Pago.objects.select_related('cliente').aget(id=pago_id)
+
+        # Verificar permisos: el cliente solo sus pagos, la empresa puede ver cualquiera
+        if username_cliente and pago.cliente.usernameCliente != username_cliente:
+            return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+        return _respuesta_espera(await esperar_mensajes('pago', pago.id, despues), despues)
+
+    except Pago.DoesNotExist:
+        return JsonResponse({'success': False, 'error': 'Pago no encontrado'}, status=404)
+    except Exception as e:
+        print(f"Error en api_esperar_mensajes_pago: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
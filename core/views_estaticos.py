@@ -0,0 +1,70 @@
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseForbidden
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+from .estaticos import PATRON_NOMBRE_CON_HASH
+from .medios import CACHE_MEDIA_PRIVADO, CACHE_MEDIA_PUBLICO, es_privado, puede_ver_media, respuesta_archivo
+
+# Codificaciones precomprimidas por orden de preferencia: (token en Accept-Encoding, extensión)
+VARIANTES_COMPRIMIDAS = (('br', '.br'), ('gzip', '.gz'))
+
+CACHE_CON_HASH = 'public, max-age=31536000, immutable'
+CACHE_SIN_HASH = 'public, max-age=3600'
+
+
+@require_safe
+def servir_estatico(request, path):
+    """Sirve un archivo de STATIC_ROOT, con su variante .br/.gz si el navegador la acepta.
+
+    Los nombres con hash del manifest no cambian nunca de contenido, así que
+    se cachean un año; el resto (p. ej. archivos sin procesar) una hora.
+    """
+    try:
+        ruta = Path(safe_join(settings.STATIC_ROOT, path))
+    except ValueError:
+        raise Http404('Archivo no encontrado')
+    if not ruta.is_file():
+        raise Http404('Archivo no encontrado')
+
+    tipo, _ = mimetypes.guess_type(ruta.name)
+    aceptadas = request.headers.get('Accept-Encoding', '')
+    archivo, codificacion = ruta, None
+    for token, extension in VARIANTES_COMPRIMIDAS:
+        variante = ruta.with_name(ruta.name + extension)
+        if token in aceptadas and variante.is_file():
+            archivo, codificacion = variante, token
+            break
+
+    response = FileResponse(open(archivo, 'rb'), content_type=tipo or 'application/octet-stream')
+    if codificacion:
+        response['Content-Encoding'] = codificacion
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = CACHE_CON_HASH if PATRON_NOMBRE_CON_HASH.search(ruta.name) else CACHE_SIN_HASH
+    return response
+
+
+@require_safe
+def servir_media(request, path):
+    """Sirve un archivo subido de MEDIA_ROOT con soporte de Range y respuestas 304.
+
+    Los comprobantes y las imágenes del chat de pagos solo se entregan a la
+    empresa y al cliente dueño del pago.
+    """
+    try:
+        ruta = Path(safe_join(settings.MEDIA_ROOT, path))
+    except ValueError:
+        raise Http404('Archivo no encontrado')
+    # Normalizada ('a/../b' -> 'b') para que los permisos se comprueben sobre la ruta real
+    ruta_relativa = Path(os.path.relpath(ruta, os.path.abspath(settings.MEDIA_ROOT))).as_posix()
+    if not puede_ver_media(request, ruta_relativa):
+        return HttpResponseForbidden('No tienes permiso para ver este archivo')
+    if not ruta.is_file():
+        raise Http404('Archivo no encontrado')
+
+    cache_control = CACHE_MEDIA_PRIVADO if es_privado(ruta_relativa) else CACHE_MEDIA_PUBLICO
+    return respuesta_archivo(request, ruta, ruta_relativa, cache_control)
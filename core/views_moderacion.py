@@ -0,0 +1,57 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+from .lotes import MAX_POR_PAGINA, POR_PAGINA, leer_lote, parametro_entero
+from .moderacion import ACCIONES, cola_moderacion, moderar_comentarios
+from .models import Comentario
+from .replicas import lectura_en_replica
+
+# Comentarios que se pueden aprobar/rechazar en una sola petición
+MAX_COMENTARIOS_POR_LOTE = 500
+
+
+@require_GET
+@lectura_en_replica
+def api_cola_moderacion(request):
+    """Comentarios pendientes de moderar, en orden de llegada.
+
+    Parámetros: ?despues=<id del último comentario recibido>&limite=N. La
+    respuesta trae `siguiente` (el valor de `despues` para la página
+    siguiente, o null si no hay más).
+    """
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+    despues = parametro_entero(request.GET.get('despues'), 0, 0, 2**63 - 1)
+    limite = parametro_entero(request.GET.get('limite'), POR_PAGINA, 1, MAX_POR_PAGINA)
+    if despues is None or limite is None:
+        return JsonResponse({'success': False, 'error': 'Parámetros de página inválidos'}, status=400)
+
+    filas, siguiente = cola_moderacion(despues, limite)
+    return JsonResponse({
+        'success': True,
+        'pendientes': Comentario.objects.filter(estado='pendiente').count(),
+        'siguiente': siguiente,
+        'comentarios': [{
+            'id': fila['id'],
+            'usuario': fila['usuario__usernameCliente'],
+            'contenido': fila['contenido'],
+            'fecha_creacion': fila['fecha_creacion'].isoformat(),
+            'puntuacion_spam': fila['puntuacion_spam'],
+        } for fila in filas],
+    })
+
+
+@require_POST
+def api_moderar_comentarios(request):
+    """Aprueba o rechaza varios comentarios. JSON: {"ids": [1, 2], "accion": "aprobar"|"rechazar"}"""
+    if 'empresa_id' not in request.session:
+        return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+    datos, error = leer_lote(request, MAX_COMENTARIOS_POR_LOTE, 'comentarios')
+    if error:
+        return error
+
+    accion = datos.get('accion')
+    if accion not in ACCIONES:
+        return JsonResponse({'success': False, 'error': 'Acción inválida (use aprobar o rechazar)'}, status=400)
+
+    actualizados = moderar_comentarios(datos['ids'], accion)
+    return JsonResponse({'success': True, 'actualizados': actualizados})
@@ -0,0 +1,55 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import render
+from django.views.decorators.http import require_http_methods
+
+from .instrumentacion import estadisticas_rutas
+from .perfilador import PATRON_NOMBRE_PERFIL, directorio_perfiles, perfiles_recientes
+
+# Extensiones de perfil que se pueden descargar
+EXTENSIONES_PERFIL = ('prof', 'collapsed')
+
+# Campos por los que se puede ordenar el resumen de rutas
+ORDENES_METRICAS = ('p50_ms', 'p90_ms', 'p95_ms', 'p99_ms', 'max_ms', 'sql_p95_ms', 'consultas_promedio', 'muestras')
+
+
+@require_http_methods(["GET", "POST"])
+def metricas_rutas_view(request):
+    """Percentiles de tiempo por ruta (solo staff). POST las reinicia."""
+    if not request.user.is_authenticated or not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+    if request.method == 'POST':
+        estadisticas_rutas.reiniciar()
+        return JsonResponse({'success': True})
+
+    orden = request.GET.get('orden', 'p95_ms')
+    if orden not in ORDENES_METRICAS:
+        return JsonResponse({'success': False, 'error': f'Orden no válido: {orden}'}, status=400)
+
+    rutas = sorted(estadisticas_rutas.resumen(), key=lambda ruta: ruta[orden] or 0, reverse=True)
+    return JsonResponse({
+        'success': True,
+        'orden': orden,
+        'muestras_por_ruta': estadisticas_rutas.muestras_por_ruta,
+        'rutas': rutas,
+    })
+
+
+@staff_member_required
+def perfiles_view(request):
+    """Página del admin con los perfiles de peticiones más recientes."""
+    return render(request, 'core/admin_perfiles.html', {
+        'title': 'Perfiles de peticiones',
+        'perfiles': perfiles_recientes(),
+    })
+
+
+@staff_member_required
+def descargar_perfil_view(request, nombre, extension):
+    if extension not in EXTENSIONES_PERFIL or not PATRON_NOMBRE_PERFIL.match(nombre):
+        raise Http404('Perfil no encontrado')
+    ruta = directorio_perfiles() / f'{nombre}.{extension}'
+    if not ruta.exists():
+        raise Http404('Perfil no encontrado')
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)